@@ -82,6 +82,12 @@ class BuildDirTarget(BuildTargetWithConfig):
         """
         BuildTargetWithConfig.__init__(self, args, cfgfile_required, config)
 
+    def getEquivalenceKey(self):
+        """
+        All BuildDirTargets with the same configuration are equivalent.
+        """
+        return self._makeEquivalenceKey()
+
     def _isBuildRequired(self):
         """
         Return False if the build directory already exists.
@@ -0,0 +1,272 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a class, BuildManifest, for deciding whether build products are up
+# to date based on the contents of their input files rather than on file
+# modification times.  For each build product (i.e., output file), the
+# manifest records the SHA-1 hashes of the product and of all of its input
+# files, the configuration settings that affect the product, and the version
+# of the build logic.  A product is up to date if none of these have changed.
+# To keep up-to-date checks cheap, the size and modification time of each file
+# are recorded along with its hash, and a file is only hashed again if its size
+# or modification time changed.  Thus, touching a file or checking it out
+# again does not trigger a rebuild, and hashing only happens for files that
+# appear to have changed.  The manifest is stored as a JSON file in the build
+# directory.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import os
+import json
+import hashlib
+import threading
+from ontopilot import logger
+
+# Java imports.
+
+
+# The name of the manifest file in the build directory.
+MANIFEST_FILENAME = 'build_manifest.json'
+
+# The version of the manifest file format.
+MANIFEST_VERSION = 1
+
+# The version of the build logic.  This should be incremented whenever changes
+# to OntoPilot would change the contents of build products, so that all
+# existing products are rebuilt.
+BUILD_VERSION = 1
+
+# BuildManifest instances for each manifest file path, so that all build
+# targets share the same instance (and lock) for each manifest.
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def getBuildManifest(builddir):
+    """
+    Returns the BuildManifest instance for a build directory.
+
+    builddir: The path to a build directory.
+    """
+    manifest_path = os.path.join(os.path.abspath(builddir), MANIFEST_FILENAME)
+
+    with _manifests_lock:
+        if manifest_path not in _manifests:
+            _manifests[manifest_path] = BuildManifest(manifest_path)
+
+        return _manifests[manifest_path]
+
+def getFileHash(filepath):
+    """
+    Returns the SHA-1 hash of a file's contents as a hexadecimal string.
+    """
+    hasher = hashlib.sha1()
+    with open(filepath, 'rb') as fin:
+        chunk = fin.read(65536)
+        while len(chunk) > 0:
+            hasher.update(chunk)
+            chunk = fin.read(65536)
+
+    return hasher.hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the inputs and settings of build products and checks whether
+    build products are up to date.  All methods are thread safe.
+    """
+    def __init__(self, manifest_path):
+        """
+        manifest_path: The path of the JSON manifest file.  The file does not
+            need to exist.
+        """
+        self.manifest_path = manifest_path
+        self.lock = threading.RLock()
+
+        # The product records, keyed by absolute product path.  Loaded on
+        # demand by _getRecords().
+        self.records = None
+
+    def _getRecords(self):
+        """
+        Returns the dictionary of product records, loading the manifest file
+        first, if needed.  If the manifest file does not exist or cannot be
+        read, no products are recorded.
+        """
+        if self.records is None:
+            self.records = {}
+
+            try:
+                with open(self.manifest_path) as fin:
+                    manifest = json.load(fin)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self.records = manifest['products']
+            except (IOError, ValueError, KeyError):
+                pass
+
+        return self.records
+
+    def _save(self):
+        """
+        Writes the product records to the manifest file.  Failure to write the
+        manifest is not an error; products will simply be checked by other
+        means (or rebuilt) the next time.
+        """
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'products': self._getRecords()
+        }
+
+        # Write the manifest to a temporary file first so that an interrupted
+        # write cannot leave a corrupted manifest behind.
+        tmppath = self.manifest_path + '.tmp'
+        try:
+            with open(tmppath, 'w') as fout:
+                json.dump(manifest, fout, indent=1, sort_keys=True)
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
+            os.rename(tmppath, self.manifest_path)
+        except (IOError, OSError) as err:
+            logger.debug(
+                'Unable to write the build manifest file "{0}": {1}'.format(
+                    self.manifest_path, err
+                )
+            )
+
+    def _getFileInfo(self, filepath, oldinfo=None):
+        """
+        Returns a dictionary with the size, modification time, and SHA-1 hash
+        of a file, or None if the file does not exist.  If oldinfo is a
+        previously recorded file information dictionary and the file's size
+        and modification time have not changed, the recorded hash is reused.
+        """
+        try:
+            fstat = os.stat(filepath)
+        except OSError:
+            return None
+
+        info = {'size': fstat.st_size, 'mtime': fstat.st_mtime}
+
+        if (
+            oldinfo is not None and oldinfo['size'] == info['size'] and
+            oldinfo['mtime'] == info['mtime']
+        ):
+            info['sha1'] = oldinfo['sha1']
+        else:
+            info['sha1'] = getFileHash(filepath)
+
+        return info
+
+    def _normalizeSettings(self, settings):
+        """
+        Converts a settings dictionary to the form in which it is stored in
+        the manifest (e.g., tuples become lists), so that recorded and current
+        settings can be compared directly.
+        """
+        return json.loads(json.dumps(settings, sort_keys=True))
+
+    def isProductCurrent(self, productpath, inputpaths, settings):
+        """
+        Checks whether a build product is up to date.  Returns True if the
+        product file, all of its input files, its settings, and the build logic
+        version are unchanged since the product was recorded.  Returns False if
+        anything changed.  Returns None if there is no record of the product,
+        in which case the caller must decide by other means.
+
+        productpath: The path of the product file.
+        inputpaths: A list of the paths of all input files for the product.
+        settings: A JSON-compatible dictionary of all settings that affect the
+            product.
+        """
+        productpath = os.path.abspath(productpath)
+
+        with self.lock:
+            record = self._getRecords().get(productpath)
+            if record is None:
+                return None
+
+            if record['build_version'] != BUILD_VERSION:
+                return False
+
+            if record['settings'] != self._normalizeSettings(settings):
+                return False
+
+            inputpaths = sorted(set(
+                [os.path.abspath(inputpath) for inputpath in inputpaths]
+            ))
+            if inputpaths != sorted(record['inputs'].keys()):
+                return False
+
+            # Check the product file itself, then all of the input files.
+            # Keep track of whether any file only appears to have changed, so
+            # that the record can be updated to avoid hashing the file again.
+            stats_changed = False
+            oldinfo = record['product']
+            newinfo = self._getFileInfo(productpath, oldinfo)
+            if newinfo is None or newinfo['sha1'] != oldinfo['sha1']:
+                return False
+            if newinfo != oldinfo:
+                record['product'] = newinfo
+                stats_changed = True
+
+            for inputpath in inputpaths:
+                # Input files that did not exist when the product was recorded
+                # must still not exist.
+                oldinfo = record['inputs'][inputpath]
+                newinfo = self._getFileInfo(inputpath, oldinfo)
+                if (oldinfo is None) or (newinfo is None):
+                    if (oldinfo is None) != (newinfo is None):
+                        return False
+                    continue
+                if newinfo['sha1'] != oldinfo['sha1']:
+                    return False
+                if newinfo != oldinfo:
+                    record['inputs'][inputpath] = newinfo
+                    stats_changed = True
+
+            if stats_changed:
+                self._save()
+
+            return True
+
+    def recordProduct(self, productpath, inputpaths, settings):
+        """
+        Records the current state of a build product, its input files, and
+        its settings.  This should be called after the product is built.  Input
+        files that do not exist are recorded as missing.  Arguments are as for
+        isProductCurrent().
+        """
+        productpath = os.path.abspath(productpath)
+
+        with self.lock:
+            productinfo = self._getFileInfo(productpath)
+            if productinfo is None:
+                return
+
+            inputs = {}
+            for inputpath in inputpaths:
+                inputpath = os.path.abspath(inputpath)
+                inputs[inputpath] = self._getFileInfo(inputpath)
+
+            self._getRecords()[productpath] = {
+                'build_version': BUILD_VERSION,
+                'settings': self._normalizeSettings(settings),
+                'product': productinfo,
+                'inputs': inputs
+            }
+
+            self._save()
@@ -0,0 +1,274 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a single class, BuildScheduler, that runs a build target and all of
+# its dependencies.  The scheduler first converts the tree of build target
+# instances into a directed acyclic graph (DAG) by merging equivalent targets
+# (that is, targets that report the same equivalence key; see
+# BuildTarget.getEquivalenceKey()), so that work that is shared by several
+# high-level targets is only checked and done once.  The targets in the DAG
+# are then run in dependency order, and, if more than one thread is requested,
+# targets that do not depend on each other are run at the same time.  Whether
+# a target is run, and how build products are passed up the dependency chain,
+# follows the same rules as sequential builds.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import sys
+import threading
+
+# Java imports.
+
+
+class BuildScheduler:
+    """
+    Runs a build target and its dependencies as a DAG of unique targets.
+    """
+    def __init__(self, target, numthreads=1):
+        """
+        target: The top-level BuildTarget to run.
+        numthreads (int): The maximum number of targets to run at once.
+        """
+        self.target = target
+        self.numthreads = numthreads
+
+        # Maps target equivalence keys to the first target instance found with
+        # each key.
+        self.key_targets = {}
+
+        # Maps each unique target to the list of its unique dependencies.
+        self.dependencies = {}
+
+        # All unique targets, in dependency order (i.e., each target comes
+        # after all of its dependencies).
+        self.order = []
+
+        self._buildGraph()
+
+    def _getUniqueTarget(self, target):
+        """
+        Returns the target instance that represents all build targets that are
+        equivalent to the given target.
+        """
+        key = target.getEquivalenceKey()
+        if key is None:
+            return target
+
+        return self.key_targets.setdefault(key, target)
+
+    def _buildGraph(self):
+        """
+        Builds the DAG of unique targets and sorts it in dependency order.
+        """
+        # Targets for which a depth-first search is in progress.  Used for
+        # detecting dependency cycles.
+        active = set()
+
+        def visit(target):
+            if target in self.dependencies:
+                return
+
+            if target in active:
+                raise RuntimeError(
+                    'The build target {0} depends on itself, either directly '
+                    'or indirectly.'.format(target.__class__.__name__)
+                )
+            active.add(target)
+
+            deps = []
+            for dependency in target.dependencies:
+                dependency = self._getUniqueTarget(dependency)
+                if dependency not in deps:
+                    deps.append(dependency)
+                visit(dependency)
+
+            active.remove(target)
+            self.dependencies[target] = deps
+            self.order.append(target)
+
+        visit(self._getUniqueTarget(self.target))
+
+    def getTargets(self):
+        """
+        Returns a list of the unique targets that will be run by this
+        scheduler, in dependency order.
+        """
+        return list(self.order)
+
+    def _runTarget(self, target, force_build, status):
+        """
+        Runs a single target, all of whose dependencies must already have been
+        processed.  The target's build task is run if the target requires a
+        build, if any of its dependencies were run, or if force_build is True.
+
+        status: A dictionary that maps each processed target to a tuple,
+            (was_run, product_sources), where was_run indicates whether the
+            target's build task was run and product_sources maps each of the
+            target's product keys to the target that created the product.
+        """
+        # Invalidate any previous build products.
+        target.products.clear()
+        product_sources = {}
+
+        dependencies_run = False
+        for dependency in self.dependencies[target]:
+            dep_run, dep_sources = status[dependency]
+            if not(dep_run):
+                continue
+
+            dependencies_run = True
+
+            # Merge the dependency's products with the products dictionary,
+            # making sure we don't have any duplicate keys.  A product that
+            # reaches this target through more than one dependency from the
+            # same shared target is not a duplicate.
+            for key in dependency.products:
+                if key not in target.products:
+                    target.products[key] = dependency.products[key]
+                    product_sources[key] = dep_sources[key]
+                elif product_sources[key] is not dep_sources[key]:
+                    raise RuntimeError(
+                        'Unable to merge product returned from build target \
+{0} into the build products set for build target {1} because of a duplicate \
+product name key: "{2}".'.format(
+                            dependency.__class__.__name__,
+                            target.__class__.__name__, key
+                        )
+                    )
+
+        # Run the build task for this target.  If we ran any dependencies, we
+        # should always run this build task even if the local
+        # _isBuildRequired() returns False.
+        was_run = False
+        results = {}
+        if target._isBuildRequired() or dependencies_run or force_build:
+            was_run = True
+            results = target._run()
+            if results is None:
+                results = {}
+
+        # Merge the results of this build target with the products accumulated
+        # from lower-level build targets, again making sure we don't have any
+        # duplicate keys.
+        for key in results:
+            if key not in target.products:
+                target.products[key] = results[key]
+                product_sources[key] = target
+            else:
+                raise RuntimeError(
+                    'A build product from build target {0} could not be \
+merged into the build products set because it uses a product name key that \
+duplicates one of its dependency\'s product name keys: "{1}".'.format(
+                        target.__class__.__name__, key
+                    )
+                )
+
+        status[target] = (was_run, product_sources)
+
+    def _runParallel(self, force_build, status):
+        """
+        Runs all targets with a pool of worker threads.  A target is started
+        as soon as all of its dependencies have been processed.  If a target
+        fails, no new targets are started, and once all running targets have
+        finished, the exception from the failed target that comes first in
+        dependency order is raised.
+        """
+        positions = dict(
+            (target, index) for index, target in enumerate(self.order)
+        )
+
+        # The number of unprocessed dependencies for each target and the
+        # targets that depend on each target.
+        waiting_on = {}
+        dependents = dict((target, []) for target in self.order)
+        for target in self.order:
+            waiting_on[target] = len(self.dependencies[target])
+            for dependency in self.dependencies[target]:
+                dependents[dependency].append(target)
+
+        ready = [target for target in self.order if waiting_on[target] == 0]
+        state = {'running': 0, 'finished': 0}
+        errors = []
+        cond = threading.Condition()
+
+        def worker():
+            while True:
+                with cond:
+                    while (
+                        len(ready) == 0 and len(errors) == 0 and
+                        state['finished'] < len(self.order)
+                    ):
+                        cond.wait()
+
+                    if len(errors) > 0 or len(ready) == 0:
+                        return
+
+                    target = ready.pop(0)
+                    state['running'] += 1
+
+                error = None
+                try:
+                    self._runTarget(target, force_build, status)
+                except:
+                    error = (positions[target], sys.exc_info())
+
+                with cond:
+                    state['running'] -= 1
+                    state['finished'] += 1
+                    if error is not None:
+                        errors.append(error)
+                    else:
+                        for dependent in dependents[target]:
+                            waiting_on[dependent] -= 1
+                            if waiting_on[dependent] == 0:
+                                ready.append(dependent)
+                        ready.sort(key=lambda target: positions[target])
+
+                    cond.notify_all()
+
+        workers = []
+        for cnt in range(min(self.numthreads, len(self.order))):
+            wthread = threading.Thread(target=worker)
+            wthread.daemon = True
+            wthread.start()
+            workers.append(wthread)
+
+        for wthread in workers:
+            wthread.join()
+
+        if len(errors) > 0:
+            errors.sort(key=lambda error: error[0])
+            exc_info = errors[0][1]
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    def run(self, force_build=False):
+        """
+        Runs the top-level target and all of its dependencies and returns the
+        top-level target's build products.
+
+        force_build: If True, all build tasks will be run, even if all build
+            products appear to be up to date.
+        """
+        status = {}
+
+        if self.numthreads > 1 and len(self.order) > 1:
+            self._runParallel(force_build, status)
+        else:
+            for target in self.order:
+                self._runTarget(target, force_build, status)
+
+        return self.order[-1].products
@@ -31,11 +31,20 @@ import os, shutil
 from contextlib import contextmanager
 import tempfile
 from zipfile import ZipFile
-from ontoconfig import OntoConfig
+from ontoconfig import OntoConfig, parsePrecomputeStrs
+from build_scheduler import BuildScheduler
+from build_manifest import getBuildManifest
+from labelmap import enableLabelIndexCache
+import reasoner_manager
 
 # Java imports.
 
 
+# The name of the build directory subfolder for label index files (see
+# labelmap.enableLabelIndexCache()).
+LABEL_INDEX_DIR = 'label_index'
+
+
 class BuildTarget:
     """
     An abstract base class for all concrete build target classes.
@@ -153,67 +162,44 @@ class BuildTarget:
 
         return self._isBuildRequired()
 
+    def getEquivalenceKey(self):
+        """
+        Returns a hashable key that identifies the build work done by this
+        target, or None.  Targets that return the same (non-None) key are
+        considered equivalent, so only one of them is run when they occur more
+        than once in a dependency graph.  The default is None, which means
+        that this target is never merged with other targets.  Child classes
+        whose results are fully determined by their class and configuration
+        should override this method.
+        """
+        return None
+
+    def getBuildThreads(self):
+        """
+        Returns the maximum number of build targets to run at the same time
+        when this target is run.  The default is 1.
+        """
+        return 1
+
     def run(self, force_build=False):
         """
         Runs this build task.  All dependencies are processed first.  If the
         build task fails, an appropriate exception should be thrown, and
         exceptions should be allowed to "bubble up" through the dependency
-        chain so they can be properly handled by external client code.
+        chain so they can be properly handled by external client code.  The
+        dependencies are run by a BuildScheduler, which makes sure that
+        equivalent targets are only run once and which can run independent
+        dependencies at the same time (see getBuildThreads()).  Each target is
+        run if it requires a build or if any of its dependencies were run, and
+        the build products of each target are passed up the dependency chain.
 
         force_build: If True, the build task (including all dependencies) will
             be run, even if all build products appear to be up to date.
         """
-        # Invalidate any previous build products.
-        self.products.clear()
-
-        dependencies_run = False
-        for dependency in self.dependencies:
-            results = {}
-            if dependency.isBuildRequired() or force_build:
-                dependencies_run = True
-                results = dependency.run(force_build)
-
-            # Merge the results with the products dictionary, making sure we
-            # don't have any duplicate keys.
-            for key in results:
-                if key not in self.products:
-                    self.products[key] = results[key]
-                else:
-                    raise RuntimeError(
-                        'Unable to merge product returned from build target \
-{0} into the build products set for build target {1} because of a duplicate \
-product name key: "{2}".'.format(
-                            dependency.__class__.__name__, self.__class__.__name__, key
-                        )
-                    )
+        scheduler = BuildScheduler(self, self.getBuildThreads())
 
-        # Run the build task for this target.  If we ran any dependencies, we
-        # should always run this build task even if the local
-        # _isBuildRequired() returns False.
-        if self._isBuildRequired() or dependencies_run or force_build:
-            results = self._run()
-            if results is None:
-                results = {}
-        else:
-            results = {}
-
-        # Merge the results of this build target with the products accumulated
-        # from lower-level build targets, again making sure we don't have any
-        # duplicate keys.
-        for key in results:
-            if key not in self.products:
-                self.products[key] = results[key]
-            else:
-                raise RuntimeError(
-                    'A build product from build target {0} could not be \
-merged into the build products set because it uses a product name key that \
-duplicates one of its dependency\'s product name keys: "{1}".'.format(
-                        self.__class__.__name__, key
-                    )
-                )
+        return scheduler.run(force_build)
 
-        return self.products
-    
     def getBuildNotRequiredMsg(self):
         """
         Returns a string with a target-appropriate message to indicate that
@@ -289,9 +275,117 @@ class BuildTargetWithConfig(BuildTarget):
                         'configuration file or path.'.format(cfilepath)
                     )
 
+        # If a project configuration file was loaded, cache the labels of
+        # imported ontologies between runs in the project's build directory.
+        if self.config.getConfigFilePath() is not None:
+            enableLabelIndexCache(
+                os.path.join(self.config.getBuildDir(), LABEL_INDEX_DIR)
+            )
+
     def getConfig(self):
         """
         Returns the OntoConfig object associated with this build target.
         """
         return self.config
 
+    def _setReasonerOptions(self, args):
+        """
+        Sets the options for all reasoners created during the build (see
+        reasoner_manager.setReasonerOptions()) from the configuration.  Values
+        provided on the command line override the configured values.  Not all
+        args "structs" include these options, so they are optional.
+
+        args: A "struct" of configuration options.
+        """
+        threads = getattr(args, 'reasoner_threads', None)
+        if threads is None:
+            threads = self.config.getReasonerThreads()
+        elif threads < 0:
+            raise RuntimeError(
+                'Invalid number of reasoner threads: {0}.  The value must be '
+                'a non-negative integer.'.format(threads)
+            )
+
+        timeout = getattr(args, 'reasoner_timeout', None)
+        if timeout is None:
+            timeout = self.config.getReasonerTimeout()
+        elif timeout < 0:
+            raise RuntimeError(
+                'Invalid reasoner timeout: {0}.  The value must be a '
+                'non-negative number of seconds.'.format(timeout)
+            )
+
+        precompute = getattr(args, 'reasoner_precompute', None)
+        if precompute is None:
+            precompute = self.config.getPrecomputeStrs()
+        else:
+            try:
+                precompute = parsePrecomputeStrs(precompute)
+            except ValueError as err:
+                raise RuntimeError(
+                    'Invalid inference type to precompute: {0}'.format(err)
+                )
+
+        reasoner_manager.setReasonerOptions(threads, timeout, precompute)
+
+    def _makeEquivalenceKey(self, *settings):
+        """
+        Returns an equivalence key (see getEquivalenceKey()) for targets that
+        are fully determined by their class, their OntoConfig object, and any
+        additional settings values.
+
+        settings: Hashable values of any additional target settings.
+        """
+        return (self.__class__, id(self.config)) + settings
+
+    def getBuildThreads(self):
+        """
+        Returns the number of build threads set in the configuration.
+        """
+        return self.config.getBuildThreads()
+
+    def getBuildManifest(self):
+        """
+        Returns the BuildManifest for this target's build directory.
+        """
+        return getBuildManifest(self.config.getBuildDir())
+
+    def _isProductCurrent(
+        self, productpath, inputpaths, settings, mtime_check
+    ):
+        """
+        Returns True if a build product is up to date according to the build
+        manifest (see BuildManifest.isProductCurrent()).  If the manifest has
+        no record of the product (e.g., for a new checkout of a project), the
+        callable mtime_check is used instead; it should return True if file
+        modification times indicate that the product is up to date.  In that
+        case, the product is added to the manifest so that all later checks
+        are based on file contents.
+
+        productpath: The path of the product file.
+        inputpaths: A list of the paths of all input files for the product.
+        settings: A JSON-compatible dictionary of all settings that affect the
+            product.
+        mtime_check: A callable that takes no arguments.
+        """
+        manifest = self.getBuildManifest()
+
+        is_current = manifest.isProductCurrent(
+            productpath, inputpaths, settings
+        )
+        if is_current is None:
+            is_current = mtime_check()
+            if is_current:
+                manifest.recordProduct(productpath, inputpaths, settings)
+
+        return is_current
+
+    def _recordProduct(self, productpath, inputpaths, settings):
+        """
+        Records a newly built product in the build manifest.  Arguments are as
+        for _isProductCurrent().
+        """
+        self.getBuildManifest().recordProduct(
+            productpath, inputpaths, settings
+        )
+
@@ -0,0 +1,214 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#
+# Provides a single class, DeclarationIndex, that maintains a lookup table
+# mapping entity IRIs to the types of entities (class, object property, etc.)
+# that are declared with those IRIs in an ontology's imports closure.  Without
+# the index, checking whether an entity is declared requires searching the
+# declaration axioms of every ontology in the imports closure, which is slow
+# for large imports closures and is done very frequently when building an
+# ontology.  The index is kept up to date by listening for changes to the OWL
+# API ontologies in the imports closure and for 'ontology_added' events from
+# the source Ontology object.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+from ontology_entities import (
+    CLASS_ENTITY, DATAPROPERTY_ENTITY, OBJECTPROPERTY_ENTITY,
+    ANNOTATIONPROPERTY_ENTITY, INDIVIDUAL_ENTITY
+)
+
+# Java imports.
+from java.util import Collections, IdentityHashMap
+from org.semanticweb.owlapi.model import AxiomType
+from org.semanticweb.owlapi.model import OWLOntologyChangeListener
+
+
+class DeclarationIndex(OWLOntologyChangeListener):
+    """
+    Maintains a lookup table for an ontology that maps entity IRIs to the
+    types of the entities declared with those IRIs.  Because the same entity
+    can be declared in more than one ontology of the imports closure, the index
+    keeps a count of the declaration axioms for each IRI/entity type pair, and
+    an entity is only removed from the index once all of its declarations have
+    been removed.
+    """
+    def __init__(self, ontology):
+        """
+        Initializes this DeclarationIndex with an existing ontology.
+
+        ontology: An Ontology object (*not* an OWL API OWLOntology object).
+        """
+        # Dictionary for the lookup table.  Keys are OWL API IRI objects and
+        # values are dictionaries that map entity type constants to
+        # declaration counts.
+        self.index = {}
+
+        # The OWL API ontologies (i.e., the imports closure) that are
+        # currently indexed.  This is an identity-based set because the hash
+        # codes of OWL API ontologies change if their ontology IDs change.
+        self.indexed_onts = self._newOntologySet()
+
+        self.ontology = ontology
+        self._syncImportsClosure()
+
+        # Listen for axiom and import changes in the OWL API ontologies, and
+        # register as an observer of the ontology so that we know when new
+        # ontologies are added to the imports closure.
+        self.ontology.getOntologyManager().addOntologyChangeListener(self)
+        self.ontology.registerObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+    def dispose(self):
+        """
+        Stops following changes to the ontology by unregistering this index
+        as an ontology change listener and as an observer of the source
+        ontology.  The index should not be used after calling this method.
+        """
+        self.ontology.getOntologyManager().removeOntologyChangeListener(self)
+        self.ontology.unregisterObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+    def _newOntologySet(self):
+        """
+        Returns a new, empty, identity-based Java set for OWL API ontologies.
+        """
+        return Collections.newSetFromMap(IdentityHashMap())
+
+    def _getEntityType(self, owl_entity):
+        """
+        Returns the entity type constant for an OWL API entity object, or None
+        if the entity is not of a supported type (e.g., a datatype).
+        """
+        if owl_entity.isOWLClass():
+            return CLASS_ENTITY
+        elif owl_entity.isOWLObjectProperty():
+            return OBJECTPROPERTY_ENTITY
+        elif owl_entity.isOWLDataProperty():
+            return DATAPROPERTY_ENTITY
+        elif owl_entity.isOWLAnnotationProperty():
+            return ANNOTATIONPROPERTY_ENTITY
+        elif owl_entity.isOWLNamedIndividual():
+            return INDIVIDUAL_ENTITY
+        else:
+            return None
+
+    def _addDeclaration(self, decl_axiom):
+        """
+        Adds the entity of an OWL API declaration axiom to the index.
+        """
+        owl_entity = decl_axiom.getEntity()
+        enttype = self._getEntityType(owl_entity)
+        if enttype is None:
+            return
+
+        enttypes = self.index.setdefault(owl_entity.getIRI(), {})
+        enttypes[enttype] = enttypes.get(enttype, 0) + 1
+
+    def _removeDeclaration(self, decl_axiom):
+        """
+        Removes the entity of an OWL API declaration axiom from the index.
+        """
+        owl_entity = decl_axiom.getEntity()
+        enttype = self._getEntityType(owl_entity)
+        entIRI = owl_entity.getIRI()
+        if (enttype is None) or (entIRI not in self.index):
+            return
+
+        enttypes = self.index[entIRI]
+        if enttype in enttypes:
+            enttypes[enttype] -= 1
+            if enttypes[enttype] < 1:
+                del enttypes[enttype]
+                if len(enttypes) == 0:
+                    del self.index[entIRI]
+
+    def _syncImportsClosure(self):
+        """
+        Updates the index so that it covers exactly the ontologies in the
+        source ontology's current imports closure.
+        """
+        closure = self._newOntologySet()
+        closure.addAll(self.ontology.getOWLOntology().getImportsClosure())
+
+        for owlont in closure:
+            if not(self.indexed_onts.contains(owlont)):
+                for decl_axiom in owlont.getAxioms(AxiomType.DECLARATION):
+                    self._addDeclaration(decl_axiom)
+
+        for owlont in self.indexed_onts:
+            if not(closure.contains(owlont)):
+                for decl_axiom in owlont.getAxioms(AxiomType.DECLARATION):
+                    self._removeDeclaration(decl_axiom)
+
+        self.indexed_onts = closure
+
+    def ontologiesChanged(self, changes):
+        """
+        Responds to change notifications from the OWL API ontology manager.
+        Only changes to ontologies in the indexed imports closure are
+        considered.
+        """
+        imports_changed = False
+
+        for change in changes:
+            if not(self.indexed_onts.contains(change.getOntology())):
+                continue
+
+            if change.isAxiomChange():
+                axiom = change.getAxiom()
+                if axiom.isOfType(AxiomType.DECLARATION):
+                    if change.isAddAxiom():
+                        self._addDeclaration(axiom)
+                    else:
+                        self._removeDeclaration(axiom)
+            elif change.isImportChange():
+                imports_changed = True
+
+        if imports_changed:
+            self._syncImportsClosure()
+
+    def notifyOntologyAdded(self, added_ont):
+        """
+        Responds to 'ontology_added' event notifications from the source
+        ontology.
+        """
+        self._syncImportsClosure()
+
+    def isDeclared(self, entIRI, entity_type):
+        """
+        Returns True if an entity of the given type is declared with the given
+        IRI anywhere in the ontology's imports closure.
+
+        entIRI: An OWL API IRI object.
+        entity_type: One of the entity type constants defined in
+            ontology_entities (e.g., CLASS_ENTITY).
+        """
+        return entity_type in self.index.get(entIRI, {})
+
+    def getEntityTypes(self, entIRI):
+        """
+        Returns a list of the types of all entities declared with the given IRI
+        in the ontology's imports closure.  The list will be empty if the IRI
+        is not declared.
+
+        entIRI: An OWL API IRI object.
+        """
+        return self.index.get(entIRI, {}).keys()
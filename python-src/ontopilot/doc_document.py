@@ -20,7 +20,7 @@
 # Python imports.
 from __future__ import unicode_literals
 import abc
-from module_extractor import ModuleExtractor, rel_axiom_types
+from relationship_index import rel_axiom_types
 from obohelper import termIRIToOboID, OBOIdentifierError
 
 # Java imports.
@@ -139,10 +139,10 @@ class DocumentNode:
             # dictionary keys, and they map to DocumentNode objects.
             entset = {self.entIRI: self}
 
-        me = ModuleExtractor(self.ont)
-
-        # Get the direct descendants of this node's entity.
-        components = me.getDirectlyRelatedComponents(
+        # Get the direct descendants of this node's entity from the source
+        # ontology's relationship index, which is shared by all nodes.
+        relindex = self.ont.getRelationshipIndex()
+        components = relindex.getDirectlyRelatedComponents(
             self.entity.getOWLAPIObj(), (rel_axiom_types.DESCENDANTS,)
         )
         children = components[0]
@@ -209,7 +209,12 @@ class DocsBuildTarget(BuildTargetWithConfig):
 
         logger.info('Creating ontology documentation files...')
 
-        ont = Ontology(self.mobt_reasoned.getOutputFilePath())
+        # Use the reasoned Ontology object if it was built as part of this
+        # build.  The documenter does not modify the ontology, so there is no
+        # need to copy it.
+        ont = self.products.get(self.mobt_reasoned.getOntologyProductKey())
+        if ont is None:
+            ont = Ontology(self.mobt_reasoned.getOutputFilePath())
 
         # Create the documentation files.
         for foutinfo in fileoutinfos:
@@ -44,6 +44,8 @@ class ErrorCheckBuildTarget(BuildTargetWithConfig):
 
         self.addDependency(self.obt)
 
+        self._setReasonerOptions(args)
+
     def _isBuildRequired(self):
         """
         This always returns True, because if the user is requesting an
@@ -55,7 +57,12 @@ class ErrorCheckBuildTarget(BuildTargetWithConfig):
         """
         Checks for entailment errors in the main ontology.
         """
-        mainont = Ontology(self.obt.getOutputFilePath())
+        # Use the compiled Ontology object if the main ontology was built as
+        # part of this build.  Checking for entailment errors does not modify
+        # the ontology, so there is no need to copy it.
+        mainont = self.products.get(self.obt.getOntologyProductKey())
+        if mainont is None:
+            mainont = Ontology(self.obt.getOutputFilePath())
         timer = BasicTimer()
 
         logger.info('Checking for entailment errors...')
@@ -20,6 +20,8 @@ from labelmap import LabelMap, InvalidLabelError, AmbiguousLabelError
 from obohelper import isOboID, oboIDToIRI, getIRIForOboPrefix
 from rfc3987 import rfc3987
 import re
+import threading
+from collections import OrderedDict
 
 # Java imports.
 from org.semanticweb.owlapi.model import IRI
@@ -33,23 +35,235 @@ prefix_label_re = re.compile(
 )
 
 
+# The default maximum number of entries in each identifier resolution cache.
+DEFAULT_CACHE_SIZE = 20000
+
+
+class _LRUCache:
+    """
+    A simple, thread-safe, bounded cache that discards the least recently used
+    entries when it is full.
+    """
+    def __init__(self, maxsize):
+        """
+        maxsize: The maximum number of entries in the cache.
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the value associated with key, or None if key is not in the
+        cache.
+        """
+        with self.lock:
+            value = self.entries.pop(key, None)
+            if value is not None:
+                # Re-insert the entry so that it becomes the most recently
+                # used entry.
+                self.entries[key] = value
+
+        return value
+
+    def put(self, key, value):
+        """
+        Adds a new entry to the cache.  If the cache is full, the least
+        recently used entry is discarded.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class IDResolver:
     """
     Provides a high-level interface for ontology identifier resolution.  The
     various methods allow resolving prefix IRIs, relative IRIs, OBO IDs, and
     term labels (with and without prefixes) to full IRIs.
     """
-    def __init__(self, ontology):
+    def __init__(self, ontology, cache_size=DEFAULT_CACHE_SIZE):
         """
         ontology: The Ontology instance to link with this IDResolver.
+        cache_size: The maximum number of entries in each of the identifier
+            resolution caches.
         """
         self.ontology = ontology
         ontman = self.ontology.getOntologyManager()
         owlont = self.ontology.getOWLOntology()
         self.prefix_df = ontman.getOntologyFormat(owlont).asPrefixOWLOntologyFormat()
 
-        # Set up a LabelMap to track the source ontology.
-        self.labelmap = LabelMap(self.ontology)
+        # Resolving identifier strings is relatively expensive, and the same
+        # identifiers tend to be resolved over and over, so resolution results
+        # are cached.  Results that depend on labels are kept separately so
+        # that they can be invalidated whenever labels are added to the
+        # ontology.  All cached results depend on the ontology's prefixes, so
+        # the caches are cleared if the prefixes change.
+        self.iri_cache = _LRUCache(cache_size)
+        self.label_cache = _LRUCache(cache_size)
+        self.cache_hits = self.cache_misses = 0
+        self.stats_lock = threading.Lock()
+        self.prefixes_hash = self._getPrefixesHash()
+        for event_name in ('label_added', 'labels_added', 'ontology_added'):
+            self.ontology.registerObserver(
+                event_name, self._clearLabelCache
+            )
+
+        # The LabelMap for the source ontology is not built until it is
+        # needed (see _getLabelMap()), because building it requires scanning
+        # all annotation axioms in the imports closure.  Until then, external
+        # ontologies that are added to the source ontology are buffered.
+        # 'label_added' events do not need to be buffered, because new label
+        # axioms are added to the source ontology itself and so will be found
+        # when the LabelMap is built.
+        self.labelmap = None
+        self.pending_onts = []
+        self.labelmap_lock = threading.Lock()
+        self.ontology.registerObserver(
+            'ontology_added', self._bufferOntologyAdded
+        )
+
+        # Per-thread state for recording the labels resolved by each thread
+        # (see startLabelLog()).
+        self.thread_state = threading.local()
+
+    def _clearLabelCache(self, *args):
+        """
+        Responds to 'label_added', 'labels_added', and 'ontology_added' event
+        notifications from the source ontology by discarding all cached label
+        resolution results.
+        """
+        self.label_cache.clear()
+
+    def _getPrefixesHash(self):
+        """
+        Returns a hash code for the current prefix definitions.
+        """
+        return self.prefix_df.getPrefixName2PrefixMap().hashCode()
+
+    def _checkPrefixes(self):
+        """
+        Clears all resolution caches if the prefix definitions have changed
+        since the caches were last checked.
+        """
+        prefixes_hash = self._getPrefixesHash()
+        if prefixes_hash != self.prefixes_hash:
+            self.iri_cache.clear()
+            self.label_cache.clear()
+            self.prefixes_hash = prefixes_hash
+
+    def _countCacheLookup(self, hit):
+        """
+        Updates the cache statistics after a resolution cache lookup.  The
+        resolution methods can be called by several threads at once, so the
+        counters are only updated while holding the statistics lock.
+
+        hit: Whether the lookup found a cached result.
+        """
+        with self.stats_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def getCacheStats(self):
+        """
+        Returns a dictionary with the numbers of identifier resolution cache
+        hits and misses.
+        """
+        with self.stats_lock:
+            return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    def startLabelLog(self):
+        """
+        Starts recording all labels that are resolved by the calling thread,
+        along with the IRIs they resolve to.  This allows client code to
+        determine which labels a result depends on.  Call takeLabelLog() to
+        stop recording and retrieve the labels.
+        """
+        self.thread_state.label_log = {}
+
+    def takeLabelLog(self):
+        """
+        Stops recording resolved labels for the calling thread and returns a
+        dictionary that maps each label string resolved since startLabelLog()
+        was called to the string of the IRI it resolved to.  If no label log
+        was started, returns an empty dictionary.
+        """
+        label_log = getattr(self.thread_state, 'label_log', None)
+        self.thread_state.label_log = None
+
+        if label_log is None:
+            label_log = {}
+
+        return label_log
+
+    def _logLabel(self, labelstr, labelIRI):
+        """
+        Records a resolved label if the calling thread has an active label log.
+        """
+        label_log = getattr(self.thread_state, 'label_log', None)
+        if label_log is not None:
+            label_log[labelstr] = labelIRI.toString()
+
+    def _bufferOntologyAdded(self, added_ont):
+        """
+        Responds to 'ontology_added' event notifications from the source
+        ontology until the LabelMap is built.
+        """
+        self.pending_onts.append(added_ont)
+
+    def buildLabelMap(self):
+        """
+        Builds the LabelMap for the source ontology now, rather than when a
+        label is first resolved.  If the LabelMap was already built, this has
+        no effect.
+        """
+        self._getLabelMap()
+
+    def _getLabelMap(self):
+        """
+        Returns the LabelMap for the source ontology, building it first if
+        needed.
+        """
+        # The LabelMap might be requested by several threads at once (e.g.,
+        # when processing entity descriptions in parallel), so make sure that
+        # it is only built once and is only visible once it is complete.
+        if self.labelmap is None:
+            with self.labelmap_lock:
+                if self.labelmap is None:
+                    self.ontology.unregisterObserver(
+                        'ontology_added', self._bufferOntologyAdded
+                    )
+
+                    # After it is built, the LabelMap tracks changes to the
+                    # source ontology itself.
+                    labelmap = LabelMap(self.ontology)
+
+                    # Add the labels of any buffered ontologies that are not
+                    # already part of the imports closure (e.g., merged
+                    # ontologies).
+                    closure = self.ontology.getOWLOntology().getImportsClosure()
+                    for added_ont in self.pending_onts:
+                        if not(closure.contains(added_ont)):
+                            labelmap.addOntologyTerms(added_ont)
+
+                    self.pending_onts = []
+                    self.labelmap = labelmap
+
+        return self.labelmap
 
     def expandIRI(self, iri):
         """
@@ -66,6 +280,13 @@ class IDResolver:
             object.  In the latter case, iri is returned as is.
         """
         if isinstance(iri, basestring):
+            self._checkPrefixes()
+            fullIRI = self.iri_cache.get(('iri', iri))
+            if fullIRI is not None:
+                self._countCacheLookup(True)
+                return fullIRI
+            self._countCacheLookup(False)
+
             # Verify that we have a valid IRI string.
             if rfc3987.match(iri, rule='IRI_reference') is None:
                 raise RuntimeError('Invalid IRI string: "' + iri + '".')
@@ -76,6 +297,8 @@ class IDResolver:
                 fullIRI = self.prefix_df.getIRI(iri)
             except OWLRuntimeException:
                 fullIRI = IRI.create(iri)
+
+            self.iri_cache.put(('iri', iri), fullIRI)
         elif isinstance(iri, IRI):
             fullIRI = iri
         else:
@@ -109,15 +332,33 @@ class IDResolver:
 
         Returns: An OWL API IRI object.
         """
+        self._checkPrefixes()
+        labelIRI = self.label_cache.get(labelstr)
+        if labelIRI is not None:
+            self._countCacheLookup(True)
+            self._logLabel(labelstr, labelIRI)
+            return labelIRI
+        self._countCacheLookup(False)
+
         if not(self._isLabel(labelstr)):
             raise RuntimeError(
                 'The string "{0}" is not a valid ontology entity '
                 'label.'.format(labelstr)
             )
 
+        labelIRI = self._lookupLabel(labelstr)
+        self.label_cache.put(labelstr, labelIRI)
+        self._logLabel(labelstr, labelIRI)
+
+        return labelIRI
+
+    def _lookupLabel(self, labelstr):
+        """
+        Implements label resolution for resolveLabel(), without caching.
+        """
         if (labelstr[0] == "'") and (labelstr[-1] == "'"):
             # If we have a non-prefixed label, do the lookup directly.
-            return self.labelmap.lookupIRI(labelstr[1:-1])
+            return self._getLabelMap().lookupIRI(labelstr[1:-1])
         else:
             # If we have a prefixed label, we need to parse out the prefix and
             # the label text and resolve the prefix to an IRI root first.  The
@@ -135,13 +376,13 @@ class IDResolver:
             obo_lookup = iri_lookup = None
 
             try:
-                obo_lookup = self.labelmap.lookupIRI(labeltxt[1:-1], obo_root)
+                obo_lookup = self._getLabelMap().lookupIRI(labeltxt[1:-1], obo_root)
             except InvalidLabelError:
                 obo_lookup = None
 
             if iri_root is not None:
                 try:
-                    iri_lookup = self.labelmap.lookupIRI(
+                    iri_lookup = self._getLabelMap().lookupIRI(
                         labeltxt[1:-1], iri_root
                     )
                 except InvalidLabelError:
@@ -186,12 +427,26 @@ class IDResolver:
         Returns: An OWL API IRI object.
         """
         if isinstance(id_obj, basestring):
+            # Check the caches before testing what kind of identifier we have.
+            self._checkPrefixes()
+            IRIobj = self.iri_cache.get(('id', id_obj))
+            if IRIobj is None:
+                IRIobj = self.label_cache.get(id_obj)
+                if IRIobj is not None:
+                    self._logLabel(id_obj, IRIobj)
+            if IRIobj is not None:
+                self._countCacheLookup(True)
+                return IRIobj
+
             if self._isLabel(id_obj):
                 IRIobj = self.resolveLabel(id_obj)
             elif isOboID(id_obj):
+                self._countCacheLookup(False)
                 IRIobj = oboIDToIRI(id_obj)
+                self.iri_cache.put(('id', id_obj), IRIobj)
             else:
                 IRIobj = self.expandIRI(id_obj)
+                self.iri_cache.put(('id', id_obj), IRIobj)
         elif isinstance(id_obj, IRI):
             IRIobj = id_obj
         else:
@@ -0,0 +1,234 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a class, ImportModuleRecords, that stores a record of how each
+# import module was extracted, so that the module can be updated without
+# loading the (typically very large) source ontology if rows were only removed
+# from the module's terms file.  For each module, the record consists of an
+# OWL functional syntax document and a small JSON record:
+#
+#   * The document contains all axioms of the module before any entities were
+#     excluded, plus the declarations, annotation assertions, and property
+#     characteristics from the source ontology of every entity those axioms
+#     refer to.  These axioms are a subset of the source ontology that contains
+#     every module that can be extracted from the source ontology for a subset
+#     of the terms file rows, so extracting the module for such a subset from
+#     the recorded axioms gives exactly the same result as extracting it from
+#     the source ontology.  (Syntactic locality modules are self-contained,
+#     and every relationship that is traversed for a row is part of the
+#     axioms saved for that row.)
+#   * The JSON record contains the hash of the source ontology file, the
+#     module settings, the entity that each "include" row resolved to, and the
+#     entities that each "Exclude" row excluded.  Excluded entities are
+#     recorded because the relationships that were traversed to find them are
+#     not necessarily part of the module.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import os
+import json
+import hashlib
+import threading
+from ontopilot import logger
+from build_manifest import getFileHash
+
+# Java imports.
+from java.io import File, FileOutputStream
+from java.io import IOException as JavaIOException
+from java.util import HashSet
+from org.semanticweb.owlapi.apibinding import OWLManager
+from org.semanticweb.owlapi.model import OWLOntologyStorageException
+from org.semanticweb.owlapi.formats import FunctionalSyntaxDocumentFormat
+
+
+# The version of the record format.  This should be incremented whenever
+# changes to OntoPilot would change the modules that are extracted for the
+# same terms file rows, so that all records are discarded.
+RECORD_VERSION = 1
+
+
+class ImportModuleRecords:
+    """
+    Stores and retrieves import module extraction records.  All methods are
+    thread safe, provided that each module is only built by one thread at a
+    time.
+    """
+    def __init__(self, recorddir):
+        """
+        recorddir: The directory in which to store the records.  It will be
+            created when a record is first stored, if needed.
+        """
+        self.recorddir = recorddir
+        self.lock = threading.Lock()
+
+    def _getEntryPaths(self, modulepath):
+        """
+        Returns the paths of the JSON record and the axioms document for an
+        import module.
+        """
+        basename = hashlib.sha1(
+            os.path.abspath(modulepath).encode('utf-8')
+        ).hexdigest()
+        basepath = os.path.join(self.recorddir, basename)
+
+        return (basepath + '.json', basepath + '.ofn')
+
+    def _normalize(self, value):
+        """
+        Converts a value to the form in which it is stored in a JSON record
+        (e.g., tuples become lists), so that recorded and current values can be
+        compared directly.
+        """
+        return json.loads(json.dumps(value, sort_keys=True))
+
+    def _getSourceInfo(self, sourcepath, oldinfo=None):
+        """
+        Returns a dictionary with the size, modification time, and SHA-1 hash
+        of a source ontology file.  As for the build manifest, a previously
+        recorded hash is reused if the file's size and modification time have
+        not changed, because source ontologies can be very large.
+        """
+        fstat = os.stat(sourcepath)
+        info = {'size': fstat.st_size, 'mtime': fstat.st_mtime}
+
+        if (
+            oldinfo is not None and oldinfo['size'] == info['size'] and
+            oldinfo['mtime'] == info['mtime']
+        ):
+            info['sha1'] = oldinfo['sha1']
+        else:
+            info['sha1'] = getFileHash(sourcepath)
+
+        return info
+
+    def getRecord(self, modulepath, sourcepath, settings):
+        """
+        Returns the extraction record of an import module, or None if there is
+        no valid record.  A record is only valid if the source ontology file
+        and the module settings are unchanged.  The returned record is a
+        dictionary with the following keys.
+          'axioms_path': The path of the recorded axioms document.
+          'include_rows': A dictionary that maps the specification key of each
+              recorded include row to an [IRI string, entity type name] pair.
+          'exclude_rows': A dictionary that maps the specification key of each
+              recorded exclude row to a list of [IRI string, entity type name]
+              pairs.
+
+        modulepath: The path of the import module file.
+        sourcepath: The path of the local copy of the source ontology.
+        settings: A JSON-compatible dictionary of all module settings.
+        """
+        recordpath, axiomspath = self._getEntryPaths(modulepath)
+
+        try:
+            with open(recordpath) as fin:
+                record = json.load(fin)
+
+            if record.get('version') != RECORD_VERSION:
+                return None
+
+            if record['settings'] != self._normalize(settings):
+                return None
+
+            sourceinfo = self._getSourceInfo(sourcepath, record['source'])
+            if sourceinfo['sha1'] != record['source']['sha1']:
+                return None
+
+            if record['axioms_hash'] != getFileHash(axiomspath):
+                return None
+
+            return {
+                'axioms_path': axiomspath,
+                'include_rows': record['include_rows'],
+                'exclude_rows': record['exclude_rows']
+            }
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def storeRecord(
+        self, modulepath, sourcepath, settings, include_rows, exclude_rows,
+        axioms, ontologyID
+    ):
+        """
+        Stores the extraction record of an import module.  Failure to store
+        the record is not an error; the module will simply be extracted from
+        the source ontology during the next build.
+
+        modulepath: The path of the import module file.
+        sourcepath: The path of the local copy of the source ontology.
+        settings: A JSON-compatible dictionary of all module settings.
+        include_rows: A dictionary that maps the specification key string of
+            each include row to the [IRI string, entity type name] pair of the
+            entity it resolved to.
+        exclude_rows: A dictionary that maps the specification key string of
+            each exclude row to a list of the [IRI string, entity type name]
+            pairs of the entities it excluded.
+        axioms: A collection of the axioms to record (see the module
+            comments).
+        ontologyID: The OWL API ontology ID of the source ontology.
+        """
+        recordpath, axiomspath = self._getEntryPaths(modulepath)
+
+        try:
+            with self.lock:
+                if not(os.path.isdir(self.recorddir)):
+                    os.makedirs(self.recorddir)
+
+            # Remove any old record first, so that an interrupted update
+            # cannot leave a record behind that does not match its axioms.
+            if os.path.exists(recordpath):
+                os.remove(recordpath)
+
+            # The recorded axioms are used in place of the source ontology, so
+            # they get the source ontology's ID.
+            ontman = OWLManager.createOWLOntologyManager()
+            owlont = ontman.createOntology(ontologyID)
+            axiomset = HashSet(len(axioms))
+            for axiom in axioms:
+                axiomset.add(axiom)
+            ontman.addAxioms(owlont, axiomset)
+
+            # Do not let the writer add declarations that are not in the
+            # source ontology.
+            docformat = FunctionalSyntaxDocumentFormat()
+            docformat.setAddMissingTypes(False)
+
+            foutputstream = FileOutputStream(File(axiomspath))
+            try:
+                ontman.saveOntology(owlont, docformat, foutputstream)
+            finally:
+                foutputstream.close()
+
+            record = {
+                'version': RECORD_VERSION,
+                'settings': self._normalize(settings),
+                'source': self._getSourceInfo(sourcepath),
+                'include_rows': self._normalize(include_rows),
+                'exclude_rows': self._normalize(exclude_rows),
+                'axioms_hash': getFileHash(axiomspath)
+            }
+
+            with open(recordpath, 'w') as fout:
+                json.dump(record, fout, indent=1, sort_keys=True)
+        except (
+            IOError, OSError, JavaIOException, OWLOntologyStorageException
+        ) as err:
+            logger.debug(
+                'Unable to store the extraction record for import module '
+                '"{0}": {1}'.format(modulepath, err)
+            )
+
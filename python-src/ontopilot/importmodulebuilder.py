@@ -22,16 +22,18 @@
 # Python imports.
 from __future__ import unicode_literals
 import os
-from urllib import FancyURLopener
-from urllib2 import HTTPError
 import urllib, urlparse
 import math
+import json
 from progressbar import ProgressBar, Percentage, Bar, ETA
 from rfc3987 import rfc3987
 from ontopilot import logger
 import oom_manager
 from tablereaderfactory import TableReaderFactory
 from tablereader import TableRowError
+from build_manifest import getBuildManifest
+from import_module_records import ImportModuleRecords
+from source_cache import SourceOntologyCache
 import ontopilot
 from ontopilot import TRUE_STRS
 from ontology import Ontology
@@ -43,6 +45,18 @@ from java.util import HashSet
 from org.semanticweb.owlapi.model import IRI, OWLClassExpression
 from org.semanticweb.owlapi.model import OWLObjectPropertyExpression
 from org.semanticweb.owlapi.model import OWLObjectProperty, OWLDataProperty
+from org.semanticweb.owlapi.model import EntityType
+
+
+# The OWL API entity types, keyed by their names, for converting recorded
+# entities back to OWL API entities.
+_entity_types = {}
+for _enttype in (
+    EntityType.CLASS, EntityType.OBJECT_PROPERTY, EntityType.DATA_PROPERTY,
+    EntityType.ANNOTATION_PROPERTY, EntityType.NAMED_INDIVIDUAL,
+    EntityType.DATATYPE
+):
+    _entity_types[unicode(_enttype.getName())] = _enttype
 
 
 class ImportModSpecError(TableRowError):
@@ -61,15 +75,6 @@ class ImportModSpecError(TableRowError):
         RuntimeError.__init__(self, new_msg)
 
 
-class URLOpenerWithErrorHandling(FancyURLopener):
-    """
-    Extends FancyURLopener by adding better error handling for unrecoverable
-    HTTP errors (e.g., 404).
-    """
-    def http_error_default(self, url, fp, errcode, errmsg, headers):
-        raise HTTPError(url, errcode, errmsg, headers, fp)
-
-
 class ImportModuleBuilder:
     """
     Builds import modules using terms from an external ontology.  The argument
@@ -87,7 +92,10 @@ class ImportModuleBuilder:
     # Default values for input table columns.
     DEFAULT_COL_VALS = {'Method': 'Locality'}
 
-    def __init__(self, base_IRI, module_suffix, builddir, outputdir=''):
+    def __init__(
+        self, base_IRI, module_suffix, builddir, outputdir='',
+        show_progress=True, use_locality_index=False, sharedcache=None
+    ):
         """
         ImportModuleBuilder constructor.
 
@@ -96,9 +104,18 @@ class ImportModuleBuilder:
         builddir: The build directory to use.
         outputdir: The directory in which to save the import module OWL files,
             if different from builddir.
+        show_progress: Whether to show a console progress bar when downloading
+            source ontologies.  This should be False if several modules are
+            built at the same time.
+        use_locality_index: Whether to use a locality index of each source
+            ontology for syntactic locality extraction (see ModuleExtractor).
+        sharedcache: An optional SharedSourceCache in which to store
+            downloaded source ontologies.
         """
         self.progbar = None
         self.sourceOntologyIRI = ''
+        self.show_progress = show_progress
+        self.use_locality_index = use_locality_index
 
         self.base_IRI = base_IRI
         self.mod_suffix = module_suffix
@@ -115,6 +132,13 @@ class ImportModuleBuilder:
 
         # Generate the directory name for local copies of source ontologies.
         self.ontcachedir = os.path.join(builddir, 'source_ontologies')
+        self.sourcecache = SourceOntologyCache(self.ontcachedir, sharedcache)
+
+        # The records of previous module extractions, for updating modules
+        # without loading their source ontologies.
+        self.records = ImportModuleRecords(
+            os.path.join(builddir, 'import_module_records')
+        )
 
     def _checkOutputDirs(self):
         """
@@ -129,7 +153,13 @@ class ImportModuleBuilder:
         # Check the downloaded ontologies cache directory.
         if not(os.path.isdir(self.ontcachedir)):
             if not(os.path.exists(self.ontcachedir)):
-                os.mkdir(self.ontcachedir)
+                try:
+                    os.mkdir(self.ontcachedir)
+                except OSError:
+                    # Another builder might have created the directory in the
+                    # meantime.
+                    if not(os.path.isdir(self.ontcachedir)):
+                        raise
             else:
                 raise RuntimeError(
                     'A file with the name of the ontology cache directory '
@@ -148,7 +178,7 @@ class ImportModuleBuilder:
         """
         Instantiates and updates a console-based progress bar to indicate
         ontology download progress.  This method should be passed to the
-        retrieve() method of URLOpenerWithErrorHandling.
+        retrieve() method of SourceOntologyCache.
         """
         #print blocks_transferred, blocksize, filesize
         if blocks_transferred == 0:
@@ -164,36 +194,48 @@ class ImportModuleBuilder:
                 self.progbar.finish()
                 print
 
-    def _getOutputFileName(self, ontologyIRI):
+    def _getOutputFileName(self, ontologyIRI, modname=''):
         """
         Constructs the file name for the output import module file.
+
+        ontologyIRI: The IRI of the ontology to import.
+        modname (optional): A name that distinguishes the module from other
+            modules that are built from the same source ontology.  If it is
+            not empty, it is added to the file name.
         """
         # Extract the name of the source ontology file from the IRI.
         ontfile = os.path.basename(ontologyIRI)
+        basename = os.path.splitext(ontfile)[0]
+        if modname != '':
+            basename += '_' + modname
 
         # Generate the file name for the ouput ontology OWL file.
-        outputfile = os.path.splitext(ontfile)[0] + self.mod_suffix
+        outputfile = basename + self.mod_suffix
 
         return outputfile
 
-    def getModulePath(self, ontologyIRI):
+    def getModulePath(self, ontologyIRI, modname=''):
         """
         Returns the full path of the compiled import module file.
+
+        ontologyIRI: The IRI of the ontology to import.
+        modname (optional): As for _getOutputFileName().
         """
-        outputfile = self._getOutputFileName(ontologyIRI)
+        outputfile = self._getOutputFileName(ontologyIRI, modname)
 
         return os.path.join(self.outputdir, outputfile)
 
-    def getModuleIRIStr(self, ontologyIRI):
+    def getModuleIRIStr(self, ontologyIRI, modname=''):
         """
         Returns the IRI string that will be used for an import module.
 
         ontologyIRI: The IRI of the ontology to import.
+        modname (optional): As for _getOutputFileName().
         """
         if self.base_IRI == '':
             return ''
 
-        outputfile = self._getOutputFileName(ontologyIRI)
+        outputfile = self._getOutputFileName(ontologyIRI, modname)
 
         # Generate the IRI for the output ontology OWL file by parsing the base
         # path from the base IRI and then adding the new module file name to
@@ -217,12 +259,72 @@ class ImportModuleBuilder:
 
         return rfc3987.compose(**parts)
 
-    def isBuildNeeded(self, ontologyIRI, termsfile_path):
+    def _getSourceOntologyPath(self, ontologyIRI):
+        """
+        Returns the path of the local copy of a source ontology.
+        """
+        return self.sourcecache.getFilePath(ontologyIRI)
+
+    def _getManifestInputs(self, ontologyIRI, termsfile_path, modname=''):
+        """
+        Returns a tuple, (input file paths, settings), that describes all
+        inputs of an import module for the build manifest.
+        """
+        inputpaths = [
+            termsfile_path, self._getSourceOntologyPath(ontologyIRI)
+        ]
+
+        return (inputpaths, self._getModuleSettings(ontologyIRI, modname))
+
+    def _getModuleSettings(self, ontologyIRI, modname=''):
+        """
+        Returns a dictionary of all settings that affect the extraction of an
+        import module.
+        """
+        settings = {
+            'source_IRI': ontologyIRI,
+            'module_IRI': self.getModuleIRIStr(ontologyIRI, modname)
+        }
+
+        # Only record the locality index setting if it is used, so that
+        # existing records remain valid.
+        if self.use_locality_index:
+            settings['locality_index'] = True
+
+        return settings
+
+    def retrieveSourceOntology(self, ontologyIRI, refresh=False):
+        """
+        Makes sure that a local copy of a source ontology is available,
+        downloading the source ontology if needed, and returns the path of the
+        local copy.  Interrupted downloads are resumed, and downloads are
+        verified against any checksums provided by the server (see
+        SourceOntologyCache).
+
+        ontologyIRI (string): The IRI of the source ontology.
+        refresh (optional): If True, an existing local copy is checked
+            against the remote source ontology (with a conditional request)
+            and updated if the remote source ontology has changed.
+        """
+        # Check the output directories.
+        self._checkOutputDirs()
+
+        if self.show_progress:
+            reporthook = self._updateDownloadProgress
+        else:
+            reporthook = None
+
+        self.sourceOntologyIRI = ontologyIRI
+
+        return self.sourcecache.retrieve(ontologyIRI, refresh, reporthook)
+
+    def isBuildNeeded(self, ontologyIRI, termsfile_path, modname=''):
         """
         Tests whether an import module actually needs to be built.
 
         ontologyIRI: The IRI of the imported ontology.
         termsfile_path: The input file containing the terms to import.
+        modname (optional): As for _getOutputFileName().
         """
         # If the terms file path is empty, we will just import the entire
         # source ontology, so there is never any module to build.
@@ -234,94 +336,295 @@ class ImportModuleBuilder:
             raise RuntimeError('Could not find the input terms file "'
                     + termsfile_path + '".')
 
-        outputpath = self.getModulePath(ontologyIRI)
-    
-        # If the output file already exists and the terms file was not
-        # modified/created more recently, there is nothing to do.
+        outputpath = self.getModulePath(ontologyIRI, modname)
+
+        # If the build manifest has a record of the module, it decides whether
+        # the module is up to date.
+        manifest = getBuildManifest(self.builddir)
+        inputpaths, settings = self._getManifestInputs(
+            ontologyIRI, termsfile_path, modname
+        )
+        is_current = manifest.isProductCurrent(
+            outputpath, inputpaths, settings
+        )
+        if is_current is not None:
+            return not(is_current)
+
+        # Otherwise, if the output file already exists and the terms file was
+        # not modified/created more recently, there is nothing to do.  In that
+        # case, record the module in the manifest so that later builds can use
+        # content hashes.
         if os.path.isfile(outputpath):
             if os.path.getmtime(outputpath) > os.path.getmtime(termsfile_path):
+                manifest.recordProduct(outputpath, inputpaths, settings)
                 return False
 
         return True
         
-    def buildModule(self, ontologyIRI, termsfile_path):
+    def loadSourceOntology(self, ontologyIRI):
+        """
+        Loads a source ontology, downloading it first if needed, and returns
+        it as an Ontology object.  The source ontology gets its own ontology
+        manager, which should be released with
+        oom_manager.releaseOWLOntologyManager() once the source ontology is no
+        longer needed.
+
+        ontologyIRI (string): The IRI of the source ontology.
+        """
+        ontfile = self.retrieveSourceOntology(ontologyIRI)
+
+        # Add an IRI mapping so that requests to load the imported ontology
+        # will retrieve it from the local file.
+        doc_iristr = urlparse.urljoin(
+            'file://localhost', urllib.pathname2url(ontfile)
+        )
+        oom_manager.addNewIRIMapping(
+            IRI.create(ontologyIRI), IRI.create(doc_iristr)
+        )
+
+        ontopilot.logger.info('Loading source ontology from file ' + ontfile + '.')
+
+        return Ontology(ontfile)
+
+    def buildModule(
+        self, ontologyIRI, termsfile_path, getsource=None, sourcelock=None,
+        modname=''
+    ):
         """
         Builds an import module from a single external ontology and an input
         file containing a set of terms to import.  The import module will be
         saved as an OWL file with a name generated by appending self.mod_suffix
         to the base of the source ontology file name.
 
+        If the module has a valid extraction record (see ImportModuleRecords)
+        and every row of the terms file is also in the record (i.e., rows were
+        only removed since the module was last extracted, or the module file
+        itself needs to be restored), the module is extracted from the
+        recorded axioms and the source ontology is not needed at all.
+        Otherwise, the module is extracted from the source ontology.
+
         ontologyIRI (string): The IRI of the source ontology.
         termsfile_path: The input file containing the terms to import.
+        getsource (optional): A function without arguments that returns the
+            source ontology, already loaded with loadSourceOntology().  It is
+            only called if the source ontology is needed.  In that case, the
+            caller is responsible for releasing the source ontology, and the
+            same source ontology can be used to build several modules.
+            Otherwise, the source ontology is loaded, if needed, and then
+            released once the module is built.
+        sourcelock (optional): A lock that is held while a source ontology
+            from getsource is used.  Extracting a module modifies the source
+            ontology's manager, which is not thread safe, so all modules that
+            are built from the same source ontology at the same time must
+            share one lock.
+        modname (optional): A name that distinguishes the module from other
+            modules that are built from the same source ontology (see
+            _getOutputFileName()).
         """
         # Verify that the terms file exists.
         if not(os.path.isfile(termsfile_path)):
             raise RuntimeError('Could not find the input terms file "'
                     + termsfile_path + '".')
 
-        # Check the output directories.
-        self._checkOutputDirs()
+        # Keep the terms file open until the module is built, because errors
+        # in the row specifications are reported with the table context.
+        with TableReaderFactory(termsfile_path) as reader:
+            rowspecs = self._readRowSpecs(reader)
 
-        # Extract the name of the source ontology file from the IRI and
-        # generate the path to it on the local filesystem.
-        ontfile = os.path.basename(ontologyIRI)
-        ontfile = os.path.join(self.ontcachedir, ontfile)
+            record = self._getUsableRecord(ontologyIRI, rowspecs, modname)
+            if record is not None:
+                ontopilot.logger.info(
+                    'Updating the import module for {0} from the record of '
+                    'its previous extraction.'.format(ontologyIRI)
+                )
+                sourceont = Ontology(record['axioms_path'])
+                release_source = True
+            elif getsource is not None:
+                sourceont = getsource()
+                release_source = False
+            else:
+                sourceont = self.loadSourceOntology(ontologyIRI)
+                release_source = True
 
-        # Verify that the source ontology file exists; if not, download it.
-        if not(os.path.isfile(ontfile)):
-            opener = URLOpenerWithErrorHandling()
             try:
-                self.sourceOntologyIRI = ontologyIRI
-                opener.retrieve(ontologyIRI, ontfile, self._updateDownloadProgress)
-            except (IOError, HTTPError) as err:
-                raise RuntimeError('Unable to download the external ontology at "'
-                        + ontologyIRI + '": ' + unicode(err))
+                if release_source or (sourcelock is None):
+                    self._extractModule(
+                        ontologyIRI, termsfile_path, rowspecs, sourceont,
+                        record, modname
+                    )
+                else:
+                    with sourcelock:
+                        self._extractModule(
+                            ontologyIRI, termsfile_path, rowspecs, sourceont,
+                            record, modname
+                        )
+            finally:
+                # Source ontologies can be very large, so make sure that the
+                # memory used by the source ontology can be reclaimed.
+                if release_source:
+                    sourceont.dispose()
+                    oom_manager.releaseOWLOntologyManager(
+                        sourceont.getOntologyManager()
+                    )
+
+    def _readRowSpecs(self, reader):
+        """
+        Reads the import specifications from all tables of a terms file.
+        Returns a list with a dictionary for each row that is not ignored.
+        Each dictionary contains the table row ('row'), the entity ID string
+        ('id'), whether the row excludes entities ('exclude'), the extraction
+        method constant or None for exclude rows ('method'), the set of
+        related axiom type constants ('rel_types'), and a string that
+        uniquely identifies the specification ('key').
+
+        reader: A TableReader for the terms file.
+        """
+        rowspecs = []
+
+        for table in reader:
+            table.setRequiredColumns(self.REQUIRED_COLS)
+            table.setOptionalColumns(self.OPTIONAL_COLS)
+            table.setDefaultValues(self.DEFAULT_COL_VALS)
+
+            for row in table:
+                if row['Ignore'].lower() in TRUE_STRS:
+                    continue
+
+                try:
+                    rel_types = rel_axiom_types.getAxiomTypesFromStr(
+                        row['Related entities']
+                    )
+
+                    if row['Exclude'].lower() in TRUE_STRS:
+                        exclude = True
+                        method = None
+                    else:
+                        exclude = False
+                        method = me_methods.getMethodFromStr(row['Method'])
+                except RuntimeError as err:
+                    raise ImportModSpecError(unicode(err), row)
+
+                rowspecs.append({
+                    'row': row, 'id': row['ID'], 'exclude': exclude,
+                    'method': method, 'rel_types': rel_types,
+                    'key': json.dumps(
+                        [row['ID'], method, sorted(rel_types)]
+                    )
+                })
+
+        return rowspecs
+
+    def _getUsableRecord(self, ontologyIRI, rowspecs, modname=''):
+        """
+        Returns the extraction record of an import module if the module can
+        be extracted from the recorded axioms for the given row
+        specifications.  Otherwise, returns None.
+        """
+        sourcepath = self._getSourceOntologyPath(ontologyIRI)
+        if not(os.path.isfile(sourcepath)):
+            return None
 
-        # Add an IRI mapping so that requests to load the imported ontology
-        # will retrieve it from the local file.
-        doc_iristr = urlparse.urljoin(
-            'file://localhost', urllib.pathname2url(ontfile)
+        record = self.records.getRecord(
+            self.getModulePath(ontologyIRI, modname), sourcepath,
+            self._getModuleSettings(ontologyIRI, modname)
         )
-        oom_manager.addNewIRIMapping(
-            IRI.create(ontologyIRI), IRI.create(doc_iristr)
+        if record is None:
+            return None
+
+        for rowspec in rowspecs:
+            if rowspec['exclude']:
+                recorded_rows = record['exclude_rows']
+            else:
+                recorded_rows = record['include_rows']
+
+            if rowspec['key'] not in recorded_rows:
+                return None
+
+        return record
+
+    def _getEntityPair(self, owlent):
+        """
+        Returns the [IRI string, entity type name] pair that is used to record
+        an OWL API entity.
+        """
+        return [
+            owlent.getIRI().toString(), owlent.getEntityType().getName()
+        ]
+
+    def _getOWLEntity(self, entpair, ontology):
+        """
+        Returns the OWL API entity for a recorded [IRI string, entity type
+        name] pair.
+        """
+        return ontology.df.getOWLEntity(
+            _entity_types[entpair[1]], IRI.create(entpair[0])
         )
 
-        ontopilot.logger.info('Loading source ontology from file ' + ontfile + '.')
-        sourceont = Ontology(ontfile)
+    def _extractModule(
+        self, ontologyIRI, termsfile_path, rowspecs, sourceont, record=None,
+        modname=''
+    ):
+        """
+        Extracts an import module from a loaded source ontology, saves it, and
+        stores the module's extraction record.
 
-        mod_ext = ModuleExtractor(sourceont)
-        excluded_ents = []
-        with TableReaderFactory(termsfile_path) as reader:
-            # Read the terms to import from each table in the input file, add
-            # each term to the signature set for module extraction, and add the
-            # descendants of each term, if desired.
-            for table in reader:
-                table.setRequiredColumns(self.REQUIRED_COLS)
-                table.setOptionalColumns(self.OPTIONAL_COLS)
-                table.setDefaultValues(self.DEFAULT_COL_VALS)
-
-                for row in table:
-                    if row['Ignore'].lower() in TRUE_STRS:
-                        continue
-
-                    idstr = row['ID']
-                    ontopilot.logger.info('Processing entity "' + idstr + '".')
-    
-                    try:
-                        rel_types = rel_axiom_types.getAxiomTypesFromStr(
-                            row['Related entities']
-                        )
+        ontologyIRI (string): The IRI of the source ontology.
+        termsfile_path: The input file containing the terms to import.
+        rowspecs: The row specifications from _readRowSpecs().
+        sourceont: The source ontology or an ontology of recorded axioms.
+        record (optional): If sourceont contains recorded axioms, the
+            extraction record, which provides the entities of all rows.
+        modname (optional): As for _getOutputFileName().
+        """
+        mod_ext = ModuleExtractor(sourceont, self.use_locality_index)
 
-                        if row['Exclude'].lower() in TRUE_STRS:
-                            mod_ext.excludeEntity(idstr, rel_types)
-                        else:
-                            method = me_methods.getMethodFromStr(
-                                row['Method']
-                            )
-                            mod_ext.addEntity(idstr, method, rel_types)
+        # The entities of the include and exclude rows, for the new record.
+        include_rows = {}
+        exclude_rows = {}
 
-                    except RuntimeError as err:
-                        raise ImportModSpecError(unicode(err), row)
+        # Add each term to the signature set for module extraction, and add
+        # the related entities of each term, if desired.
+        for rowspec in rowspecs:
+            ontopilot.logger.info(
+                'Processing entity "' + rowspec['id'] + '".'
+            )
+
+            try:
+                if rowspec['exclude']:
+                    if record is None:
+                        owlents = mod_ext.excludeEntity(
+                            rowspec['id'], rowspec['rel_types']
+                        )
+                    else:
+                        # The related entities of excluded entities are not
+                        # necessarily part of the recorded axioms, so use
+                        # the recorded entities.
+                        owlents = [
+                            self._getOWLEntity(entpair, sourceont) for entpair
+                            in record['exclude_rows'][rowspec['key']]
+                        ]
+                        mod_ext.excludeOWLEntities(owlents)
+
+                    exclude_rows[rowspec['key']] = [
+                        self._getEntityPair(owlent) for owlent in owlents
+                    ]
+                else:
+                    if record is None:
+                        owlent = mod_ext.addEntity(
+                            rowspec['id'], rowspec['method'],
+                            rowspec['rel_types']
+                        )
+                    else:
+                        owlent = self._getOWLEntity(
+                            record['include_rows'][rowspec['key']], sourceont
+                        )
+                        mod_ext.addOWLEntity(
+                            owlent, rowspec['method'], rowspec['rel_types']
+                        )
+
+                    include_rows[rowspec['key']] = self._getEntityPair(owlent)
+            except RuntimeError as err:
+                raise ImportModSpecError(unicode(err), rowspec['row'])
 
         if mod_ext.getSignatureSize() == 0:
             ontopilot.logger.warning(
@@ -329,7 +632,32 @@ class ImportModuleBuilder:
                 '{0}.'.format(termsfile_path)
             )
 
-        module = mod_ext.extractModule(self.getModuleIRIStr(ontologyIRI))
+        mod_axioms = mod_ext.extractModuleAxioms()
+        module = mod_ext.extractModule(
+            self.getModuleIRIStr(ontologyIRI, modname), mod_axioms
+        )
+
+        modulepath = self.getModulePath(ontologyIRI, modname)
+        module.saveOntology(modulepath)
+
+        # The module was created by the source ontology's manager, so remove
+        # it from the manager, which might still be used for building other
+        # modules, and make sure that the manager no longer refers to it.
+        sourceont.getOntologyManager().removeOntology(module.getOWLOntology())
+        module.dispose()
+
+        self.records.storeRecord(
+            modulepath, self._getSourceOntologyPath(ontologyIRI),
+            self._getModuleSettings(ontologyIRI, modname), include_rows,
+            exclude_rows,
+            mod_ext.getEnrichedAxioms(mod_axioms),
+            sourceont.getOWLOntology().getOntologyID()
+        )
 
-        module.saveOntology(self.getModulePath(ontologyIRI))
+        inputpaths, settings = self._getManifestInputs(
+            ontologyIRI, termsfile_path, modname
+        )
+        getBuildManifest(self.builddir).recordProduct(
+            modulepath, inputpaths, settings
+        )
 
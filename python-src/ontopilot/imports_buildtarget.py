@@ -21,12 +21,17 @@
 # Python imports.
 from __future__ import unicode_literals
 import os
+import sys
+import threading
 import urllib, urlparse
 from ontopilot import logger
+from loggroups import startLogGroup, endLogGroup
 import oom_manager
+import nethelper
 from tablereaderfactory import TableReaderFactory
 from tablereader import TableRowError
 from importmodulebuilder import ImportModuleBuilder
+from source_cache import SharedSourceCache
 from ontopilot import TRUE_STRS
 from rfc3987 import rfc3987
 from buildtarget import BuildTargetWithConfig
@@ -34,6 +39,7 @@ from basic_buildtargets import BuildDirTarget
 from collections import namedtuple
 
 # Java imports.
+from java.lang import Runtime
 from org.semanticweb.owlapi.model import IRI
 
 
@@ -48,6 +54,173 @@ REQUIRED_COLS = ('Entities file', 'IRI')
 # Optional columns in terms files.
 OPTIONAL_COLS = ('Ignore',)
 
+# Loaded ontologies need several times more memory than the size of their
+# source documents.  When import modules are built in parallel, the memory
+# needed for a loaded source ontology is estimated as the size of the source
+# ontology document times this factor.
+SOURCE_MEMORY_FACTOR = 10
+
+# The fraction of the maximum Java heap size that may be used by the source
+# ontologies of import modules that are built in parallel.
+SOURCE_MEMORY_FRACTION = 0.6
+
+# The name of the file in the build directory that caches the results of
+# checking whether import IRIs are redirected.
+REDIRECT_CACHE_FILE = 'redirect_cache.json'
+
+
+class _MemoryLimiter:
+    """
+    Limits the total estimated memory used by import module builds that run at
+    the same time.  A build that would exceed the memory budget waits until
+    other builds finish, unless no other builds are running, so that even a
+    single very large source ontology can always be processed.
+    """
+    def __init__(self, budget):
+        """
+        budget: The total amount of memory available, in bytes.
+        """
+        self.budget = budget
+        self.reserved = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, amount):
+        """
+        Waits until the given amount of memory is available and reserves it.
+        """
+        with self.cond:
+            while self.reserved > 0 and self.reserved + amount > self.budget:
+                self.cond.wait()
+
+            self.reserved += amount
+
+    def release(self, amount):
+        """
+        Releases an amount of memory that was reserved with acquire().
+        """
+        with self.cond:
+            self.reserved -= amount
+            self.cond.notify_all()
+
+
+class _SourceOntologyPool:
+    """
+    Shares loaded source ontologies among all import modules that are built
+    from the same source ontology during a build, so that each source ontology
+    is only parsed once.  A source ontology is loaded when the first module
+    that needs it is built and is released as soon as the last module that
+    uses it is finished.  All methods are thread safe.
+    """
+    def __init__(self, buildrows, memlimiter=None):
+        """
+        buildrows: The imports source rows of all modules that will be built.
+        memlimiter (optional): A _MemoryLimiter with which to reserve the
+            estimated memory needed by each source ontology while it is
+            loaded.
+        """
+        self.memlimiter = memlimiter
+        self.lock = threading.Lock()
+
+        # Maps each source ontology IRI string to a dictionary that contains
+        # the number of modules that still need the source ontology, the
+        # loaded Ontology (or None), the amount of memory reserved for it, and
+        # a lock that is held while the source ontology is loaded, used to
+        # extract a module, or released.
+        self.sources = {}
+        for row in buildrows:
+            if row['IRI'] not in self.sources:
+                self.sources[row['IRI']] = {
+                    'users': 0, 'ontology': None, 'memsize': 0,
+                    'lock': threading.Lock()
+                }
+            self.sources[row['IRI']]['users'] += 1
+
+    def acquire(self, ontologyIRI, mbuilder):
+        """
+        Returns the loaded source ontology with the given IRI, loading it
+        first if needed.  Every module must call release() once it is
+        finished, whether or not it acquired the source ontology (modules that
+        can be updated from their extraction records do not need it).
+
+        ontologyIRI (string): The IRI of the source ontology.
+        mbuilder: The ImportModuleBuilder with which to load the source
+            ontology.
+        """
+        with self.lock:
+            source = self.sources[ontologyIRI]
+
+        with source['lock']:
+            if source['ontology'] is None:
+                if self.memlimiter is not None:
+                    ontfile = mbuilder.retrieveSourceOntology(ontologyIRI)
+                    memsize = os.path.getsize(ontfile) * SOURCE_MEMORY_FACTOR
+                    self.memlimiter.acquire(memsize)
+                    source['memsize'] = memsize
+
+                try:
+                    source['ontology'] = mbuilder.loadSourceOntology(
+                        ontologyIRI
+                    )
+                except:
+                    self._releaseMemory(source)
+                    raise
+
+            return source['ontology']
+
+    def getLock(self, ontologyIRI):
+        """
+        Returns the lock for a source ontology.  Modules must hold this lock
+        while they use the source ontology, because the ontology managers of
+        source ontologies are not thread safe.
+
+        ontologyIRI (string): The IRI of the source ontology.
+        """
+        with self.lock:
+            return self.sources[ontologyIRI]['lock']
+
+    def release(self, ontologyIRI):
+        """
+        Indicates that a module that used a source ontology is finished.  If
+        no other modules need the source ontology, it is released.
+        """
+        with self.lock:
+            source = self.sources[ontologyIRI]
+            source['users'] -= 1
+            if source['users'] > 0:
+                return
+
+        self._unload(source)
+
+    def close(self):
+        """
+        Releases all source ontologies that are still loaded (e.g., because a
+        module failed to build, so that not all modules were built).
+        """
+        for source in self.sources.values():
+            self._unload(source)
+
+    def _unload(self, source):
+        """
+        Releases a source ontology and the memory reserved for it.
+        """
+        with source['lock']:
+            if source['ontology'] is not None:
+                source['ontology'].dispose()
+                oom_manager.releaseOWLOntologyManager(
+                    source['ontology'].getOntologyManager()
+                )
+                source['ontology'] = None
+
+            self._releaseMemory(source)
+
+    def _releaseMemory(self, source):
+        """
+        Releases the memory reserved for a source ontology, if any.
+        """
+        if source['memsize'] > 0:
+            self.memlimiter.release(source['memsize'])
+            source['memsize'] = 0
+
 
 class ImportsBuildTarget(BuildTargetWithConfig):
     """
@@ -79,12 +252,45 @@ class ImportsBuildTarget(BuildTargetWithConfig):
         self._checkFiles()
         self._readImportsSource()
 
+        # Get the maximum number of import modules to build at once.  A value
+        # provided on the command line overrides the configured value.  Not
+        # all args "structs" include this option, so it is optional.
+        self.imports_threads = getattr(args, 'imports_threads', None)
+        if self.imports_threads is None:
+            self.imports_threads = self.config.getImportsThreads()
+        elif self.imports_threads < 1:
+            raise RuntimeError(
+                'Invalid number of import modules to build at the same time: '
+                '{0}.  The value must be a positive integer.'.format(
+                    self.imports_threads
+                )
+            )
+
+        # Whether to check the cached source ontologies against the remote
+        # source ontologies before building.  Not all args "structs" include
+        # this option, so it is optional.
+        self.refresh_sources = getattr(args, 'refresh_sources', False)
+        self.sources_refreshed = False
+
+        # The source ontology cache shared by all projects, if it is used.
+        # All module builders share the same instance.
+        self.sharedcache = None
+        if self.config.getUseSharedSourceCache():
+            self.sharedcache = SharedSourceCache(
+                self.config.getSharedSourceCacheDir(),
+                self.config.getSharedSourceCacheSize()
+            )
+
+        # Configure the redirect checks of import IRIs.  Not all args
+        # "structs" include the offline option, so it is optional.
+        nethelper.setRedirectCache(
+            os.path.join(self.builddir, REDIRECT_CACHE_FILE),
+            self.config.getRedirectCacheTTL()
+        )
+        nethelper.setOfflineMode(getattr(args, 'offline', False))
+
         # Initialize the ImportModuleBuilder.
-        self.mbuilder = ImportModuleBuilder(
-                        self.config.getImportsDevBaseIRI(),
-                        self.config.getImportModSuffix(), self.builddir,
-                        self.outputdir
-                    )
+        self.mbuilder = self._createModuleBuilder()
 
         # Update the IRI mappings for the import modules so that the local
         # files are loaded instead of the versions at the remote IRIs.
@@ -97,6 +303,17 @@ class ImportsBuildTarget(BuildTargetWithConfig):
                     IRI.create(modinfo.iristr), IRI.create(doc_iristr)
                 )
 
+    def _createModuleBuilder(self, show_progress=True):
+        """
+        Returns a new ImportModuleBuilder for this target's configuration.
+        """
+        return ImportModuleBuilder(
+            self.config.getImportsDevBaseIRI(),
+            self.config.getImportModSuffix(), self.builddir, self.outputdir,
+            show_progress, self.config.getUseLocalityIndex(),
+            self.sharedcache
+        )
+
     def _checkFiles(self):
         """
         Verifies that all files and directories needed for the build exist.
@@ -115,7 +332,8 @@ class ImportsBuildTarget(BuildTargetWithConfig):
         Reads the top-level imports source file (that is, the file that defines
         from which ontologies to generate import modules).  For each row, the
         source IRI is checked for errors, the absolute termsfile path is
-        determined, and the row is added to self.tablerows.
+        determined, and the row is added to self.tablerows.  Finally, the
+        module name of each row is set (see _setModuleNames()).
         """
         ifpath = self.config.getTopImportsFilePath()
 
@@ -133,6 +351,48 @@ class ImportsBuildTarget(BuildTargetWithConfig):
 
                         self.tablerows.append(row)
 
+        self._setModuleNames()
+
+    def _setModuleNames(self):
+        """
+        Sets the module name ('modname') of each imports source row.  The
+        module name distinguishes the import modules that are built from the
+        same source ontology, which would otherwise all get the same file
+        name, IRI, and build records.  If only one module is built from a
+        source ontology, the module name is empty, so the module file name
+        only depends on the source ontology.  Otherwise, the module name is
+        the base name of the row's terms file.
+        """
+        sourcecnts = {}
+        for row in self.tablerows:
+            if row['abs_tfilepath'] != '':
+                sourcecnts[row['IRI']] = sourcecnts.get(row['IRI'], 0) + 1
+
+        modrows = {}
+        for row in self.tablerows:
+            row['modname'] = ''
+            if row['abs_tfilepath'] == '':
+                continue
+
+            if sourcecnts[row['IRI']] > 1:
+                row['modname'] = os.path.splitext(
+                    os.path.basename(row['abs_tfilepath'])
+                )[0]
+
+            modkey = (row['IRI'], row['modname'])
+            if modkey in modrows:
+                raise TableRowError(
+                    'The import modules for the source ontology <{0}> would '
+                    'overwrite each other because the terms files "{1}" and '
+                    '"{2}" have the same base name.  Please rename one of the '
+                    'terms files or combine them into a single terms '
+                    'file.'.format(
+                        row['IRI'], modrows[modkey]['abs_tfilepath'],
+                        row['abs_tfilepath']
+                    ), row
+                )
+            modrows[modkey] = row
+
     def _getAbsTermsFilePath(self, trow):
         """
         Gets the absolute path to a terms file from an input table row.
@@ -188,23 +448,60 @@ class ImportsBuildTarget(BuildTargetWithConfig):
                 modinfo = ModuleInfo(filename='', iristr=row['IRI'])
             else:
                 modinfo = ModuleInfo(
-                    filename=self.mbuilder.getModulePath(row['IRI']),
-                    iristr=self.mbuilder.getModuleIRIStr(row['IRI'])
+                    filename=self.mbuilder.getModulePath(
+                        row['IRI'], row['modname']
+                    ),
+                    iristr=self.mbuilder.getModuleIRIStr(
+                        row['IRI'], row['modname']
+                    )
                 )
 
             modinfos.append(modinfo)
 
         return modinfos
 
+    def getEquivalenceKey(self):
+        """
+        All ImportsBuildTargets with the same configuration are equivalent.
+        """
+        return self._makeEquivalenceKey()
+
     def getBuildNotRequiredMsg(self):
         return 'All import modules are already up to date.'
 
+    def _refreshSourceOntologies(self):
+        """
+        If requested, updates the local copies of all source ontologies that
+        are used for building import modules if the remote source ontologies
+        have changed.  This is only done once.
+        """
+        if not(self.refresh_sources) or self.sources_refreshed:
+            return
+
+        refreshed = set()
+        for row in self.tablerows:
+            if row['abs_tfilepath'] != '' and row['IRI'] not in refreshed:
+                logger.info(
+                    'Checking for updates of the source ontology '
+                    '{0}.'.format(row['IRI'])
+                )
+                self.mbuilder.retrieveSourceOntology(row['IRI'], refresh=True)
+                refreshed.add(row['IRI'])
+
+        self.sources_refreshed = True
+
     def _isBuildRequired(self):
         """
         Returns True if one or more of the import modules needs to be compiled.
         """
+        # Updated source ontologies require the affected modules to be built
+        # again, so refresh the source ontologies first.
+        self._refreshSourceOntologies()
+
         for row in self.tablerows:
-            if self.mbuilder.isBuildNeeded(row['IRI'], row['abs_tfilepath']):
+            if self.mbuilder.isBuildNeeded(
+                row['IRI'], row['abs_tfilepath'], row['modname']
+            ):
                 return True
 
         return False
@@ -220,20 +517,147 @@ class ImportsBuildTarget(BuildTargetWithConfig):
             if not(os.path.isdir(self.outputdir)):
                 self._makeDirs(self.outputdir)
 
+        self._refreshSourceOntologies()
+
+        # Get the rows for all modules that need to be built.
+        buildrows = []
         for row in self.tablerows:
             termsfile_path = row['abs_tfilepath']
 
             if termsfile_path != '':
-                if self.mbuilder.isBuildNeeded(row['IRI'], termsfile_path):
+                if self.mbuilder.isBuildNeeded(
+                    row['IRI'], termsfile_path, row['modname']
+                ):
+                    buildrows.append(row)
+                else:
+                    logger.info(
+                        'The {0} ({1}) import module is already up to '
+                        'date.'.format(row['name'], row['IRI'])
+                    )
+
+        # Build all modules that use the same source ontology one after the
+        # other, so that each source ontology only needs to stay loaded until
+        # its modules are built.
+        buildrows = self._groupRowsBySource(buildrows)
+
+        if self.imports_threads > 1 and len(buildrows) > 1:
+            self._buildModulesParallel(buildrows)
+        else:
+            sourcepool = _SourceOntologyPool(buildrows)
+            try:
+                for row in buildrows:
                     logger.info(
                         'Building the {0} ({1}) import module.'.format(
                             row['name'], row['IRI']
                         )
                     )
-                    self.mbuilder.buildModule(row['IRI'], termsfile_path)
-                else:
+                    self._buildModule(self.mbuilder, row, sourcepool)
+            finally:
+                sourcepool.close()
+
+    def _groupRowsBySource(self, buildrows):
+        """
+        Returns a copy of a list of imports source rows in which all rows with
+        the same source ontology IRI are next to each other.  Otherwise, the
+        order of the rows is preserved.
+        """
+        rowgroups = {}
+        iristrs = []
+        for row in buildrows:
+            if row['IRI'] not in rowgroups:
+                rowgroups[row['IRI']] = []
+                iristrs.append(row['IRI'])
+
+            rowgroups[row['IRI']].append(row)
+
+        grouped = []
+        for iristr in iristrs:
+            grouped.extend(rowgroups[iristr])
+
+        return grouped
+
+    def _buildModule(self, mbuilder, row, sourcepool):
+        """
+        Builds the import module for a single imports source row, using a
+        source ontology from a _SourceOntologyPool if the source ontology is
+        needed.
+        """
+        def getSource():
+            return sourcepool.acquire(row['IRI'], mbuilder)
+
+        try:
+            mbuilder.buildModule(
+                row['IRI'], row['abs_tfilepath'], getSource,
+                sourcepool.getLock(row['IRI']), row['modname']
+            )
+        finally:
+            sourcepool.release(row['IRI'])
+
+    def _buildModulesParallel(self, buildrows):
+        """
+        Builds import modules with a pool of worker threads.  Each worker uses
+        its own ImportModuleBuilder.  Source ontologies are loaded into their
+        own ontology managers and are shared by all modules that use them (see
+        _SourceOntologyPool).  Ontology managers are not thread safe, so
+        modules that use the same source ontology are extracted one at a time,
+        but modules from different source ontologies are extracted in
+        parallel.  Source ontologies are downloaded in parallel, but the number
+        of source ontologies that are loaded at the same time is limited by the
+        estimated memory they need (see _MemoryLimiter).  The log messages for
+        each module are written together once the module is finished.  If a
+        module fails to build, no new modules are started, and once all
+        running builds have finished, the exception from the failed module
+        that comes first in buildrows is raised.
+
+        buildrows: The imports source rows of the modules to build.  All rows
+            with the same source ontology must be next to each other, which
+            ensures that a worker that waits for memory never prevents the
+            modules of an already loaded source ontology from being built.
+        """
+        rowqueue = list(enumerate(buildrows))
+        errors = []
+        lock = threading.Lock()
+        memlimiter = _MemoryLimiter(
+            Runtime.getRuntime().maxMemory() * SOURCE_MEMORY_FRACTION
+        )
+        sourcepool = _SourceOntologyPool(buildrows, memlimiter)
+
+        def worker():
+            mbuilder = self._createModuleBuilder(show_progress=False)
+
+            while True:
+                with lock:
+                    if len(errors) > 0 or len(rowqueue) == 0:
+                        return
+                    index, row = rowqueue.pop(0)
+
+                startLogGroup()
+                try:
                     logger.info(
-                        'The {0} ({1}) import module is already up to '
-                        'date.'.format(row['name'], row['IRI'])
+                        'Building the {0} ({1}) import module.'.format(
+                            row['name'], row['IRI']
+                        )
                     )
-
+                    self._buildModule(mbuilder, row, sourcepool)
+                except:
+                    with lock:
+                        errors.append((index, sys.exc_info()))
+                finally:
+                    endLogGroup()
+
+        workers = []
+        for cnt in range(min(self.imports_threads, len(buildrows))):
+            wthread = threading.Thread(target=worker)
+            wthread.daemon = True
+            wthread.start()
+            workers.append(wthread)
+
+        for wthread in workers:
+            wthread.join()
+
+        sourcepool.close()
+
+        if len(errors) > 0:
+            errors.sort(key=lambda error: error[0])
+            exc_info = errors[0][1]
+            raise exc_info[0], exc_info[1], exc_info[2]
@@ -0,0 +1,346 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a class, InferenceCache, that stores the results of reasoning (see
+# InferredAxiomAdder.computeInferences()) from previous runs, so that the
+# reasoner does not need to run again if neither the input axioms nor the
+# reasoning settings have changed.  Cache entries are keyed by a fingerprint
+# of the axioms in the ontology's imports closure, the reasoning settings, and
+# the SHA-1 hashes of any other input files (e.g., an excluded types file).
+# The axiom fingerprint does not depend on the order of the axioms, so it only
+# changes if the axioms themselves change.
+#
+# Each cache entry consists of a small JSON record and one gzip-compressed OWL
+# functional syntax document for each of the axiom sets of the results.  Only
+# the most recently used entries are kept.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import os
+import json
+import hashlib
+import threading
+from ontopilot import logger
+from build_manifest import getFileHash
+from inferred_axiom_adder import InferenceResults
+
+# Java imports.
+from java.io import File, FileInputStream, FileOutputStream
+from java.io import IOException as JavaIOException
+from java.util import HashSet
+from java.util.zip import GZIPInputStream, GZIPOutputStream
+from org.semanticweb.owlapi.apibinding import OWLManager
+from org.semanticweb.owlapi.model import OWLOntologyCreationException
+from org.semanticweb.owlapi.model import OWLOntologyStorageException
+from org.semanticweb.owlapi.formats import FunctionalSyntaxDocumentFormat
+
+
+# The version of the cache record format.  This should be incremented whenever
+# changes to OntoPilot would change the results of reasoning, so that all
+# cached results are discarded.
+CACHE_VERSION = 1
+
+# The maximum number of cache entries to keep.
+MAX_ENTRIES = 4
+
+# The names of the InferenceResults attributes that are stored in the cache.
+RESULT_PARTS = (
+    'inverse_axioms', 'inferred_axioms', 'redundant_axioms',
+    'import_redundant_axioms'
+)
+
+
+def _getAxiomHash(axiom):
+    """
+    Returns the SHA-1 hash of an axiom's string representation as an integer.
+    """
+    return int(
+        hashlib.sha1(axiom.toString().encode('utf-8')).hexdigest(), 16
+    )
+
+
+def getAxiomsFingerprint(owlont, ignore_annotations=False):
+    """
+    Returns a fingerprint of the axioms of an OWL API ontology.  The
+    fingerprint is the sum, modulo 2^160, of the SHA-1 hashes of all axioms,
+    along with the number of axioms, so it does not depend on the order in
+    which the ontology stores its axioms.
+
+    owlont: An OWL API ontology.
+    ignore_annotations: If True, annotation axioms (e.g., labels and
+        definitions) are not included in the fingerprint.  They do not affect
+        the results of reasoning unless labels are used to identify entities.
+    """
+    total = 0
+    axiomcnt = 0
+    for axiom in owlont.getAxioms():
+        if ignore_annotations and axiom.isAnnotationAxiom():
+            continue
+
+        total += _getAxiomHash(axiom)
+        axiomcnt += 1
+
+    return '{0:040x}-{1}'.format(total % (1 << 160), axiomcnt)
+
+
+def getClosureFingerprint(ontology, ignore_annotations=False):
+    """
+    Returns a fingerprint of the axioms in an ontology's imports closure.  The
+    axioms of the main ontology and of each imported ontology, including
+    indirectly imported ontologies, are fingerprinted separately, because the
+    results of reasoning depend on which ontology each axiom is in.
+
+    ontology: An Ontology object.
+    ignore_annotations: As for getAxiomsFingerprint().
+    """
+    owlont = ontology.getOWLOntology()
+
+    import_fingerprints = sorted(
+        getAxiomsFingerprint(importont, ignore_annotations)
+        for importont in owlont.getImportsClosure()
+        if not(importont.equals(owlont))
+    )
+
+    return hashlib.sha1(
+        json.dumps([
+            getAxiomsFingerprint(owlont, ignore_annotations),
+            import_fingerprints
+        ]).encode('utf-8')
+    ).hexdigest()
+
+
+class InferenceCache:
+    """
+    Stores and retrieves InferenceResults.  All methods are thread safe.
+    """
+    def __init__(self, cachedir):
+        """
+        cachedir: The directory in which to store cached results.  It will be
+            created when results are first stored, if needed.
+        """
+        self.cachedir = cachedir
+        self.lock = threading.Lock()
+
+    def _getFileHashes(self, inputpaths):
+        """
+        Returns a dictionary that maps each input file path to the SHA-1 hash
+        of its contents, or to None if the file does not exist.
+        """
+        hashes = {}
+        for inputpath in inputpaths:
+            if os.path.isfile(inputpath):
+                hashes[inputpath] = getFileHash(inputpath)
+            else:
+                hashes[inputpath] = None
+
+        return hashes
+
+    def _getEntryPaths(self, key):
+        """
+        Returns a tuple, (record path, {result part: axioms document path}),
+        for a cache entry.
+        """
+        basepath = os.path.join(self.cachedir, key)
+        partpaths = dict(
+            (part, '{0}-{1}.ofn.gz'.format(basepath, part))
+            for part in RESULT_PARTS
+        )
+
+        return (basepath + '.json', partpaths)
+
+    def _normalize(self, value):
+        """
+        Converts a value to the form in which it is stored in a JSON record
+        (e.g., tuples become lists), so that recorded and current values can be
+        compared directly.
+        """
+        return json.loads(json.dumps(value, sort_keys=True))
+
+    def _loadAxioms(self, ontman, axiomspath):
+        """
+        Returns a set of all axioms in a compressed axioms document.
+        """
+        finputstream = GZIPInputStream(FileInputStream(File(axiomspath)))
+        try:
+            owlont = ontman.loadOntologyFromOntologyDocument(finputstream)
+        finally:
+            finputstream.close()
+
+        return set(owlont.getAxioms())
+
+    def _saveAxioms(self, ontman, axioms, axiomspath):
+        """
+        Writes a set of axioms to a compressed axioms document.
+        """
+        owlont = ontman.createOntology()
+        axiomset = HashSet(len(axioms))
+        for axiom in axioms:
+            axiomset.add(axiom)
+        ontman.addAxioms(owlont, axiomset)
+
+        # Do not let the writer add declarations for the entities in the
+        # axioms' signature; they would be added to the ontology along with the
+        # cached axioms.
+        docformat = FunctionalSyntaxDocumentFormat()
+        docformat.setAddMissingTypes(False)
+
+        foutputstream = GZIPOutputStream(FileOutputStream(File(axiomspath)))
+        try:
+            ontman.saveOntology(owlont, docformat, foutputstream)
+        finally:
+            foutputstream.close()
+
+    def _readEntry(self, key, record_data):
+        """
+        Returns the InferenceResults of a cache entry, or None if the entry
+        does not exist or does not match record_data.
+        """
+        recordpath, partpaths = self._getEntryPaths(key)
+
+        try:
+            with open(recordpath) as fin:
+                record = json.load(fin)
+
+            for field, value in record_data.iteritems():
+                if record.get(field) != value:
+                    return None
+
+            ontman = OWLManager.createOWLOntologyManager()
+            parts = {}
+            for part in RESULT_PARTS:
+                if record['axioms_hashes'][part] != getFileHash(
+                    partpaths[part]
+                ):
+                    return None
+
+                parts[part] = self._loadAxioms(ontman, partpaths[part])
+
+            # Mark the entry as recently used.
+            os.utime(recordpath, None)
+        except (
+            IOError, OSError, ValueError, KeyError, JavaIOException,
+            OWLOntologyCreationException
+        ):
+            return None
+
+        return InferenceResults(**parts)
+
+    def _writeEntry(self, key, record_data, results):
+        """
+        Stores InferenceResults in a new cache entry and removes the least
+        recently used entries if there are too many.  Failure to store the
+        results is not an error; the reasoner will simply run again next time.
+        """
+        recordpath, partpaths = self._getEntryPaths(key)
+
+        try:
+            if not(os.path.isdir(self.cachedir)):
+                os.makedirs(self.cachedir)
+
+            # Write the axioms documents first, so that a record is never
+            # written without its axioms.
+            ontman = OWLManager.createOWLOntologyManager()
+            axioms_hashes = {}
+            for part in RESULT_PARTS:
+                self._saveAxioms(
+                    ontman, getattr(results, part), partpaths[part]
+                )
+                axioms_hashes[part] = getFileHash(partpaths[part])
+
+            record = dict(record_data)
+            record['axioms_hashes'] = axioms_hashes
+
+            with open(recordpath, 'w') as fout:
+                json.dump(record, fout, indent=1, sort_keys=True)
+
+            self._removeOldEntries()
+        except (
+            IOError, OSError, JavaIOException, OWLOntologyCreationException,
+            OWLOntologyStorageException
+        ) as err:
+            logger.debug(
+                'Unable to cache the inferred axioms: {0}'.format(err)
+            )
+
+    def _removeOldEntries(self):
+        """
+        Removes the least recently used cache entries so that at most
+        MAX_ENTRIES entries are kept.
+        """
+        records = [
+            os.path.join(self.cachedir, fname)
+            for fname in os.listdir(self.cachedir) if fname.endswith('.json')
+        ]
+        records.sort(key=os.path.getmtime, reverse=True)
+
+        for recordpath in records[MAX_ENTRIES:]:
+            key = os.path.splitext(os.path.basename(recordpath))[0]
+            partpaths = self._getEntryPaths(key)[1]
+
+            # Remove the record first, so that an entry is never left with a
+            # record but without its axioms.
+            for fpath in [recordpath] + partpaths.values():
+                if os.path.exists(fpath):
+                    os.remove(fpath)
+
+    def getResults(
+        self, ontology, settings, inputpaths, compute,
+        ignore_annotations=False
+    ):
+        """
+        Returns the InferenceResults for an ontology.  If there are no cached
+        results for the ontology's axioms, settings, and input files, the
+        results are created by calling compute() and then stored in the
+        cache.
+
+        ontology: The Ontology object to reason over.  It must not yet have
+            been modified by reasoning (e.g., by adding inverse property
+            assertions).
+        settings: A JSON-compatible dictionary of all settings that affect
+            the results of reasoning.
+        inputpaths: A list of the paths of any input files, other than the
+            ontology, that affect the results of reasoning.
+        compute: A function that returns new InferenceResults.
+        ignore_annotations: Whether annotation axioms can be ignored when
+            fingerprinting the ontology (see getAxiomsFingerprint()).
+        """
+        record_data = self._normalize({
+            'version': CACHE_VERSION,
+            'fingerprint': getClosureFingerprint(ontology, ignore_annotations),
+            'settings': settings,
+            'input_hashes': self._getFileHashes(inputpaths)
+        })
+        key = hashlib.sha1(
+            json.dumps(record_data, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        with self.lock:
+            results = self._readEntry(key, record_data)
+
+        if results is not None:
+            logger.info(
+                'Using cached inferred axioms; the reasoner does not need to '
+                'run.'
+            )
+            return results
+
+        results = compute()
+
+        with self.lock:
+            self._writeEntry(key, record_data, results)
+
+        return results
@@ -21,6 +21,8 @@ from ontopilot import logger
 from ontology import Ontology
 from buildtarget import BuildTargetWithConfig
 from inferred_axiom_adder import InferredAxiomAdder
+from inference_cache import InferenceCache
+from modified_onto_buildtarget import INFERENCE_CACHE_DIR
 
 # Java imports.
 from java.lang import System as JavaSystem
@@ -52,6 +54,8 @@ class InferencePipelineBuildTarget(BuildTargetWithConfig):
 
         self._checkInputFile()
 
+        self._setReasonerOptions(args)
+
     def _checkInputFile(self):
         """
         Verifies that the user-specified input file exists.
@@ -70,6 +74,29 @@ class InferencePipelineBuildTarget(BuildTargetWithConfig):
         """
         return True
 
+    def _runReasoner(self, sourceont):
+        """
+        Runs the reasoner on the source ontology and returns the
+        InferenceResults.
+        """
+        logger.info('Running reasoner and generating inferred axioms...')
+
+        iaa = InferredAxiomAdder(sourceont, self.config.getReasonerStr())
+        if self.config.getExcludedTypesFile() != '':
+            iaa.loadExcludedTypes(self.config.getExcludedTypesFile())
+
+        results = iaa.computeInferences(
+            self.config.getInferenceTypeStrs(),
+            self.config.getAnnotateInferred(),
+            self.config.getPreprocessInverses()
+        )
+
+        # The reasoner is no longer needed, and it would otherwise process the
+        # inferred axioms as they are added to the ontology.
+        sourceont.getReasonerManager().disposeReasoners()
+
+        return results
+
     def _run(self):
         """
         Runs the inferencing pipeline.
@@ -81,16 +108,35 @@ class InferencePipelineBuildTarget(BuildTargetWithConfig):
         else:
             sourceont = Ontology(JavaSystem.in)
 
-        logger.info('Running reasoner and adding inferred axioms...')
-        inf_types = self.config.getInferenceTypeStrs()
-        annotate_inferred = self.config.getAnnotateInferred()
-        preprocess_inverses = self.config.getPreprocessInverses()
-        iaa = InferredAxiomAdder(sourceont, self.config.getReasonerStr())
-        if self.config.getExcludedTypesFile() != '':
-            iaa.loadExcludedTypes(self.config.getExcludedTypesFile())
-        iaa.addInferredAxioms(
-            inf_types, annotate_inferred, preprocess_inverses
-        )
+        excluded_types_file = self.config.getExcludedTypesFile()
+        settings = {
+            'reasoner': self.config.getReasonerStr(),
+            'inferences': self.config.getInferenceTypeStrs(),
+            'annotate_inferred': self.config.getAnnotateInferred(),
+            'preprocess_inverses': self.config.getPreprocessInverses(),
+            'excluded_types_file': excluded_types_file
+        }
+
+        # Cache the inferred axioms in the project's build directory, if there
+        # is one, so that repeated runs on the same input do not need to run
+        # the reasoner.
+        builddir = self.config.getBuildDir()
+        if os.path.isdir(builddir):
+            inputpaths = []
+            if excluded_types_file != '':
+                inputpaths.append(excluded_types_file)
+
+            cache = InferenceCache(os.path.join(builddir, INFERENCE_CACHE_DIR))
+            inferences = cache.getResults(
+                sourceont, settings, inputpaths,
+                lambda: self._runReasoner(sourceont),
+                ignore_annotations=(excluded_types_file == '')
+            )
+        else:
+            inferences = self._runReasoner(sourceont)
+
+        logger.info('Adding inferred axioms...')
+        inferences.applyTo(sourceont)
 
         # Write the ontology to the output file or stdout.
         format_str = self.config.getOutputFormat()
@@ -20,14 +20,16 @@
 # Python imports.
 from __future__ import unicode_literals
 import os.path
+from collections import deque
 from ontopilot import logger
 from basictimer import BasicTimer
 from tablereaderfactory import TableReaderFactory
 from tablereader import TableRowError
 from ontopilot import TRUE_STRS
+from reasoner_manager import reasonerTimeLimit
 
 # Java imports.
-from java.util import HashSet
+from java.util import HashSet, Collections
 from java.lang import UnsupportedOperationException
 from org.semanticweb.owlapi.model import IRI
 from org.semanticweb.owlapi.model.parameters import Imports as ImportsEnum
@@ -37,11 +39,10 @@ from org.semanticweb.owlapi.util import InferredSubDataPropertyAxiomGenerator
 from org.semanticweb.owlapi.util import InferredSubObjectPropertyAxiomGenerator
 from org.semanticweb.owlapi.util import InferredClassAssertionAxiomGenerator
 from org.semanticweb.owlapi.util import InferredDisjointClassesAxiomGenerator
-from org.semanticweb.owlapi.util import InferredOntologyGenerator
 from org.semanticweb.owlapi.util import InferredInverseObjectPropertiesAxiomGenerator
 from org.semanticweb.owlapi.util import InferredPropertyAssertionGenerator
 from org.semanticweb.owlapi.model import AxiomType
-from org.semanticweb.owlapi.model.parameters import Imports
+from org.semanticweb.owlapi.reasoner import InferenceType
 
 
 # Strings for identifying supported types of inferences for generating inferred
@@ -52,6 +53,24 @@ INFERENCE_TYPES = (
     'property values'
 )
 
+# The kinds of inferences that a reasoner must compute to generate each type of
+# inferred axioms.
+INFERENCE_PRECOMPUTE_TYPES = {
+    'subclasses': (InferenceType.CLASS_HIERARCHY,),
+    'subdata properties': (InferenceType.DATA_PROPERTY_HIERARCHY,),
+    'subobject properties': (InferenceType.OBJECT_PROPERTY_HIERARCHY,),
+    'types': (InferenceType.CLASS_ASSERTIONS,),
+    'equivalent classes': (InferenceType.CLASS_HIERARCHY,),
+    'disjoint classes': (
+        InferenceType.CLASS_HIERARCHY, InferenceType.DISJOINT_CLASSES
+    ),
+    'inverse object properties': (InferenceType.OBJECT_PROPERTY_HIERARCHY,),
+    'property values': (
+        InferenceType.OBJECT_PROPERTY_ASSERTIONS,
+        InferenceType.DATA_PROPERTY_ASSERTIONS
+    )
+}
+
 
 class ExcludedTypeSpecError(TableRowError):
     """
@@ -68,6 +87,57 @@ class ExcludedTypeSpecError(TableRowError):
         RuntimeError.__init__(self, new_msg)
 
 
+class InferenceResults:
+    """
+    Stores the results of running a reasoner on an ontology (see
+    InferredAxiomAdder.computeInferences()).  The results only depend on the
+    logical content of the ontology's imports closure, so they can be applied
+    to any ontology with the same content: both to the ontology itself and to
+    a version of it with its imports merged into the main ontology.
+    """
+    def __init__(
+        self, inverse_axioms, inferred_axioms, redundant_axioms,
+        import_redundant_axioms
+    ):
+        """
+        inverse_axioms: A set of the inverse property assertions that were
+            added to the ontology prior to reasoning.
+        inferred_axioms: A set of the inferred axioms to add.
+        redundant_axioms: A set of the redundant "subclass of" axioms from the
+            main ontology.
+        import_redundant_axioms: A set of the redundant "subclass of" axioms
+            from the main ontology's direct imports.  Only the direct imports
+            are included because they are the ontologies whose axioms are
+            merged into the main ontology when its imports are merged (see
+            Ontology.mergeOntology()).
+        """
+        self.inverse_axioms = inverse_axioms
+        self.inferred_axioms = inferred_axioms
+        self.redundant_axioms = redundant_axioms
+        self.import_redundant_axioms = import_redundant_axioms
+
+    def applyTo(self, ontology, merged=False):
+        """
+        Adds the inverse property assertions and inferred axioms to an
+        ontology and removes the redundant "subclass of" axioms.  No reasoner
+        is needed.
+
+        ontology: An Ontology object.
+        merged: Whether the ontology's imports have been merged into it.  If
+            so, the redundant "subclass of" axioms from the imported ontologies
+            are also removed.
+        """
+        owlont = ontology.getOWLOntology()
+        ontman = ontology.ontman
+
+        ontman.addAxioms(owlont, self.inverse_axioms)
+        ontman.addAxioms(owlont, self.inferred_axioms)
+
+        ontman.removeAxioms(owlont, self.redundant_axioms)
+        if merged:
+            ontman.removeAxioms(owlont, self.import_redundant_axioms)
+
+
 class InferredAxiomAdder:
     """
     Provides a high-level interface for generating inferred axioms and adding
@@ -241,7 +311,37 @@ class InferredAxiomAdder:
 
         return generators
 
-    def _getRedundantSubclassOfAxioms(self, owlont):
+    def _getDirectSuperclasses(self):
+        """
+        Walks the reasoner's class hierarchy once, from the top node down, and
+        returns a dictionary that maps each class in the hierarchy to a set of
+        its direct superclasses (i.e., all classes in its direct superclass
+        nodes).  Each node of the hierarchy is expanded only once, no matter
+        how many parents it has.
+        """
+        direct_supers = {}
+
+        topnode = self.reasoner.getTopClassNode()
+        visited = set([topnode])
+        queue = deque([topnode])
+        while len(queue) > 0:
+            node = queue.popleft()
+            parents = list(node.getEntities())
+
+            subnodes = self.reasoner.getSubClasses(
+                node.getRepresentativeElement(), True
+            ).getNodes()
+            for subnode in subnodes:
+                for subclass in subnode.getEntities():
+                    direct_supers.setdefault(subclass, set()).update(parents)
+
+                if subnode not in visited:
+                    visited.add(subnode)
+                    queue.append(subnode)
+
+        return direct_supers
+
+    def _getRedundantSubclassOfAxioms(self, owlont, direct_supers=None):
         """
         Returns a set of all "subclass of" axioms in an ontology that are
         redundant.  In this context, "redundant" means that a class is asserted
@@ -251,23 +351,40 @@ class InferredAxiomAdder:
         situation can easily arise after inferred "subclass of" axioms are
         added to an ontology.
 
+        Rather than querying the reasoner for the direct superclasses of each
+        class separately, this walks the reasoner's class hierarchy once (see
+        _getDirectSuperclasses()) and then checks all "subclass of" axioms in
+        a single pass.
+
         owlont: An OWL API ontology object.
+        direct_supers (optional): The result of _getDirectSuperclasses(), if
+            it was already computed.  It is updated with any classes that are
+            not part of the reasoner's class hierarchy.
         """
         redundants = set()
 
-        for classobj in owlont.getClassesInSignature():
-            # Get the set of direct superclasses for this class.
-            supersset = self.reasoner.getSuperClasses(classobj, True).getFlattened()
-
-            # Examine each "subclass of" axiom for this class.  If the
-            # superclass asserted in an axiom is not a direct superclass, then
-            # the axiom can be considered redundant.
-            axioms = owlont.getSubClassAxiomsForSubClass(classobj)
-            for axiom in axioms:
-                superclass = axiom.getSuperClass()
-                if not(superclass.isAnonymous()):
-                    if not(supersset.contains(superclass.asOWLClass())):
-                        redundants.add(axiom)
+        if direct_supers is None:
+            direct_supers = self._getDirectSuperclasses()
+
+        for axiom in owlont.getAxioms(AxiomType.SUBCLASS_OF):
+            subclass = axiom.getSubClass()
+            superclass = axiom.getSuperClass()
+            if subclass.isAnonymous() or superclass.isAnonymous():
+                continue
+
+            subclass = subclass.asOWLClass()
+            supers = direct_supers.get(subclass)
+            if supers is None:
+                # The class is not part of the reasoner's class hierarchy
+                # (e.g., because it was added after the reasoner was
+                # created), so query the reasoner directly.
+                supers = self.reasoner.getSuperClasses(
+                    subclass, True
+                ).getFlattened()
+                direct_supers[subclass] = supers
+
+            if not(superclass.asOWLClass() in supers):
+                redundants.add(axiom)
 
         return redundants
 
@@ -277,6 +394,7 @@ class InferredAxiomAdder:
         properties) and all property assertions and negative property
         assertions using those properties, then materializes the inverse
         property assertions.  This is all done without using a reasoner.
+        Returns a set of the new axioms.
         """
         owlont = self.ont.getOWLOntology()
 
@@ -342,10 +460,7 @@ class InferredAxiomAdder:
                     )
                 )
 
-        self.ont.ontman.addAxioms(owlont, new_axioms)
-
         # Do the same thing for all negative object property assertions.
-        new_axioms.clear()
         for axiom in npa_axioms:
             pexp = axiom.getProperty()
             inv_pexp = None
@@ -366,6 +481,8 @@ class InferredAxiomAdder:
 
         self.ont.ontman.addAxioms(owlont, new_axioms)
 
+        return new_axioms
+
     def _getExcludedTypesFromFile(self, etfpath):
         """
         Parses a tabular data file containing information about the classes to
@@ -430,51 +547,99 @@ class InferredAxiomAdder:
         self.excluded_types.clear()
         self.excluded_types.update(self._getExcludedTypesFromFile(etfpath))
 
-    def _getExcludedTypeAssertions(self, owlont):
+    def _isExcludedTypeAssertion(self, axiom):
         """
-        Returns the set of type assertion axioms in owlont that reference types
-        in self.excluded_types.
+        Returns True if axiom is a type assertion axiom that references a type
+        in self.excluded_types; returns False otherwise.
 
-        owlont: An OWL API ontology object.
+        axiom: An OWL API axiom object.
         """
-        excluded_axioms = set()
+        if not(axiom.isOfType(AxiomType.CLASS_ASSERTION)):
+            return False
 
-        axioms = owlont.getAxioms(AxiomType.CLASS_ASSERTION, Imports.INCLUDED)
-        for axiom in axioms:
-            cexp = axiom.getClassExpression()
-            if not(cexp.isAnonymous()):
-                if cexp.asOWLClass() in self.excluded_types:
-                    excluded_axioms.add(axiom)
+        cexp = axiom.getClassExpression()
 
-        return excluded_axioms
+        return (
+            not(cexp.isAnonymous()) and
+            cexp.asOWLClass() in self.excluded_types
+        )
 
-    def addInferredAxioms(self, inference_types, annotate=False, add_inverses=False):
+    def _getInferredAxioms(
+        self, generators, oldaxioms, check_types, annotate
+    ):
         """
-        Runs a reasoner on this ontology and adds the inferred axioms.
+        Generates inferred axioms and returns a Java set of the axioms that
+        should be added to the ontology.  Each generated axiom is examined only
+        once, as soon as it is generated: it is dropped if it is explicitly
+        stated in the ontology (or its imports closure), if it is trivial
+        (e.g., "subclass of owl:Thing"), or if it is an excluded type
+        assertion; otherwise, it is annotated, if requested, and kept.
+
+        generators: A list of AxiomGenerators.
+        oldaxioms: A Java set of the axioms in the ontology (and its imports
+            closure) prior to reasoning.
+        check_types: Whether to check for excluded type assertions.
+        annotate: Whether to annotate the kept axioms as inferred.
+        """
+        df = self.ont.df
 
-        inference_types: A list of strings specifying the kinds of inferred
-            axioms to generate.  Valid values are detailed in the sample
-            configuration file.
-        annotate: If True, annotate inferred axioms to mark them as inferred.
-        add_inverses: If True, inverse property assertions will be explicitly
-            added to the ontology *prior* to running the reasoner.  This is
-            useful for cases in which a reasoner that does not support inverses
-            must be used (e.g., for runtime considerations) on an ontology with
-            inverse property axioms.
+        trivial_entities = HashSet([
+            df.getOWLThing(), df.getOWLNothing(),
+            df.getOWLTopDataProperty(), df.getOWLTopObjectProperty(),
+            df.getOWLBottomDataProperty(), df.getOWLBottomObjectProperty()
+        ])
+        check_types = check_types and len(self.excluded_types) > 0
+
+        if annotate:
+            annotprop = df.getOWLAnnotationProperty(self.INFERRED_ANNOT_IRI)
+            annots = HashSet([
+                df.getOWLAnnotation(annotprop, df.getOWLLiteral('true'))
+            ])
+
+        newaxioms = HashSet()
+        for generator in generators:
+            for axiom in generator.createAxioms(df, self.reasoner):
+                if oldaxioms.contains(axiom):
+                    continue
+
+                # Build each axiom's signature only once rather than once for
+                # each trivial entity.
+                if not(Collections.disjoint(
+                    axiom.getSignature(), trivial_entities
+                )):
+                    continue
+
+                if check_types and self._isExcludedTypeAssertion(axiom):
+                    continue
+
+                if annotate:
+                    axiom = axiom.getAnnotatedAxiom(annots)
+
+                newaxioms.add(axiom)
+
+        return newaxioms
+
+    def computeInferences(
+        self, inference_types, annotate=False, add_inverses=False
+    ):
+        """
+        Runs a reasoner on this ontology and returns an InferenceResults
+        object with the inferred axioms, which can then be applied to this
+        ontology or to a merged version of it.  This ontology is only modified
+        if add_inverses is True.  Arguments are as for addInferredAxioms().
         """
         timer = BasicTimer()
 
         owlont = self.ont.getOWLOntology()
-        ontman = self.ont.ontman
-        df = self.ont.df
         oldaxioms = owlont.getAxioms(ImportsEnum.INCLUDED)
 
+        inverse_axioms = set()
         if add_inverses:
             logger.info(
                 'Generating inverse property assertions...'
             )
             timer.start()
-            self._addInversePropAssertions()
+            inverse_axioms = self._addInversePropAssertions()
             logger.info(
                 'Inverse property assertions generated in {0} s.'.format(
                     timer.stop()
@@ -501,81 +666,102 @@ class InferredAxiomAdder:
                 'before inferred axioms can be added to the ontology.'
             )
 
+        # Compute everything the axiom generators will ask for in one step
+        # before querying the reasoner.
+        logger.info('Precomputing inferences...')
+        timer.start()
+
+        precompute_types = []
+        for inference_type in inference_types:
+            precompute_types.extend(
+                INFERENCE_PRECOMPUTE_TYPES.get(inference_type.lower(), ())
+            )
+        self.ont.getReasonerManager().precomputeInferences(
+            self.reasoner_str, precompute_types
+        )
+
+        logger.info(
+            'Inferences precomputed in {0} s.'.format(timer.stop())
+        )
+
         # The general approach is to first get the set of all axioms in the
         # ontology prior to reasoning so that this set can be used for
-        # de-duplication later.  Then, inferred axioms are added to a new
-        # ontology.  This makes it easy to compare explicit and inferred
-        # axioms and to annotate inferred axioms.  Trivial axioms are removed
-        # from the inferred axiom set, and the inferred axioms are merged into
-        # the main ontology.
+        # de-duplication.  Then, each inferred axiom is filtered (and
+        # annotated, if needed) as soon as it is generated.  Finally, the
+        # redundant "subclass of" axioms are found.  None of these steps
+        # modifies the ontology, so the reasoner never needs to process
+        # changes.
 
         logger.info(
-            'Generating inferred axioms...'
+            'Generating inferred axioms and removing duplicate, trivial, and '
+            'excluded axioms...'
         )
         timer.start()
 
         generators = self._getGeneratorsList(inference_types)
-        iog = InferredOntologyGenerator(self.reasoner, generators)
-
-        inferredont = ontman.createOntology()
-        iog.fillOntology(self.ont.df, inferredont)
+        with reasonerTimeLimit('generating inferred axioms'):
+            newaxioms = self._getInferredAxioms(
+                generators, oldaxioms, 'types' in inference_types, annotate
+            )
 
         logger.info('Inferred axioms generated in {0} s.'.format(timer.stop()))
 
-        logger.info(
-            'Cleaning up redundant, trivial, and excluded axioms and merging '
-            'with the main ontology...'
+        # Find the redundant "subclass of" axioms in the main ontology and, in
+        # case the imports get merged, in the imported ontologies.  This is
+        # only necessary if we inferred the class hierarchy.
+        redundants = set()
+        import_redundants = set()
+        if 'subclasses' in inference_types:
+            logger.info('Finding redundant "subclass of" axioms...')
+            timer.start()
+
+            with reasonerTimeLimit('retrieving the class hierarchy'):
+                direct_supers = self._getDirectSuperclasses()
+            redundants = self._getRedundantSubclassOfAxioms(
+                owlont, direct_supers
+            )
+            for importont in owlont.getImports():
+                import_redundants.update(
+                    self._getRedundantSubclassOfAxioms(
+                        importont, direct_supers
+                    )
+                )
+
+            logger.info(
+                'Redundant axioms found in {0} s.'.format(timer.stop())
+            )
+
+        return InferenceResults(
+            inverse_axioms, newaxioms, redundants, import_redundants
         )
-        timer.start()
 
-        # Delete axioms in the inferred set that are explicitly stated in the
-        # source ontology (or its imports closure).
-        delaxioms = HashSet()
-        for axiom in inferredont.getAxioms():
-            if oldaxioms.contains(axiom):
-                delaxioms.add(axiom)
-        ontman.removeAxioms(inferredont, delaxioms)
+    def addInferredAxioms(self, inference_types, annotate=False, add_inverses=False):
+        """
+        Runs a reasoner on this ontology and adds the inferred axioms.
 
-        # Delete trivial axioms (e.g., subclass of owl:Thing, etc.).
-        trivial_entities = [
-            df.getOWLThing(), df.getOWLNothing(),
-            df.getOWLTopDataProperty(), df.getOWLTopObjectProperty(),
-            df.getOWLBottomDataProperty(), df.getOWLBottomObjectProperty()
-        ]
-        delaxioms.clear()
-        for axiom in inferredont.getAxioms():
-            for trivial_entity in trivial_entities:
-                if axiom.containsEntityInSignature(trivial_entity):
-                    delaxioms.add(axiom)
-                    break
-        ontman.removeAxioms(inferredont, delaxioms)
-
-        # Find and remove excluded class/type assertions.  This is only
-        # necessary if we added inferred class assertions.
-        if 'types' in inference_types:
-            excluded = self._getExcludedTypeAssertions(inferredont)
-            ontman.removeAxioms(inferredont, excluded)
+        inference_types: A list of strings specifying the kinds of inferred
+            axioms to generate.  Valid values are detailed in the sample
+            configuration file.
+        annotate: If True, annotate inferred axioms to mark them as inferred.
+        add_inverses: If True, inverse property assertions will be explicitly
+            added to the ontology *prior* to running the reasoner.  This is
+            useful for cases in which a reasoner that does not support inverses
+            must be used (e.g., for runtime considerations) on an ontology with
+            inverse property axioms.
+        """
+        results = self.computeInferences(
+            inference_types, annotate, add_inverses
+        )
 
-        if annotate:
-            # Annotate all of the inferred axioms.
-            annotprop = df.getOWLAnnotationProperty(self.INFERRED_ANNOT_IRI)
-            annotval = df.getOWLLiteral('true')
-            for axiom in inferredont.getAxioms():
-                annot = df.getOWLAnnotation(annotprop, annotval)
-                newaxiom = axiom.getAnnotatedAxiom(HashSet([annot]))
-                ontman.removeAxiom(inferredont, axiom)
-                ontman.addAxiom(inferredont, newaxiom)
-
-        # Merge the inferred axioms into the main ontology.
-        ontman.addAxioms(owlont, inferredont.getAxioms())
-
-        # Find and remove redundant "subclass of" axioms.  This is only
-        # necessary if we inferred the class hierarchy.
-        if 'subclasses' in inference_types:
-            redundants = self._getRedundantSubclassOfAxioms(owlont)
-            ontman.removeAxioms(owlont, redundants)
+        logger.info(
+            'Merging the inferred axioms with the main ontology and removing '
+            'redundant axioms...'
+        )
+        timer = BasicTimer()
+        timer.start()
+
+        results.applyTo(self.ont)
 
         logger.info(
             'Axiom clean up and merge completed in {0} s.'.format(timer.stop())
         )
-
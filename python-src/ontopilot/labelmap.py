@@ -25,16 +25,81 @@
 # references, client code can optionally supply a root IRI string that will be
 # used to attempt to disambiguate label collisions.
 #
+# Scanning all annotation axioms of large imported ontologies is slow, so
+# LabelMap can optionally cache the labels of each imported ontology document
+# in a small JSON index file.  Index files are stored in a separate directory
+# (typically, inside of a project's build directory), are named by a hash of
+# the document's path, and record a hash of the document's contents.  On later
+# runs, the index is used instead of rescanning the ontology as long as the
+# document has not changed.  This is only done for ontologies loaded from local
+# files, and it is assumed that imported ontologies are not modified after they
+# are loaded.  Label index caching is disabled by default; it can be enabled by
+# calling enableLabelIndexCache().
+#
 
 # Python imports.
 from __future__ import unicode_literals
+import os
+import json
+import hashlib
 import logging
+from build_manifest import getFileHash
 
 # Java imports.
+from java.io import File
 from org.semanticweb.owlapi.model import AxiomType
 from org.semanticweb.owlapi.model import OWLLiteral, IRI
 
 
+# The version of the label index file format.
+LABEL_INDEX_VERSION = 1
+
+# The directory for label index files, or None if label index files should not
+# be used.
+_label_index_dir = None
+
+
+def enableLabelIndexCache(indexdir):
+    """
+    Enables the use of label index cache files for imported ontologies.
+
+    indexdir: The directory in which to store label index files.  It will be
+        created when the first index file is saved, if needed.
+    """
+    global _label_index_dir
+    _label_index_dir = indexdir
+
+def disableLabelIndexCache():
+    """
+    Disables the use of label index cache files for imported ontologies.
+    """
+    global _label_index_dir
+    _label_index_dir = None
+
+def _getOntologyFilePath(owlont):
+    """
+    Returns the local file system path of an OWL API ontology's source
+    document, or None if the ontology was not loaded from a local file.
+    """
+    docIRI = owlont.getOWLOntologyManager().getOntologyDocumentIRI(owlont)
+    if (docIRI is None) or (docIRI.getScheme() != 'file'):
+        return None
+
+    filepath = File(docIRI.toURI()).getAbsolutePath()
+    if not(os.path.isfile(filepath)):
+        return None
+
+    return filepath
+
+def _getLabelIndexPath(filepath):
+    """
+    Returns the path of the label index file for an ontology document.
+    """
+    pathhash = hashlib.sha1(filepath.encode('utf-8')).hexdigest()
+
+    return os.path.join(_label_index_dir, pathhash + '.labels.json')
+
+
 class LabelError(RuntimeError):
     """
     Top-level exception class for all label errors.
@@ -80,6 +145,7 @@ class LabelMap:
         # Register as an observer of the ontology so we can track changes
         # (i.e., adding labels or ontologies to the source ontology).
         self.ontology.registerObserver('label_added', self.notifyLabelAdded)
+        self.ontology.registerObserver('labels_added', self.notifyLabelsAdded)
         self.ontology.registerObserver(
             'ontology_added', self.notifyOntologyAdded
         )
@@ -90,6 +156,14 @@ class LabelMap:
         """
         self.add(labelstr, subjectIRI)
 
+    def notifyLabelsAdded(self, labelinfos):
+        """
+        Responds to 'labels_added' event notifications from the source
+        ontology.
+        """
+        for labelstr, subjectIRI in labelinfos:
+            self.add(labelstr, subjectIRI)
+
     def notifyOntologyAdded(self, added_ont):
         """
         Responds to 'ontology_added' event notifications from the source
@@ -174,7 +248,8 @@ class LabelMap:
     def add(self, label, termIRI):
         """
         Adds an IRI/label pair to this LabelMap.  If the label is already in
-        use in the ontology, a warning is issued.
+        use in the ontology, a warning is issued.  Adding an IRI/label pair
+        that is already in the LabelMap has no effect.
 
         label: A string containing the label text.
         termIRI: An OWl API IRI object.
@@ -182,6 +257,11 @@ class LabelMap:
         if label not in self.lmap:
             self.lmap[label] = termIRI
         else:
+            if label in self.ambiglabels:
+                for labelIRI in self.ambiglabels[label]:
+                    if labelIRI.equals(termIRI):
+                        return
+
             if not(self.lmap[label].equals(termIRI)):
                 self._addAmbiguousLabel(label, termIRI)
                 ontiri_opt = self.ontology.getOWLOntology().getOntologyID().getOntologyIRI()
@@ -221,12 +301,96 @@ class LabelMap:
 
         ontology: An OWL API ontology object.
         """
-        for annotation_axiom in ontology.getAxioms(AxiomType.ANNOTATION_ASSERTION, True):
+        sourceont = self.ontology.getOWLOntology()
+
+        for owlont in ontology.getImportsClosure():
+            # The source ontology is usually modified after it is loaded, so
+            # its labels are never cached.
+            use_index = _label_index_dir is not None
+            if use_index and not(owlont.equals(sourceont)):
+                labels = self._getCachedLabels(owlont)
+            else:
+                labels = self._getOntologyLabels(owlont)
+
+            for label, iristrs in labels.iteritems():
+                for iristr in iristrs:
+                    self.add(label, IRI.create(iristr))
+
+    def _getOntologyLabels(self, owlont):
+        """
+        Scans the label annotations of a single ontology, excluding its
+        imports closure, and returns a dictionary that maps each label to a
+        list of the IRI strings of the entities with that label.  Labels with
+        more than one IRI are ambiguous.
+
+        owlont: An OWL API ontology object.
+        """
+        labels = {}
+
+        for annotation_axiom in owlont.getAxioms(AxiomType.ANNOTATION_ASSERTION):
             avalue = annotation_axiom.getValue()
             aproperty = annotation_axiom.getProperty()
             asubject = annotation_axiom.getSubject()
             if aproperty.isLabel():
                 if isinstance(avalue, OWLLiteral) and isinstance(asubject, IRI):
-                    literalval = avalue.getLiteral()
-                    self.add(literalval, asubject)
+                    iristrs = labels.setdefault(avalue.getLiteral(), [])
+                    iristr = asubject.toString()
+                    if iristr not in iristrs:
+                        iristrs.append(iristr)
+
+        return labels
+
+    def _getCachedLabels(self, owlont):
+        """
+        Returns the labels of a single ontology, excluding its imports
+        closure, in the format returned by _getOntologyLabels().  If the
+        ontology was loaded from a local file, the labels are read from the
+        file's label index, if the index exists and matches the file contents.
+        Otherwise, the labels are obtained by scanning the ontology, and a new
+        label index is saved, if possible.
+
+        owlont: An OWL API ontology object.
+        """
+        filepath = _getOntologyFilePath(owlont)
+        if filepath is None:
+            return self._getOntologyLabels(owlont)
+
+        indexpath = _getLabelIndexPath(filepath)
+        filehash = getFileHash(filepath)
+
+        # Try to use an existing index.
+        try:
+            with open(indexpath) as fin:
+                index = json.load(fin)
+            if (
+                index.get('version') == LABEL_INDEX_VERSION and
+                index.get('sha1') == filehash
+            ):
+                return index['labels']
+        except (IOError, ValueError, KeyError):
+            pass
+
+        labels = self._getOntologyLabels(owlont)
+
+        # Save a new index.  Failure to write the index is not an error; the
+        # ontology will simply be scanned again the next time.
+        index = {
+            'version': LABEL_INDEX_VERSION,
+            'sha1': filehash,
+            'labels': labels
+        }
+        try:
+            if not(os.path.isdir(_label_index_dir)):
+                os.makedirs(_label_index_dir)
+
+            with open(indexpath, 'w') as fout:
+                json.dump(index, fout)
+        except (IOError, OSError) as err:
+            logging.debug(
+                'Unable to write the label index file "{0}": {1}'.format(
+                    indexpath, err
+                )
+            )
+
+        return labels
 
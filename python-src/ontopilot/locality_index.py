@@ -0,0 +1,189 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#
+# Provides a class, LocalityIndex, that speeds up repeated syntactic locality
+# module extraction from the same (typically large) ontology.  The OWL API's
+# SyntacticLocalityModuleExtractor repeatedly checks every axiom of the
+# ontology for locality until the module stops growing, which is slow for
+# large ontologies and is repeated from scratch for every extraction.  The
+# index maps each entity to the logical axioms that refer to it and records
+# the axioms that are non-local for every signature.  Because an axiom that is
+# local for a signature can only become non-local if an entity in its own
+# signature is added to the signature, the bottom (i.e., "BOT") locality
+# module for a seed signature can be computed by only checking the axioms of
+# entities that are added to the module signature.  The bottom module always
+# contains the STAR module for the same seed signature, so it can be passed to
+# the OWL API extractor as a much smaller set of axioms from which to extract
+# the final STAR module.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import threading
+
+# Java imports.
+from java.util import HashSet, Collections, IdentityHashMap
+from org.semanticweb.owlapi.model import OWLOntologyChangeListener
+from uk.ac.manchester.cs.owlapi.modularity import SyntacticLocalityEvaluator
+from uk.ac.manchester.cs.owlapi.modularity import LocalityClass
+
+
+class LocalityIndex(OWLOntologyChangeListener):
+    """
+    Indexes the logical axioms in an ontology's imports closure for fast
+    computation of bottom locality modules.  The index is built the first time
+    it is needed and is discarded whenever an ontology in the indexed imports
+    closure changes.  The index is thread safe.
+    """
+    def __init__(self, ontology):
+        """
+        ontology: An Ontology object (*not* an OWL API OWLOntology object).
+        """
+        self.ontology = ontology
+        self.lock = threading.Lock()
+
+        # Maps OWL API entities to lists of the logical axioms that refer to
+        # them.  None if the index has not been built yet.
+        self.axioms_by_entity = None
+
+        # The axioms that are not local for any signature, including the empty
+        # signature.  These are part of every bottom module.
+        self.global_axioms = None
+
+        # The OWL API ontologies (i.e., the imports closure) that are currently
+        # indexed.  This is an identity-based set because the hash codes of
+        # OWL API ontologies change if their ontology IDs change.
+        self.indexed_onts = Collections.newSetFromMap(IdentityHashMap())
+
+        self.ontology.getOntologyManager().addOntologyChangeListener(self)
+        self.ontology.registerObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+    def dispose(self):
+        """
+        Stops following changes to the ontology by unregistering this index
+        as an ontology change listener and as an observer of the source
+        ontology.  The index should not be used after calling this method.
+        """
+        self.ontology.getOntologyManager().removeOntologyChangeListener(self)
+        self.ontology.unregisterObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+    def clear(self):
+        """
+        Discards the index.  It will be built again when it is next needed.
+        """
+        with self.lock:
+            self.axioms_by_entity = None
+            self.global_axioms = None
+            self.indexed_onts.clear()
+
+    def ontologiesChanged(self, changes):
+        """
+        Responds to change notifications from the OWL API ontology manager.
+        Only changes to ontologies in the indexed imports closure are
+        considered.
+        """
+        if self.axioms_by_entity is None:
+            return
+
+        for change in changes:
+            if self.indexed_onts.contains(change.getOntology()):
+                self.clear()
+                return
+
+    def notifyOntologyAdded(self, added_ont):
+        """
+        Responds to 'ontology_added' event notifications from the source
+        ontology.
+        """
+        self.clear()
+
+    def _getIndex(self):
+        """
+        Returns a tuple, (axioms by entity, global axioms), building the index
+        first if needed.
+        """
+        with self.lock:
+            if self.axioms_by_entity is None:
+                evaluator = SyntacticLocalityEvaluator(
+                    LocalityClass.BOTTOM_BOTTOM
+                )
+                emptysig = HashSet()
+
+                axioms_by_entity = {}
+                global_axioms = []
+                closure = self.ontology.getOWLOntology().getImportsClosure()
+                for owlont in closure:
+                    for axiom in owlont.getLogicalAxioms():
+                        if not(evaluator.isLocal(axiom, emptysig)):
+                            global_axioms.append(axiom)
+
+                        for entity in axiom.getSignature():
+                            if entity not in axioms_by_entity:
+                                axioms_by_entity[entity] = []
+                            axioms_by_entity[entity].append(axiom)
+
+                self.indexed_onts.addAll(closure)
+                self.axioms_by_entity = axioms_by_entity
+                self.global_axioms = global_axioms
+
+            return (self.axioms_by_entity, self.global_axioms)
+
+    def getBottomModule(self, signature):
+        """
+        Returns a set of the logical axioms of the bottom locality module for
+        a seed signature.
+
+        signature: An iterable of OWL API OWLEntity objects.
+        """
+        axioms_by_entity, global_axioms = self._getIndex()
+
+        evaluator = SyntacticLocalityEvaluator(LocalityClass.BOTTOM_BOTTOM)
+
+        # The current module signature, as a Java set for the locality
+        # evaluator, and the entities that were added to the module signature
+        # but whose axioms have not been checked yet.
+        modsig = HashSet()
+        pending = []
+
+        module = set()
+
+        def addToSignature(entities):
+            for entity in entities:
+                if modsig.add(entity):
+                    pending.append(entity)
+
+        addToSignature(signature)
+        for axiom in global_axioms:
+            module.add(axiom)
+            addToSignature(axiom.getSignature())
+
+        while len(pending) > 0:
+            entity = pending.pop()
+
+            for axiom in axioms_by_entity.get(entity, ()):
+                if axiom in module:
+                    continue
+
+                if not(evaluator.isLocal(axiom, modsig)):
+                    module.add(axiom)
+                    addToSignature(axiom.getSignature())
+
+        return module
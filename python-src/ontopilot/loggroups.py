@@ -0,0 +1,88 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides functions for grouping log messages by thread.  When several
+# threads work on independent tasks at the same time (e.g., building import
+# modules), their log messages would normally be interleaved on the console.
+# A thread can instead start a log group, in which case all of its log
+# messages are held back until the thread ends the log group, at which point
+# they are written together, without any messages from other threads in
+# between.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import logging
+import threading
+import ontopilot
+
+# Java imports.
+
+
+class _LogGroupFilter(logging.Filter):
+    """
+    A log handler filter that holds back the log records of all threads that
+    have an active log group.
+    """
+    def __init__(self):
+        logging.Filter.__init__(self)
+
+        # Each thread with an active log group has a list of held-back records.
+        self.thread_state = threading.local()
+
+        # Ensures that groups of records are written one group at a time.
+        self.output_lock = threading.Lock()
+
+    def filter(self, record):
+        records = getattr(self.thread_state, 'records', None)
+        if records is None:
+            return True
+
+        records.append(record)
+
+        return False
+
+    def startGroup(self):
+        self.thread_state.records = []
+
+    def endGroup(self, handler):
+        records = getattr(self.thread_state, 'records', None)
+        self.thread_state.records = None
+
+        if records is not None:
+            with self.output_lock:
+                for record in records:
+                    handler.handle(record)
+
+
+_filter = _LogGroupFilter()
+ontopilot.handler.addFilter(_filter)
+
+
+def startLogGroup():
+    """
+    Starts a log group for the calling thread.  Log messages from the thread
+    are held back until endLogGroup() is called.
+    """
+    _filter.startGroup()
+
+def endLogGroup():
+    """
+    Ends the calling thread's log group and writes all of its log messages.
+    Has no effect if the thread does not have an active log group.
+    """
+    _filter.endGroup(ontopilot.handler)
+
@@ -17,16 +17,64 @@
 # Python imports.
 from __future__ import unicode_literals
 import os
+import json
+import threading
 from ontopilot import logger
 from basictimer import BasicTimer
 from ontology import Ontology
 from buildtarget import BuildTargetWithConfig
 from onto_buildtarget import OntoBuildTarget
 from inferred_axiom_adder import InferredAxiomAdder
+from inference_cache import InferenceCache
+from build_manifest import getFileHash
 
 # Java imports.
 
 
+# The name of the build directory subfolder for cached inferred axioms.
+INFERENCE_CACHE_DIR = 'inference_cache'
+
+
+class _SharedInferences:
+    """
+    Shares the results of reasoning among the ModifiedOntoBuildTargets of a
+    build, so that the reasoner only runs once for all reasoned variants of
+    the ontology (e.g., for the reasoned and the merged, reasoned ontologies
+    of a release).  Only the most recent results are kept, because all
+    reasoned variants in a build have the same inputs.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.results = None
+
+    def get(self, key, compute):
+        """
+        Returns the InferenceResults for the given key.  If they are not
+        available, they are created by calling compute().  Targets that
+        request the same results at the same time wait for the first one to
+        finish computing them.
+
+        key: A string that identifies all inputs of the reasoning.
+        compute: A function that returns new InferenceResults.
+        """
+        with self.lock:
+            if key != self.key:
+                self.key = None
+                self.results = compute()
+                self.key = key
+            else:
+                logger.info(
+                    'Reusing the inferred axioms of another reasoned '
+                    'ontology in this build.'
+                )
+
+            return self.results
+
+
+_shared_inferences = _SharedInferences()
+
+
 class ModifiedOntoBuildTarget(BuildTargetWithConfig):
     """
     Manages the process of building a "modified" ontology from the standard
@@ -53,6 +101,9 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
         if self.mergeimports or self.prereason:
             self.addDependency(self.obt)
 
+        if self.prereason:
+            self._setReasonerOptions(args)
+
     def _retrieveAndCheckFilePaths(self):
         """
         Verifies that all files and directories needed for the build exist.
@@ -101,19 +152,150 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
 
         return destpath
 
+    def getEquivalenceKey(self):
+        """
+        ModifiedOntoBuildTargets with the same configuration are equivalent if
+        they apply the same modifications.
+        """
+        return self._makeEquivalenceKey(self.mergeimports, self.prereason)
+
+    def getOntologyProductKey(self):
+        """
+        Returns the build products key of the modified Ontology object.
+        """
+        keystr = 'ontology'
+
+        if self.prereason:
+            keystr = 'reasoned_' + keystr
+        if self.mergeimports:
+            keystr = 'merged_' + keystr
+
+        return keystr
+
     def getBuildNotRequiredMsg(self):
         return 'The compiled ontology files are already up to date.'
 
-    def _isBuildRequired(self):
+    def _getManifestInputs(self):
         """
-        Checks if the modified ontology already exists, and if so, whether file
-        modification times indicate that the modified ontology is already up to
-        date.  Returns True if the modified ontology needs to be updated.
+        Returns a tuple, (input file paths, settings), that describes all
+        inputs of the modified ontology for the build manifest.
         """
-        # If neither modification is requested, then no build is required.
-        if not(self.mergeimports) and not(self.prereason):
-            return False
+        # The compiled import modules are inputs because they are either
+        # merged into the ontology or used by the reasoner.
+        modinfos = self.obt.getImportsBuildTarget().getImportsInfo()
+
+        inputpaths = [self.obt.getOutputFilePath()]
+        for modinfo in modinfos:
+            if modinfo.filename != '':
+                inputpaths.append(modinfo.filename)
+
+        settings = {
+            'merge_imports': self.mergeimports,
+            'reason': self.prereason,
+            'output_format': self.config.getOutputFormat(),
+            'ontology_IRI': self.config.generateDevIRI(
+                self.getOutputFilePath()
+            )
+        }
+
+        if self.mergeimports:
+            settings['annotate_merged'] = self.config.getAnnotateMerged()
+
+        if self.prereason:
+            reasoning_settings = self._getReasoningSettings()
+            settings.update(reasoning_settings)
+
+            excluded_types_file = reasoning_settings['excluded_types_file']
+            if excluded_types_file != '':
+                inputpaths.append(excluded_types_file)
 
+        return (inputpaths, settings)
+
+    def _getReasoningSettings(self):
+        """
+        Returns a dictionary of all settings that affect the inferred axioms.
+        """
+        return {
+            'reasoner': self.config.getReasonerStr(),
+            'inferences': self.config.getInferenceTypeStrs(),
+            'annotate_inferred': self.config.getAnnotateInferred(),
+            'preprocess_inverses': self.config.getPreprocessInverses(),
+            'excluded_types_file': self.config.getExcludedTypesFile()
+        }
+
+    def _getInferencesKey(self):
+        """
+        Returns a string that identifies all inputs of the reasoning, which
+        are the same for all reasoned variants of the ontology.
+        """
+        inputpaths, settings = self._getManifestInputs()
+
+        fileinfos = []
+        for inputpath in inputpaths:
+            if os.path.isfile(inputpath):
+                fileinfos.append([inputpath, getFileHash(inputpath)])
+            else:
+                fileinfos.append([inputpath, None])
+
+        return json.dumps(
+            [fileinfos, self._getReasoningSettings()], sort_keys=True
+        )
+
+    def _computeInferences(self, ontology):
+        """
+        Returns the InferenceResults for an unmerged ontology.  If the results
+        of a previous build with the same input axioms and reasoning settings
+        are cached, they are used; otherwise, the reasoner is run (see
+        _runReasoner()).
+        """
+        cache = InferenceCache(
+            os.path.join(self.config.getBuildDir(), INFERENCE_CACHE_DIR)
+        )
+
+        excluded_types_file = self.config.getExcludedTypesFile()
+        inputpaths = []
+        if excluded_types_file != '':
+            inputpaths.append(excluded_types_file)
+
+        # Annotations only affect the results if an excluded types file might
+        # identify classes by their labels.
+        return cache.getResults(
+            ontology, self._getReasoningSettings(), inputpaths,
+            lambda: self._runReasoner(ontology),
+            ignore_annotations=(excluded_types_file == '')
+        )
+
+    def _runReasoner(self, ontology):
+        """
+        Runs the reasoner on an unmerged ontology and returns the
+        InferenceResults.  The ontology is only modified by adding inverse
+        property assertions, if this is requested (see
+        InferredAxiomAdder.computeInferences()).
+        """
+        logger.info('Running reasoner and generating inferred axioms...')
+
+        iaa = InferredAxiomAdder(ontology, self.config.getReasonerStr())
+        if self.config.getExcludedTypesFile() != '':
+            iaa.loadExcludedTypes(self.config.getExcludedTypesFile())
+
+        results = iaa.computeInferences(
+            self.config.getInferenceTypeStrs(),
+            self.config.getAnnotateInferred(),
+            self.config.getPreprocessInverses()
+        )
+
+        # The reasoner is no longer needed, and it would otherwise process
+        # all later changes to the ontology (e.g., merged imports).
+        ontology.getReasonerManager().disposeReasoners()
+
+        return results
+
+    def _checkModTimes(self):
+        """
+        Returns True if file modification times indicate that the modified
+        ontology is up to date.  This is only used if the build manifest has no
+        record of the modified ontology.
+        """
         foutpath = self.getOutputFilePath()
         main_ontpath = self.obt.getOutputFilePath()
 
@@ -123,27 +305,68 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
             if os.path.isfile(main_ontpath):
                 mtime = os.path.getmtime(foutpath)
 
-                return mtime < os.path.getmtime(main_ontpath)
+                return mtime >= os.path.getmtime(main_ontpath)
             else:
                 # If the main ontology file does not exist, a build is
                 # required.
-                return True
+                return False
         else:
             # If the modified ontology file does not exist, a build is
             # obviously required.
+            return False
+
+    def _isBuildRequired(self):
+        """
+        Checks if the modified ontology already exists, and if so, whether the
+        build manifest indicates that the modified ontology is already up to
+        date (i.e., none of its input files or settings have changed).  Returns
+        True if the modified ontology needs to be updated.
+        """
+        # If neither modification is requested, then no build is required.
+        if not(self.mergeimports) and not(self.prereason):
+            return False
+
+        # If the main ontology file does not exist, a build is required.
+        if not(os.path.isfile(self.obt.getOutputFilePath())):
             return True
 
+        inputpaths, settings = self._getManifestInputs()
+
+        return not(
+            self._isProductCurrent(
+                self.getOutputFilePath(), inputpaths, settings,
+                self._checkModTimes
+            )
+        )
+
     def _run(self):
         """
         Runs the build process and produces a new, modified version of the main
-        OWL ontology file.
+        OWL ontology file.  The modified Ontology object is also returned as a
+        build product (see getOntologyProductKey()).
         """
         timer = BasicTimer()
         timer.start()
 
         self._retrieveAndCheckFilePaths()
 
-        mainont = Ontology(self.obt.getOutputFilePath())
+        # If the main ontology was compiled as part of this build, use the
+        # compiled Ontology object instead of parsing the ontology file again.
+        # Because the compiled ontology might also be used by other build
+        # targets, it must be copied before it is modified.
+        mainont = self.products.get(self.obt.getOntologyProductKey())
+        if mainont is not None:
+            mainont = mainont.copy()
+        else:
+            mainont = Ontology(self.obt.getOutputFilePath())
+
+        # The reasoner always runs on the unmerged ontology, so that the
+        # results can be shared by all reasoned variants of the ontology.
+        if self.prereason:
+            inferences = _shared_inferences.get(
+                self._getInferencesKey(),
+                lambda: self._computeInferences(mainont)
+            )
 
         if self.mergeimports:
             # Merge the axioms from each imported ontology directly into this
@@ -157,16 +380,8 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
                 )
 
         if self.prereason:
-            logger.info('Running reasoner and adding inferred axioms...')
-            inf_types = self.config.getInferenceTypeStrs()
-            annotate_inferred = self.config.getAnnotateInferred()
-            preprocess_inverses = self.config.getPreprocessInverses()
-            iaa = InferredAxiomAdder(mainont, self.config.getReasonerStr())
-            if self.config.getExcludedTypesFile() != '':
-                iaa.loadExcludedTypes(self.config.getExcludedTypesFile())
-            iaa.addInferredAxioms(
-                inf_types, annotate_inferred, preprocess_inverses
-            )
+            logger.info('Adding inferred axioms...')
+            inferences.applyTo(mainont, self.mergeimports)
 
         fileoutpath = self.getOutputFilePath()
 
@@ -178,6 +393,9 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
         logger.info('Writing compiled ontology to ' + fileoutpath + '...')
         mainont.saveOntology(fileoutpath, self.config.getOutputFormat())
 
+        inputpaths, settings = self._getManifestInputs()
+        self._recordProduct(fileoutpath, inputpaths, settings)
+
         if self.mergeimports and self.prereason:
             msgtxt = 'Merged and reasoned '
         elif self.mergeimports:
@@ -191,3 +409,5 @@ class ModifiedOntoBuildTarget(BuildTargetWithConfig):
             )
         )
 
+        return {self.getOntologyProductKey(): mainont}
+
@@ -16,10 +16,11 @@
 
 # Python imports.
 from __future__ import unicode_literals
-import unicodedata
 from ontology import Ontology
+from relationship_index import rel_axiom_types
 
 # Java imports.
+from java.util import HashSet
 from org.semanticweb.owlapi.model import AxiomType, OWLClass, OWLSubClassOfAxiom, OWLEquivalentClassesAxiom, OWLDisjointClassesAxiom, OWLObjectPropertyExpression, OWLSubObjectPropertyOfAxiom, OWLObjectPropertyDomainAxiom, OWLObjectPropertyRangeAxiom, OWLInverseObjectPropertiesAxiom, OWLEquivalentObjectPropertiesAxiom, OWLDisjointObjectPropertiesAxiom, OWLDataPropertyExpression, OWLSubDataPropertyOfAxiom, OWLDataPropertyDomainAxiom, OWLDataPropertyRangeAxiom, OWLEquivalentDataPropertiesAxiom, OWLDisjointDataPropertiesAxiom, OWLIndividual, OWLClassAssertionAxiom, OWLDataPropertyAssertionAxiom, OWLObjectPropertyAssertionAxiom, OWLNegativeObjectPropertyAssertionAxiom, OWLNegativeDataPropertyAssertionAxiom, OWLSymmetricObjectPropertyAxiom, OWLAsymmetricObjectPropertyAxiom, OWLReflexiveObjectPropertyAxiom, OWLIrreflexiveObjectPropertyAxiom, OWLTransitiveObjectPropertyAxiom, OWLFunctionalObjectPropertyAxiom, OWLInverseFunctionalObjectPropertyAxiom, OWLFunctionalDataPropertyAxiom
 
 from org.semanticweb.owlapi.model.parameters import Imports
@@ -67,83 +68,6 @@ class _ExtractMethods:
 methods = _ExtractMethods()
 
 
-# Define constants for the kinds of axioms from which related terms can be
-# extracted and methods for handling the constants.
-class _RelatedAxiomTypes:
-    # Superclasses and superproperties.
-    ANCESTORS = 0
-    # Subclasses and subproperties.
-    DESCENDANTS = 1
-    # Equivalent classes and properties.
-    EQUIVALENTS = 2
-    # Disjoint classes and properties.
-    DISJOINTS = 3
-    # Domains of object and data properties.
-    DOMAINS = 4
-    # Ranges of object and data properties.
-    RANGES = 5
-    # Object property inverses.
-    INVERSES = 6
-    # Types (class assertions) of named individuals.
-    TYPES = 7
-    # Object and data property assertions of named individuals, including
-    # negative property assertions.
-    PROPERTY_ASSERTIONS = 8
-
-    # Combine all supported axiom types in a single tuple.
-    all_ax_types = (
-        ANCESTORS, DESCENDANTS, EQUIVALENTS, DISJOINTS, DOMAINS, RANGES,
-        INVERSES
-    )
-
-    # Define string values that map to the axiom types.
-    strings = {
-        'ancestors': ANCESTORS,
-        'descendants': DESCENDANTS,
-        'equivalents': EQUIVALENTS,
-        'disjoints': DISJOINTS,
-        'domains': DOMAINS,
-        'ranges': RANGES,
-        'inverses': INVERSES,
-        'types': TYPES,
-        'property assertions': PROPERTY_ASSERTIONS
-    }
-
-    def getAxiomTypesFromStr(self, ax_types_str):
-        """
-        Returns a set of axiom type constants parsed from the input string,
-        which should contain a comma-separated list of axiom type string
-        values.  Matching is not case sensitive.
-        """
-        # First normalize the axiom types string using unicode compatibility
-        # equivalents.  This ensures that "space-like" characters (e.g.,
-        # no-break space) are converted to the ordinary space character.
-        ax_types_str = unicodedata.normalize('NFKC', ax_types_str)
-        type_strs = ax_types_str.split(',')
-
-        ax_types = set()
-
-        for type_str in type_strs:
-            type_str = type_str.strip()
-            if type_str == '':
-                continue
-
-            if type_str.lower() in self.strings:
-                ax_types.add(self.strings[type_str.lower()])
-            else:
-                raise RuntimeError(
-                    'Invalid axiom type for specifying related terms to '
-                    'extract: "{0}".  Axiom type strings must be one of '
-                    '{{"{1}"}}.'.format(
-                        type_str, '", "'.join(self.strings.keys())
-                    )
-                )
-
-        return ax_types
-
-rel_axiom_types = _RelatedAxiomTypes()
-
-
 class ModuleExtractor:
     """
     Extracts import "modules" from existing OWL ontologies.  Also includes two
@@ -151,13 +75,18 @@ class ModuleExtractor:
     getDirectlyRelatedComponents().  These methods make it simple to traverse
     the relationships among entities in an ontology.
     """
-    def __init__(self, ontology_source):
+    def __init__(self, ontology_source, use_locality_index=False):
         """
         Initialize this ModuleExtractor instance.  The argument
-        "ontology_source" should be an instance of ontopilot.Ontology.
+        "ontology_source" should be an instance of ontopilot.Ontology.  If
+        "use_locality_index" is True, syntactic locality extraction uses the
+        source ontology's LocalityIndex, which is much faster for repeated
+        extractions from large ontologies.  In that case, the axioms of the
+        source ontology's entire imports closure are used for extraction.
         """
         self.ontology = ontology_source
         self.owlont = self.ontology.getOWLOntology()
+        self.use_locality_index = use_locality_index
 
         # Initialize data structures for holding the extraction signature,
         # axioms that need to be retained, and entities to exclude.
@@ -202,6 +131,8 @@ class ModuleExtractor:
             prefix:'label txt').
         method: The extraction method to use for this entity.
         rel_types: A set of related axiom type constants.
+
+        Returns the OWL API object of the entity.
         """
         entity = self.ontology.getExistingEntity(entity_id)
         if entity is None:
@@ -211,7 +142,15 @@ class ModuleExtractor:
             )
 
         owlent = entity.getOWLAPIObj()
+        self.addOWLEntity(owlent, method, rel_types)
+
+        return owlent
 
+    def addOWLEntity(self, owlent, method, rel_types=set()):
+        """
+        Adds an OWL API entity object to the module signature.  Otherwise, the
+        same as addEntity().
+        """
         entset, axiomset = self.getRelatedComponents(owlent, rel_types, True)
 
         self.saved_axioms.update(axiomset)
@@ -231,6 +170,8 @@ class ModuleExtractor:
             Labels should be enclosed in single quotes (e.g., 'label text' or
             prefix:'label txt').
         rel_types: A set of related axiom type constants.
+
+        Returns a set of the OWL API objects of all excluded entities.
         """
         entity = self.ontology.getExistingEntity(entity_id)
         if entity is None:
@@ -245,7 +186,18 @@ class ModuleExtractor:
 
         self.excluded_entities.update(entset)
 
-    def extractModule(self, mod_iri):
+        return entset
+
+    def excludeOWLEntities(self, owlents):
+        """
+        Adds OWL API entity objects to exclude from the final module.  Unlike
+        excludeEntity(), related entities are not retrieved.
+
+        owlents: An iterable of OWL API entity objects.
+        """
+        self.excluded_entities.update(owlents)
+
+    def extractModule(self, mod_iri, mod_axioms=None):
         """
         Extracts a module that is a subset of the entities in the source
         ontology.  The result is returned as an Ontology object.
@@ -253,31 +205,19 @@ class ModuleExtractor:
         mod_iri: The IRI for the extracted ontology module.  Can be either an
             IRI object or a string containing a relative IRI, prefix IRI, or
             full IRI.
+        mod_axioms (optional): The module axioms returned by
+            extractModuleAxioms(), if they were already extracted.
         """
+        if mod_axioms is None:
+            mod_axioms = self.extractModuleAxioms()
+
         modont = Ontology(self.ontology.ontman.createOntology())
         modont.setOntologyID(mod_iri)
 
-        # Do the syntactic locality extraction.  Only do the extraction if the
-        # signature set is non-empty.  The OWL API module extractor will
-        # produce a non-empty module even for an empty signature set.
-        if len(self.signatures[methods.LOCALITY]) > 0:
-            slme = SyntacticLocalityModuleExtractor(
-                self.ontology.ontman, self.owlont, ModuleType.STAR
-            )
-            mod_axioms = slme.extract(self.signatures[methods.LOCALITY])
-            for axiom in mod_axioms:
-                modont.addEntityAxiom(axiom)
-
-        # Do all single-entity extractions.
-        self._extractSingleEntities(self.signatures[methods.SINGLE], modont)
-
-        # Add all saved axioms.
-        for axiom in self.saved_axioms:
-            modont.addEntityAxiom(axiom)
+        modont.addEntityAxioms(mod_axioms)
 
         # Remove any entities that should be excluded from the final module.
-        for ent in self.excluded_entities:
-            modont.removeEntity(ent, remove_annotations=True)
+        modont.removeEntities(self.excluded_entities, remove_annotations=True)
 
         # Add an annotation for the source of the module.
         sourceIRI = None
@@ -292,7 +232,97 @@ class ModuleExtractor:
 
         return modont
 
-    def _extractSingleEntities(self, signature, target):
+    def extractModuleAxioms(self):
+        """
+        Returns a list of all axioms of the module for the current signature,
+        before any excluded entities are removed.
+        """
+        # Gather all axioms for the module so that they can be added to the
+        # module ontology in a single batch.
+        mod_axioms = []
+
+        # Do the syntactic locality extraction.  Only do the extraction if the
+        # signature set is non-empty.  The OWL API module extractor will
+        # produce a non-empty module even for an empty signature set.
+        if len(self.signatures[methods.LOCALITY]) > 0:
+            if self.use_locality_index:
+                # The bottom module contains the STAR module, so the OWL API
+                # extractor only needs to search the bottom module.
+                locindex = self.ontology.getLocalityIndex()
+                botmodule = HashSet()
+                for axiom in locindex.getBottomModule(
+                    self.signatures[methods.LOCALITY]
+                ):
+                    botmodule.add(axiom)
+
+                slme = SyntacticLocalityModuleExtractor(
+                    self.ontology.ontman, self.owlont, botmodule,
+                    ModuleType.STAR
+                )
+            else:
+                slme = SyntacticLocalityModuleExtractor(
+                    self.ontology.ontman, self.owlont, ModuleType.STAR
+                )
+            mod_axioms.extend(
+                slme.extract(self.signatures[methods.LOCALITY])
+            )
+
+        # Do all single-entity extractions.  Use a copy of the signature,
+        # because the extraction consumes it.
+        self._extractSingleEntities(
+            set(self.signatures[methods.SINGLE]), mod_axioms
+        )
+
+        # Add all saved axioms.
+        mod_axioms.extend(self.saved_axioms)
+
+        return mod_axioms
+
+    def getEnrichedAxioms(self, axioms):
+        """
+        Returns a set that contains a collection of axioms plus, for every
+        entity the axioms refer to, the entity's declarations, annotation
+        assertions, and (for object and data properties) property
+        characteristics axioms from the source ontology.  Entities that are
+        referred to by the added axioms are handled in the same way.  Any
+        module extracted from the source ontology for a subset of the current
+        signature can be extracted from an ontology that contains the enriched
+        axioms of the current module (see extractModuleAxioms()) with the same
+        result.
+
+        axioms: A collection of OWL API axioms from the source ontology.
+        """
+        ontset = self.owlont.getImportsClosure()
+        proptypes = (EntityType.OBJECT_PROPERTY, EntityType.DATA_PROPERTY)
+
+        enriched = set()
+        visited = set()
+        pending = list(axioms)
+        while len(pending) > 0:
+            axiom = pending.pop()
+            if axiom in enriched:
+                continue
+            enriched.add(axiom)
+
+            for owlent in axiom.getSignature():
+                if owlent in visited:
+                    continue
+                visited.add(owlent)
+
+                for ont in ontset:
+                    pending.extend(ont.getDeclarationAxioms(owlent))
+                    pending.extend(
+                        ont.getAnnotationAssertionAxioms(owlent.getIRI())
+                    )
+
+                if owlent.getEntityType() in proptypes:
+                    pending.extend(
+                        self._getPropertyCharacteristicsAxioms(owlent, True)
+                    )
+
+        return enriched
+
+    def _extractSingleEntities(self, signature, axioms):
         """
         Extracts entities from the source ontology using the single-entity
         extraction method, which pulls individual entities without any
@@ -301,28 +331,34 @@ class ModuleExtractor:
         from the source ontology.
 
         signature: A set of OWL API OWLEntity objects.
-        target: The target module ontopilot.Ontology object.
+        axioms: A list to which the extracted OWL API axioms will be appended.
         """
         rdfslabel = self.ontology.df.getRDFSLabel()
 
+        # Keep track of the entities that are already included in the module
+        # so that annotation properties are only extracted once.
+        extracted = set()
+        for axiom in axioms:
+            if axiom.isOfType(AxiomType.DECLARATION):
+                extracted.add(axiom.getEntity())
+
         while len(signature) > 0:
             owlent = signature.pop()
+            extracted.add(owlent)
 
             # Get the declaration axiom for this entity and add it to the
             # target ontology.
             ontset = self.owlont.getImportsClosure()
             for ont in ontset:
-                dec_axioms = ont.getDeclarationAxioms(owlent)
-                for axiom in dec_axioms:
-                    target.addEntityAxiom(axiom)
+                axioms.extend(ont.getDeclarationAxioms(owlent))
 
             # If the current entity is a data or object property, make sure to
             # preserve its characteristics.
             proptypes = (EntityType.OBJECT_PROPERTY, EntityType.DATA_PROPERTY)
             if owlent.getEntityType() in proptypes:
-                axioms = self._getPropertyCharacteristicsAxioms(owlent, True)
-                for axiom in axioms:
-                    target.addEntityAxiom(axiom)
+                axioms.extend(
+                    self._getPropertyCharacteristicsAxioms(owlent, True)
+                )
 
             # Get all annotation axioms for this entity and add them to the
             # target ontology.
@@ -330,19 +366,18 @@ class ModuleExtractor:
                 annot_axioms = ont.getAnnotationAssertionAxioms(owlent.getIRI())
 
                 for annot_axiom in annot_axioms:
-                    target.addEntityAxiom(annot_axiom)
+                    axioms.append(annot_axiom)
 
                     # Check if the relevant annotation property is already
-                    # included in the target ontology.  If not, add it to the
-                    # set of terms to extract.
+                    # included in the extracted entities.  If not, add it to
+                    # the set of terms to extract.
 
                     # Ignore rdfs:label since it is always included.
                     if annot_axiom.getProperty().equals(rdfslabel):
                         continue
 
-                    prop_iri = annot_axiom.getProperty().getIRI()
-
-                    if target.getExistingAnnotationProperty(prop_iri) is None:
+                    if annot_axiom.getProperty() not in extracted:
+                        prop_iri = annot_axiom.getProperty().getIRI()
                         annot_ent = self.ontology.getExistingAnnotationProperty(prop_iri)
                         # Built-in annotation properties, such as rdfs:label,
                         # will not "exist" because they have no declaration
@@ -449,6 +484,13 @@ class ModuleExtractor:
         rel_types: A set of related axiom type constants.
         include_imports: Whether to search the ontology's imports closure.
         """
+        # Searches of the imports closure can use the ontology's relationship
+        # index, which is much faster for large traversals.
+        if include_imports:
+            return self.ontology.getRelationshipIndex().getRelatedComponents(
+                target_entity, rel_types
+            )
+
         entset = set()
         axiomset = set()
 
@@ -487,6 +529,10 @@ class ModuleExtractor:
         rel_types: A set of related axiom type constants.
         include_imports: Whether to search the ontology's imports closure.
         """
+        if include_imports:
+            index = self.ontology.getRelationshipIndex()
+            return index.getDirectlyRelatedComponents(entity, rel_types)
+
         if entity.getEntityType() == EntityType.CLASS:
             return self._getRelComponentsForClass(
                 entity, rel_types, include_imports
@@ -62,7 +62,7 @@ class _BasicShortFormProvider(ShortFormProvider):
     def __init__(self):
         self.iri_sfp = SimpleIRIShortFormProvider()
 
-    def dispose():
+    def dispose(self):
         pass
 
     def getShortForm(self, owl_entity):
@@ -89,14 +89,26 @@ class _MoreAdvancedEntityChecker(OWLEntityChecker):
         
         # Create a ShortFormEntityChecker.  This allows looking up "local" IRI
         # names to retrieve the corresponding OWL entity.  These IRIs are the
-        # "simpleIRI" production of the Manchester Syntax grammar.
+        # "simpleIRI" production of the Manchester Syntax grammar.  Because
+        # the short form provider is given the ontology manager, it registers
+        # itself as an ontology change listener and updates its short form
+        # index incrementally as entities are added to or removed from the
+        # ontology, so a single entity checker can be reused for the lifetime
+        # of the ontology.
         ontset = HashSet(1)
         ontset.add(self.ontology.getOWLOntology())
-        self.sf_checker = ShortFormEntityChecker(
-            BidirectionalShortFormProviderAdapter(
-                self.ontology.ontman, ontset, _BasicShortFormProvider()
-            )
+        self.sfp = BidirectionalShortFormProviderAdapter(
+            self.ontology.ontman, ontset, _BasicShortFormProvider()
         )
+        self.sf_checker = ShortFormEntityChecker(self.sfp)
+
+    def dispose(self):
+        """
+        Unregisters the short form provider from the ontology manager's change
+        listeners.  The entity checker should not be used after calling this
+        method.
+        """
+        self.sfp.dispose()
 
     def _resolveName(self, name):
         """
@@ -177,6 +189,11 @@ class _MoreAdvancedEntityChecker(OWLEntityChecker):
 class ManchesterSyntaxParserHelper:
     """
     Provides a simple interface for parsing Manchester Syntax statements.
+    Building a parser requires indexing the short forms of all entities in the
+    ontology's signature, which is expensive for large ontologies, so client
+    code should generally use the shared parser instance returned by
+    Ontology.getManchesterParser() rather than instantiating this class
+    directly.
     """
     def __init__(self, ontology):
         self.ontology = ontology
@@ -184,7 +201,16 @@ class ManchesterSyntaxParserHelper:
         self.parser = ManchesterOWLSyntaxParserImpl(
                 OWLAPIConfigProvider(), self.ontology.df
         )
-        self.parser.setOWLEntityChecker(_MoreAdvancedEntityChecker(self.ontology))
+        self.entity_checker = _MoreAdvancedEntityChecker(self.ontology)
+        self.parser.setOWLEntityChecker(self.entity_checker)
+
+    def dispose(self):
+        """
+        Releases the resources used by this parser, including its ontology
+        change listener.  The parser should not be used after calling this
+        method.
+        """
+        self.entity_checker.dispose()
 
     def parseLiteral(self, literal_ms_exp):
         """
@@ -14,15 +14,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 #
-# Provides convenience methods for working with remote resources.
+# Provides convenience methods for working with remote resources.  HTTP(S)
+# connections are kept open and reused for later requests to the same host.
+# The results of redirect checks can be stored in a persistent RedirectCache
+# (see setRedirectCache()), so that they do not need to be repeated for every
+# build, and network access for redirect checks can be disabled entirely with
+# an offline mode (see setOfflineMode()).
 #
 
 # Python imports.
 from __future__ import unicode_literals
+import os
+import json
 import urlparse, httplib
 from ssl import SSLError
 import time
 import socket
+import threading
+from ontopilot import logger
 
 # Java imports.
 
@@ -41,11 +50,182 @@ class NotFoundError(RuntimeError):
     pass
 
 
+# The version of the redirect cache file format.
+REDIRECT_CACHE_VERSION = 1
+
+
+class RedirectCache:
+    """
+    Stores the results of redirect checks (see checkForRedirect()) in a JSON
+    file.  Results expire after a configurable amount of time.  All methods
+    are thread safe.
+    """
+    def __init__(self, cachepath, ttl):
+        """
+        cachepath: The path of the cache file.  If the file's directory does
+            not exist when a result is stored, the result is only cached in
+            memory.
+        ttl: The number of seconds after which cached results expire.
+        """
+        self.cachepath = cachepath
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.redirects = self._read()
+
+    def _read(self):
+        try:
+            with open(self.cachepath) as fin:
+                cachedata = json.load(fin)
+            if cachedata.get('version') == REDIRECT_CACHE_VERSION:
+                return cachedata['redirects']
+        except (IOError, ValueError, KeyError):
+            pass
+
+        return {}
+
+    def _write(self):
+        cachedata = {
+            'version': REDIRECT_CACHE_VERSION, 'redirects': self.redirects
+        }
+
+        tmppath = self.cachepath + '.tmp'
+        try:
+            with open(tmppath, 'w') as fout:
+                json.dump(cachedata, fout, indent=1, sort_keys=True)
+            if os.path.exists(self.cachepath):
+                os.remove(self.cachepath)
+            os.rename(tmppath, self.cachepath)
+        except (IOError, OSError) as err:
+            logger.debug(
+                'Unable to save the redirect cache "{0}": {1}'.format(
+                    self.cachepath, err
+                )
+            )
+
+    def lookup(self, source_iri, ignore_ttl=False):
+        """
+        Returns the cached result of the redirect check of an IRI, or None if
+        there is no current result.
+
+        source_iri: An IRI string.
+        ignore_ttl (optional): If True, expired results are also returned.
+        """
+        with self.lock:
+            entry = self.redirects.get(source_iri)
+
+        if entry is None:
+            return None
+        if not(ignore_ttl) and (time.time() - entry['checked'] > self.ttl):
+            return None
+
+        return entry['target']
+
+    def store(self, source_iri, target_iri):
+        """
+        Stores the result of the redirect check of an IRI.
+
+        source_iri: An IRI string.
+        target_iri: The result of checkForRedirect() for source_iri.
+        """
+        with self.lock:
+            self.redirects[source_iri] = {
+                'target': target_iri, 'checked': time.time()
+            }
+            self._write()
+
+
+# The RedirectCache used by checkForRedirect(), if any.
+_redirect_cache = None
+
+# Whether checkForRedirect() should avoid network access.
+_offline = False
+
+# Idle HTTP(S) connections, stored as lists of connections indexed by (scheme,
+# host string) tuples.  Each connection is used by only one thread at a time.
+_connections = {}
+
+# Protects _connections.
+_lock = threading.Lock()
+
+
+def setRedirectCache(cachepath, ttl):
+    """
+    Configures a persistent cache for the results of checkForRedirect().
+
+    cachepath: The path of the cache file, or None to disable caching.
+    ttl: The number of seconds after which cached results expire.  If ttl is
+        0, caching is disabled.
+    """
+    global _redirect_cache
+
+    if cachepath is None or ttl <= 0:
+        _redirect_cache = None
+    elif (
+        _redirect_cache is None or _redirect_cache.cachepath != cachepath or
+        _redirect_cache.ttl != ttl
+    ):
+        _redirect_cache = RedirectCache(cachepath, ttl)
+
+def setOfflineMode(offline):
+    """
+    Enables or disables the offline mode.  In offline mode, checkForRedirect()
+    does not access the network; it returns cached results (regardless of
+    their age), if available, and otherwise assumes that IRIs are not
+    redirected.
+
+    offline: Whether to enable the offline mode.
+    """
+    global _offline
+
+    _offline = offline
+
+def _getConnection(scheme, netloc):
+    """
+    Returns a tuple, (connection, reused), with an idle connection to a host,
+    if there is one, or a new connection otherwise.
+    """
+    with _lock:
+        idle = _connections.get((scheme, netloc))
+        if idle:
+            return (idle.pop(), True)
+
+    # Note that this will correctly handle non-standard TCP port numbers
+    # specified as part of the URL string (e.g., "http://example.com:8080"),
+    # because they will be included as part of the "netloc" attribute by
+    # urlsplit() and then extracted by the httplib methods.
+    if scheme == 'http':
+        conn = httplib.HTTPConnection(netloc)
+    else:
+        conn = httplib.HTTPSConnection(netloc)
+
+    return (conn, False)
+
+def _releaseConnection(scheme, netloc, conn):
+    """
+    Makes a connection available for reuse.
+    """
+    with _lock:
+        _connections.setdefault((scheme, netloc), []).append(conn)
+
+def closeConnections():
+    """
+    Closes all idle connections.
+    """
+    with _lock:
+        for idle in _connections.values():
+            for conn in idle:
+                conn.close()
+        _connections.clear()
+
+
 def httpHEAD(sourceIRI):
     """
     Makes an HTTP HEAD request to sourceIRI and returns the response.  Works
     for either HTTP or HTTPS IRIs.  The response is returned as a standard
-    Python HTTPResponse object.
+    Python HTTPResponse object.  If the server supports persistent
+    connections, the connection is kept open for later requests to the same
+    host.
 
     sourceIRI: A fully expanded IRI as an OWL API IRI object or a string.
     """
@@ -54,6 +234,11 @@ def httpHEAD(sourceIRI):
 
     source_iri = unicode(sourceIRI)
     parts = urlparse.urlsplit(source_iri)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        raise ConnectionFailError(
+            'The IRI <{0}> is not an HTTP or HTTPS IRI.'.format(source_iri)
+        )
 
     # Reconstruct the portion of the IRI that comes after the scheme and
     # host string.
@@ -69,25 +254,26 @@ def httpHEAD(sourceIRI):
     # loop and waiting a short time on failure before retrying.
     while (retrycnt < MAX_RETRIES) and not(success):
         try:
-            # Initialize the connection.  Note that this will correctly
-            # handle non-standard TCP port numbers specified as part of the
-            # URL string (e.g., "http://example.com:8080"), because they
-            # will be included as part of the "netloc" attribute by
-            # urlsplit() and then extracted by the httplib methods.
-            if parts.scheme.lower() == 'http':
-                conn = httplib.HTTPConnection(parts.netloc)
-            elif parts.scheme.lower() == 'https':
-                conn = httplib.HTTPSConnection(parts.netloc)
-            else:
-                raise ConnectionFailError(
-                    'The IRI <{0}> is not an HTTP or HTTPS IRI.'.format(
-                        source_iri
-                    )
-                )
+            conn, reused = _getConnection(scheme, parts.netloc)
+
+            try:
+                conn.request('HEAD', location_part)
+                response = conn.getresponse()
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                # The server might have closed an idle connection, so try
+                # again with another connection.
+                if reused:
+                    continue
+                raise
 
-            conn.request('HEAD', location_part)
-            response = conn.getresponse()
-            conn.close()
+            # Reading the (empty) response body finishes the response, which
+            # is required before the connection can be reused.
+            response.read()
+            if response.will_close:
+                conn.close()
+            else:
+                _releaseConnection(scheme, parts.netloc, conn)
             success = True
 
             status = int(response.status)
@@ -125,11 +311,28 @@ def checkForRedirect(sourceIRI):
     a redirect, returns a string containing the IRI of the final document
     location.  Otherwise, returns an empty string.
 
+    The results for HTTP(S) IRIs are cached if a redirect cache is configured
+    (see setRedirectCache()).  In offline mode (see setOfflineMode()), no
+    network requests are made.
+
     sourceIRI: A fully expanded IRI as an OWL API IRI object or a string.
     """
+    source_iri = unicode(sourceIRI)
+    if urlparse.urlsplit(source_iri).scheme.lower() not in ('http', 'https'):
+        return ''
+
+    redirect_cache = _redirect_cache
+    if redirect_cache is not None:
+        target_iri = redirect_cache.lookup(source_iri, ignore_ttl=_offline)
+        if target_iri is not None:
+            return target_iri
+
+    if _offline:
+        return ''
+
     redirected = False
     status = 300
-    curr_iri = unicode(sourceIRI)
+    curr_iri = source_iri
 
     while (status < 400) and (status >= 300):
         parts = urlparse.urlsplit(curr_iri)
@@ -146,8 +349,11 @@ def checkForRedirect(sourceIRI):
                 curr_iri, response.getheader('location')
             )
 
-    if redirected:
-        return curr_iri
-    else:
-        return ''
+    if not(redirected):
+        curr_iri = ''
+
+    if redirect_cache is not None:
+        redirect_cache.store(source_iri, curr_iri)
+
+    return curr_iri
 
@@ -26,6 +26,7 @@ from ontopilot import logger
 from basictimer import BasicTimer
 from tablereaderfactory import TableReaderFactory
 from owlontologybuilder import OWLOntologyBuilder, EntityDescriptionError
+from terms_axiom_cache import TermsAxiomCache
 from ontopilot import TRUE_STRS
 from buildtarget import BuildTargetWithConfig
 from imports_buildtarget import ImportsBuildTarget
@@ -36,6 +37,9 @@ from imports_buildtarget import ImportsBuildTarget
 # Required columns in terms files.
 REQUIRED_COLS = ('Type', 'ID')
 
+# The name of the build directory subfolder for cached terms file axioms.
+TERMS_CACHE_DIR = 'terms_cache'
+
 # Optional columns in terms files.
 OPTIONAL_COLS = (
     'Comments', 'Text definition', 'Parent', 'Subclass of', 'Superclass of',
@@ -58,6 +62,9 @@ class OntoBuildTarget(BuildTargetWithConfig):
         # Determine whether to add IDs to term references in definitions.
         self.expanddefs = self.config.getExpandEntityDefs()
 
+        # Get the number of threads to use for processing entity descriptions.
+        self.compile_threads = self.config.getCompileThreads()
+
         # Set the imports modules as a dependency, regardless of whether we're
         # using in-source or out-of-source builds.  Either way, it is probably
         # best for end users to make sure imports modules remain updated.  Of
@@ -176,19 +183,59 @@ class OntoBuildTarget(BuildTargetWithConfig):
 
         return destpath
 
+    def getEquivalenceKey(self):
+        """
+        All OntoBuildTargets with the same configuration are equivalent.
+        """
+        return self._makeEquivalenceKey()
+
+    def getOntologyProductKey(self):
+        """
+        Returns the build products key of the compiled Ontology object.
+        """
+        return 'main_ontology'
+
     def getBuildNotRequiredMsg(self):
         return 'The compiled ontology is already up to date.'
 
-    def _isBuildRequired(self):
+    def _getManifestInputs(self):
+        """
+        Returns a tuple, (input file paths, settings), that describes all
+        inputs of the compiled ontology for the build manifest.  This requires
+        that _retrieveAndCheckFilePaths() has already been run.
         """
-        Checks if the compiled ontology already exists, and if so, whether file
-        modification times indicate that the compiled ontology is already up to
-        date.  Returns True if the compiled ontology needs to be updated.
+        modinfos = self.ibt.getImportsInfo()
+
+        # Besides the source files, the compiled import modules are inputs
+        # because labels used in the source files can refer to imported terms.
+        inputpaths = [
+            self.config.getBaseOntologyPath(),
+            self.config.getTopImportsFilePath()
+        ]
+        inputpaths.extend(self.termsfile_paths)
+        for modinfo in modinfos:
+            if modinfo.filename != '':
+                inputpaths.append(modinfo.filename)
+
+        settings = {
+            'expand_entity_defs': self.expanddefs,
+            'output_format': self.config.getOutputFormat(),
+            'ontology_IRI': self.config.generateDevIRI(
+                self.getOutputFilePath()
+            ),
+            'imports': [modinfo.iristr for modinfo in modinfos]
+        }
+
+        return (inputpaths, settings)
+
+    def _checkModTimes(self):
+        """
+        Returns True if file modification times indicate that the compiled
+        ontology is up to date.  This is only used if the build manifest has no
+        record of the compiled ontology.
         """
         foutpath = self.getOutputFilePath()
 
-        self._retrieveAndCheckFilePaths()
-
         if os.path.isfile(foutpath):
             mtime = os.path.getmtime(foutpath)
 
@@ -196,31 +243,53 @@ class OntoBuildTarget(BuildTargetWithConfig):
             # new build might be needed if new terms files have been added or
             # other ontology-related changes were made.
             if mtime < os.path.getmtime(self.config.getConfigFilePath()):
-                return True
+                return False
 
             # Check the modification time of the base ontology.
             if mtime < os.path.getmtime(self.config.getBaseOntologyPath()):
-                return True
+                return False
 
             # Check the modification time of each source entities file.
             for sourcefile in self._getExpandedSourceFilesList():
                 if mtime < os.path.getmtime(sourcefile):
-                    return True
+                    return False
 
             # Check the modification time of the top-level imports file.  If
             # this file was changed, and full ontologies were added as imports,
             # the import modules would not need to be built but we would still
             # need to rebuild the main ontology.
             if mtime < os.path.getmtime(self.config.getTopImportsFilePath()):
-                return True
+                return False
 
-            return False
-        else:
             return True
+        else:
+            return False
+
+    def _isBuildRequired(self):
+        """
+        Checks if the compiled ontology already exists, and if so, whether the
+        build manifest indicates that the compiled ontology is already up to
+        date (i.e., none of its input files or settings have changed).  Returns
+        True if the compiled ontology needs to be updated.
+        """
+        self._retrieveAndCheckFilePaths()
+
+        inputpaths, settings = self._getManifestInputs()
+
+        return not(
+            self._isProductCurrent(
+                self.getOutputFilePath(), inputpaths, settings,
+                self._checkModTimes
+            )
+        )
 
     def _run(self):
         """
-        Runs the build process and produces a compiled OWL ontology file.
+        Runs the build process and produces a compiled OWL ontology file.  The
+        compiled Ontology object is also returned as a build product (see
+        getOntologyProductKey()) so that dependent targets do not need to
+        parse the ontology file again.  Dependent targets must not modify the
+        product; they should modify a copy instead (see Ontology.copy()).
         """
         # We don't need to run _retrieveAndCheckFilePaths() here because the
         # base class ensures that _isBuildRequired() will always be called
@@ -244,6 +313,15 @@ class OntoBuildTarget(BuildTargetWithConfig):
                 self._makeDirs(destdir)
 
         ontbuilder = OWLOntologyBuilder(self.base_ont_path)
+
+        # Reuse the axioms generated from unchanged terms files during previous
+        # builds.  All terms files must still be read, because their entities
+        # and labels are needed to check which cached axioms are still valid.
+        axiom_cache = TermsAxiomCache(
+            os.path.join(self.config.getBuildDir(), TERMS_CACHE_DIR)
+        )
+        ontbuilder.setAxiomCache(axiom_cache)
+
         # Add an import declaration for each import module.
         for importIRI in importsIRIs:
             ontbuilder.getOntology().addImport(importIRI, True)
@@ -293,7 +371,23 @@ class OntoBuildTarget(BuildTargetWithConfig):
 
         # Define all deferred axioms from the source entity descriptions.
         logger.info('Defining all remaining entity axioms...')
-        ontbuilder.processDeferredEntityAxioms(self.expanddefs)
+        ontbuilder.processDeferredEntityAxioms(
+            self.expanddefs, self.compile_threads
+        )
+
+        cache_stats = ontbuilder.getOntology().idr.getCacheStats()
+        logger.debug(
+            'Identifier resolution cache: {0} hits, {1} misses.'.format(
+                cache_stats['hits'], cache_stats['misses']
+            )
+        )
+        cache_stats = axiom_cache.getCacheStats()
+        logger.info(
+            'Reused the cached axioms of {0} of {1} terms files.'.format(
+                cache_stats['hits'],
+                cache_stats['hits'] + cache_stats['misses']
+            )
+        )
 
         # Set the ontology IRI.
         ontIRI = self.config.generateDevIRI(fileoutpath)
@@ -305,7 +399,12 @@ class OntoBuildTarget(BuildTargetWithConfig):
             fileoutpath, self.config.getOutputFormat()
         )
 
+        inputpaths, settings = self._getManifestInputs()
+        self._recordProduct(fileoutpath, inputpaths, settings)
+
         logger.info(
             'Main ontology build completed in {0} s.\n'.format(timer.stop())
         )
 
+        return {self.getOntologyProductKey(): ontbuilder.getOntology()}
+
@@ -24,6 +24,7 @@ from rfc3987 import rfc3987
 from ontopilot import logger, TRUE_STRS
 from ontology import OUTPUT_FORMATS
 from inferred_axiom_adder import INFERENCE_TYPES
+from reasoner_manager import PRECOMPUTE_TYPES
 from documentation_writers import DOC_FORMAT_TYPES
 
 # Java imports.
@@ -39,6 +40,32 @@ DEFAULT_INFERENCE_TYPES = (
 )
 
 
+def parsePrecomputeStrs(rawval):
+    """
+    Parses a comma-separated list of the kinds of inferences a reasoner should
+    precompute (see reasoner_manager.PRECOMPUTE_TYPES) and returns a list of
+    the normalized (lower-case) strings.  Raises a ValueError if any of the
+    strings is not a supported kind of inference.
+
+    rawval: A string with a comma-separated list of inference types.
+    """
+    precompute_strs = []
+    for precompute_str in rawval.split(','):
+        precompute_str = precompute_str.strip().lower()
+        if precompute_str != '':
+            if not(precompute_str in PRECOMPUTE_TYPES):
+                raise ValueError(
+                    '"{0}".  Supported values are: "{1}".'.format(
+                        precompute_str,
+                        '", "'.join(sorted(PRECOMPUTE_TYPES.keys()))
+                    )
+                )
+            else:
+                precompute_strs.append(precompute_str)
+
+    return precompute_strs
+
+
 class ConfigError(Exception):
     """
     A basic exception class for reporting errors in the build configuration
@@ -420,6 +447,54 @@ class OntoConfig(RawConfigParser):
 
         return expand_str.lower() in TRUE_STRS
 
+    def _getThreadCount(self, option):
+        """
+        Returns the value of a [Build] setting that specifies a number of
+        threads.  If the setting is not configured, returns 1.
+
+        option (str): The name of the setting.
+        """
+        threads_str = self.getCustom('Build', option, '1')
+
+        try:
+            numthreads = int(threads_str)
+        except ValueError:
+            numthreads = 0
+
+        if numthreads < 1:
+            raise ConfigError(
+                'Invalid value for the "{0}" setting in the build '
+                'configuration file: "{1}".  The value must be a positive '
+                'integer.'.format(option, threads_str)
+            )
+
+        return numthreads
+
+    def getCompileThreads(self):
+        """
+        Returns the number of threads to use for processing entity
+        descriptions when compiling the main ontology.  If this option is not
+        configured, returns 1 (i.e., no parallel processing).
+        """
+        return self._getThreadCount('compile_threads')
+
+    def getBuildThreads(self):
+        """
+        Returns the maximum number of build targets (e.g., the merged and
+        reasoned variants of the compiled ontology) to run at the same time.
+        If this option is not configured, returns 1 (i.e., build targets are
+        run one at a time).
+        """
+        return self._getThreadCount('build_threads')
+
+    def getImportsThreads(self):
+        """
+        Returns the maximum number of import modules to build at the same
+        time.  If this option is not configured, returns 1 (i.e., import
+        modules are built one at a time).
+        """
+        return self._getThreadCount('imports_threads')
+
     def getImportsSrcDir(self):
         """
         Returns the path to the directory of the import modules sources.
@@ -565,6 +640,67 @@ class OntoConfig(RawConfigParser):
 
         return etfpath
 
+    def getReasonerThreads(self):
+        """
+        Returns the number of worker threads the reasoner should use.  Only ELK
+        supports multiple worker threads.  If this option is not configured,
+        returns 0 (i.e., use the reasoner's default).
+        """
+        threads_str = self.getCustom('Reasoning', 'reasoner_threads', '0')
+
+        try:
+            numthreads = int(threads_str)
+        except ValueError:
+            numthreads = -1
+
+        if numthreads < 0:
+            raise ConfigError(
+                'Invalid value for the "reasoner_threads" setting in the '
+                'build configuration file: "{0}".  The value must be a '
+                'non-negative integer.'.format(threads_str)
+            )
+
+        return numthreads
+
+    def getReasonerTimeout(self):
+        """
+        Returns the maximum number of seconds that any single reasoner
+        operation may take.  If this option is not configured, returns 0
+        (i.e., no time limit).
+        """
+        timeout_str = self.getCustom('Reasoning', 'reasoner_timeout', '0')
+
+        try:
+            timeout = float(timeout_str)
+        except ValueError:
+            timeout = -1
+
+        if timeout < 0:
+            raise ConfigError(
+                'Invalid value for the "reasoner_timeout" setting in the '
+                'build configuration file: "{0}".  The value must be a '
+                'non-negative number of seconds.'.format(timeout_str)
+            )
+
+        return timeout
+
+    def getPrecomputeStrs(self):
+        """
+        Returns a list of strings identifying the kinds of inferences the
+        reasoner should precompute before it is queried.  If this option is
+        not configured, returns an empty list, in which case the kinds of
+        inferences are chosen based on how the reasoner is used.
+        """
+        rawval = self.getCustom('Reasoning', 'precompute', '')
+
+        try:
+            return parsePrecomputeStrs(rawval)
+        except ValueError as err:
+            raise ConfigError(
+                'Invalid inference type for the "precompute" setting in the '
+                'build configuration file: {0}'.format(err)
+            )
+
     def getAnnotateMerged(self):
         """
         Returns True if entities that are merged into the main ontology from an
@@ -578,6 +714,82 @@ class OntoConfig(RawConfigParser):
 
         return annotate_merged.lower() in TRUE_STRS
 
+    def getUseLocalityIndex(self):
+        """
+        Returns True if syntactic locality module extraction for import
+        modules should use a locality index of each source ontology; returns
+        False otherwise.  The default is False.
+        """
+        locality_index = self.getCustom('Imports', 'locality_index', 'False')
+
+        return locality_index.lower() in TRUE_STRS
+
+    def getUseSharedSourceCache(self):
+        """
+        Returns True if source ontologies should be stored in a source ontology
+        cache that is shared by all projects; returns False otherwise.  The
+        default is False.
+        """
+        shared_cache = self.getCustom(
+            'Imports', 'shared_source_cache', 'False'
+        )
+
+        return shared_cache.lower() in TRUE_STRS
+
+    def getRedirectCacheTTL(self):
+        """
+        Returns the number of seconds for which the results of checking
+        whether an import IRI is redirected should be cached.  The setting is
+        in hours, and the default is 24 hours.  A value of 0 disables caching.
+        """
+        ttl_str = self.getCustom('Imports', 'redirect_cache_ttl', '24')
+
+        try:
+            ttl = float(ttl_str)
+        except ValueError:
+            ttl = -1
+
+        if ttl < 0:
+            raise ConfigError(
+                'Invalid value for the "redirect_cache_ttl" setting in the '
+                'build configuration file: "{0}".  The value must be a '
+                'non-negative number of hours.'.format(ttl_str)
+            )
+
+        return int(ttl * 3600)
+
+    def getSharedSourceCacheDir(self):
+        """
+        Returns the path of the shared source ontology cache directory.  The
+        default is "~/.ontopilot/source_cache".
+        """
+        cachedir = self.getCustom('Imports', 'shared_source_cache_dir', '')
+        if cachedir == '':
+            cachedir = '~/.ontopilot/source_cache'
+
+        return self._getAbsPath(cachedir)
+
+    def getSharedSourceCacheSize(self):
+        """
+        Returns the maximum size, in bytes, of the shared source ontology
+        cache.  The setting is in gigabytes, and the default is 20 GB.
+        """
+        size_str = self.getCustom('Imports', 'shared_source_cache_size', '20')
+
+        try:
+            size = float(size_str)
+        except ValueError:
+            size = -1
+
+        if size <= 0:
+            raise ConfigError(
+                'Invalid value for the "shared_source_cache_size" setting in '
+                'the build configuration file: "{0}".  The value must be a '
+                'positive number of gigabytes.'.format(size_str)
+            )
+
+        return int(size * 1024 ** 3)
+
     def getOutputFormat(self):
         """
         Returns the string identifying the output format to use.  If this
@@ -26,19 +26,29 @@ from idresolver import IDResolver
 from ontology_entities import _OntologyClass, _OntologyDataProperty
 from ontology_entities import _OntologyObjectProperty, _OntologyAnnotationProperty
 from ontology_entities import _OntologyIndividual, _OntologyEntity
-from reasoner_manager import ReasonerManager
+from ontology_entities import (
+    CLASS_ENTITY, DATAPROPERTY_ENTITY, OBJECTPROPERTY_ENTITY,
+    ANNOTATIONPROPERTY_ENTITY, INDIVIDUAL_ENTITY
+)
+from declaration_index import DeclarationIndex
+from relationship_index import RelationshipIndex
+from locality_index import LocalityIndex
+from reasoner_manager import ReasonerManager, reasonerTimeLimit
 from observable import Observable
+from mshelper import ManchesterSyntaxParserHelper
 import nethelper
+import threading
 
 # Java imports.
 from java.io import File, FileOutputStream, InputStream
 from java.lang import System as JavaSystem
-from java.util import HashSet
+from java.util import HashSet, ArrayList
 from org.semanticweb.owlapi.apibinding import OWLManager
 from org.semanticweb.owlapi.model import IRI, OWLOntologyID
 from org.semanticweb.owlapi.model import AddAxiom, AddImport, RemoveImport
 from org.semanticweb.owlapi.model import SetOntologyID, AxiomType, OWLOntology
 from org.semanticweb.owlapi.model import AddOntologyAnnotation
+from org.semanticweb.owlapi.model import OntologyCopy
 from org.semanticweb.owlapi.formats import (
     RDFXMLDocumentFormat, TurtleDocumentFormat, OWLXMLDocumentFormat,
     ManchesterSyntaxDocumentFormat
@@ -49,6 +59,7 @@ from org.semanticweb.owlapi.model import OWLOntologyAlreadyExistsException
 from org.semanticweb.owlapi.io import OWLOntologyCreationIOException
 from org.semanticweb.owlapi.model import OWLOntologyFactoryNotFoundException
 from org.semanticweb.owlapi.model.parameters import Imports as ImportsEnum
+from org.semanticweb.owlapi.reasoner import InferenceType
 
 
 # Define constants for the supported output formats.
@@ -115,13 +126,36 @@ class Ontology(Observable):
         # as follows.
         # "label_added": Triggers any time a label axiom is added to the
         #   ontology.  Arguments are the label text and subject IRI.
+        # "labels_added": Triggers any time a batch of label axioms is added
+        #   to the ontology.  The single argument is a list of (label text,
+        #   subject IRI) tuples.
         # "ontology_added": Triggers any time an external ontology is added
         #   to this ontology, either by importing it or merging it.  The single
         #   argument is the external ontology instance.
-        self.defineObservableEvents(['label_added', 'ontology_added'])
+        self.defineObservableEvents(
+            ['label_added', 'labels_added', 'ontology_added']
+        )
+
+        # An index of the entities declared in the imports closure, which
+        # makes the getExisting*() methods fast even for large imports.
+        self.declindex = DeclarationIndex(self)
 
         self.idr = IDResolver(self)
 
+        # An index of the relationships among the entities in the imports
+        # closure and an index for fast locality module extraction, which are
+        # created on demand by getRelationshipIndex() and getLocalityIndex().
+        self.relindex = None
+        self.locindex = None
+        self.index_lock = threading.Lock()
+
+        # Per-thread state.  Each thread gets its own Manchester Syntax
+        # parser, which is created on demand by getManchesterParser(), and its
+        # own list for buffering entity axioms while an axiom batch is active
+        # (see startAxiomBatch()).  This allows entity axioms to be generated
+        # by several threads at once.
+        self.thread_state = threading.local()
+
     def getOWLOntology(self):
         """
         Returns the OWL API ontology object contained by this Ontology object.
@@ -140,6 +174,97 @@ class Ontology(Observable):
         """
         return self.reasonerman
 
+    def getRelationshipIndex(self):
+        """
+        Returns a RelationshipIndex instance for this ontology, which provides
+        fast traversals of the relationships among the entities in the
+        ontology's imports closure.  The index is created the first time this
+        method is called and is kept up to date as the ontology changes.
+        """
+        if self.relindex is None:
+            with self.index_lock:
+                if self.relindex is None:
+                    self.relindex = RelationshipIndex(self)
+
+        return self.relindex
+
+    def getLocalityIndex(self):
+        """
+        Returns a LocalityIndex instance for this ontology, which provides
+        fast computation of locality modules from the ontology's imports
+        closure.  The index object is created the first time this method is
+        called, and the index itself is built when it is first used.
+        """
+        if self.locindex is None:
+            with self.index_lock:
+                if self.locindex is None:
+                    self.locindex = LocalityIndex(self)
+
+        return self.locindex
+
+    def getManchesterParser(self):
+        """
+        Returns a ManchesterSyntaxParserHelper instance for this ontology.  The
+        parser is created the first time this method is called by a given
+        thread and then reused for all subsequent calls from that thread.  The
+        parser's short form index is updated automatically as entities are
+        added to the ontology, so the returned parser will always reflect the
+        current state of the ontology.
+        """
+        msparser = getattr(self.thread_state, 'msparser', None)
+        if msparser is None:
+            msparser = ManchesterSyntaxParserHelper(self)
+            self.thread_state.msparser = msparser
+
+        return msparser
+
+    def setManchesterParser(self, msparser):
+        """
+        Sets the ManchesterSyntaxParserHelper that getManchesterParser()
+        returns for the calling thread.  This allows a thread to create parsers
+        that other threads then use (see
+        OWLOntologyBuilder._processDeferredParallel()).  The thread that
+        created a parser remains responsible for disposing of it.
+
+        msparser: A ManchesterSyntaxParserHelper for this ontology, or None.
+        """
+        self.thread_state.msparser = msparser
+
+    def releaseManchesterParser(self):
+        """
+        Disposes of the calling thread's Manchester Syntax parser, if it has
+        one.  Worker threads should call this method before they exit so that
+        their parsers stop listening for ontology changes.
+        """
+        msparser = getattr(self.thread_state, 'msparser', None)
+        if msparser is not None:
+            msparser.dispose()
+            self.thread_state.msparser = None
+
+    def dispose(self):
+        """
+        Unregisters everything that this Ontology added to its OWL API
+        ontology manager: the change listeners of its indexes, of the calling
+        thread's Manchester Syntax parser, and of its reasoners.  This must be
+        called for temporary Ontology objects whose ontology manager outlives
+        them (e.g., import modules, which are created by the ontology manager
+        of their source ontology); otherwise, the manager keeps them reachable
+        and keeps sending them all later ontology changes.  The Ontology
+        object should not be used after calling this method.
+        """
+        self.releaseManchesterParser()
+        self.reasonerman.disposeReasoners()
+        self.declindex.dispose()
+
+        with self.index_lock:
+            if self.relindex is not None:
+                self.relindex.dispose()
+                self.relindex = None
+
+            if self.locindex is not None:
+                self.locindex.dispose()
+                self.locindex = None
+
     def resolveLabel(self, labeltxt):
         """
         Resolves an entity label (either with or without a prefix) to an
@@ -186,10 +311,8 @@ class Ontology(Observable):
 
         classobj = self.df.getOWLClass(classIRI)
 
-        ontset = self.ontology.getImportsClosure()
-        for ont in ontset:
-            if ont.getDeclarationAxioms(classobj).size() > 0:
-                return _OntologyClass(classIRI, classobj, self)
+        if self.declindex.isDeclared(classIRI, CLASS_ENTITY):
+            return _OntologyClass(classIRI, classobj, self)
 
         return None
 
@@ -211,10 +334,8 @@ class Ontology(Observable):
 
         propobj = self.df.getOWLDataProperty(propIRI)
 
-        ontset = self.ontology.getImportsClosure()
-        for ont in ontset:
-            if ont.getDeclarationAxioms(propobj).size() > 0:
-                return _OntologyDataProperty(propIRI, propobj, self)
+        if self.declindex.isDeclared(propIRI, DATAPROPERTY_ENTITY):
+            return _OntologyDataProperty(propIRI, propobj, self)
 
         return None
 
@@ -236,10 +357,8 @@ class Ontology(Observable):
 
         propobj = self.df.getOWLObjectProperty(propIRI)
 
-        ontset = self.ontology.getImportsClosure()
-        for ont in ontset:
-            if ont.getDeclarationAxioms(propobj).size() > 0:
-                return _OntologyObjectProperty(propIRI, propobj, self)
+        if self.declindex.isDeclared(propIRI, OBJECTPROPERTY_ENTITY):
+            return _OntologyObjectProperty(propIRI, propobj, self)
 
         return None
 
@@ -261,10 +380,8 @@ class Ontology(Observable):
 
         propobj = self.df.getOWLAnnotationProperty(propIRI)
 
-        ontset = self.ontology.getImportsClosure()
-        for ont in ontset:
-            if ont.getDeclarationAxioms(propobj).size() > 0:
-                return _OntologyAnnotationProperty(propIRI, propobj, self)
+        if self.declindex.isDeclared(propIRI, ANNOTATIONPROPERTY_ENTITY):
+            return _OntologyAnnotationProperty(propIRI, propobj, self)
 
         return None
 
@@ -313,10 +430,8 @@ class Ontology(Observable):
 
         indvobj = self.df.getOWLNamedIndividual(indvIRI)
 
-        ontset = self.ontology.getImportsClosure()
-        for ont in ontset:
-            if ont.getDeclarationAxioms(indvobj).size() > 0:
-                return _OntologyIndividual(indvIRI, indvobj, self)
+        if self.declindex.isDeclared(indvIRI, INDIVIDUAL_ENTITY):
+            return _OntologyIndividual(indvIRI, indvobj, self)
 
         return None
 
@@ -444,12 +559,12 @@ class Ontology(Observable):
 
         return _OntologyIndividual(individualIRI, owlobj, self)
     
-    def addEntityAxiom(self, owl_axiom):
+    def _getLabelAxiomInfo(self, owl_axiom):
         """
-        Adds a new entity axiom to this ontology.  In this context, "entity
-        axiom" means an axiom with an OWL class, property, or individual as its
-        subject.  The argument "owl_axiom" should be an instance of an OWL API
-        axiom object.
+        If an OWL API axiom is a label annotation axiom, returns a tuple
+        containing the label text and the subject IRI.  Otherwise, returns
+        None.  If the subject of a label axiom is anonymous, an exception is
+        thrown.
         """
         if owl_axiom.isOfType(AxiomType.ANNOTATION_ASSERTION):
             if owl_axiom.getProperty().isLabel():
@@ -462,49 +577,194 @@ class Ontology(Observable):
                     raise RuntimeError('Attempted to add the label "'
                         + labeltxt + '" as an annotation of an anonymous class.')
 
-                # Notify observers about the new label.
-                self.notifyObservers('label_added', (labeltxt, subjIRI))
+                return (labeltxt, subjIRI)
+
+        return None
+
+    def addEntityAxiom(self, owl_axiom):
+        """
+        Adds a new entity axiom to this ontology.  In this context, "entity
+        axiom" means an axiom with an OWL class, property, or individual as its
+        subject.  The argument "owl_axiom" should be an instance of an OWL API
+        axiom object.  If an axiom batch is active in the calling thread, the
+        axiom is not added until the batch is committed.
+        """
+        axiom_batch = getattr(self.thread_state, 'axiom_batch', None)
+        if axiom_batch is not None:
+            axiom_batch.append(owl_axiom)
+            return
+
+        labelinfo = self._getLabelAxiomInfo(owl_axiom)
+        if labelinfo is not None:
+            # Notify observers about the new label.
+            self.notifyObservers('label_added', labelinfo)
 
         self.ontman.applyChange(AddAxiom(self.ontology, owl_axiom))
 
+    def addEntityAxioms(self, owl_axioms):
+        """
+        Adds a collection of entity axioms to this ontology (see
+        addEntityAxiom()).  All of the axioms are checked before any are added,
+        so if one of the axioms is invalid, none of the axioms are added.  The
+        axioms are then added with a single batch of ontology changes, and
+        observers are sent a single notification for all new labels.  For
+        large numbers of axioms, this is much more efficient than calling
+        addEntityAxiom() for each axiom.
+
+        owl_axioms: An iterable of OWL API axiom objects.
+        """
+        changes = ArrayList()
+        labelinfos = []
+
+        for owl_axiom in owl_axioms:
+            labelinfo = self._getLabelAxiomInfo(owl_axiom)
+            if labelinfo is not None:
+                labelinfos.append(labelinfo)
+
+            changes.add(AddAxiom(self.ontology, owl_axiom))
+
+        # Notify observers about the new labels.
+        if len(labelinfos) > 0:
+            self.notifyObservers('labels_added', (labelinfos,))
+
+        if changes.size() > 0:
+            self.ontman.applyChanges(changes)
+
+    def startAxiomBatch(self):
+        """
+        Starts a new axiom batch.  While the batch is active, axioms passed to
+        addEntityAxiom() are buffered rather than added to the ontology.  The
+        buffered axioms are added, all at once, by commitAxiomBatch(), or
+        discarded by cancelAxiomBatch().  Note that entities declared by
+        buffered axioms will not be found by the getExisting*() methods until
+        the batch is committed.  Axiom batches are specific to the thread that
+        started them, so each thread can have its own active batch.
+        """
+        if getattr(self.thread_state, 'axiom_batch', None) is not None:
+            raise RuntimeError(
+                'Attempted to start a new axiom batch while another axiom '
+                'batch was active.'
+            )
+
+        self.thread_state.axiom_batch = []
+
+    def takeAxiomBatch(self):
+        """
+        Ends the active axiom batch and returns a tuple of all buffered axioms
+        without adding them to the ontology.  If no batch is active, an empty
+        tuple is returned.  The axioms can be added to the ontology later with
+        addEntityAxioms().
+        """
+        batch = getattr(self.thread_state, 'axiom_batch', None)
+        self.thread_state.axiom_batch = None
+
+        if batch is None:
+            return ()
+        else:
+            return tuple(batch)
+
+    def commitAxiomBatch(self):
+        """
+        Ends the active axiom batch and adds all buffered axioms to the
+        ontology (see addEntityAxioms()).
+        """
+        self.addEntityAxioms(self.takeAxiomBatch())
+
+    def cancelAxiomBatch(self):
+        """
+        Ends the active axiom batch, if there is one, and discards all buffered
+        axioms.
+        """
+        self.thread_state.axiom_batch = None
+
     def removeEntity(self, entity, remove_annotations=True):
         """
         Removes an entity from the ontology (including its imports closure).
         Optionally, any annotations referencing the deleted entity can also be
-        removed (this is the default behavior).
+        removed (this is the default behavior).  To remove more than one
+        entity, removeEntities() is much more efficient.
 
         entity: An _OntologyEntity object or an OWL API entity object.
         remove_annotations: If True, annotations referencing the entity will
             also be removed.
         """
-        if isinstance(entity, _OntologyEntity):
-            owlent = entity.getOWLAPIObj()
-        else:
-            owlent = entity
+        self.removeEntities((entity,), remove_annotations)
+
+    def removeEntities(self, entities, remove_annotations=True):
+        """
+        Removes a collection of entities from the ontology (including its
+        imports closure).  Optionally, any annotations referencing the deleted
+        entities can also be removed (this is the default behavior).  All
+        axioms to delete are gathered first, using the OWL API's
+        referencing-axiom and annotation-subject indexes, and then removed with
+        a single change operation for each ontology in the imports closure.
+
+        entities: An iterable of _OntologyEntity objects and/or OWL API entity
+            objects.
+        remove_annotations: If True, annotations referencing the entities will
+            also be removed.
+        """
+        owlents = []
+        for entity in entities:
+            if isinstance(entity, _OntologyEntity):
+                owlents.append(entity.getOWLAPIObj())
+            else:
+                owlents.append(entity)
 
         ontset = self.ontology.getImportsClosure()
         for ont in ontset:
-            # A set for gathering axioms to remove so that axioms can be
-            # deleted after looping over an ontology's axioms rather than in
-            # the loop, to avoid the risk of invalidating the iteration.
+            # A set for gathering axioms to remove so that all axioms can be
+            # deleted with a single call to removeAxioms().
             del_axioms = HashSet()
 
-            for axiom in ont.getAxioms():
-                # See if this axiom is an annotation axiom.
-                if axiom.getAxiomType() == AxiomType.ANNOTATION_ASSERTION:
-                    if remove_annotations:
-                        # Check if this annotation axiom refers to the target
-                        # entity.
-                        asubject = axiom.getSubject()
-                        if isinstance(asubject, IRI):
-                            if asubject.equals(owlent.getIRI()):
-                                del_axioms.add(axiom)
-                # See if this axiom includes the target entity (e.g., a
-                # declaration axiom for the target entity).
-                elif axiom.getSignature().contains(owlent):
-                    del_axioms.add(axiom)
-
-            self.ontman.removeAxioms(ont, del_axioms)
+            for owlent in owlents:
+                # Get all axioms that include the target entity (e.g., a
+                # declaration axiom for the target entity).  Annotation
+                # assertions are only removed if they have the entity as their
+                # subject, and only if remove_annotations is True.
+                for axiom in ont.getReferencingAxioms(owlent):
+                    if axiom.getAxiomType() != AxiomType.ANNOTATION_ASSERTION:
+                        del_axioms.add(axiom)
+                del_axioms.addAll(ont.getDeclarationAxioms(owlent))
+
+                if remove_annotations:
+                    del_axioms.addAll(
+                        ont.getAnnotationAssertionAxioms(owlent.getIRI())
+                    )
+
+            if del_axioms.size() > 0:
+                self.ontman.removeAxioms(ont, del_axioms)
+
+    def copy(self):
+        """
+        Returns a new Ontology object that contains an independent copy of
+        this ontology.  The copy uses its own OWL API ontology manager, and
+        all ontologies in the imports closure are copied into that manager, so
+        the copy can be modified (e.g., by merging imports or adding inferred
+        axioms) without affecting this ontology and without reloading any
+        ontology documents.
+        """
+        newman = oom_manager.getNewOWLOntologyManager()
+
+        # Copy all imported ontologies, including indirect imports, first so
+        # that the copies' imports declarations can be resolved without
+        # loading any documents.
+        copies = []
+        for owlont in self.ontology.getImportsClosure():
+            if not(owlont.equals(self.ontology)):
+                copies.append(newman.copyOntology(owlont, OntologyCopy.DEEP))
+
+        newowlont = newman.copyOntology(self.ontology, OntologyCopy.DEEP)
+        copies.append(newowlont)
+
+        # As in addImport(), explicitly request each import of every copied
+        # ontology so that the copy's imports closure is the same as this
+        # ontology's imports closure.
+        for owlont in copies:
+            for importdec in owlont.getImportsDeclarations():
+                newman.makeLoadImportRequest(importdec)
+
+        return Ontology(newowlont)
 
     def setOntologyID(self, ont_iri, version_iri=''):
         """
@@ -579,6 +839,9 @@ class Ontology(Observable):
 
         # Check if the import IRI redirects to another URI, in which case get
         # the true location and check if *it* is already included as an import.
+        # Document IRIs that are mapped to local files are never checked over
+        # the network, and the results for remote IRIs can be cached (see
+        # nethelper.setRedirectCache()).
         redir_iri = nethelper.checkForRedirect(docIRI)
         if redir_iri != '':
             if importdocs.contains(IRI.create(redir_iri)):
@@ -809,16 +1072,24 @@ class Ontology(Observable):
         report = {
             'unsatisfiable_classes': []
         }
-        reasoner = self.getReasonerManager().getReasoner(reasoner)
+        reasoner_name = reasoner
+        reasoner = self.getReasonerManager().getReasoner(reasoner_name)
 
-        report['is_consistent'] = reasoner.isConsistent()
+        with reasonerTimeLimit('checking the consistency of the ontology'):
+            report['is_consistent'] = reasoner.isConsistent()
 
         if report['is_consistent']:
             # If the ontology is inconsistent, any attempts to reason over it
-            # will throw exceptions.
+            # will throw exceptions.  Otherwise, classify the ontology before
+            # asking for the unsatisfiable classes.
+            self.getReasonerManager().precomputeInferences(
+                reasoner_name, (InferenceType.CLASS_HIERARCHY,)
+            )
+
             owlnothing = self.df.getOWLNothing()
-            unsatisfiables = reasoner.getUnsatisfiableClasses().getEntities()
-            for unsatisfiable in unsatisfiables:
+            with reasonerTimeLimit('finding the unsatisfiable classes'):
+                unsatisfiables = reasoner.getUnsatisfiableClasses()
+            for unsatisfiable in unsatisfiables.getEntities():
                 if not(unsatisfiable.equals(owlnothing)):
                     report['unsatisfiable_classes'].append(unsatisfiable)
 
@@ -23,7 +23,6 @@
 # Python imports.
 from __future__ import unicode_literals
 from obohelper import oboIDToIRI
-from mshelper import ManchesterSyntaxParserHelper
 
 # Java imports.
 from org.semanticweb.owlapi.manchestersyntax.renderer import ParserException
@@ -199,9 +198,7 @@ class _OntologyEntity:
         manchester_exps: A string containing an MS "description" production.
         """
         try:
-            #self.ontology.mparser = ManchesterSyntaxTool(self.ontology.ontology)
-            #cexp = self.ontology.mparser.parseManchesterExpression(formaldef)
-            parser = ManchesterSyntaxParserHelper(self.ontology)
+            parser = self.ontology.getManchesterParser()
             cexps = parser.parseClassExpression(manchester_exp);
         except ParserException as err:
             print err
@@ -384,7 +381,7 @@ class _OntologyDataProperty(_OntologyEntity):
         """
         if datarange_exp != '':
             try:
-                parser = ManchesterSyntaxParserHelper(self.ontology)
+                parser = self.ontology.getManchesterParser()
 
                 # Parse the expression to get an OWLDataRange object.
                 datarange = parser.parseDataRange(datarange_exp);
@@ -871,7 +868,7 @@ class _OntologyIndividual(_OntologyEntity):
 
         # Parse the literal value.
         try:
-            parser = ManchesterSyntaxParserHelper(self.ontology)
+            parser = self.ontology.getManchesterParser()
             litval = parser.parseLiteral(literal_exp);
         except ParserException as err:
             raise RuntimeError(
@@ -22,6 +22,7 @@
 
 # Python imports.
 from __future__ import unicode_literals
+import threading
 
 # Java imports.
 from org.semanticweb.owlapi.util import SimpleIRIMapper
@@ -39,9 +40,15 @@ _IRImappings = {}
 # *lot* of OOMs, it hardly made a difference in overall memory consumption:
 # e.g., for one pair of runs, I observed a peak of 722 MB without storing
 # references and 733 MB with reference storing.  However, if needed, this could
-# be optimized to improve memory management.
+# be optimized to improve memory management.  OOMs that hold large ontologies
+# that are no longer needed can be released with releaseOWLOntologyManager().
 _ooms_list = []
 
+# Protects _IRImappings and _ooms_list, because OOMs might be created and IRI
+# mappings might be added by several threads at once (e.g., when import modules
+# are built in parallel).
+_lock = threading.RLock()
+
 
 def lookupDocumentIRI(oom, ontologyIRI):
     """
@@ -73,37 +80,58 @@ def addNewIRIMapping(ontologyIRI, documentIRI):
     if ontologyIRI.equals(documentIRI):
         return
 
-    if ontologyIRI not in _IRImappings:
-        _IRImappings[ontologyIRI] = documentIRI
-
-        for oom in _ooms_list:
-            if lookupDocumentIRI(oom, ontologyIRI) is None:
-                oom.getIRIMappers().add(
-                    SimpleIRIMapper(ontologyIRI, documentIRI)
+    with _lock:
+        if ontologyIRI not in _IRImappings:
+            _IRImappings[ontologyIRI] = documentIRI
+
+            for oom in _ooms_list:
+                if lookupDocumentIRI(oom, ontologyIRI) is None:
+                    oom.getIRIMappers().add(
+                        SimpleIRIMapper(ontologyIRI, documentIRI)
+                    )
+
+        elif not(_IRImappings[ontologyIRI].equals(documentIRI)):
+            raise RuntimeError(
+                'Could not create the mapping of <{0}> to <{1}>, because a '
+                'conflicting mapping of <{0}> to <{2}> already exists.'.format(
+                        ontologyIRI.toString(), documentIRI.toString(),
+                        _IRImappings[ontologyIRI].toString()
                 )
-
-    elif not(_IRImappings[ontologyIRI].equals(documentIRI)):
-        raise RuntimeError(
-            'Could not create the mapping of <{0}> to <{1}>, because a '
-            'conflicting mapping of <{0}> to <{2}> already exists.'.format(
-                    ontologyIRI.toString(), documentIRI.toString(),
-                    _IRImappings[ontologyIRI].toString()
             )
-        )
 
 def getNewOWLOntologyManager():
     """
     Creates and returns a new OWLOntologyManager.
     """
     oom = OWLManager.createOWLOntologyManager()
-    _ooms_list.append(oom)
 
-    # Add any missing IRI mappings.
-    for ontologyIRI in _IRImappings:
-        if lookupDocumentIRI(oom, ontologyIRI) is None:
-            oom.getIRIMappers().add(
-                SimpleIRIMapper(ontologyIRI, _IRImappings[ontologyIRI])
-            )
+    with _lock:
+        _ooms_list.append(oom)
+
+        # Add any missing IRI mappings.
+        for ontologyIRI in _IRImappings:
+            if lookupDocumentIRI(oom, ontologyIRI) is None:
+                oom.getIRIMappers().add(
+                    SimpleIRIMapper(ontologyIRI, _IRImappings[ontologyIRI])
+                )
 
     return oom
 
+def releaseOWLOntologyManager(oom):
+    """
+    Removes all ontologies from an OOM that was created by
+    getNewOWLOntologyManager() and stops tracking the OOM, so that the memory
+    used by its ontologies can be reclaimed.  The OOM and its ontologies must
+    not be used after calling this function.
+
+    oom: An OWLOntologyManager.
+    """
+    with _lock:
+        for index, tracked_oom in enumerate(_ooms_list):
+            if tracked_oom.equals(oom):
+                del _ooms_list[index]
+                break
+
+    for owlont in list(oom.getOntologies()):
+        oom.removeOntology(owlont)
+
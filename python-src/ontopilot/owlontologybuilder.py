@@ -22,7 +22,11 @@
 # Python imports.
 from __future__ import unicode_literals
 import re
+import sys
 import unicodedata
+import threading
+from Queue import Queue, Empty
+from collections import OrderedDict
 from obohelper import termIRIToOboID, OBOIdentifierError
 from ontology import Ontology
 from ontology_entities import (
@@ -30,6 +34,7 @@ from ontology_entities import (
     ANNOTATIONPROPERTY_ENTITY, INDIVIDUAL_ENTITY
 )
 from delimstr_parser import DelimStrParser
+from mshelper import ManchesterSyntaxParserHelper
 from tablereader import TableRowError
 
 # Java imports.
@@ -89,12 +94,32 @@ class OWLOntologyBuilder:
         # property assertions (facts).
         self.ws_dsparser = DelimStrParser(delimchars=' \t', quotechars='"\'')
 
+        # An optional TermsAxiomCache for reusing the deferred entity axioms
+        # of unchanged source files (see setAxiomCache()).  While deferred
+        # axioms are processed with a cache, axiom_records maps the name of
+        # each source file that is processed to a dictionary with the file's
+        # entities, generated axioms, and resolved labels.
+        self.axiom_cache = None
+        self.axiom_records = None
+
     def getOntology(self):
         """
         Returns the Ontology object contained by this OWLOntologyBuilder.
         """
         return self.ontology
 
+    def setAxiomCache(self, axiom_cache):
+        """
+        Sets a TermsAxiomCache to use for processing deferred entity axioms.
+        If a cache is set, processDeferredEntityAxioms() reuses the cached
+        axioms of all source files whose axioms would not change and stores
+        the axioms of all other source files in the cache.  The resulting
+        ontology is the same as without a cache.
+
+        axiom_cache: A TermsAxiomCache, or None to disable caching.
+        """
+        self.axiom_cache = axiom_cache
+
     def _addGenericAxioms(self, entobj, entdesc, expanddef=True):
         """
         Adds generic axioms (i.e., axioms that all entities have in common)
@@ -633,34 +658,166 @@ class OWLOntologyBuilder:
                     desc
                 )
 
-    def processDeferredEntityAxioms(self, expanddefs=True):
+    def _getDeferredEntityAxioms(self, entity, desc, expanddefs):
+        """
+        Generates all remaining axioms for an entity from its cached _TableRow
+        description.  Returns a tuple, (axioms, labels), where axioms is a
+        tuple of OWL API axioms and labels is a dictionary that maps each label
+        that was resolved while generating the axioms to the string of its
+        IRI.  The axioms are not added to the ontology, so this method can be
+        called by several threads at once, provided that the objects it uses
+        that would otherwise be created on first use (the thread's Manchester
+        Syntax parser and the label map) were created beforehand (see
+        _processDeferredParallel()).
+        """
+        self.ontology.startAxiomBatch()
+        self.ontology.idr.startLabelLog()
+        try:
+            typeconst = entity.getTypeConst()
+            if typeconst == CLASS_ENTITY:
+                self._addClassAxioms(entity, desc, expanddefs)
+            elif typeconst == DATAPROPERTY_ENTITY:
+                self._addDataPropertyAxioms(entity, desc, expanddefs)
+            elif typeconst == OBJECTPROPERTY_ENTITY:
+                self._addObjectPropertyAxioms(entity, desc, expanddefs)
+            elif typeconst == ANNOTATIONPROPERTY_ENTITY:
+                self._addAnnotationPropertyAxioms(entity, desc, expanddefs)
+            elif typeconst == INDIVIDUAL_ENTITY:
+                self._addIndividualAxioms(entity, desc, expanddefs)
+            else:
+                raise RuntimeError(
+                    'Unsupported ontology entity type: '
+                    '{0}.'.format(typeconst)
+                )
+
+            axioms = self.ontology.takeAxiomBatch()
+
+            return (axioms, self.ontology.idr.takeLabelLog())
+        finally:
+            # If the batch and label log were taken, this has no effect.
+            self.ontology.cancelAxiomBatch()
+            self.ontology.idr.takeLabelLog()
+
+    def _addDeferredAxioms(self, desc, axioms, labels):
+        """
+        Adds the deferred axioms generated from an entity description to the
+        ontology and, if the axioms are being cached, records them for the
+        description's source file.
+        """
+        self.ontology.addEntityAxioms(axioms)
+
+        if self.axiom_records is not None:
+            record = self.axiom_records[desc.getFileName()]
+            record['axioms'].extend(axioms)
+            record['labels'].update(labels)
+
+    def _getCacheSettings(self, expanddefs):
+        """
+        Returns a dictionary of the settings that affect the deferred axioms
+        generated from entity descriptions.
+        """
+        prefixmap = self.prefix_df.getPrefixName2PrefixMap()
+        prefixes = dict(
+            (prefixname, prefixmap.get(prefixname))
+            for prefixname in prefixmap.keySet()
+        )
+
+        return {'expand_defs': expanddefs, 'prefixes': prefixes}
+
+    def _addCachedAxioms(self, expanddefs):
+        """
+        Adds the cached deferred axioms of all source files that have valid
+        axioms in the axiom cache and removes their entity descriptions from
+        the stack.  Prepares axiom_records for all other source files.
+        """
+        settings = self._getCacheSettings(expanddefs)
+
+        # Get the entities for each source file, in processing order.
+        file_entities = OrderedDict()
+        for entity, desc in reversed(self.entity_trows):
+            file_entities.setdefault(desc.getFileName(), []).append(entity)
+
+        # Check all source files before adding any cached axioms, so that all
+        # files are checked against the same ontology state.
+        cached_axioms = {}
+        for filename, entities in file_entities.iteritems():
+            axioms = self.axiom_cache.getAxioms(
+                filename, entities, settings, self.ontology
+            )
+            if axioms is not None:
+                cached_axioms[filename] = axioms
+
+        for filename, axioms in cached_axioms.iteritems():
+            self.ontology.addEntityAxioms(axioms)
+
+        self.entity_trows = [
+            (entity, desc) for entity, desc in self.entity_trows
+            if desc.getFileName() not in cached_axioms
+        ]
+
+        self.axiom_records = OrderedDict()
+        for filename, entities in file_entities.iteritems():
+            if filename not in cached_axioms:
+                self.axiom_records[filename] = {
+                    'entities': entities, 'axioms': [], 'labels': {}
+                }
+
+    def _storeCachedAxioms(self, expanddefs):
+        """
+        Stores the deferred axioms that were generated for each processed
+        source file in the axiom cache.
+        """
+        settings = self._getCacheSettings(expanddefs)
+
+        for filename, record in self.axiom_records.iteritems():
+            self.axiom_cache.storeAxioms(
+                filename, record['entities'], settings, record['axioms'],
+                record['labels'], self.ontology
+            )
+
+    def processDeferredEntityAxioms(self, expanddefs=True, numthreads=1):
         """
         Processes all cached _TableRow entity descriptions and entity objects
         by adding all remaining axioms for the entities. (e.g., text
         definitions, comments, subclass of axioms, etc.).  If expanddefs is
         True, then term labels in the text definition for the new property will
-        be expanded to include the terms' OBO IDs.
+        be expanded to include the terms' OBO IDs.  If numthreads is greater
+        than 1, the entity descriptions are processed in parallel (see
+        _processDeferredParallel()).  The resulting ontology does not depend on
+        the number of threads.  If an axiom cache is set (see
+        setAxiomCache()), cached axioms are used wherever possible.
+        """
+        if self.axiom_cache is not None:
+            self._addCachedAxioms(expanddefs)
+
+        try:
+            if numthreads > 1 and len(self.entity_trows) > 1:
+                self._processDeferredParallel(expanddefs, numthreads)
+            else:
+                self._processDeferredSequential(expanddefs)
+
+            # Only cache the axioms if all entity descriptions were processed
+            # successfully.
+            if self.axiom_records is not None:
+                self._storeCachedAxioms(expanddefs)
+        finally:
+            self.axiom_records = None
+
+    def _processDeferredSequential(self, expanddefs):
+        """
+        Processes all cached entity descriptions, one at a time.
         """
         while len(self.entity_trows) > 0:
             entity, desc = self.entity_trows[-1]
 
+            # All axioms for the entity are added to the ontology with a
+            # single batch of changes.  If processing the entity fails, none
+            # of its axioms are added.
             try:
-                typeconst = entity.getTypeConst()
-                if typeconst == CLASS_ENTITY:
-                    self._addClassAxioms(entity, desc, expanddefs)
-                elif typeconst == DATAPROPERTY_ENTITY:
-                    self._addDataPropertyAxioms(entity, desc, expanddefs)
-                elif typeconst == OBJECTPROPERTY_ENTITY:
-                    self._addObjectPropertyAxioms(entity, desc, expanddefs)
-                elif typeconst == ANNOTATIONPROPERTY_ENTITY:
-                    self._addAnnotationPropertyAxioms(entity, desc, expanddefs)
-                elif typeconst == INDIVIDUAL_ENTITY:
-                    self._addIndividualAxioms(entity, desc, expanddefs)
-                else:
-                    raise RuntimeError(
-                        'Unsupported ontology entity type: '
-                        '{0}.'.format(typeconst)
-                    )
+                axioms, labels = self._getDeferredEntityAxioms(
+                    entity, desc, expanddefs
+                )
+                self._addDeferredAxioms(desc, axioms, labels)
             except RuntimeError as err:
                 raise EntityDescriptionError(unicode(err), desc)
 
@@ -668,7 +825,110 @@ class OWLOntologyBuilder:
             # description is only removed from the list/stack if it was
             # processed without an exception being thrown.
             self.entity_trows.pop()
-    
+
+    def _processDeferredParallel(self, expanddefs, numthreads):
+        """
+        Processes all cached entity descriptions with a pool of worker
+        threads.  Parsing the entity descriptions (including resolving labels
+        and IDs and parsing Manchester Syntax expressions) is done by the
+        workers, which return the axioms for each entity as an immutable batch.
+        The batches are then added to the ontology by the calling thread, in
+        the same order in which the descriptions would be processed
+        sequentially.  If a description cannot be processed, the axioms of all
+        preceding descriptions are added, and an EntityDescriptionError is
+        raised for the failed description, exactly as for sequential
+        processing.
+
+        The OWL API ontology manager is not thread safe, and Manchester Syntax
+        parsers register a change listener with the manager and scan the
+        ontology's signature when they are created.  Therefore, the calling
+        thread creates the parsers for all workers, and builds the label map,
+        before the workers start, and it disposes of the parsers after the
+        workers finish.  While the workers run, neither the ontology nor its
+        manager is modified, so the workers only read from them.
+        """
+        # Process the descriptions in the same order as the sequential code
+        # (i.e., last to first).
+        trows = list(reversed(self.entity_trows))
+
+        # For each description, results will contain either ('axioms',
+        # (axioms, labels)) or ('error', exception info).
+        results = [None] * len(trows)
+
+        rowqueue = Queue()
+        for index in range(len(trows)):
+            rowqueue.put(index)
+
+        # Set when a description fails, so that the workers stop taking new
+        # descriptions.  Because descriptions are taken in order, all
+        # descriptions that precede the failed description will already have
+        # been taken by a worker.
+        failed = threading.Event()
+
+        workercnt = min(numthreads, len(trows))
+        self.ontology.idr.buildLabelMap()
+        msparsers = [
+            ManchesterSyntaxParserHelper(self.ontology)
+            for cnt in range(workercnt)
+        ]
+
+        def worker(msparser):
+            self.ontology.setManchesterParser(msparser)
+            try:
+                while not(failed.is_set()):
+                    try:
+                        index = rowqueue.get_nowait()
+                    except Empty:
+                        break
+
+                    entity, desc = trows[index]
+                    try:
+                        results[index] = (
+                            'axioms',
+                            self._getDeferredEntityAxioms(
+                                entity, desc, expanddefs
+                            )
+                        )
+                    except:
+                        results[index] = ('error', sys.exc_info())
+                        failed.set()
+            finally:
+                self.ontology.setManchesterParser(None)
+
+        try:
+            workers = []
+            for msparser in msparsers:
+                wthread = threading.Thread(target=worker, args=(msparser,))
+                wthread.daemon = True
+                wthread.start()
+                workers.append(wthread)
+
+            for wthread in workers:
+                wthread.join()
+        finally:
+            for msparser in msparsers:
+                msparser.dispose()
+
+        # Add the axioms to the ontology in the original processing order.
+        for index, (entity, desc) in enumerate(trows):
+            restype, result = results[index]
+
+            if restype == 'error':
+                err = result[1]
+                if isinstance(err, RuntimeError):
+                    raise EntityDescriptionError(unicode(err), desc)
+                else:
+                    raise result[0], result[1], result[2]
+
+            try:
+                self._addDeferredAxioms(desc, result[0], result[1])
+            except RuntimeError as err:
+                raise EntityDescriptionError(unicode(err), desc)
+
+            # As for sequential processing, only remove a description from the
+            # stack once its axioms have been added.
+            self.entity_trows.pop()
+
     def _expandDefinition(self, deftext):
         """
         Modifies a text definition for an ontology term by adding OBO IDs for
@@ -16,13 +16,74 @@
 
 # Python imports.
 from __future__ import unicode_literals
+from contextlib import contextmanager
 from ontopilot import logger
 
 # Java imports.
 from org.semanticweb.elk.owlapi import ElkReasonerFactory
+from org.semanticweb.elk.owlapi import ElkReasonerConfiguration
+from org.semanticweb.elk.reasoner.config import ReasonerConfiguration
 from org.semanticweb.HermiT import ReasonerFactory as HermiTReasonerFactory
 from com.clarkparsia.pellet.owlapiv3 import PelletReasonerFactory
 from uk.ac.manchester.cs.jfact import JFactFactory
+from org.semanticweb.owlapi.reasoner import InferenceType, SimpleConfiguration
+from org.semanticweb.owlapi.reasoner import TimeOutException
+
+
+# Strings for identifying the kinds of inferences that reasoners can
+# precompute, and the corresponding OWL API inference types.
+PRECOMPUTE_TYPES = {
+    'class hierarchy': InferenceType.CLASS_HIERARCHY,
+    'class assertions': InferenceType.CLASS_ASSERTIONS,
+    'object property hierarchy': InferenceType.OBJECT_PROPERTY_HIERARCHY,
+    'data property hierarchy': InferenceType.DATA_PROPERTY_HIERARCHY,
+    'object property assertions': InferenceType.OBJECT_PROPERTY_ASSERTIONS,
+    'data property assertions': InferenceType.DATA_PROPERTY_ASSERTIONS,
+    'disjoint classes': InferenceType.DISJOINT_CLASSES,
+    'same individual': InferenceType.SAME_INDIVIDUAL,
+    'different individuals': InferenceType.DIFFERENT_INDIVIDUALS
+}
+
+# The options for all new reasoners (see setReasonerOptions()).
+_options = {'threads': 0, 'timeout': 0, 'precompute': ()}
+
+
+def setReasonerOptions(threads=0, timeout=0, precompute=()):
+    """
+    Sets the options for all reasoners that are created after this call.
+
+    threads: The number of worker threads to use.  Only ELK supports
+        multiple worker threads.  If 0, the reasoner's default is used.
+    timeout: The maximum number of seconds that any single reasoner operation
+        may take.  If 0, there is no time limit.
+    precompute: A list of strings (see PRECOMPUTE_TYPES) that specify the
+        kinds of inferences to precompute before a reasoner is queried.  If
+        empty, the kinds of inferences are chosen by the code that queries the
+        reasoner (see ReasonerManager.precomputeInferences()).
+    """
+    _options['threads'] = threads
+    _options['timeout'] = timeout
+    _options['precompute'] = tuple(precompute)
+
+@contextmanager
+def reasonerTimeLimit(task):
+    """
+    A context manager for code that queries reasoners.  If a reasoner
+    operation exceeds the reasoner timeout (see setReasonerOptions()), the
+    reasoner's TimeOutException is converted to a RuntimeError with an
+    informative message.
+
+    task: A description of what the reasoner is doing, for the error message
+        (e.g., "precomputing inferences").
+    """
+    try:
+        yield
+    except TimeOutException:
+        raise RuntimeError(
+            'The reasoner did not finish {0} within the time limit of {1} s.  '
+            'Increase the reasoner timeout or set it to 0 to disable the time '
+            'limit.'.format(task, _options['timeout'])
+        )
 
 
 class ReasonerManager:
@@ -46,6 +107,41 @@ class ReasonerManager:
         """
         return self.ontology
 
+    def _getReasonerConfiguration(self, reasoner_name):
+        """
+        Returns an OWL API reasoner configuration for a new reasoner that
+        implements the current reasoner options, or None if the reasoner's
+        default configuration should be used.
+
+        reasoner_name: A lower-case reasoner name string.
+        """
+        threads = _options['threads']
+        timeout = _options['timeout']
+
+        if threads == 0 and timeout == 0:
+            return None
+
+        if timeout > 0:
+            rconfig = SimpleConfiguration(long(timeout * 1000))
+        else:
+            rconfig = SimpleConfiguration()
+
+        if reasoner_name == 'elk':
+            elkconfig = ReasonerConfiguration.getConfiguration()
+            if threads > 0:
+                elkconfig.setParameter(
+                    ReasonerConfiguration.NUM_OF_WORKING_THREADS,
+                    unicode(threads)
+                )
+            rconfig = ElkReasonerConfiguration(rconfig, elkconfig)
+        elif threads > 0:
+            logger.warning(
+                'Only the ELK reasoner supports multiple worker threads; the '
+                'reasoner threads setting will be ignored.'
+            )
+
+        return rconfig
+
     def getReasoner(self, reasoner_name):
         """
         Returns an instance of a reasoner matching the value of the string
@@ -76,7 +172,15 @@ class ReasonerManager:
                 rfact = JFactFactory()
 
             if rfact is not None:
-                self.reasoners[reasoner_name] = rfact.createNonBufferingReasoner(owlont)
+                rconfig = self._getReasonerConfiguration(reasoner_name)
+                if rconfig is not None:
+                    reasoner = rfact.createNonBufferingReasoner(
+                        owlont, rconfig
+                    )
+                else:
+                    reasoner = rfact.createNonBufferingReasoner(owlont)
+
+                self.reasoners[reasoner_name] = reasoner
             else:
                 raise RuntimeError(
                     'Unrecognized DL reasoner name: '
@@ -85,6 +189,42 @@ class ReasonerManager:
 
         return self.reasoners[reasoner_name]
 
+    def precomputeInferences(self, reasoner_name, inference_types):
+        """
+        Precomputes inferences with a reasoner before it is queried, so that
+        the work is done once, up front, instead of piecemeal as the queries
+        require it.  Only the kinds of inferences that the reasoner supports
+        and has not already precomputed are computed.  If the kinds of
+        inferences to precompute were configured (see setReasonerOptions()),
+        they are used instead of inference_types.
+
+        reasoner_name: A string specifying the type of reasoner (see
+            getReasoner()).
+        inference_types: A list of OWL API InferenceType constants.
+        """
+        if len(_options['precompute']) > 0:
+            inference_types = [
+                PRECOMPUTE_TYPES[typestr] for typestr in _options['precompute']
+            ]
+
+        reasoner = self.getReasoner(reasoner_name)
+        supported = reasoner.getPrecomputableInferenceTypes()
+
+        to_compute = []
+        for inference_type in inference_types:
+            if (
+                supported.contains(inference_type) and
+                not(reasoner.isPrecomputed(inference_type)) and
+                inference_type not in to_compute
+            ):
+                to_compute.append(inference_type)
+
+        if len(to_compute) == 0:
+            return
+
+        with reasonerTimeLimit('precomputing inferences'):
+            reasoner.precomputeInferences(*to_compute)
+
     def disposeReasoners(self):
         """
         Runs the dispose() operation on all reasoner instances.  Note that this
@@ -0,0 +1,513 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#
+# Provides a class, RelationshipIndex, that maintains an in-memory adjacency
+# index of the direct relationships (subclass/superclass, equivalence,
+# disjointness, domains, ranges, etc.) among the entities in an ontology's
+# imports closure, and the constants for the supported relationship types.
+# Traversing the relationships among entities by searching the OWL API axiom
+# indexes requires several searches of every ontology in the imports closure
+# for each visited entity, which is very slow for large traversals (e.g.,
+# retrieving all descendants of a class in a large taxonomy).  With the
+# index, each relationship type only needs to be indexed once, by scanning the
+# relevant axioms of the imports closure a single time, after which traversals
+# are simple dictionary lookups.  Relationship types are indexed on demand,
+# and the index is discarded whenever an ontology in the indexed imports
+# closure changes.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import unicodedata
+import threading
+from collections import deque
+
+# Java imports.
+from java.util import Collections, IdentityHashMap
+from org.semanticweb.owlapi.model import AxiomType
+from org.semanticweb.owlapi.model import OWLOntologyChangeListener
+
+
+# Define constants for the kinds of axioms from which related terms can be
+# extracted and methods for handling the constants.
+class _RelatedAxiomTypes:
+    # Superclasses and superproperties.
+    ANCESTORS = 0
+    # Subclasses and subproperties.
+    DESCENDANTS = 1
+    # Equivalent classes and properties.
+    EQUIVALENTS = 2
+    # Disjoint classes and properties.
+    DISJOINTS = 3
+    # Domains of object and data properties.
+    DOMAINS = 4
+    # Ranges of object and data properties.
+    RANGES = 5
+    # Object property inverses.
+    INVERSES = 6
+    # Types (class assertions) of named individuals.
+    TYPES = 7
+    # Object and data property assertions of named individuals, including
+    # negative property assertions.
+    PROPERTY_ASSERTIONS = 8
+
+    # Combine all supported axiom types in a single tuple.
+    all_ax_types = (
+        ANCESTORS, DESCENDANTS, EQUIVALENTS, DISJOINTS, DOMAINS, RANGES,
+        INVERSES
+    )
+
+    # Define string values that map to the axiom types.
+    strings = {
+        'ancestors': ANCESTORS,
+        'descendants': DESCENDANTS,
+        'equivalents': EQUIVALENTS,
+        'disjoints': DISJOINTS,
+        'domains': DOMAINS,
+        'ranges': RANGES,
+        'inverses': INVERSES,
+        'types': TYPES,
+        'property assertions': PROPERTY_ASSERTIONS
+    }
+
+    def getAxiomTypesFromStr(self, ax_types_str):
+        """
+        Returns a set of axiom type constants parsed from the input string,
+        which should contain a comma-separated list of axiom type string
+        values.  Matching is not case sensitive.
+        """
+        # First normalize the axiom types string using unicode compatibility
+        # equivalents.  This ensures that "space-like" characters (e.g.,
+        # no-break space) are converted to the ordinary space character.
+        ax_types_str = unicodedata.normalize('NFKC', ax_types_str)
+        type_strs = ax_types_str.split(',')
+
+        ax_types = set()
+
+        for type_str in type_strs:
+            type_str = type_str.strip()
+            if type_str == '':
+                continue
+
+            if type_str.lower() in self.strings:
+                ax_types.add(self.strings[type_str.lower()])
+            else:
+                raise RuntimeError(
+                    'Invalid axiom type for specifying related terms to '
+                    'extract: "{0}".  Axiom type strings must be one of '
+                    '{{"{1}"}}.'.format(
+                        type_str, '", "'.join(self.strings.keys())
+                    )
+                )
+
+        return ax_types
+
+rel_axiom_types = _RelatedAxiomTypes()
+
+
+class RelationshipIndex(OWLOntologyChangeListener):
+    """
+    Maintains an adjacency index of the direct relationships among the
+    entities in an ontology's imports closure.  For each relationship type,
+    the index maps each OWL API entity to a list of (related entities, axiom)
+    pairs, where "related entities" is a tuple of the entities that the axiom
+    relates to the indexed entity (e.g., the superclass of a class), and
+    "axiom" is the axiom that defines the relationship.  Relationships only
+    include named entities; axioms with anonymous class or property
+    expressions are ignored.  The index is thread safe.
+    """
+    def __init__(self, ontology):
+        """
+        Initializes this RelationshipIndex for an existing ontology.  No
+        relationships are indexed until they are first needed.
+
+        ontology: An Ontology object (*not* an OWL API OWLOntology object).
+        """
+        self.ontology = ontology
+        self.lock = threading.Lock()
+
+        # Maps relationship type constants to the index dictionaries for the
+        # relationship types that are currently indexed.
+        self.relations = {}
+
+        # The OWL API ontologies (i.e., the imports closure) that are currently
+        # indexed.  This is an identity-based set because the hash codes of
+        # OWL API ontologies change if their ontology IDs change.
+        self.indexed_onts = self._newOntologySet()
+
+        # Listen for changes to the OWL API ontologies, and register as an
+        # observer of the ontology so that we know when new ontologies are
+        # added to the imports closure.
+        self.ontology.getOntologyManager().addOntologyChangeListener(self)
+        self.ontology.registerObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+        # The methods that build the index for each relationship type.
+        self.indexers = {
+            rel_axiom_types.ANCESTORS: self._indexAncestors,
+            rel_axiom_types.DESCENDANTS: self._indexDescendants,
+            rel_axiom_types.EQUIVALENTS: self._indexEquivalents,
+            rel_axiom_types.DISJOINTS: self._indexDisjoints,
+            rel_axiom_types.DOMAINS: self._indexDomains,
+            rel_axiom_types.RANGES: self._indexRanges,
+            rel_axiom_types.INVERSES: self._indexInverses,
+            rel_axiom_types.TYPES: self._indexTypes,
+            rel_axiom_types.PROPERTY_ASSERTIONS: self._indexPropAssertions
+        }
+
+    def _newOntologySet(self):
+        """
+        Returns a new, empty, identity-based Java set for OWL API ontologies.
+        """
+        return Collections.newSetFromMap(IdentityHashMap())
+
+    def dispose(self):
+        """
+        Stops following changes to the ontology by unregistering this index
+        as an ontology change listener and as an observer of the source
+        ontology.  The index should not be used after calling this method.
+        """
+        self.ontology.getOntologyManager().removeOntologyChangeListener(self)
+        self.ontology.unregisterObserver(
+            'ontology_added', self.notifyOntologyAdded
+        )
+
+    def clear(self):
+        """
+        Discards all indexed relationships.  They will be indexed again when
+        they are next needed.
+        """
+        with self.lock:
+            self.relations = {}
+            self.indexed_onts = self._newOntologySet()
+
+    def ontologiesChanged(self, changes):
+        """
+        Responds to change notifications from the OWL API ontology manager.
+        Only changes to ontologies in the indexed imports closure are
+        considered.
+        """
+        if len(self.relations) == 0:
+            return
+
+        for change in changes:
+            if self.indexed_onts.contains(change.getOntology()):
+                self.clear()
+                return
+
+    def notifyOntologyAdded(self, added_ont):
+        """
+        Responds to 'ontology_added' event notifications from the source
+        ontology.
+        """
+        self.clear()
+
+    def _getRelations(self, rel_type):
+        """
+        Returns the index dictionary for a relationship type, building it
+        first if needed.
+        """
+        relations = self.relations.get(rel_type)
+        if relations is not None:
+            return relations
+
+        with self.lock:
+            if rel_type not in self.relations:
+                closure = self.ontology.getOWLOntology().getImportsClosure()
+                self.indexed_onts.addAll(closure)
+
+                relations = {}
+                for owlont in closure:
+                    self.indexers[rel_type](owlont, relations)
+
+                self.relations[rel_type] = relations
+
+            return self.relations[rel_type]
+
+    def _addRelation(self, relations, entity, related_ents, axiom):
+        """
+        Adds a relationship to an index dictionary.
+        """
+        if entity not in relations:
+            relations[entity] = []
+
+        relations[entity].append((related_ents, axiom))
+
+    def _indexSubAxioms(self, owlont, relations, to_super):
+        """
+        Indexes the subclass and subproperty axioms of an ontology.
+
+        to_super: If True, each entity is related to its superclasses or
+            superproperties; otherwise, to its subclasses or subproperties.
+        """
+        for axiom in owlont.getAxioms(AxiomType.SUBCLASS_OF):
+            sub_ce = axiom.getSubClass()
+            super_ce = axiom.getSuperClass()
+            if not(sub_ce.isAnonymous()) and not(super_ce.isAnonymous()):
+                sub_ce = sub_ce.asOWLClass()
+                super_ce = super_ce.asOWLClass()
+                if to_super:
+                    self._addRelation(relations, sub_ce, (super_ce,), axiom)
+                else:
+                    self._addRelation(relations, super_ce, (sub_ce,), axiom)
+
+        for axtype, converter in (
+            (AxiomType.SUB_OBJECT_PROPERTY, 'asOWLObjectProperty'),
+            (AxiomType.SUB_DATA_PROPERTY, 'asOWLDataProperty')
+        ):
+            for axiom in owlont.getAxioms(axtype):
+                sub_pe = axiom.getSubProperty()
+                super_pe = axiom.getSuperProperty()
+                if not(sub_pe.isAnonymous()) and not(super_pe.isAnonymous()):
+                    sub_pe = getattr(sub_pe, converter)()
+                    super_pe = getattr(super_pe, converter)()
+                    if to_super:
+                        self._addRelation(
+                            relations, sub_pe, (super_pe,), axiom
+                        )
+                    else:
+                        self._addRelation(
+                            relations, super_pe, (sub_pe,), axiom
+                        )
+
+        for axiom in owlont.getAxioms(AxiomType.SUB_ANNOTATION_PROPERTY_OF):
+            sub_pe = axiom.getSubProperty()
+            super_pe = axiom.getSuperProperty()
+            if to_super:
+                self._addRelation(relations, sub_pe, (super_pe,), axiom)
+            else:
+                self._addRelation(relations, super_pe, (sub_pe,), axiom)
+
+    def _indexAncestors(self, owlont, relations):
+        self._indexSubAxioms(owlont, relations, True)
+
+    def _indexDescendants(self, owlont, relations):
+        self._indexSubAxioms(owlont, relations, False)
+
+    def _indexPairwiseAxioms(self, owlont, relations, axtypes):
+        """
+        Indexes the n-ary class or property axioms (e.g., equivalent classes
+        axioms) of the given types in an ontology.  The axioms are converted to
+        pairwise axioms, and each named entity in a pairwise axiom is related
+        to the other named entity by the pairwise axiom.
+
+        axtypes: A sequence of (axiom type, operands getter name, converter
+            name) tuples, where the operands getter is the name of the axiom
+            method that returns the axiom's class or property expressions and
+            the converter is the name of the expression method that returns
+            the corresponding OWL API entity.
+        """
+        for axtype, getter, converter in axtypes:
+            for rawaxiom in owlont.getAxioms(axtype):
+                for axiom in rawaxiom.asPairwiseAxioms():
+                    named_ents = []
+                    for operand in getattr(axiom, getter)():
+                        if not(operand.isAnonymous()):
+                            named_ents.append(getattr(operand, converter)())
+
+                    if len(named_ents) == 2:
+                        self._addRelation(
+                            relations, named_ents[0], (named_ents[1],), axiom
+                        )
+                        self._addRelation(
+                            relations, named_ents[1], (named_ents[0],), axiom
+                        )
+
+    def _indexEquivalents(self, owlont, relations):
+        self._indexPairwiseAxioms(owlont, relations, (
+            (
+                AxiomType.EQUIVALENT_CLASSES, 'getClassExpressions',
+                'asOWLClass'
+            ),
+            (
+                AxiomType.EQUIVALENT_OBJECT_PROPERTIES, 'getProperties',
+                'asOWLObjectProperty'
+            ),
+            (
+                AxiomType.EQUIVALENT_DATA_PROPERTIES, 'getProperties',
+                'asOWLDataProperty'
+            )
+        ))
+
+    def _indexDisjoints(self, owlont, relations):
+        self._indexPairwiseAxioms(owlont, relations, (
+            (
+                AxiomType.DISJOINT_CLASSES, 'getClassExpressions',
+                'asOWLClass'
+            ),
+            (
+                AxiomType.DISJOINT_OBJECT_PROPERTIES, 'getProperties',
+                'asOWLObjectProperty'
+            ),
+            (
+                AxiomType.DISJOINT_DATA_PROPERTIES, 'getProperties',
+                'asOWLDataProperty'
+            )
+        ))
+
+    def _indexPropertyClassAxioms(self, owlont, relations, axtypes, getter):
+        """
+        Indexes the property domain or range axioms of the given types in an
+        ontology.  Each named property is related to the named class returned
+        by the axiom method "getter".  Data property range axioms do not
+        relate a property to any entities.
+
+        axtypes: A sequence of (axiom type, converter name) tuples, where the
+            converter is the name of the property expression method that
+            returns the OWL API property.
+        """
+        for axtype, converter in axtypes:
+            for axiom in owlont.getAxioms(axtype):
+                pexp = axiom.getProperty()
+                if pexp.isAnonymous():
+                    continue
+                prop = getattr(pexp, converter)()
+
+                if axtype == AxiomType.DATA_PROPERTY_RANGE:
+                    self._addRelation(relations, prop, (), axiom)
+                else:
+                    cexp = getattr(axiom, getter)()
+                    if not(cexp.isAnonymous()):
+                        self._addRelation(
+                            relations, prop, (cexp.asOWLClass(),), axiom
+                        )
+
+    def _indexDomains(self, owlont, relations):
+        self._indexPropertyClassAxioms(owlont, relations, (
+            (AxiomType.OBJECT_PROPERTY_DOMAIN, 'asOWLObjectProperty'),
+            (AxiomType.DATA_PROPERTY_DOMAIN, 'asOWLDataProperty')
+        ), 'getDomain')
+
+    def _indexRanges(self, owlont, relations):
+        self._indexPropertyClassAxioms(owlont, relations, (
+            (AxiomType.OBJECT_PROPERTY_RANGE, 'asOWLObjectProperty'),
+            (AxiomType.DATA_PROPERTY_RANGE, 'asOWLDataProperty')
+        ), 'getRange')
+
+    def _indexInverses(self, owlont, relations):
+        for axiom in owlont.getAxioms(AxiomType.INVERSE_OBJECT_PROPERTIES):
+            first = axiom.getFirstProperty()
+            second = axiom.getSecondProperty()
+            if (
+                not(first.isAnonymous()) and not(second.isAnonymous()) and
+                not(first.equals(second))
+            ):
+                first = first.asOWLObjectProperty()
+                second = second.asOWLObjectProperty()
+                self._addRelation(relations, first, (second,), axiom)
+                self._addRelation(relations, second, (first,), axiom)
+
+    def _indexTypes(self, owlont, relations):
+        for axiom in owlont.getAxioms(AxiomType.CLASS_ASSERTION):
+            indv = axiom.getIndividual()
+            cexp = axiom.getClassExpression()
+            if indv.isNamed() and not(cexp.isAnonymous()):
+                self._addRelation(
+                    relations, indv.asOWLNamedIndividual(),
+                    (cexp.asOWLClass(),), axiom
+                )
+
+    def _indexPropAssertions(self, owlont, relations):
+        for axtype in (
+            AxiomType.OBJECT_PROPERTY_ASSERTION,
+            AxiomType.NEGATIVE_OBJECT_PROPERTY_ASSERTION
+        ):
+            for axiom in owlont.getAxioms(axtype):
+                subject = axiom.getSubject()
+                pexp = axiom.getProperty()
+                obj = axiom.getObject()
+                if (
+                    subject.isNamed() and not(pexp.isAnonymous()) and
+                    obj.isNamed()
+                ):
+                    self._addRelation(
+                        relations, subject.asOWLNamedIndividual(),
+                        (pexp.asOWLObjectProperty(),
+                         obj.asOWLNamedIndividual()),
+                        axiom
+                    )
+
+        for axtype in (
+            AxiomType.DATA_PROPERTY_ASSERTION,
+            AxiomType.NEGATIVE_DATA_PROPERTY_ASSERTION
+        ):
+            for axiom in owlont.getAxioms(axtype):
+                subject = axiom.getSubject()
+                pexp = axiom.getProperty()
+                if subject.isNamed() and not(pexp.isAnonymous()):
+                    self._addRelation(
+                        relations, subject.asOWLNamedIndividual(),
+                        (pexp.asOWLDataProperty(),), axiom
+                    )
+
+    def getDirectlyRelatedComponents(self, entity, rel_types):
+        """
+        Gets all entities and axioms that are directly related to the target
+        entity by the specified axiom types.  Returns a tuple containing two
+        sets: 1) A set of all related entities; and 2) a set of axioms that
+        define the relationships.
+
+        entity: An OWL API OWLEntity object.
+        rel_types: A set of related axiom type constants.
+        """
+        entset = set()
+        axiomset = set()
+
+        for rel_type in rel_types:
+            relations = self._getRelations(rel_type)
+            for related_ents, axiom in relations.get(entity, ()):
+                entset.update(related_ents)
+                axiomset.add(axiom)
+
+        return (entset, axiomset)
+
+    def getRelatedComponents(self, target_entity, rel_types):
+        """
+        Gets all entities and axioms that are recursively (i.e., either
+        directly or indirectly) related to the target entity by the specified
+        axiom types, using a breadth-first traversal of the index.  Returns a
+        tuple containing two sets: 1) A set consisting of the target entity
+        plus all related entities; and 2) a set of axioms that define the
+        relationships among the entities.
+
+        target_entity: An OWL API OWLEntity object.
+        rel_types: A set of related axiom type constants.
+        """
+        all_relations = [
+            self._getRelations(rel_type) for rel_type in rel_types
+        ]
+
+        entset = set([target_entity])
+        axiomset = set()
+
+        entqueue = deque([target_entity])
+        while len(entqueue) > 0:
+            entity = entqueue.popleft()
+
+            for relations in all_relations:
+                for related_ents, axiom in relations.get(entity, ()):
+                    axiomset.add(axiom)
+
+                    # Check whether each entity has already been seen so we
+                    # don't get stuck in cyclic relationship graphs.
+                    for related_ent in related_ents:
+                        if related_ent not in entset:
+                            entset.add(related_ent)
+                            entqueue.append(related_ent)
+
+        return (entset, axiomset)
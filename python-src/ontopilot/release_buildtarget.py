@@ -164,28 +164,37 @@ class ReleaseBuildTarget(BuildTargetWithConfig):
 
     def _generateBuildInfo(self):
         """
-        Generates the paths and IRIs needed to build the release.  Sets two
+        Generates the paths and IRIs needed to build the release.  Sets three
         class attributes: ont_fileinfos and imports_fileinfos, which are lists
-        of FileInfo objects that describe how to build the release components.
+        of FileInfo objects that describe how to build the release components,
+        and ont_productkeys, which contains the build products key of the
+        Ontology object for each element of ont_fileinfos.
         """
         # Gather the ontology file information.  Get the compiled main ontology
         # file path from one of the modified ontology dependencies.
         self.ont_fileinfos = []
+        self.ont_productkeys = []
 
-        spath = self.mobt_merged.getOntoBuildTarget().getOutputFilePath()
+        obt = self.mobt_merged.getOntoBuildTarget()
+        spath = obt.getOutputFilePath()
         self.ont_fileinfos.append(
             self._generateOntologyFileInfo(spath, '-raw', False)
         )
+        self.ont_productkeys.append(obt.getOntologyProductKey())
 
         spath = self.mobt_merged.getOutputFilePath()
         self.ont_fileinfos.append(
             self._generateOntologyFileInfo(spath, '-merged', False)
         )
+        self.ont_productkeys.append(self.mobt_merged.getOntologyProductKey())
 
         spath = self.mobt_merged_reasoned.getOutputFilePath()
         self.ont_fileinfos.append(
             self._generateOntologyFileInfo(spath, '', True)
         )
+        self.ont_productkeys.append(
+            self.mobt_merged_reasoned.getOntologyProductKey()
+        )
 
         # Gather the imports file information.
         self.imports_fileinfos = []
@@ -246,8 +255,18 @@ class ReleaseBuildTarget(BuildTargetWithConfig):
 
         # Create the release ontology files.
         logger.info('Creating release ontology files...')
-        for fileinfo in self.ont_fileinfos:
-            ont = Ontology(fileinfo.sourcepath)
+        for fileinfo, productkey in zip(
+            self.ont_fileinfos, self.ont_productkeys
+        ):
+            # Use the Ontology object from the dependencies if it was built as
+            # part of this build; otherwise, load the ontology file.  Products
+            # are shared with other build targets, so they must be copied
+            # before they are modified.
+            ont = self.products.get(productkey)
+            if ont is not None:
+                ont = ont.copy()
+            else:
+                ont = Ontology(fileinfo.sourcepath)
             ont.setOntologyID(fileinfo.destIRI, fileinfo.versionIRI)
 
             # Update the IRIs of any released import modules that are
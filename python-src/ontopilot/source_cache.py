@@ -0,0 +1,990 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a class, SourceOntologyCache, that manages the local copies of the
+# source ontologies of import modules.  Source ontologies can be very large,
+# so the cache avoids downloading them more often than necessary:
+#
+#   * Along with each cached file, the cache stores the file's size,
+#     modification time, and SHA-1 hash, and the HTTP validators (i.e., the
+#     ETag and Last-Modified headers) that the server sent with it.  Cached
+#     files can be refreshed with conditional GET requests, so that a source
+#     ontology is only downloaded again if it was actually changed.
+#   * Downloads are written to a ".part" file, and the validators of the
+#     partial download are recorded before any data are received.  If a
+#     download is interrupted, it is resumed with an HTTP Range request (with
+#     an If-Range header, so that a partial download is never combined with
+#     data from a different version of the source ontology), either right away
+#     or during the next build.
+#   * Downloads are verified against the length and any checksums (Content-MD5
+#     or Digest headers) sent by the server, and cached files are verified
+#     against their recorded SHA-1 hash whenever their size or modification
+#     time have changed.  Corrupted cached files are downloaded again.
+#
+# Optionally, a project's cache can use a SharedSourceCache, which stores
+# source ontologies by content hash in a directory that is shared by all of a
+# user's projects (by default, under the user's home directory).  Downloads are
+# moved to the shared cache, and the project's cached file is a symbolic link
+# to the shared copy (or a hard link or copy if symbolic links are not
+# supported).  When a project needs a source ontology that another project
+# already downloaded, the shared copy is used without any download.  The size
+# of the shared cache is limited by evicting the least recently used files.
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import os
+import re
+import json
+import math
+import base64
+import hashlib
+import threading
+import time
+import errno
+import shutil
+import socket
+import urlparse, httplib
+from urllib import FancyURLopener
+from urllib2 import HTTPError
+from ontopilot import logger
+from build_manifest import getFileHash
+
+# Java imports.
+
+
+# The version of the cache information file format.
+CACHE_VERSION = 1
+
+# The size, in bytes, of the blocks in which downloads are read and written.
+BLOCKSIZE = 65536
+
+# The maximum number of redirects to follow for a download.
+MAX_REDIRECTS = 10
+
+# The maximum number of attempts to complete an interrupted download.
+MAX_ATTEMPTS = 5
+
+# The network timeout, in seconds, for download requests.
+TIMEOUT = 60
+
+# The number of seconds after which a lock file of the shared cache is
+# considered stale (e.g., because the process that created it was killed).
+STALE_LOCK_AGE = 120
+
+# Maps the hash algorithm names used in HTTP Digest headers to hashlib
+# constructors.
+DIGEST_ALGORITHMS = {
+    'md5': hashlib.md5, 'sha': hashlib.sha1, 'sha-256': hashlib.sha256
+}
+
+
+class URLOpenerWithErrorHandling(FancyURLopener):
+    """
+    Extends FancyURLopener by adding better error handling for unrecoverable
+    HTTP errors (e.g., 404).
+    """
+    def http_error_default(self, url, fp, errcode, errmsg, headers):
+        raise HTTPError(url, errcode, errmsg, headers, fp)
+
+
+class _InterruptedDownload(Exception):
+    """
+    Raised when a download ends before all data were received.
+    """
+    pass
+
+
+class _FileLock:
+    """
+    A simple lock file for protecting files that are shared by several
+    processes.  Use in a "with" statement.
+    """
+    def __init__(self, lockpath, timeout=60):
+        """
+        lockpath: The path of the lock file.
+        timeout: The maximum number of seconds to wait for the lock.
+        """
+        self.lockpath = lockpath
+        self.timeout = timeout
+
+    def __enter__(self):
+        starttime = time.time()
+        while True:
+            try:
+                fd = os.open(
+                    self.lockpath, os.O_CREAT | os.O_EXCL | os.O_WRONLY
+                )
+                os.close(fd)
+                return self
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+
+            # Remove stale lock files.
+            try:
+                lockage = time.time() - os.path.getmtime(self.lockpath)
+                if lockage > STALE_LOCK_AGE:
+                    os.remove(self.lockpath)
+                    continue
+            except OSError:
+                continue
+
+            if time.time() - starttime > self.timeout:
+                raise RuntimeError(
+                    'Unable to acquire the lock file {0}.  If no other '
+                    'OntoPilot process is running, please delete the lock '
+                    'file.'.format(self.lockpath)
+                )
+            time.sleep(0.1)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            os.remove(self.lockpath)
+        except OSError:
+            pass
+
+
+class SharedSourceCache:
+    """
+    A content-addressed store of source ontology files that can be shared by
+    several projects (and several OntoPilot processes).  Files are stored by
+    SHA-1 hash, and an index records the current file of each source ontology
+    IRI, with the file's HTTP validators, and when each file was last used.
+    The total size of the stored files is limited by evicting the least
+    recently used files.  All methods are thread safe.
+    """
+    def __init__(self, cachedir, maxsize):
+        """
+        cachedir: The shared cache directory.  It will be created if needed.
+        maxsize: The maximum total size, in bytes, of the stored files.  The
+            most recently stored file is never evicted, even if it is larger
+            than maxsize.
+        """
+        self.cachedir = cachedir
+        self.objectsdir = os.path.join(cachedir, 'objects')
+        self.indexpath = os.path.join(cachedir, 'index.json')
+        self.maxsize = maxsize
+
+        self.lock = threading.Lock()
+
+    def _getObjectPath(self, sha1):
+        return os.path.join(self.objectsdir, sha1[:2], sha1)
+
+    def _lockIndex(self):
+        """
+        Returns a _FileLock for the index.  The shared cache directory is
+        created first, if needed.
+        """
+        if not(os.path.isdir(self.cachedir)):
+            try:
+                os.makedirs(self.cachedir)
+            except OSError:
+                if not(os.path.isdir(self.cachedir)):
+                    raise
+
+        return _FileLock(self.indexpath + '.lock')
+
+    def _readIndex(self):
+        """
+        Reads the index.  If the index file does not exist or cannot be read,
+        returns an empty index.
+        """
+        try:
+            with open(self.indexpath) as fin:
+                index = json.load(fin)
+            if index.get('version') == CACHE_VERSION:
+                return index
+        except (IOError, ValueError):
+            pass
+
+        return {'version': CACHE_VERSION, 'objects': {}, 'sources': {}}
+
+    def _writeIndex(self, index):
+        tmppath = self.indexpath + '.tmp'
+        with open(tmppath, 'w') as fout:
+            json.dump(index, fout, indent=1, sort_keys=True)
+        if os.path.exists(self.indexpath):
+            os.remove(self.indexpath)
+        os.rename(tmppath, self.indexpath)
+
+    def lookup(self, sourceIRI):
+        """
+        Returns a tuple, (file path, validators), for the stored file of a
+        source ontology, where validators is a dictionary of the file's HTTP
+        validators.  Returns None if there is no stored file for the source
+        ontology.  The file is marked as used.
+
+        sourceIRI (string): The IRI of the source ontology.
+        """
+        with self.lock, self._lockIndex():
+            index = self._readIndex()
+
+            sourceinfo = index['sources'].get(sourceIRI)
+            if sourceinfo is None:
+                return None
+
+            sha1 = sourceinfo['sha1']
+            objpath = self._getObjectPath(sha1)
+            objinfo = index['objects'].get(sha1)
+            if (
+                objinfo is None or not(os.path.isfile(objpath)) or
+                os.path.getsize(objpath) != objinfo['size']
+            ):
+                del index['sources'][sourceIRI]
+                self._writeIndex(index)
+                return None
+
+            objinfo['last_used'] = time.time()
+            self._writeIndex(index)
+
+        validators = dict(sourceinfo)
+        del validators['sha1']
+
+        return (objpath, validators)
+
+    def touch(self, filepath):
+        """
+        Marks a stored file as used.  Nothing happens if the file is not a
+        stored file of this cache.
+
+        filepath: The path of a stored file or of a link to a stored file.
+        """
+        objpath = os.path.realpath(filepath)
+        if os.path.dirname(os.path.dirname(objpath)) != os.path.realpath(
+            self.objectsdir
+        ):
+            return
+
+        with self.lock, self._lockIndex():
+            index = self._readIndex()
+            objinfo = index['objects'].get(os.path.basename(objpath))
+            if objinfo is not None:
+                objinfo['last_used'] = time.time()
+                self._writeIndex(index)
+
+    def discard(self, filepath):
+        """
+        Removes a corrupted stored file from the cache.  Nothing happens if
+        the file is not a stored file of this cache.
+
+        filepath: The path of a stored file or of a link to a stored file.
+        """
+        objpath = os.path.realpath(filepath)
+        if os.path.dirname(os.path.dirname(objpath)) != os.path.realpath(
+            self.objectsdir
+        ):
+            return
+
+        with self.lock, self._lockIndex():
+            index = self._readIndex()
+            self._removeObject(index, os.path.basename(objpath))
+            self._writeIndex(index)
+
+    def store(self, sourceIRI, filepath, sha1, validators):
+        """
+        Moves a downloaded file into the cache (or deletes it, if an identical
+        file is already stored), records it as the current file of a source
+        ontology, evicts the least recently used files if the cache is too
+        large, and returns the path of the stored file.
+
+        sourceIRI (string): The IRI of the source ontology.
+        filepath: The path of the downloaded file.
+        sha1: The SHA-1 hash of the downloaded file.
+        validators: A dictionary of the file's HTTP validators.
+        """
+        objpath = self._getObjectPath(sha1)
+        objdir = os.path.dirname(objpath)
+        if not(os.path.isdir(objdir)):
+            try:
+                os.makedirs(objdir)
+            except OSError:
+                if not(os.path.isdir(objdir)):
+                    raise
+
+        # Move the file to the cache before acquiring the lock, because this
+        # requires copying the file if the cache is on another file system.
+        tmppath = '{0}.{1}.{2}.tmp'.format(
+            objpath, os.getpid(), threading.current_thread().ident
+        )
+        shutil.move(filepath, tmppath)
+
+        with self.lock, self._lockIndex():
+            index = self._readIndex()
+
+            if os.path.isfile(objpath):
+                os.remove(tmppath)
+            else:
+                os.rename(tmppath, objpath)
+
+            index['objects'][sha1] = {
+                'size': os.path.getsize(objpath), 'last_used': time.time()
+            }
+
+            sourceinfo = {'sha1': sha1}
+            sourceinfo.update(validators)
+            index['sources'][sourceIRI] = sourceinfo
+
+            self._evict(index, sha1)
+            self._writeIndex(index)
+
+        return objpath
+
+    def _removeObject(self, index, sha1):
+        """
+        Deletes a stored file and removes it and all source ontologies that
+        refer to it from the index.
+        """
+        try:
+            os.remove(self._getObjectPath(sha1))
+        except OSError:
+            pass
+
+        index['objects'].pop(sha1, None)
+        for sourceIRI, sourceinfo in index['sources'].items():
+            if sourceinfo['sha1'] == sha1:
+                del index['sources'][sourceIRI]
+
+    def _evict(self, index, keep_sha1):
+        """
+        Evicts the least recently used stored files until the total size of
+        the stored files is no larger than the maximum size.  The file with
+        the hash keep_sha1 is never evicted.
+        """
+        totalsize = sum(
+            objinfo['size'] for objinfo in index['objects'].values()
+        )
+
+        by_use = sorted(
+            index['objects'].items(), key=lambda item: item[1]['last_used']
+        )
+        for sha1, objinfo in by_use:
+            if totalsize <= self.maxsize:
+                break
+
+            if sha1 != keep_sha1:
+                logger.info(
+                    'Removing the least recently used source ontology file '
+                    '{0} from the shared source ontology cache.'.format(sha1)
+                )
+                self._removeObject(index, sha1)
+                totalsize -= objinfo['size']
+
+
+class SourceOntologyCache:
+    """
+    Downloads, stores, and refreshes local copies of source ontologies.  All
+    methods are thread safe.
+    """
+    def __init__(self, cachedir, sharedcache=None):
+        """
+        cachedir: The directory in which to store the source ontologies.  It
+            must already exist when a source ontology is retrieved.
+        sharedcache (optional): A SharedSourceCache in which to store the
+            actual source ontology files.
+        """
+        self.cachedir = cachedir
+        self.sharedcache = sharedcache
+
+        # Locks that make sure that each cached file is only downloaded by
+        # one thread at a time, keyed by file path.
+        self.lock = threading.Lock()
+        self.filelocks = {}
+
+    def getFilePath(self, sourceIRI):
+        """
+        Returns the path of the local copy of a source ontology.
+
+        sourceIRI (string): The IRI of the source ontology.
+        """
+        return os.path.join(self.cachedir, os.path.basename(sourceIRI))
+
+    def _getFileLock(self, filepath):
+        """
+        Returns the lock for a cached file.
+        """
+        with self.lock:
+            if filepath not in self.filelocks:
+                self.filelocks[filepath] = threading.Lock()
+
+            return self.filelocks[filepath]
+
+    def _getCacheInfoPath(self, filepath):
+        return filepath + '.cacheinfo'
+
+    def _getPartialPath(self, filepath):
+        return filepath + '.part'
+
+    def _readCacheInfo(self, filepath):
+        """
+        Returns the cache information dictionary for a cached file.  The
+        dictionary has up to two entries: 'complete', with information about
+        the cached file, and 'partial', with information about an incomplete
+        download.  If there is no valid cache information, the dictionary is
+        empty.
+        """
+        try:
+            with open(self._getCacheInfoPath(filepath)) as fin:
+                cacheinfo = json.load(fin)
+
+            if cacheinfo.get('version') == CACHE_VERSION:
+                del cacheinfo['version']
+                return cacheinfo
+        except (IOError, ValueError):
+            pass
+
+        return {}
+
+    def _writeCacheInfo(self, filepath, cacheinfo):
+        """
+        Writes the cache information dictionary for a cached file.
+        """
+        record = dict(cacheinfo)
+        record['version'] = CACHE_VERSION
+
+        infopath = self._getCacheInfoPath(filepath)
+        tmppath = infopath + '.tmp'
+        with open(tmppath, 'w') as fout:
+            json.dump(record, fout, indent=1, sort_keys=True)
+        if os.path.exists(infopath):
+            os.remove(infopath)
+        os.rename(tmppath, infopath)
+
+    def _isFileValid(self, filepath, cacheinfo):
+        """
+        Checks whether a cached file matches its recorded size and SHA-1 hash.
+        The hash is only computed if the file's modification time has changed,
+        in which case the new modification time is recorded.
+        """
+        fileinfo = cacheinfo['complete']
+
+        fstat = os.stat(filepath)
+        if fstat.st_size != fileinfo['size']:
+            return False
+
+        if fstat.st_mtime != fileinfo['mtime']:
+            if getFileHash(filepath) != fileinfo['sha1']:
+                return False
+
+            fileinfo['mtime'] = fstat.st_mtime
+            self._writeCacheInfo(filepath, cacheinfo)
+
+        return True
+
+    def retrieve(self, sourceIRI, refresh=False, reporthook=None):
+        """
+        Makes sure that a local copy of a source ontology is available and
+        returns its path.  The source ontology is downloaded if there is no
+        local copy, if the local copy is corrupted, or, if refresh is True,
+        if the remote source ontology has changed.
+
+        sourceIRI (string): The IRI of the source ontology.
+        refresh (optional): Whether to check if an existing local copy is
+            still current.
+        reporthook (optional): A download progress function with the same
+            arguments as for urllib.urlretrieve() (i.e., the number of blocks
+            transferred so far, the block size, and the total size, which is
+            -1 if it is unknown).
+        """
+        filepath = self.getFilePath(sourceIRI)
+
+        with self._getFileLock(filepath):
+            cacheinfo = self._readCacheInfo(filepath)
+
+            # With a shared cache, a missing local copy might be available
+            # from the shared cache.
+            if not(os.path.isfile(filepath)) and self.sharedcache is not None:
+                self._linkFromSharedCache(sourceIRI, filepath, cacheinfo)
+
+            if os.path.isfile(filepath):
+                if 'complete' not in cacheinfo:
+                    # A local copy without cache information (e.g., one that
+                    # was copied manually) is used as it is.
+                    if not(refresh):
+                        return filepath
+                elif not(self._isFileValid(filepath, cacheinfo)):
+                    logger.warning(
+                        'The local copy of {0} does not match its recorded '
+                        'checksum, so it will be downloaded again.'.format(
+                            sourceIRI
+                        )
+                    )
+                    if self.sharedcache is not None:
+                        self.sharedcache.discard(filepath)
+                    del cacheinfo['complete']
+                elif not(refresh):
+                    if self.sharedcache is not None:
+                        self.sharedcache.touch(filepath)
+                    return filepath
+            else:
+                cacheinfo.pop('complete', None)
+
+            parts = urlparse.urlsplit(sourceIRI)
+            try:
+                if parts.scheme.lower() in ('http', 'https'):
+                    self._downloadHTTP(
+                        sourceIRI, filepath, cacheinfo, reporthook
+                    )
+                else:
+                    self._downloadOther(
+                        sourceIRI, filepath, cacheinfo, reporthook
+                    )
+            except (IOError, OSError, HTTPError) as err:
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": '
+                    '{1}'.format(sourceIRI, unicode(err))
+                )
+
+        return filepath
+
+    def _linkFromSharedCache(self, sourceIRI, filepath, cacheinfo):
+        """
+        If the shared cache has a copy of a source ontology, links the local
+        copy to it and records the local copy's information.
+        """
+        found = self.sharedcache.lookup(sourceIRI)
+        if found is None:
+            return
+
+        objpath, validators = found
+        logger.info(
+            'Using the copy of {0} in the shared source ontology '
+            'cache.'.format(sourceIRI)
+        )
+        self._linkFile(objpath, filepath)
+
+        fstat = os.stat(filepath)
+        fileinfo = {
+            'IRI': sourceIRI, 'size': fstat.st_size, 'mtime': fstat.st_mtime,
+            'sha1': os.path.basename(objpath)
+        }
+        fileinfo.update(validators)
+        cacheinfo['complete'] = fileinfo
+        self._writeCacheInfo(filepath, cacheinfo)
+
+    def _linkFile(self, objpath, filepath):
+        """
+        Makes filepath refer to a file in the shared cache.  A symbolic link
+        is used if possible; otherwise, a hard link or a copy.
+        """
+        if os.path.lexists(filepath):
+            os.remove(filepath)
+
+        for linkfunc in (
+            getattr(os, 'symlink', None), getattr(os, 'link', None)
+        ):
+            if linkfunc is not None:
+                try:
+                    linkfunc(objpath, filepath)
+                    return
+                except (OSError, NotImplementedError):
+                    pass
+
+        shutil.copyfile(objpath, filepath)
+
+    def _downloadOther(self, sourceIRI, filepath, cacheinfo, reporthook):
+        """
+        Downloads a source ontology with a non-HTTP(S) IRI (e.g., an FTP IRI).
+        Such downloads cannot be resumed or refreshed conditionally.
+        """
+        if reporthook is None:
+            logger.info('Downloading ' + sourceIRI + '...')
+
+        partpath = self._getPartialPath(filepath)
+        opener = URLOpenerWithErrorHandling()
+        if reporthook is None:
+            opener.retrieve(sourceIRI, partpath)
+        else:
+            opener.retrieve(sourceIRI, partpath, reporthook)
+
+        cacheinfo.pop('partial', None)
+        self._finishDownload(
+            sourceIRI, filepath, cacheinfo, getFileHash(partpath), {}
+        )
+
+    def _finishDownload(
+        self, sourceIRI, filepath, cacheinfo, sha1, validators
+    ):
+        """
+        Replaces a cached file with a completed download and records the new
+        file's information.
+        """
+        partpath = self._getPartialPath(filepath)
+        if self.sharedcache is not None:
+            objpath = self.sharedcache.store(
+                sourceIRI, partpath, sha1, validators
+            )
+            self._linkFile(objpath, filepath)
+        else:
+            if os.path.lexists(filepath):
+                os.remove(filepath)
+            os.rename(partpath, filepath)
+
+        fstat = os.stat(filepath)
+        fileinfo = {
+            'IRI': sourceIRI, 'size': fstat.st_size, 'mtime': fstat.st_mtime,
+            'sha1': sha1
+        }
+        fileinfo.update(validators)
+
+        cacheinfo['complete'] = fileinfo
+        cacheinfo.pop('partial', None)
+        self._writeCacheInfo(filepath, cacheinfo)
+
+    def _downloadHTTP(self, sourceIRI, filepath, cacheinfo, reporthook):
+        """
+        Downloads or refreshes a source ontology with an HTTP(S) IRI,
+        resuming interrupted downloads if possible.
+        """
+        attempt = 1
+        while True:
+            try:
+                self._requestHTTP(sourceIRI, filepath, cacheinfo, reporthook)
+                return
+            except _InterruptedDownload as err:
+                if attempt == MAX_ATTEMPTS:
+                    raise RuntimeError(
+                        'Unable to download the external ontology at "{0}": '
+                        'the download was interrupted {1} times.  The '
+                        'download will be resumed during the next '
+                        'build.'.format(sourceIRI, MAX_ATTEMPTS)
+                    )
+
+                logger.info(
+                    'The download of {0} was interrupted ({1}); '
+                    'resuming.'.format(sourceIRI, err)
+                )
+                attempt += 1
+
+    def _getValidators(self, response):
+        """
+        Returns a dictionary of the HTTP validators of a response.
+        """
+        validators = {}
+        for header, key in (
+            ('etag', 'etag'), ('last-modified', 'last_modified')
+        ):
+            value = response.getheader(header)
+            if value is not None:
+                validators[key] = value
+
+        return validators
+
+    def _getRangeValidator(self, validators):
+        """
+        Returns a value for an If-Range header from a dictionary of HTTP
+        validators, or None if there is no usable validator.  Weak entity tags
+        cannot be used for range requests.
+        """
+        etag = validators.get('etag')
+        if etag is not None and not(etag.startswith('W/')):
+            return etag
+
+        return validators.get('last_modified')
+
+    def _openRequest(self, sourceIRI, headers):
+        """
+        Sends a GET request for a source ontology, following any redirects,
+        and returns a tuple, (connection, response).
+        """
+        curr_iri = sourceIRI
+        for redirect_cnt in range(MAX_REDIRECTS + 1):
+            parts = urlparse.urlsplit(curr_iri)
+            if parts.scheme.lower() == 'http':
+                conn = httplib.HTTPConnection(parts.netloc, timeout=TIMEOUT)
+            elif parts.scheme.lower() == 'https':
+                conn = httplib.HTTPSConnection(parts.netloc, timeout=TIMEOUT)
+            else:
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": the '
+                    'IRI <{1}> is not an HTTP or HTTPS IRI.'.format(
+                        sourceIRI, curr_iri
+                    )
+                )
+
+            location_part = urlparse.urlunsplit(('', '') + parts[2:5])
+
+            try:
+                conn.request('GET', location_part, headers=headers)
+                response = conn.getresponse()
+            except (socket.error, httplib.HTTPException) as err:
+                conn.close()
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": '
+                    '{1}.'.format(sourceIRI, unicode(err))
+                )
+
+            status = int(response.status)
+            location = response.getheader('location')
+            if status in (301, 302, 303, 307, 308) and location is not None:
+                conn.close()
+                curr_iri = urlparse.urljoin(curr_iri, location)
+            else:
+                return (conn, response)
+
+        raise RuntimeError(
+            'Unable to download the external ontology at "{0}": too many '
+            'redirects.'.format(sourceIRI)
+        )
+
+    def _requestHTTP(self, sourceIRI, filepath, cacheinfo, reporthook):
+        """
+        Makes a single attempt to download or refresh a source ontology.
+        Raises _InterruptedDownload if the download was not completed.
+        """
+        partpath = self._getPartialPath(filepath)
+
+        # Check whether there is a partial download that can be resumed.
+        partinfo = cacheinfo.get('partial')
+        offset = 0
+        if (
+            partinfo is not None and partinfo['IRI'] == sourceIRI and
+            os.path.isfile(partpath)
+        ):
+            offset = os.path.getsize(partpath)
+        else:
+            partinfo = None
+
+        headers = {}
+
+        # If there is a local copy, only request the source ontology if it
+        # has changed.
+        fileinfo = cacheinfo.get('complete')
+        if fileinfo is not None:
+            if 'etag' in fileinfo:
+                headers['If-None-Match'] = fileinfo['etag']
+            if 'last_modified' in fileinfo:
+                headers['If-Modified-Since'] = fileinfo['last_modified']
+
+        # Only request the rest of a partial download if the remote source
+        # ontology is the same version.
+        if offset > 0:
+            range_validator = self._getRangeValidator(partinfo)
+            if range_validator is not None:
+                headers['Range'] = 'bytes={0}-'.format(offset)
+                headers['If-Range'] = range_validator
+            else:
+                offset = 0
+
+        conn, response = self._openRequest(sourceIRI, headers)
+        try:
+            status = int(response.status)
+
+            if status == 304:
+                # The local copy is current.
+                logger.info(
+                    'The local copy of {0} is up to date.'.format(sourceIRI)
+                )
+                self._writeCacheInfo(filepath, cacheinfo)
+                return
+            elif status == 416:
+                # The partial download cannot be resumed, so start over.
+                cacheinfo.pop('partial', None)
+                self._writeCacheInfo(filepath, cacheinfo)
+                raise _InterruptedDownload('invalid range request')
+            elif status == 404:
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": the '
+                    'resource could not be found.  Please make sure that the '
+                    'IRI is correct.'.format(sourceIRI)
+                )
+            elif status not in (200, 206):
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": the '
+                    'server responded with HTTP status {1} ({2}).'.format(
+                        sourceIRI, status, response.reason
+                    )
+                )
+
+            total = self._getContentSize(response, status, offset)
+            if total is None and status == 206:
+                # The server did not resume at the requested offset.
+                cacheinfo.pop('partial', None)
+                self._writeCacheInfo(filepath, cacheinfo)
+                raise _InterruptedDownload('unexpected content range')
+
+            if status == 200:
+                offset = 0
+                partinfo = {'IRI': sourceIRI}
+                partinfo.update(self._getValidators(response))
+                cacheinfo['partial'] = partinfo
+                self._writeCacheInfo(filepath, cacheinfo)
+
+            hashers = self._getHashers(response, status)
+            if offset > 0:
+                self._hashFile(partpath, hashers.values())
+                logger.info(
+                    'Resuming the download of {0} at byte {1}.'.format(
+                        sourceIRI, offset
+                    )
+                )
+            elif reporthook is None:
+                logger.info('Downloading ' + sourceIRI + '...')
+
+            received = self._receiveData(
+                response, partpath, offset, total, hashers, reporthook
+            )
+        finally:
+            conn.close()
+
+        if total is not None and received != total:
+            raise _InterruptedDownload(
+                'received {0} of {1} bytes'.format(received, total)
+            )
+
+        self._checkDigests(sourceIRI, filepath, cacheinfo, response, hashers)
+
+        validators = {}
+        for key in ('etag', 'last_modified'):
+            if key in partinfo:
+                validators[key] = partinfo[key]
+
+        self._finishDownload(
+            sourceIRI, filepath, cacheinfo, hashers['sha1'].hexdigest(),
+            validators
+        )
+
+    def _getContentSize(self, response, status, offset):
+        """
+        Returns the total size of the remote file, or None if it is unknown.
+        For partial content responses, returns None if the content does not
+        start at the requested offset.
+        """
+        if status == 206:
+            content_range = response.getheader('content-range', '')
+            match = re.match(
+                r'bytes\s+(\d+)-(\d+)/(\d+|\*)', content_range.strip()
+            )
+            if match is None or int(match.group(1)) != offset:
+                return None
+            if match.group(3) == '*':
+                return int(match.group(2)) + 1
+
+            return int(match.group(3))
+        else:
+            length = response.getheader('content-length')
+            if length is None:
+                return None
+
+            return int(length)
+
+    def _getHashers(self, response, status):
+        """
+        Returns a dictionary of hashlib hash objects, keyed by HTTP Digest
+        algorithm name, for computing the SHA-1 hash of a download ('sha1')
+        and all checksums provided by the server.
+        """
+        hashers = {'sha1': hashlib.sha1()}
+
+        # Content-MD5 only covers the content of the response, so it can only
+        # be checked for complete downloads.
+        if status == 200 and response.getheader('content-md5') is not None:
+            hashers['content-md5'] = hashlib.md5()
+
+        for algorithm in self._getDigests(response):
+            hashers[algorithm] = DIGEST_ALGORITHMS[algorithm]()
+
+        return hashers
+
+    def _getDigests(self, response):
+        """
+        Returns a dictionary of the supported checksums in an HTTP Digest
+        header, keyed by algorithm name.
+        """
+        digests = {}
+
+        digest_str = response.getheader('digest')
+        if digest_str is not None:
+            for digest in digest_str.split(','):
+                algorithm, sep, value = digest.strip().partition('=')
+                if algorithm.lower() in DIGEST_ALGORITHMS:
+                    digests[algorithm.lower()] = value
+
+        return digests
+
+    def _hashFile(self, filepath, hashers):
+        """
+        Updates a collection of hash objects with the contents of a file.
+        """
+        with open(filepath, 'rb') as fin:
+            chunk = fin.read(BLOCKSIZE)
+            while len(chunk) > 0:
+                for hasher in hashers:
+                    hasher.update(chunk)
+                chunk = fin.read(BLOCKSIZE)
+
+    def _receiveData(
+        self, response, partpath, offset, total, hashers, reporthook
+    ):
+        """
+        Writes the content of a response to a partial download file, starting
+        at the given offset.  Returns the total size of the partial download
+        file.  Raises _InterruptedDownload if the connection fails.
+        """
+        received = offset
+
+        if reporthook is not None:
+            reporthook(0, BLOCKSIZE, -1 if total is None else total)
+
+        if offset > 0:
+            mode = 'ab'
+        else:
+            mode = 'wb'
+
+        with open(partpath, mode) as fout:
+            while True:
+                try:
+                    chunk = response.read(BLOCKSIZE)
+                except (socket.error, httplib.HTTPException) as err:
+                    raise _InterruptedDownload(unicode(err))
+
+                if len(chunk) == 0:
+                    break
+
+                fout.write(chunk)
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+                received += len(chunk)
+
+                if reporthook is not None:
+                    reporthook(
+                        int(math.ceil(float(received) / BLOCKSIZE)),
+                        BLOCKSIZE, -1 if total is None else total
+                    )
+
+        return received
+
+    def _checkDigests(self, sourceIRI, filepath, cacheinfo, response, hashers):
+        """
+        Verifies a completed download against the checksums provided by the
+        server.  If a checksum does not match, the download is discarded.
+        """
+        expected = self._getDigests(response)
+        if 'content-md5' in hashers:
+            expected['content-md5'] = response.getheader('content-md5')
+
+        for algorithm, value in expected.iteritems():
+            digest = base64.b64encode(hashers[algorithm].digest())
+            if digest != value.strip():
+                os.remove(self._getPartialPath(filepath))
+                cacheinfo.pop('partial', None)
+                self._writeCacheInfo(filepath, cacheinfo)
+
+                raise RuntimeError(
+                    'Unable to download the external ontology at "{0}": the '
+                    'downloaded file does not match the {1} checksum provided '
+                    'by the server.'.format(sourceIRI, algorithm.upper())
+                )
@@ -0,0 +1,274 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Provides a class, TermsAxiomCache, that stores the deferred entity axioms
+# (i.e., all axioms except entity declarations and labels) that were generated
+# from each terms file during a previous build, so that unchanged terms files
+# do not need to be processed again.  For each terms file, the cache stores
+# the axioms in an OWL functional syntax document along with a small JSON
+# record of everything the axioms depend on:
+#
+#   * the SHA-1 hash of the terms file;
+#   * the IRIs and types of the entities described in the terms file;
+#   * every label that was resolved while generating the axioms, and the IRI
+#     it resolved to;
+#   * the declared types of every entity in the signature of the axioms;
+#   * the settings that affect axiom generation (e.g., whether text
+#     definitions are expanded, and the ontology's prefixes).
+#
+# Cached axioms are only reused if all of these are unchanged in the current
+# build, in which case they are exactly the axioms that processing the terms
+# file again would generate.  Thus, a terms file must be processed again if it
+# was changed or if a label it uses now refers to a different entity (e.g.,
+# because the label was moved to a new term in another terms file).
+#
+
+# Python imports.
+from __future__ import unicode_literals
+import os
+import json
+import hashlib
+import threading
+from ontopilot import logger
+from build_manifest import getFileHash
+
+# Java imports.
+from java.io import File, FileOutputStream
+from java.io import IOException as JavaIOException
+from java.util import HashSet
+from org.semanticweb.owlapi.apibinding import OWLManager
+from org.semanticweb.owlapi.model import IRI
+from org.semanticweb.owlapi.model import OWLOntologyCreationException
+from org.semanticweb.owlapi.model import OWLOntologyStorageException
+from org.semanticweb.owlapi.formats import FunctionalSyntaxDocumentFormat
+
+
+# The version of the cache record format.  This should be incremented whenever
+# changes to OntoPilot would change the axioms that are generated from terms
+# files, so that all cached axioms are discarded.
+CACHE_VERSION = 1
+
+
+class TermsAxiomCache:
+    """
+    Stores and retrieves the deferred entity axioms generated from terms
+    files.  All methods are thread safe.
+    """
+    def __init__(self, cachedir):
+        """
+        cachedir: The directory in which to store cached axioms.  It will be
+            created when axioms are first stored, if needed.
+        """
+        self.cachedir = cachedir
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def getCacheStats(self):
+        """
+        Returns a dictionary with the numbers of terms files for which cached
+        axioms were and were not reused.
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _getEntryPaths(self, termsfile):
+        """
+        Returns the paths of the JSON record and the axioms document for a
+        terms file.
+        """
+        basename = hashlib.sha1(
+            os.path.abspath(termsfile).encode('utf-8')
+        ).hexdigest()
+        basepath = os.path.join(self.cachedir, basename)
+
+        return (basepath + '.json', basepath + '.ofn')
+
+    def _normalize(self, value):
+        """
+        Converts a value to the form in which it is stored in a JSON record
+        (e.g., tuples become lists), so that recorded and current values can be
+        compared directly.
+        """
+        return json.loads(json.dumps(value, sort_keys=True))
+
+    def _getEntityList(self, entities):
+        """
+        Returns a list of [IRI string, entity type] pairs for a list of
+        _OntologyEntity objects.
+        """
+        return [
+            [entity.getIRI().toString(), entity.getTypeConst()]
+            for entity in entities
+        ]
+
+    def _getEntityTypes(self, iristr, ontology):
+        """
+        Returns a sorted list of the types of all entities declared with an
+        IRI in an ontology's imports closure.
+        """
+        return sorted(ontology.declindex.getEntityTypes(IRI.create(iristr)))
+
+    def _isRecordValid(self, record, termsfile, entities, settings, ontology):
+        """
+        Checks whether all dependencies in a cache record are unchanged.
+        """
+        if record.get('version') != CACHE_VERSION:
+            return False
+
+        if record['settings'] != self._normalize(settings):
+            return False
+
+        if record['file_hash'] != getFileHash(termsfile):
+            return False
+
+        if record['entities'] != self._getEntityList(entities):
+            return False
+
+        for labelstr, iristr in record['labels'].iteritems():
+            try:
+                labelIRI = ontology.resolveLabel(labelstr)
+            except RuntimeError:
+                return False
+
+            if labelIRI.toString() != iristr:
+                return False
+
+        for iristr, enttypes in record['entity_types'].iteritems():
+            if self._getEntityTypes(iristr, ontology) != enttypes:
+                return False
+
+        return True
+
+    def getAxioms(self, termsfile, entities, settings, ontology):
+        """
+        Returns a tuple of the cached axioms for a terms file, or None if
+        there are no valid cached axioms for the terms file.
+
+        termsfile: The path of the terms file.
+        entities: A list of the _OntologyEntity objects for all entity
+            descriptions in the terms file, in processing order.
+        settings: A JSON-compatible dictionary of all settings that affect
+            axiom generation.
+        ontology: The Ontology that is being built.  All entities and labels
+            from all terms files must already have been added.
+        """
+        recordpath, axiomspath = self._getEntryPaths(termsfile)
+
+        axioms = None
+        try:
+            with open(recordpath) as fin:
+                record = json.load(fin)
+
+            if (
+                self._isRecordValid(
+                    record, termsfile, entities, settings, ontology
+                ) and record['axioms_hash'] == getFileHash(axiomspath)
+            ):
+                ontman = OWLManager.createOWLOntologyManager()
+                owlont = ontman.loadOntologyFromOntologyDocument(
+                    File(axiomspath)
+                )
+                axioms = tuple(owlont.getAxioms())
+        except (
+            IOError, OSError, ValueError, KeyError, JavaIOException,
+            OWLOntologyCreationException
+        ):
+            axioms = None
+
+        with self.lock:
+            if axioms is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return axioms
+
+    def storeAxioms(
+        self, termsfile, entities, settings, axioms, labels, ontology
+    ):
+        """
+        Stores the axioms generated from a terms file.  Failure to store the
+        axioms is not an error; the terms file will simply be processed again
+        during the next build.
+
+        termsfile: The path of the terms file.
+        entities: As for getAxioms().
+        settings: As for getAxioms().
+        axioms: A list of all deferred axioms for the entities in the terms
+            file.
+        labels: A dictionary that maps each label string resolved while
+            generating the axioms to the string of the IRI it resolved to.
+        ontology: The Ontology that was built.
+        """
+        recordpath, axiomspath = self._getEntryPaths(termsfile)
+
+        # Get the types of all entities that the axioms refer to.
+        entity_types = {}
+        for axiom in axioms:
+            for owlentity in axiom.getSignature():
+                iristr = owlentity.getIRI().toString()
+                if iristr not in entity_types:
+                    entity_types[iristr] = self._getEntityTypes(
+                        iristr, ontology
+                    )
+
+        try:
+            if not(os.path.isdir(self.cachedir)):
+                os.makedirs(self.cachedir)
+
+            file_hash = getFileHash(termsfile)
+
+            # Write the axioms document first, so that a record is never
+            # written without its axioms.
+            ontman = OWLManager.createOWLOntologyManager()
+            owlont = ontman.createOntology()
+            axiomset = HashSet(len(axioms))
+            for axiom in axioms:
+                axiomset.add(axiom)
+            ontman.addAxioms(owlont, axiomset)
+
+            # Do not let the writer add declarations for the entities in the
+            # axioms' signature; they would be added to the ontology along with
+            # the cached axioms.
+            docformat = FunctionalSyntaxDocumentFormat()
+            docformat.setAddMissingTypes(False)
+
+            foutputstream = FileOutputStream(File(axiomspath))
+            try:
+                ontman.saveOntology(owlont, docformat, foutputstream)
+            finally:
+                foutputstream.close()
+
+            record = {
+                'version': CACHE_VERSION,
+                'settings': self._normalize(settings),
+                'file_hash': file_hash,
+                'entities': self._getEntityList(entities),
+                'labels': labels,
+                'entity_types': entity_types,
+                'axioms_hash': getFileHash(axiomspath)
+            }
+
+            with open(recordpath, 'w') as fout:
+                json.dump(record, fout, indent=1, sort_keys=True)
+        except (
+            IOError, OSError, JavaIOException, OWLOntologyStorageException
+        ) as err:
+            logger.debug(
+                'Unable to cache the axioms for terms file "{0}": {1}'.format(
+                    termsfile, err
+                )
+            )
+
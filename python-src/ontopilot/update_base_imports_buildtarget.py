@@ -88,17 +88,34 @@ class UpdateBaseImportsBuildTarget(BuildTargetWithConfig):
     def getBuildNotRequiredMsg(self):
         return 'The base ontology is already up to date.'
 
-    def _isBuildRequired(self):
+    def _getManifestInputs(self):
         """
-        If we're doing in-source builds, always returns True because there is
-        no way to determine whether a build is required without actually
-        reading the contents of the base ontology.  If we're doing
-        out-of-source builds, the return value depends on the modification
-        times of the base ontology file and the imports specification files.
+        Returns a tuple, (input file paths, settings), that describes all
+        inputs of the updated base ontology for the build manifest.
+        """
+        # The top-level imports file is an input because if it was changed,
+        # and full ontologies were added as imports, the import modules would
+        # not need to be built but we would still need to update the base
+        # ontology.  The import IRIs are included in the settings because
+        # they depend on the configuration file.
+        inputpaths = [
+            self.config.getBaseOntologyPath(),
+            self.config.getTopImportsFilePath()
+        ]
+        settings = {
+            'imports': [
+                importinfo.iristr for importinfo in self.ibt.getImportsInfo()
+            ]
+        }
+
+        return (inputpaths, settings)
+
+    def _checkModTimes(self):
+        """
+        Returns True if file modification times indicate that the updated base
+        ontology is up to date.  This is only used if the build manifest has
+        no record of the updated base ontology.
         """
-        if self.config.getDoInSourceBuilds():
-            return True
-
         foutpath = self.getOutputFilePath()
 
         if os.path.isfile(foutpath):
@@ -107,23 +124,41 @@ class UpdateBaseImportsBuildTarget(BuildTargetWithConfig):
             # If the configuration file is newer than the output base ontology,
             # a new build might be needed if any imports changes were made.
             if mtime < os.path.getmtime(self.config.getConfigFilePath()):
-                return True
+                return False
 
             # Check the modification time of the base ontology.
             if mtime < os.path.getmtime(self.config.getBaseOntologyPath()):
-                return True
+                return False
 
-            # Check the modification time of the top-level imports file.  If
-            # this file was changed, and full ontologies were added as imports,
-            # the import modules would not need to be built but we would still
-            # need to update the base ontology.
+            # Check the modification time of the top-level imports file.
             if mtime < os.path.getmtime(self.config.getTopImportsFilePath()):
-                return True
+                return False
 
-            return False
+            return True
         else:
+            return False
+
+    def _isBuildRequired(self):
+        """
+        If we're doing in-source builds, always returns True because there is
+        no way to determine whether a build is required without actually
+        reading the contents of the base ontology.  If we're doing
+        out-of-source builds, the return value depends on whether the build
+        manifest indicates that the base ontology file, the imports
+        specification file, or the imports settings have changed.
+        """
+        if self.config.getDoInSourceBuilds():
             return True
 
+        inputpaths, settings = self._getManifestInputs()
+
+        return not(
+            self._isProductCurrent(
+                self.getOutputFilePath(), inputpaths, settings,
+                self._checkModTimes
+            )
+        )
+
     def _run(self):
         """
         Runs the build process and produces a compiled OWL ontology file.
@@ -143,3 +178,7 @@ class UpdateBaseImportsBuildTarget(BuildTargetWithConfig):
         logger.info('Writing updated base ontology to ' + fileoutpath + '...')
         baseont.saveOntology(fileoutpath)
 
+        if not(self.config.getDoInSourceBuilds()):
+            inputpaths, settings = self._getManifestInputs()
+            self._recordProduct(fileoutpath, inputpaths, settings)
+
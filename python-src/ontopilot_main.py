@@ -86,6 +86,42 @@ argp.add_argument(
     'reasoner will be run on the ontology (HermiT by default), and inferred '
     'axioms will be added to a new ontology document.'
 )
+argp.add_argument(
+    '-j', '--imports_threads', type=int, required=False, default=None,
+    help='The maximum number of import modules to build at the same time.  '
+    'Overrides the "imports_threads" setting in the configuration file.'
+)
+argp.add_argument(
+    '--refresh_sources', action='store_true', help='If this flag is given, '
+    'the cached copies of the source ontologies for import modules will be '
+    'checked against the remote source ontologies and downloaded again if '
+    'the remote source ontologies have changed.'
+)
+argp.add_argument(
+    '--offline', action='store_true', help='If this flag is given, no '
+    'network requests are made to check whether the IRIs of imported '
+    'ontologies are redirected.  Previously cached results of such checks '
+    'are still used.'
+)
+argp.add_argument(
+    '--reasoner_threads', type=int, required=False, default=None,
+    help='The number of worker threads to use for reasoning (only supported '
+    'by ELK).  Overrides the "reasoner_threads" setting in the configuration '
+    'file.'
+)
+argp.add_argument(
+    '--reasoner_timeout', type=float, required=False, default=None,
+    help='The maximum number of seconds that any single reasoner operation '
+    'may take.  Overrides the "reasoner_timeout" setting in the '
+    'configuration file.'
+)
+argp.add_argument(
+    '--reasoner_precompute', type=str, required=False, default=None,
+    help='A comma-separated list of the kinds of inferences the reasoner '
+    'should precompute before it is queried (e.g., "class hierarchy, class '
+    'assertions").  Overrides the "precompute" setting in the configuration '
+    'file.'
+)
 argp.add_argument(
     '-d', '--release_date', type=str, required=False, default='', help='Sets '
     'a custom date for a release build.  The date must be in the format '
@@ -0,0 +1,112 @@
+#!/usr/bin/env jython
+
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#
+# Compares the throughput of parsing Manchester Syntax class expressions with a
+# new ManchesterSyntaxParserHelper for every expression (the old behavior of
+# the ontology entity classes) and with the shared parser returned by
+# Ontology.getManchesterParser().  The test ontology is padded with synthetic
+# classes so that the cost of indexing the ontology signature is visible.  Run
+# this script from the test directory, e.g.:
+#
+#   $ jython benchmark_msparser.py -n 20000 -e 500
+#
+
+import sys
+import os.path
+import time
+from argparse import ArgumentParser
+
+
+# Make sure we can find the ontopilot modules.
+ontopilot_dir = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        '../'
+    )
+)
+sys.path.append(ontopilot_dir)
+
+from ontopilot.ontology import Ontology
+from ontopilot.mshelper import ManchesterSyntaxParserHelper
+
+
+argp = ArgumentParser(
+    description='Benchmarks parsing of Manchester Syntax class expressions.'
+)
+argp.add_argument(
+    '-n', '--num_classes', type=int, default=20000, help='The number of '
+    'synthetic classes to add to the test ontology (default: 20000).'
+)
+argp.add_argument(
+    '-e', '--num_exps', type=int, default=500, help='The number of class '
+    'expressions to parse with each strategy (default: 500).'
+)
+args = argp.parse_args()
+
+ont = Ontology('test_data/ontology.owl')
+for cnt in range(args.num_classes):
+    newclass = ont.createNewClass(
+        'http://purl.obolibrary.org/obo/OBTOBENCH_{0:07d}'.format(cnt)
+    )
+    newclass.addLabel('benchmark class {0}'.format(cnt))
+
+# Build a list of expressions that use labels, OBO IDs, and short-form IRIs.
+expressions = []
+for cnt in range(args.num_exps):
+    classnum = cnt % args.num_classes if args.num_classes > 0 else 0
+    expressions.append(
+        "'benchmark class {0}' and 'test object property 1' some "
+        "OBTOBENCH_{0:07d} and OBTO:0010".format(classnum)
+    )
+
+
+def runParses(get_parser, dispose=False):
+    """
+    Parses all benchmark expressions, obtaining a parser for each expression
+    from the callable get_parser.  Returns the number of expressions parsed
+    per second.
+
+    get_parser: A callable that returns a ManchesterSyntaxParserHelper.
+    dispose: Whether to dispose of each parser after use.  Parsers that are
+        not disposed of leave a change listener on the ontology manager, which
+        would slow down later iterations.
+    """
+    start = time.time()
+    for expression in expressions:
+        parser = get_parser()
+        parser.parseClassExpression(expression)
+        if dispose:
+            parser.dispose()
+    elapsed = time.time() - start
+
+    return len(expressions) / elapsed
+
+
+uncached_rate = runParses(
+    lambda: ManchesterSyntaxParserHelper(ont), dispose=True
+)
+cached_rate = runParses(ont.getManchesterParser)
+
+print 'Ontology signature size: {0}'.format(
+    ont.getOWLOntology().getSignature().size()
+)
+print 'Expressions parsed per strategy: {0}'.format(len(expressions))
+print 'New parser per expression: {0:.1f} expressions/s'.format(uncached_rate)
+print 'Shared ontology parser:    {0:.1f} expressions/s'.format(cached_rate)
+print 'Speedup: {0:.1f}x'.format(cached_rate / uncached_rate)
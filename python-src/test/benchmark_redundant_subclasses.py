@@ -0,0 +1,134 @@
+#!/usr/bin/env jython
+
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#
+# Compares finding redundant "subclass of" axioms by querying the reasoner
+# for the direct superclasses of each class separately (the old behavior of
+# InferredAxiomAdder) and by walking the reasoner's class hierarchy once.  The
+# test ontology is a synthetic taxonomy in which every class is asserted to be
+# a subclass of its parent and some classes are also asserted to be subclasses
+# of their grandparent, which is redundant.  Run this script from the test
+# directory, e.g.:
+#
+#   $ jython benchmark_redundant_subclasses.py -n 100000 -b 10
+#
+
+import sys
+import os.path
+import time
+from argparse import ArgumentParser
+
+
+# Make sure we can find the ontopilot modules.
+ontopilot_dir = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        '../'
+    )
+)
+sys.path.append(ontopilot_dir)
+
+from ontopilot.ontology import Ontology
+from ontopilot.inferred_axiom_adder import InferredAxiomAdder
+from test_inferred_axiom_adder import getRedundantSubclassOfAxiomsByClass
+
+from java.util import HashSet
+from org.semanticweb.owlapi.model import IRI
+from org.semanticweb.owlapi.reasoner import InferenceType
+
+
+argp = ArgumentParser(
+    description='Benchmarks finding redundant "subclass of" axioms.'
+)
+argp.add_argument(
+    '-n', '--num_classes', type=int, default=100000, help='The number of '
+    'classes in the synthetic taxonomy (default: 100000).'
+)
+argp.add_argument(
+    '-b', '--branching', type=int, default=10, help='The number of '
+    'subclasses of each class in the taxonomy (default: 10).'
+)
+argp.add_argument(
+    '-r', '--redundant_every', type=int, default=5, help='Every nth class '
+    'gets a redundant "subclass of" axiom (default: 5).'
+)
+argp.add_argument(
+    '-R', '--reasoner', type=str, default='ELK', help='The reasoner to use '
+    '(default: ELK).'
+)
+args = argp.parse_args()
+
+ont = Ontology()
+df = ont.df
+classes = [
+    df.getOWLClass(
+        IRI.create('http://purl.obolibrary.org/obo/OBTOBENCH_{0:07d}'.format(
+            cnt
+        ))
+    )
+    for cnt in range(args.num_classes)
+]
+
+axioms = HashSet()
+for cnt in range(1, args.num_classes):
+    parentnum = (cnt - 1) // args.branching
+    axioms.add(df.getOWLSubClassOfAxiom(classes[cnt], classes[parentnum]))
+
+    if parentnum > 0 and cnt % args.redundant_every == 0:
+        grandparentnum = (parentnum - 1) // args.branching
+        axioms.add(
+            df.getOWLSubClassOfAxiom(classes[cnt], classes[grandparentnum])
+        )
+ont.ontman.addAxioms(ont.getOWLOntology(), axioms)
+
+iaa = InferredAxiomAdder(ont, args.reasoner)
+owlont = ont.getOWLOntology()
+
+start = time.time()
+iaa.reasoner.precomputeInferences(InferenceType.CLASS_HIERARCHY)
+classification_time = time.time() - start
+
+
+def runStrategy(find_redundants):
+    """
+    Runs a strategy for finding redundant "subclass of" axioms and returns a
+    tuple, (redundant axioms, elapsed seconds).
+    """
+    start = time.time()
+    redundants = find_redundants(owlont)
+
+    return (redundants, time.time() - start)
+
+
+byclass_res, byclass_time = runStrategy(
+    lambda owlont: getRedundantSubclassOfAxiomsByClass(iaa.reasoner, owlont)
+)
+taxonomy_res, taxonomy_time = runStrategy(iaa._getRedundantSubclassOfAxioms)
+
+if byclass_res != taxonomy_res:
+    print 'ERROR: The two strategies found different redundant axioms.'
+    sys.exit(1)
+
+print 'Classes: {0}; "subclass of" axioms: {1}'.format(
+    args.num_classes, axioms.size()
+)
+print 'Redundant axioms found: {0}'.format(len(taxonomy_res))
+print 'Classification: {0:.2f} s'.format(classification_time)
+print 'Reasoner query per class: {0:.2f} s'.format(byclass_time)
+print 'Taxonomy walk:            {0:.2f} s'.format(taxonomy_time)
+print 'Speedup: {0:.1f}x'.format(byclass_time / taxonomy_time)
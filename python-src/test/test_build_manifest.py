@@ -0,0 +1,131 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+import os
+import shutil
+import tempfile
+from ontopilot.build_manifest import BuildManifest, MANIFEST_FILENAME
+import unittest
+
+# Java imports.
+
+
+class TestBuildManifest(unittest.TestCase):
+    """
+    Tests the BuildManifest class.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.manifest_path = os.path.join(self.tmpdir, MANIFEST_FILENAME)
+        self.product = os.path.join(self.tmpdir, 'product.owl')
+        self.input1 = os.path.join(self.tmpdir, 'input1.csv')
+        self.input2 = os.path.join(self.tmpdir, 'input2.csv')
+        self.missing = os.path.join(self.tmpdir, 'missing.csv')
+
+        self._writeFile(self.product, 'product')
+        self._writeFile(self.input1, 'input 1')
+        self._writeFile(self.input2, 'input 2')
+
+        self.inputs = [self.input1, self.input2, self.missing]
+        self.settings = {'format': 'RDF/XML', 'imports': ['a', 'b']}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _writeFile(self, path, contents, mtime=None):
+        with open(path, 'w') as fout:
+            fout.write(contents)
+
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_isProductCurrent(self):
+        manifest = BuildManifest(self.manifest_path)
+
+        # Without a record, the manifest cannot decide.
+        self.assertIsNone(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        manifest.recordProduct(self.product, self.inputs, self.settings)
+        self.assertTrue(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        # The record should be read from the manifest file by new instances.
+        # Settings are compared after normalization, so tuples and lists are
+        # equivalent.
+        manifest = BuildManifest(self.manifest_path)
+        self.assertTrue(
+            manifest.isProductCurrent(
+                self.product, self.inputs,
+                {'format': 'RDF/XML', 'imports': ('a', 'b')}
+            )
+        )
+
+        # Changing a file's modification time without changing its contents
+        # should not make the product stale.
+        self._writeFile(self.input1, 'input 1', 1000)
+        self.assertTrue(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        # Changing the settings or the set of inputs should.
+        self.assertFalse(
+            manifest.isProductCurrent(
+                self.product, self.inputs, {'format': 'OWL/XML'}
+            )
+        )
+        self.assertFalse(
+            manifest.isProductCurrent(
+                self.product, self.inputs[:2], self.settings
+            )
+        )
+
+        # Changing an input file's contents should make the product stale.
+        self._writeFile(self.input1, 'input X', 2000)
+        self.assertFalse(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        manifest.recordProduct(self.product, self.inputs, self.settings)
+        self.assertTrue(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        # A previously missing input that now exists should make the product
+        # stale.
+        self._writeFile(self.missing, 'now present')
+        self.assertFalse(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+        os.remove(self.missing)
+        self.assertTrue(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
+        # Changing or deleting the product itself should make it stale.
+        self._writeFile(self.product, 'modified product')
+        self.assertFalse(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+        os.remove(self.product)
+        self.assertFalse(
+            manifest.isProductCurrent(self.product, self.inputs, self.settings)
+        )
+
@@ -0,0 +1,176 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+import threading
+from ontopilot.buildtarget import BuildTarget
+from ontopilot.build_scheduler import BuildScheduler
+import unittest
+
+# Java imports.
+
+
+# A dummy concrete build target.  Targets with the same non-None key are
+# equivalent.  Each target records the order in which targets are run in the
+# shared list run_log.
+class KeyedTarget(BuildTarget):
+    def __init__(self, name, run_log, key=None, products=None):
+        BuildTarget.__init__(self)
+        self.name = name
+        self.run_log = run_log
+        self.key = key
+        self.build_required = True
+        self.build_products = products if products is not None else {}
+        self.run_cnt = 0
+        self.fail = False
+    def getEquivalenceKey(self):
+        return self.key
+    def _isBuildRequired(self):
+        return self.build_required
+    def _run(self):
+        if self.fail:
+            raise RuntimeError('Target {0} failed.'.format(self.name))
+        self.run_cnt += 1
+        self.run_log.append(self.name)
+        return self.build_products
+
+
+# A dummy target that waits until a given number of targets are running at the
+# same time, which is only possible if the targets are run in parallel.
+class BarrierTarget(KeyedTarget):
+    def __init__(self, name, run_log, barrier_state):
+        KeyedTarget.__init__(self, name, run_log)
+        self.barrier_state = barrier_state
+    def _run(self):
+        cond = self.barrier_state['cond']
+        with cond:
+            self.barrier_state['count'] += 1
+            cond.notify_all()
+            while self.barrier_state['count'] < self.barrier_state['needed']:
+                cond.wait(10)
+                if self.barrier_state['count'] < self.barrier_state['needed']:
+                    raise RuntimeError('Targets were not run in parallel.')
+
+        return KeyedTarget._run(self)
+
+
+class TestBuildScheduler(unittest.TestCase):
+    """
+    Tests the BuildScheduler class.
+    """
+    def _makeDiamond(self, run_log):
+        """
+        Builds a "diamond" dependency graph in which the two middle targets
+        each have their own, equivalent instance of the bottom target.
+        """
+        top = KeyedTarget('top', run_log)
+        left = KeyedTarget('left', run_log)
+        right = KeyedTarget('right', run_log)
+        bottom_l = KeyedTarget('bottom', run_log, 'bottom', {'bp': 'value'})
+        bottom_r = KeyedTarget('bottom', run_log, 'bottom', {'bp': 'value'})
+
+        top.addDependency(left)
+        top.addDependency(right)
+        left.addDependency(bottom_l)
+        right.addDependency(bottom_r)
+
+        return (top, left, right, bottom_l, bottom_r)
+
+    def test_graph(self):
+        run_log = []
+        top, left, right, bottom_l, bottom_r = self._makeDiamond(run_log)
+
+        scheduler = BuildScheduler(top)
+        self.assertEqual(
+            [bottom_l, left, right, top], scheduler.getTargets()
+        )
+
+        # Verify that dependency cycles are detected.
+        bottom_l.addDependency(top)
+        with self.assertRaisesRegexp(RuntimeError, 'depends on itself'):
+            BuildScheduler(top)
+
+    def test_run(self):
+        run_log = []
+        top, left, right, bottom_l, bottom_r = self._makeDiamond(run_log)
+
+        # The shared target should only be run once, and its product should
+        # reach the top-level target through both paths without being
+        # considered a duplicate.
+        products = BuildScheduler(top).run()
+        self.assertEqual({'bp': 'value'}, products)
+        self.assertEqual(['bottom', 'left', 'right', 'top'], run_log)
+        self.assertEqual(1, bottom_l.run_cnt)
+        self.assertEqual(0, bottom_r.run_cnt)
+        self.assertEqual({'bp': 'value'}, left.products)
+        self.assertEqual({'bp': 'value'}, right.products)
+
+        # If nothing requires a build, nothing should be run, unless a build
+        # is forced.
+        for target in (top, left, right, bottom_l, bottom_r):
+            target.build_required = False
+        del run_log[:]
+        self.assertEqual({}, BuildScheduler(top).run())
+        self.assertEqual([], run_log)
+        BuildScheduler(top).run(force_build=True)
+        self.assertEqual(['bottom', 'left', 'right', 'top'], run_log)
+
+        # If only the shared target requires a build, all targets that depend
+        # on it should be run.
+        bottom_l.build_required = True
+        del run_log[:]
+        BuildScheduler(top).run()
+        self.assertEqual(['bottom', 'left', 'right', 'top'], run_log)
+
+        # Distinct targets that create the same product are still an error.
+        run_log = []
+        top, left, right, bottom_l, bottom_r = self._makeDiamond(run_log)
+        bottom_r.key = None
+        with self.assertRaisesRegexp(
+            RuntimeError, 'Unable to merge product returned from build target'
+        ):
+            BuildScheduler(top).run()
+
+    def test_runParallel(self):
+        run_log = []
+        top, left, right, bottom_l, bottom_r = self._makeDiamond(run_log)
+
+        # Replace the two middle targets with targets that can only finish if
+        # they are run at the same time.
+        barrier_state = {
+            'cond': threading.Condition(), 'count': 0, 'needed': 2
+        }
+        left = BarrierTarget('left', run_log, barrier_state)
+        right = BarrierTarget('right', run_log, barrier_state)
+        left.addDependency(bottom_l)
+        right.addDependency(bottom_r)
+        top.dependencies = [left, right]
+
+        products = BuildScheduler(top, 4).run()
+        self.assertEqual({'bp': 'value'}, products)
+        self.assertEqual('bottom', run_log[0])
+        self.assertEqual(['left', 'right'], sorted(run_log[1:3]))
+        self.assertEqual('top', run_log[3])
+        self.assertEqual(1, bottom_l.run_cnt)
+
+        # Verify that errors are propagated and that no dependent targets are
+        # run after a failure.
+        run_log = []
+        top, left, right, bottom_l, bottom_r = self._makeDiamond(run_log)
+        left.fail = True
+        with self.assertRaisesRegexp(RuntimeError, 'Target left failed.'):
+            BuildScheduler(top, 4).run()
+        self.assertNotIn('top', run_log)
@@ -17,6 +17,7 @@
 # Python imports.
 import os
 from ontopilot.buildtarget import BuildTarget, BuildTargetWithConfig
+from ontopilot import reasoner_manager
 import unittest
 
 # Java imports.
@@ -209,3 +210,32 @@ class TestBuildTargetWithConfig(unittest.TestCase):
         target = Target1Config(argvals, True)
         self.assertIsNotNone(target.config.getConfigFilePath())
 
+    def test_setReasonerOptions(self):
+        argvals = ArgVals()
+        target = Target1Config(argvals, False)
+        target.config.add_section('Reasoning')
+        target.config.set('Reasoning', 'precompute', 'class hierarchy')
+
+        try:
+            # Without command-line values, the configured values should be
+            # used.
+            target._setReasonerOptions(argvals)
+            self.assertEqual(
+                ('class hierarchy',), reasoner_manager._options['precompute']
+            )
+
+            # Command-line values should override the configured values.
+            argvals.reasoner_precompute = 'Class assertions, '
+            target._setReasonerOptions(argvals)
+            self.assertEqual(
+                ('class assertions',),
+                reasoner_manager._options['precompute']
+            )
+
+            argvals.reasoner_precompute = 'invalid'
+            with self.assertRaisesRegexp(
+                RuntimeError, 'Invalid inference type to precompute'
+            ):
+                target._setReasonerOptions(argvals)
+        finally:
+            reasoner_manager.setReasonerOptions()
@@ -0,0 +1,116 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+from ontopilot.ontology import Ontology
+from ontopilot.declaration_index import DeclarationIndex
+from ontopilot.ontology_entities import (
+    CLASS_ENTITY, DATAPROPERTY_ENTITY, OBJECTPROPERTY_ENTITY,
+    ANNOTATIONPROPERTY_ENTITY, INDIVIDUAL_ENTITY
+)
+import unittest
+
+# Java imports.
+from org.semanticweb.owlapi.model import IRI
+
+
+# IRIs of entities in the test ontology.
+OBJPROP_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_0001')
+DATAPROP_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_0020')
+ANNOTPROP_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_0030')
+CLASS_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_0010')
+INDIVIDUAL_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_8001')
+
+# IRI of a class in the imports closure of the test ontology.
+IMPORTED_CLASS_IRI = IRI.create('http://purl.obolibrary.org/obo/OBITO_0001')
+
+# IRI that is not used in the test ontology.
+NULL_IRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_9999')
+
+
+class TestDeclarationIndex(unittest.TestCase):
+    """
+    Tests the DeclarationIndex class.
+    """
+    def setUp(self):
+        self.ont = Ontology('test_data/ontology.owl')
+        self.di = DeclarationIndex(self.ont)
+
+    def test_isDeclared(self):
+        testvals = [
+            (OBJPROP_IRI, OBJECTPROPERTY_ENTITY),
+            (DATAPROP_IRI, DATAPROPERTY_ENTITY),
+            (ANNOTPROP_IRI, ANNOTATIONPROPERTY_ENTITY),
+            (CLASS_IRI, CLASS_ENTITY),
+            (INDIVIDUAL_IRI, INDIVIDUAL_ENTITY),
+            (IMPORTED_CLASS_IRI, CLASS_ENTITY)
+        ]
+
+        for entIRI, enttype in testvals:
+            self.assertTrue(self.di.isDeclared(entIRI, enttype))
+            self.assertEqual([enttype], self.di.getEntityTypes(entIRI))
+
+        # Check an entity of the wrong type and an undeclared entity.
+        self.assertFalse(self.di.isDeclared(CLASS_IRI, INDIVIDUAL_ENTITY))
+        self.assertFalse(self.di.isDeclared(NULL_IRI, CLASS_ENTITY))
+        self.assertEqual([], self.di.getEntityTypes(NULL_IRI))
+
+    def test_dispose(self):
+        """
+        Verifies that a disposed index no longer follows changes to the source
+        ontology.
+        """
+        self.di.dispose()
+
+        self.ont.createNewClass(NULL_IRI)
+        self.assertFalse(self.di.isDeclared(NULL_IRI, CLASS_ENTITY))
+        self.assertTrue(self.ont.declindex.isDeclared(NULL_IRI, CLASS_ENTITY))
+
+    def test_ontologyChanges(self):
+        """
+        Verifies that the index follows changes to the source ontology.
+        """
+        newclass = self.ont.createNewClass(NULL_IRI)
+        self.assertTrue(self.di.isDeclared(NULL_IRI, CLASS_ENTITY))
+
+        # Punning the IRI as an individual should add a second entity type.
+        self.ont.createNewIndividual(NULL_IRI)
+        self.assertEqual(
+            sorted([CLASS_ENTITY, INDIVIDUAL_ENTITY]),
+            sorted(self.di.getEntityTypes(NULL_IRI))
+        )
+
+        self.ont.removeEntity(newclass)
+        self.assertFalse(self.di.isDeclared(NULL_IRI, CLASS_ENTITY))
+        self.assertTrue(self.di.isDeclared(NULL_IRI, INDIVIDUAL_ENTITY))
+
+        # Replacing the test ontology's import with an IRI that is not loaded
+        # should remove the imported entities from the index.
+        self.ont.updateImportIRI(
+            'https://github.com/stuckyb/ontopilot/raw/master/python-src/test/test_data/ontology-import.owl',
+            'http://a.new.iri/replacement'
+        )
+        self.assertFalse(self.di.isDeclared(IMPORTED_CLASS_IRI, CLASS_ENTITY))
+
+        # Changing the ontology ID should not affect tracking of changes.
+        self.ont.setOntologyID('http://a.new.iri/ontology.owl')
+        self.ont.createNewClass('OBTO:0013')
+        self.assertTrue(
+            self.di.isDeclared(
+                IRI.create('http://purl.obolibrary.org/obo/OBTO_0013'),
+                CLASS_ENTITY
+            )
+        )
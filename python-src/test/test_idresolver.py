@@ -16,7 +16,7 @@
 
 # Python imports.
 from ontopilot.ontology import Ontology
-from ontopilot.idresolver import IDResolver
+from ontopilot.idresolver import IDResolver, _LRUCache
 from ontopilot.labelmap import InvalidLabelError, AmbiguousLabelError
 import unittest
 #from testfixtures import LogCapture
@@ -25,6 +25,34 @@ import unittest
 from org.semanticweb.owlapi.model import IRI
 
 
+class Test_LRUCache(unittest.TestCase):
+    """
+    Tests the _LRUCache "private" helper class.
+    """
+    def setUp(self):
+        self.cache = _LRUCache(2)
+
+    def test_cache(self):
+        self.assertIsNone(self.cache.get('a'))
+
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertEqual(2, len(self.cache))
+
+        # Adding a third entry should discard 'b', the least recently used
+        # entry.
+        self.cache.put('c', 3)
+        self.assertEqual(2, len(self.cache))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertEqual(3, self.cache.get('c'))
+
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+        self.assertIsNone(self.cache.get('a'))
+
+
 class TestIDResolver(unittest.TestCase):
     """
     Tests the IDResolver class.
@@ -182,3 +210,74 @@ class TestIDResolver(unittest.TestCase):
         with self.assertRaisesRegexp(RuntimeError, 'labels are not allowed'):
             self.ir.resolveNonlabelIdentifier("obo:'test object property 1'")
 
+
+    def test_lazyLabelMap(self):
+        """
+        Tests that the LabelMap is only built when a label is resolved and that
+        changes to the source ontology made before then are reflected.
+        """
+        # Non-label identifiers should not require building the LabelMap.
+        self.ir.resolveIdentifier('OBTO:0001')
+        self.ir.resolveIdentifier('obo:OBTO_0001')
+        self.assertIsNone(self.ir.labelmap)
+
+        # Add a new label and merge an ontology before building the LabelMap.
+        newclass = self.ont.createNewClass('OBTO:0013')
+        newclass.addLabel('new test class')
+        self.ont.mergeOntology(
+            'https://github.com/stuckyb/ontopilot/raw/master/python-src/test/test_data/ontology-import.owl'
+        )
+        self.assertIsNone(self.ir.labelmap)
+
+        self.assertEqual(
+            'http://purl.obolibrary.org/obo/OBTO_0013',
+            str(self.ir.resolveLabel("'new test class'"))
+        )
+        self.assertIsNotNone(self.ir.labelmap)
+        self.assertEqual(
+            'http://purl.obolibrary.org/obo/OBITO_0001',
+            str(self.ir.resolveLabel("'imported test class 1'"))
+        )
+
+        # Labels added after the LabelMap is built should also be found.
+        newclass = self.ont.createNewClass('OBTO:0014')
+        newclass.addLabel('another new test class')
+        self.assertEqual(
+            'http://purl.obolibrary.org/obo/OBTO_0014',
+            str(self.ir.resolveLabel("'another new test class'"))
+        )
+
+    def test_resolutionCache(self):
+        # Resolving the same identifiers twice should result in cache hits.
+        for idstr in ('OBTO:0001', 'obo:OBTO_0001', "'test class 1'"):
+            expIRI = self.ir.resolveIdentifier(idstr)
+            stats = self.ir.getCacheStats()
+            self.assertTrue(expIRI.equals(self.ir.resolveIdentifier(idstr)))
+            self.assertEqual(stats['hits'] + 1, self.ir.getCacheStats()['hits'])
+            self.assertEqual(
+                stats['misses'], self.ir.getCacheStats()['misses']
+            )
+
+        # Adding a label that makes a cached label ambiguous should invalidate
+        # the cached result.
+        newclass = self.ont.createNewClass('OBTO:0013')
+        newclass.addLabel('test class 1')
+        with self.assertRaisesRegexp(
+            AmbiguousLabelError, 'Attempted to use an ambiguous label'
+        ):
+            self.ir.resolveIdentifier("'test class 1'")
+
+        # Changing a prefix should invalidate cached prefix IRI expansions.
+        self.assertEqual(
+            'http://purl.obolibrary.org/obo/OBTO_0001',
+            str(self.ir.expandIRI('obo:OBTO_0001'))
+        )
+        self.ir.prefix_df.setPrefix('obo:', 'http://a.new.iri/')
+        self.assertEqual(
+            'http://a.new.iri/OBTO_0001',
+            str(self.ir.expandIRI('obo:OBTO_0001'))
+        )
+        self.assertEqual(
+            'http://a.new.iri/OBTO_0001',
+            str(self.ir.resolveIdentifier('obo:OBTO_0001'))
+        )
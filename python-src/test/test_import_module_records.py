@@ -0,0 +1,123 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+import os
+import shutil
+import tempfile
+from ontopilot.import_module_records import ImportModuleRecords
+from ontopilot.ontology import Ontology
+import unittest
+
+# Java imports.
+
+
+class TestImportModuleRecords(unittest.TestCase):
+    """
+    Tests the ImportModuleRecords class.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.records = ImportModuleRecords(
+            os.path.join(self.tmpdir, 'records')
+        )
+
+        self.modulepath = os.path.join(self.tmpdir, 'module.owl')
+        self.sourcepath = os.path.join(self.tmpdir, 'source.owl')
+        with open(self.sourcepath, 'w') as fout:
+            fout.write('source ontology')
+
+        self.settings = {'source_IRI': 'http://a.source/ont.owl'}
+
+        self.ont = Ontology('test_data/ontology.owl')
+        self.axioms = set(self.ont.getOWLOntology().getAxioms())
+
+        iristr = 'http://purl.obolibrary.org/obo/OBTO_0010'
+        self.include_rows = {'["OBTO:0010", 0, []]': [iristr, 'Class']}
+        self.exclude_rows = {'["OBTO:0010", null, [1]]': [[iristr, 'Class']]}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _storeRecord(self):
+        self.records.storeRecord(
+            self.modulepath, self.sourcepath, self.settings,
+            self.include_rows, self.exclude_rows, self.axioms,
+            self.ont.getOWLOntology().getOntologyID()
+        )
+
+    def test_getRecord(self):
+        # Without a stored record, there is no record.
+        self.assertIsNone(
+            self.records.getRecord(
+                self.modulepath, self.sourcepath, self.settings
+            )
+        )
+
+        self._storeRecord()
+
+        record = self.records.getRecord(
+            self.modulepath, self.sourcepath, self.settings
+        )
+        self.assertEqual(self.include_rows, record['include_rows'])
+        self.assertEqual(self.exclude_rows, record['exclude_rows'])
+
+        # The recorded axioms should have the source ontology's ID.
+        recordont = Ontology(record['axioms_path'])
+        self.assertEqual(
+            self.axioms, set(recordont.getOWLOntology().getAxioms())
+        )
+        self.assertTrue(
+            recordont.getOWLOntology().getOntologyID().equals(
+                self.ont.getOWLOntology().getOntologyID()
+            )
+        )
+
+        # Records for other modules should not be affected.
+        self.assertIsNone(
+            self.records.getRecord(
+                os.path.join(self.tmpdir, 'module2.owl'), self.sourcepath,
+                self.settings
+            )
+        )
+
+        # Changed settings invalidate the record.
+        self.assertIsNone(
+            self.records.getRecord(
+                self.modulepath, self.sourcepath,
+                {'source_IRI': 'http://a.source/ont2.owl'}
+            )
+        )
+
+        # So does a changed source ontology.
+        with open(self.sourcepath, 'w') as fout:
+            fout.write('new source ontology')
+        self.assertIsNone(
+            self.records.getRecord(
+                self.modulepath, self.sourcepath, self.settings
+            )
+        )
+
+        # So does a missing source ontology.
+        self._storeRecord()
+        os.remove(self.sourcepath)
+        self.assertIsNone(
+            self.records.getRecord(
+                self.modulepath, self.sourcepath, self.settings
+            )
+        )
+
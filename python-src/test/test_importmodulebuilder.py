@@ -68,6 +68,14 @@ class TestImportModuleBuilder(unittest.TestCase):
                 testval[0], self.imb._getOutputFileName(testval[1])
             )
 
+        # A module name should be added to the file name.
+        self.assertEqual(
+            'ontfile_terms_a_import_module.owl',
+            self.imb._getOutputFileName(
+                'http://import.ontology/iri/ontfile.owl', 'terms_a'
+            )
+        )
+
     def test_getModulePath(self):
         outputdir = os.path.join(self.td_path, 'imports')
 
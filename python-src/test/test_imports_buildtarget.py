@@ -17,14 +17,36 @@
 # Python imports.
 from ontopilot.ontoconfig import OntoConfig
 from ontopilot.imports_buildtarget import ImportsBuildTarget, ModuleInfo
+from ontopilot.imports_buildtarget import _MemoryLimiter, _SourceOntologyPool
+from ontopilot.imports_buildtarget import SOURCE_MEMORY_FACTOR
+from ontopilot.ontology import Ontology
 from test_tablereader import TableStub
 from ontopilot.tablereader import TableRow, TableRowError
 import unittest
 import os.path
+import threading
+from collections import namedtuple
 
 # Java imports.
 
 
+class ModuleBuilderStub:
+    """
+    A stand-in for ImportModuleBuilder that creates empty source ontologies and
+    counts how often each source ontology is loaded.
+    """
+    def __init__(self, ontfile):
+        self.ontfile = ontfile
+        self.loadcnts = {}
+
+    def retrieveSourceOntology(self, ontologyIRI):
+        return self.ontfile
+
+    def loadSourceOntology(self, ontologyIRI):
+        self.loadcnts[ontologyIRI] = self.loadcnts.get(ontologyIRI, 0) + 1
+        return Ontology()
+
+
 class TestImportsBuildTarget(unittest.TestCase):
     """
     Tests the ImportsBuildTarget class.
@@ -78,6 +100,38 @@ class TestImportsBuildTarget(unittest.TestCase):
         ):
             self.ibt._checkSourceIRI(tr)
 
+    def test_setModuleNames(self):
+        iri_a = 'http://a.iri/a.owl'
+        iri_b = 'http://a.iri/b.owl'
+        rowvals = [
+            (iri_a, '/terms/a_terms.csv'),
+            (iri_a, '/terms/more_terms.csv'),
+            (iri_a, ''),
+            (iri_b, '/terms/b_terms.csv')
+        ]
+        self.ibt.tablerows = []
+        for iristr, tfilepath in rowvals:
+            tr = TableRow(1, TableStub())
+            tr['IRI'] = iristr
+            tr['abs_tfilepath'] = tfilepath
+            self.ibt.tablerows.append(tr)
+
+        # Only modules that share their source ontology with other modules
+        # should get module names.
+        self.ibt._setModuleNames()
+        self.assertEqual(
+            ['a_terms', 'more_terms', '', ''],
+            [row['modname'] for row in self.ibt.tablerows]
+        )
+
+        # Modules that would still have the same file name should be
+        # rejected.
+        self.ibt.tablerows[1]['abs_tfilepath'] = '/other/a_terms.csv'
+        with self.assertRaisesRegexp(
+            TableRowError, 'would overwrite each other'
+        ):
+            self.ibt._setModuleNames()
+
     def test_getImportsInfo(self):
         # The source file includes an ignored row, two ontologies for which
         # import modules will be built, and one for which the entire ontology
@@ -99,3 +153,110 @@ class TestImportsBuildTarget(unittest.TestCase):
 
         self.assertEqual(expected, self.ibt.getImportsInfo())
 
+    def test_importsThreads(self):
+        ArgsType = namedtuple('args', 'imports_threads')
+
+        # Without a command-line value, the configured value should be used.
+        self.oc.set('Build', 'imports_threads', '3')
+        self.assertEqual(
+            3, ImportsBuildTarget(None, False, self.oc).imports_threads
+        )
+        ibt = ImportsBuildTarget(ArgsType(None), False, self.oc)
+        self.assertEqual(3, ibt.imports_threads)
+
+        # A command-line value overrides the configured value.
+        ibt = ImportsBuildTarget(ArgsType(5), False, self.oc)
+        self.assertEqual(5, ibt.imports_threads)
+
+        with self.assertRaisesRegexp(
+            RuntimeError, 'Invalid number of import modules'
+        ):
+            ImportsBuildTarget(ArgsType(0), False, self.oc)
+
+    def test_memoryLimiter(self):
+        limiter = _MemoryLimiter(100)
+
+        # A single request that exceeds the budget must still succeed.
+        limiter.acquire(150)
+        limiter.release(150)
+
+        limiter.acquire(60)
+        limiter.acquire(40)
+
+        # A further request must wait until enough memory is released.
+        acquired = threading.Event()
+        def acquire():
+            limiter.acquire(50)
+            acquired.set()
+
+        athread = threading.Thread(target=acquire)
+        athread.daemon = True
+        athread.start()
+
+        self.assertFalse(acquired.wait(0.2))
+        limiter.release(40)
+        self.assertFalse(acquired.wait(0.2))
+        limiter.release(60)
+        self.assertTrue(acquired.wait(10))
+        athread.join()
+
+        self.assertEqual(50, limiter.reserved)
+
+
+    def test_groupRowsBySource(self):
+        rows = [
+            {'IRI': 'http://a.iri/a.owl', 'num': 0},
+            {'IRI': 'http://a.iri/b.owl', 'num': 1},
+            {'IRI': 'http://a.iri/a.owl', 'num': 2},
+            {'IRI': 'http://a.iri/c.owl', 'num': 3},
+            {'IRI': 'http://a.iri/b.owl', 'num': 4}
+        ]
+
+        self.assertEqual(
+            [0, 2, 1, 4, 3],
+            [row['num'] for row in self.ibt._groupRowsBySource(rows)]
+        )
+
+    def test_sourceOntologyPool(self):
+        iri_a = 'http://a.iri/a.owl'
+        iri_b = 'http://a.iri/b.owl'
+        rows = [{'IRI': iri_a}, {'IRI': iri_a}, {'IRI': iri_b}]
+        ontfile = 'test_data/ontology.owl'
+        memsize = os.path.getsize(ontfile) * SOURCE_MEMORY_FACTOR
+
+        mbuilder = ModuleBuilderStub(ontfile)
+        limiter = _MemoryLimiter(memsize * 10)
+        pool = _SourceOntologyPool(rows, limiter)
+
+        # Modules that use the same source ontology should share its lock.
+        self.assertIs(pool.getLock(iri_a), pool.getLock(iri_a))
+        self.assertIsNot(pool.getLock(iri_a), pool.getLock(iri_b))
+
+        # Both modules that use the same source ontology should get the same
+        # instance, which is only loaded once.
+        sourceont = pool.acquire(iri_a, mbuilder)
+        self.assertIs(sourceont, pool.acquire(iri_a, mbuilder))
+        self.assertEqual({iri_a: 1}, mbuilder.loadcnts)
+        self.assertEqual(memsize, limiter.reserved)
+
+        # The source ontology should only be released after the last module
+        # that uses it is finished.
+        pool.release(iri_a)
+        self.assertEqual(
+            1, sourceont.getOntologyManager().getOntologies().size()
+        )
+        pool.release(iri_a)
+        self.assertEqual(
+            0, sourceont.getOntologyManager().getOntologies().size()
+        )
+        self.assertEqual(0, limiter.reserved)
+
+        # Closing the pool should release source ontologies that are still
+        # in use.
+        sourceont = pool.acquire(iri_b, mbuilder)
+        self.assertEqual(memsize, limiter.reserved)
+        pool.close()
+        self.assertEqual(
+            0, sourceont.getOntologyManager().getOntologies().size()
+        )
+        self.assertEqual(0, limiter.reserved)
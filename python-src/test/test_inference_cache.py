@@ -0,0 +1,187 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+import os
+import shutil
+import tempfile
+from ontopilot.ontology import Ontology
+from ontopilot.inferred_axiom_adder import InferredAxiomAdder
+from ontopilot.inferred_axiom_adder import InferenceResults
+from ontopilot.inference_cache import InferenceCache, getAxiomsFingerprint
+from ontopilot.inference_cache import MAX_ENTRIES, RESULT_PARTS
+import unittest
+
+# Java imports.
+from java.util import ArrayList, Collections
+from org.semanticweb.owlapi.apibinding import OWLManager
+from org.semanticweb.owlapi.model import AxiomType, AddImport, IRI
+
+
+class Test_InferenceCache(unittest.TestCase):
+    """
+    Tests the InferenceCache class and the axiom fingerprint functions.
+    """
+    def setUp(self):
+        self.ont = Ontology('test_data/ontology.owl')
+        self.owlont = self.ont.getOWLOntology()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = InferenceCache(os.path.join(self.tmpdir, 'cache'))
+
+        self.settings = {'reasoner': 'hermit', 'inferences': ['subclasses']}
+        self.compute_cnt = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _compute(self):
+        self.compute_cnt += 1
+        iaa = InferredAxiomAdder(self.ont.copy(), 'hermit')
+
+        return iaa.computeInferences(
+            ['subclasses', 'types'], annotate=True, add_inverses=True
+        )
+
+    def test_getAxiomsFingerprint(self):
+        fingerprint = getAxiomsFingerprint(self.owlont)
+
+        # Adding the same axioms to a new ontology in a different order should
+        # not change the fingerprint.
+        axioms = ArrayList(self.owlont.getAxioms())
+        Collections.reverse(axioms)
+        ontman = OWLManager.createOWLOntologyManager()
+        newont = ontman.createOntology()
+        for axiom in axioms:
+            ontman.addAxiom(newont, axiom)
+        self.assertEqual(fingerprint, getAxiomsFingerprint(newont))
+
+        # Removing an annotation axiom should only change the fingerprint if
+        # annotations are included.
+        annot_axioms = newont.getAxioms(AxiomType.ANNOTATION_ASSERTION)
+        ontman.removeAxiom(newont, annot_axioms.iterator().next())
+        self.assertNotEqual(fingerprint, getAxiomsFingerprint(newont))
+        self.assertEqual(
+            getAxiomsFingerprint(self.owlont, ignore_annotations=True),
+            getAxiomsFingerprint(newont, ignore_annotations=True)
+        )
+
+        # Removing a logical axiom should always change the fingerprint.
+        subclass_axioms = newont.getAxioms(AxiomType.SUBCLASS_OF)
+        ontman.removeAxiom(newont, subclass_axioms.iterator().next())
+        self.assertNotEqual(
+            getAxiomsFingerprint(self.owlont, ignore_annotations=True),
+            getAxiomsFingerprint(newont, ignore_annotations=True)
+        )
+
+    def test_getResults(self):
+        ontcopy = self.ont.copy()
+        results = self.cache.getResults(
+            ontcopy, self.settings, [], self._compute
+        )
+        self.assertEqual(1, self.compute_cnt)
+
+        # The same axioms and settings should use the cached results, which
+        # should be identical to the computed results.
+        cached = self.cache.getResults(
+            ontcopy, self.settings, [], self._compute
+        )
+        self.assertEqual(1, self.compute_cnt)
+        for part in RESULT_PARTS:
+            self.assertEqual(
+                set(getattr(results, part)), getattr(cached, part)
+            )
+
+        # Changing the settings or an input file should require new results.
+        self.settings['reasoner'] = 'elk'
+        self.cache.getResults(ontcopy, self.settings, [], self._compute)
+        self.assertEqual(2, self.compute_cnt)
+
+        inputpath = os.path.join(self.tmpdir, 'excluded_types.csv')
+        with open(inputpath, 'w') as fout:
+            fout.write('ID,Exclude superclasses\n')
+        self.cache.getResults(
+            ontcopy, self.settings, [inputpath], self._compute
+        )
+        self.cache.getResults(
+            ontcopy, self.settings, [inputpath], self._compute
+        )
+        self.assertEqual(3, self.compute_cnt)
+
+        with open(inputpath, 'a') as fout:
+            fout.write('OBTO:0010,True\n')
+        self.cache.getResults(
+            ontcopy, self.settings, [inputpath], self._compute
+        )
+        self.assertEqual(4, self.compute_cnt)
+
+        # Changing the ontology should require new results.
+        owlont = ontcopy.getOWLOntology()
+        ontcopy.ontman.removeAxiom(
+            owlont, owlont.getAxioms(AxiomType.SUBCLASS_OF).iterator().next()
+        )
+        self.cache.getResults(ontcopy, self.settings, [], self._compute)
+        self.assertEqual(5, self.compute_cnt)
+
+        # Only the most recently used entries should be kept.
+        records = [
+            fname for fname in os.listdir(self.cache.cachedir)
+            if fname.endswith('.json')
+        ]
+        self.assertEqual(MAX_ENTRIES, len(records))
+
+    def test_nestedImportChanged(self):
+        # Create an ontology with a two-level import chain: the ontology
+        # imports chain1.owl, which imports chain2.owl.
+        ontman = OWLManager.createOWLOntologyManager()
+        df = ontman.getOWLDataFactory()
+        iris = [
+            IRI.create('http://test.iri/chain{0}.owl'.format(cnt))
+            for cnt in range(3)
+        ]
+        owlonts = [ontman.createOntology(iri) for iri in iris]
+        for cnt in range(2):
+            ontman.applyChange(AddImport(
+                owlonts[cnt], df.getOWLImportsDeclaration(iris[cnt + 1])
+            ))
+        ont = Ontology(owlonts[0])
+
+        def compute():
+            self.compute_cnt += 1
+            return InferenceResults(set(), set(), set(), set())
+
+        self.cache.getResults(ont, self.settings, [], compute)
+        self.cache.getResults(ont, self.settings, [], compute)
+        self.assertEqual(1, self.compute_cnt)
+
+        # Changing the indirectly imported ontology should require new
+        # results.
+        newclass = df.getOWLClass(IRI.create('http://test.iri/chain2#A'))
+        ontman.addAxiom(owlonts[2], df.getOWLDeclarationAxiom(newclass))
+        self.cache.getResults(ont, self.settings, [], compute)
+        self.assertEqual(2, self.compute_cnt)
+
+    def test_corruptedEntry(self):
+        self.cache.getResults(self.ont, self.settings, [], self._compute)
+
+        for fname in os.listdir(self.cache.cachedir):
+            if fname.endswith('.gz'):
+                fpath = os.path.join(self.cache.cachedir, fname)
+                with open(fpath, 'w') as fout:
+                    fout.write('corrupted')
+
+        self.cache.getResults(self.ont, self.settings, [], self._compute)
+        self.assertEqual(2, self.compute_cnt)
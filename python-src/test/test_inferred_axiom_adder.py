@@ -28,6 +28,37 @@ from org.semanticweb.owlapi.model import IRI
 from org.semanticweb.owlapi.model import AxiomType
 
 
+def getRedundantSubclassOfAxiomsByClass(reasoner, owlont):
+    """
+    Returns the same result as
+    InferredAxiomAdder._getRedundantSubclassOfAxioms(), but queries the
+    reasoner for the direct superclasses of each class in the ontology
+    separately.  This was the original implementation of
+    _getRedundantSubclassOfAxioms(); it is used as a reference by the unit
+    tests and by benchmark_redundant_subclasses.py.
+
+    reasoner: An OWL API reasoner for owlont.
+    owlont: An OWL API ontology object.
+    """
+    redundants = set()
+
+    for classobj in owlont.getClassesInSignature():
+        # Get the set of direct superclasses for this class.
+        supersset = reasoner.getSuperClasses(classobj, True).getFlattened()
+
+        # Examine each "subclass of" axiom for this class.  If the superclass
+        # asserted in an axiom is not a direct superclass, then the axiom can
+        # be considered redundant.
+        axioms = owlont.getSubClassAxiomsForSubClass(classobj)
+        for axiom in axioms:
+            superclass = axiom.getSuperClass()
+            if not(superclass.isAnonymous()):
+                if not(supersset.contains(superclass.asOWLClass())):
+                    redundants.add(axiom)
+
+    return redundants
+
+
 class NoOpReasoner:
     """
     This is a simple mock reasoner class that implements the OWLReasoner
@@ -361,6 +392,91 @@ class Test_InferredAxiomAdder(unittest.TestCase):
             axioms.iterator().next().containsEntityInSignature(disjointclass)
         )
 
+    def test_getRedundantSubclassOfAxioms(self):
+        """
+        Tests that walking the reasoner's class hierarchy finds the same
+        redundant "subclass of" axioms as querying the reasoner separately for
+        each class.
+        """
+        df = self.ont.df
+        grandparent = df.getOWLClass(
+            IRI.create('http://purl.obolibrary.org/obo/OBITO_0001')
+        )
+        parent = df.getOWLClass(
+            IRI.create('http://purl.obolibrary.org/obo/OBTO_0010')
+        )
+        testclass = df.getOWLClass(
+            IRI.create('http://purl.obolibrary.org/obo/OBTO_0012')
+        )
+
+        redundants = self.iaa._getRedundantSubclassOfAxioms(self.owlont)
+        self.assertEqual(
+            getRedundantSubclassOfAxiomsByClass(
+                self.iaa.reasoner, self.owlont
+            ),
+            redundants
+        )
+
+        # OBTO_0012 is an inferred subclass of OBTO_0010, so its asserted
+        # superclass OBITO_0001 is redundant, but the asserted superclass of
+        # OBTO_0010 is not.
+        self.assertIn(
+            df.getOWLSubClassOfAxiom(testclass, grandparent), redundants
+        )
+        self.assertNotIn(
+            df.getOWLSubClassOfAxiom(parent, grandparent), redundants
+        )
+
+    def test_computeInferences(self):
+        """
+        Tests that computing inferences does not modify the ontology and that
+        applying the results to a copy of the ontology gives the same result
+        as adding the inferred axioms directly.
+        """
+        inftypes = ['subclasses', 'types', 'disjoint classes']
+        ontcopy = self.ont.copy()
+
+        oldaxioms = set(self.owlont.getAxioms())
+        results = self.iaa.computeInferences(inftypes)
+        self.assertEqual(oldaxioms, set(self.owlont.getAxioms()))
+
+        results.applyTo(ontcopy)
+        self.iaa.addInferredAxioms(inftypes)
+        self.assertEqual(
+            set(self.owlont.getAxioms()),
+            set(ontcopy.getOWLOntology().getAxioms())
+        )
+
+    def test_annotateInferred(self):
+        """
+        Tests that inferred axioms, and only inferred axioms, are annotated
+        when requested.
+        """
+        parentIRI = IRI.create('http://purl.obolibrary.org/obo/OBTO_0010')
+        individual = self.ont.df.getOWLNamedIndividual(
+            IRI.create(INDIVIDUAL_IRI)
+        )
+
+        self.iaa.addInferredAxioms(['types'], annotate=True)
+
+        # The explicit type assertion should not be annotated or duplicated;
+        # the two inferred type assertions should be annotated.
+        axioms = self.owlont.getClassAssertionAxioms(individual)
+        self.assertEqual(3, axioms.size())
+        for axiom in axioms:
+            typeIRI = axiom.getClassExpression().asOWLClass().getIRI()
+            annots = axiom.getAnnotations()
+            if typeIRI.equals(parentIRI):
+                self.assertTrue(annots.isEmpty())
+            else:
+                self.assertEqual(1, annots.size())
+                annot = annots.iterator().next()
+                self.assertTrue(
+                    annot.getProperty().getIRI().equals(
+                        InferredAxiomAdder.INFERRED_ANNOT_IRI
+                    )
+                )
+
     def test_inconsistent(self):
         """
         Tests that attempts to add inferred axioms to an inconsistent ontology
@@ -18,6 +18,11 @@
 from ontopilot.ontology import Ontology
 from ontopilot.labelmap import LabelMap
 from ontopilot.labelmap import InvalidLabelError, AmbiguousLabelError
+from ontopilot.labelmap import enableLabelIndexCache, disableLabelIndexCache
+import os
+import json
+import shutil
+import tempfile
 import unittest
 from testfixtures import LogCapture
 
@@ -139,6 +144,13 @@ class TestLabelMap(unittest.TestCase):
             'The label "test class 1" is used for more than one IRI in the ontology' in str(lc)
         )
 
+        # Adding the same IRI/label pair again should have no effect.
+        self.lm.add(
+            'test class 1',
+            IRI.create('http://purl.obolibrary.org/obo/OBITO_0200')
+        )
+        self.assertEqual(2, len(self.lm.ambiglabels['test class 1']))
+
         # Attempt to dereference an ambiguous label.  This should raise an
         # exception.
         with self.assertRaisesRegexp(
@@ -192,3 +204,62 @@ class TestLabelMap(unittest.TestCase):
             str(self.lm.lookupIRI('new test class'))
         )
 
+    def test_labelIndexCache(self):
+        """
+        Tests caching the labels of imported ontologies in label index files.
+        """
+        tmpdir = tempfile.mkdtemp()
+        ontpath = os.path.join(tmpdir, 'ontology-import.owl')
+        indexdir = os.path.join(tmpdir, 'label_index')
+        shutil.copy('test_data/ontology-import.owl', ontpath)
+
+        enableLabelIndexCache(indexdir)
+        try:
+            importont = Ontology(ontpath).getOWLOntology()
+
+            # Adding the ontology's terms should create a label index in the
+            # index directory and nothing next to the ontology document.
+            lm = LabelMap(Ontology())
+            lm.addOntologyTerms(importont)
+            self.assertEqual(['label_index', 'ontology-import.owl'], sorted(
+                os.listdir(tmpdir)
+            ))
+            self.assertEqual(1, len(os.listdir(indexdir)))
+            indexpath = os.path.join(indexdir, os.listdir(indexdir)[0])
+            with open(indexpath) as fin:
+                index = json.load(fin)
+            self.assertEqual(
+                ['http://purl.obolibrary.org/obo/OBITO_0001'],
+                index['labels']['imported test class 1']
+            )
+
+            # Add a label to the index to verify that the index, rather than
+            # the ontology, is used when the ontology has not changed.
+            index['labels']['cached test label'] = [
+                'http://purl.obolibrary.org/obo/OBITO_0001'
+            ]
+            with open(indexpath, 'w') as fout:
+                json.dump(index, fout)
+
+            lm = LabelMap(Ontology())
+            lm.addOntologyTerms(importont)
+            self.assertEqual(
+                'http://purl.obolibrary.org/obo/OBITO_0001',
+                str(lm.lookupIRI('cached test label'))
+            )
+
+            # After the ontology document changes, the index should be
+            # rebuilt.
+            with open(ontpath, 'a') as fout:
+                fout.write('\n')
+
+            lm = LabelMap(Ontology())
+            lm.addOntologyTerms(importont)
+            with self.assertRaises(InvalidLabelError):
+                lm.lookupIRI('cached test label')
+            with open(indexpath) as fin:
+                index = json.load(fin)
+            self.assertFalse('cached test label' in index['labels'])
+        finally:
+            disableLabelIndexCache()
+            shutil.rmtree(tmpdir)
@@ -97,3 +97,40 @@ class TestModifiedOntoBuildTarget(unittest.TestCase):
         )
         self.assertEqual(exppath, mobt.getOutputFilePath())
 
+    def test_getInferencesKey(self):
+        # The reasoned and the merged, reasoned ontologies should share their
+        # inferred axioms.
+        args = ArgsType(merge_imports=False, reason=True, no_def_expand=False)
+        mobt = ModifiedOntoBuildTarget(args, False, self.oc)
+        args = ArgsType(merge_imports=True, reason=True, no_def_expand=False)
+        mobt_merged = ModifiedOntoBuildTarget(args, False, self.oc)
+
+        key = mobt._getInferencesKey()
+        self.assertEqual(key, mobt_merged._getInferencesKey())
+
+        # Reasoning settings should change the key.
+        self.oc.set('Reasoning', 'annotate_inferred', 'True')
+        self.assertNotEqual(key, mobt._getInferencesKey())
+
+    def test_getOntologyProductKey(self):
+        testvals = [
+            (False, False, 'ontology'),
+            (True, False, 'merged_ontology'),
+            (False, True, 'reasoned_ontology'),
+            (True, True, 'merged_reasoned_ontology')
+        ]
+
+        for merge_imports, reason, expkey in testvals:
+            args = ArgsType(
+                merge_imports=merge_imports, reason=reason,
+                no_def_expand=False
+            )
+            mobt = ModifiedOntoBuildTarget(args, False, self.oc)
+            self.assertEqual(expkey, mobt.getOntologyProductKey())
+
+        # Verify that product keys do not conflict with the key of the main
+        # compiled ontology.
+        self.assertNotEqual(
+            mobt.getOntologyProductKey(),
+            mobt.getOntoBuildTarget().getOntologyProductKey()
+        )
@@ -777,3 +777,57 @@ class Test_ModuleExtractor(unittest.TestCase):
 
         #module.saveOntology('test_mod.owl')
 
+        # Extraction with the locality index should produce the same module.
+        me = ModuleExtractor(self.ont, use_locality_index=True)
+        me.addEntity('OBTO:0010', me_methods.LOCALITY)
+        me.addEntity('OBTO:0001', me_methods.LOCALITY)
+        idx_module = me.extractModule('http://test.mod/id2')
+
+        self.assertTrue(module.getOWLOntology().getAxiomCount() > 0)
+        self.assertEqual(
+            set(module.getOWLOntology().getAxioms()),
+            set(idx_module.getOWLOntology().getAxioms())
+        )
+
+
+    def test_getEnrichedAxioms(self):
+        """
+        Tests that modules for any subset of a module specification can be
+        extracted from the enriched axioms of the module with the same results
+        as from the source ontology.
+        """
+        relatives = {rel_axiom_types.ANCESTORS, rel_axiom_types.DESCENDANTS}
+
+        testvals = [
+            ('OBTO:0010', me_methods.LOCALITY, set()),
+            ('OBITO:0001', me_methods.SINGLE, relatives),
+            ('OBTO:0001', me_methods.LOCALITY, set()),
+            ('OBTO:0020', me_methods.SINGLE, set())
+        ]
+        owlents = [
+            self.ont.getExistingEntity(testval[0]).getOWLAPIObj()
+            for testval in testvals
+        ]
+
+        for owlent, testval in zip(owlents, testvals):
+            self.me.addOWLEntity(owlent, testval[1], testval[2])
+        mod_axioms = self.me.extractModuleAxioms()
+        enriched = self.me.getEnrichedAxioms(mod_axioms)
+        self.assertTrue(set(mod_axioms).issubset(enriched))
+
+        recordont = Ontology()
+        owlrecordont = recordont.getOWLOntology()
+        for axiom in enriched:
+            recordont.getOntologyManager().addAxiom(owlrecordont, axiom)
+
+        for start in range(len(testvals)):
+            me = ModuleExtractor(self.ont)
+            record_me = ModuleExtractor(recordont)
+            for owlent, testval in zip(owlents, testvals)[start:]:
+                me.addOWLEntity(owlent, testval[1], testval[2])
+                record_me.addOWLEntity(owlent, testval[1], testval[2])
+
+            self.assertEqual(
+                set(me.extractModuleAxioms()),
+                set(record_me.extractModuleAxioms())
+            )
@@ -124,3 +124,24 @@ class TestManchesterSyntaxParserHelper(unittest.TestCase):
         actual = self.msph.parseClassExpression(exps_str)
         self.assertIsNotNone(actual)
 
+
+    def test_shortFormIndexUpdates(self):
+        """
+        Tests that the parser's short form index follows changes to the
+        ontology after the parser has been created.
+        """
+        # The short form of a new class should not yet be recognized.
+        self.assertIsNone(
+            self.msph.entity_checker.sf_checker.getOWLClass('OBTO_0013')
+        )
+
+        newclass = self.test_ont.createNewClass('OBTO:0013')
+
+        cl_exp = self.msph.parseClassExpression('OBTO_0013')
+        self.assertTrue(cl_exp.asOWLClass().getIRI().equals(newclass.getIRI()))
+
+        # Removing the class should also remove its short form.
+        self.test_ont.removeEntity(newclass.getOWLAPIObj())
+        self.assertIsNone(
+            self.msph.entity_checker.sf_checker.getOWLClass('OBTO_0013')
+        )
@@ -15,6 +15,13 @@
 
 
 # Python imports.
+import os
+import time
+import shutil
+import tempfile
+import threading
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
 import ontopilot.nethelper as nethelper
 from ontopilot.nethelper import NotFoundError, ConnectionFailError
 import unittest
@@ -23,6 +30,46 @@ import unittest
 # Java imports.
 
 
+class _RedirectRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers HEAD requests from a _RedirectServer.  Requests for "/redirect" are
+    redirected to "/target"; all other requests succeed.  Connections are kept
+    open.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.server.requests.append(self.path)
+
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/target')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _RedirectServer(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP server that counts requests and connections.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _RedirectRequestHandler)
+
+        self.requests = []
+        self.connectioncnt = 0
+
+    def verify_request(self, request, client_address):
+        self.connectioncnt += 1
+        return True
+
+
 class Test_nethelper(unittest.TestCase):
     """
     Tests the methods in the nethelper module.
@@ -97,3 +144,97 @@ class Test_nethelper(unittest.TestCase):
             nethelper.checkForRedirect('http://httpbin.org/redirect/4')
         )
 
+
+class Test_nethelperLocal(unittest.TestCase):
+    """
+    Tests connection reuse, the redirect cache, and the offline mode of the
+    nethelper module with a local HTTP server.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.server = _RedirectServer()
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.baseIRI = 'http://127.0.0.1:{0}'.format(
+            self.server.server_address[1]
+        )
+
+    def tearDown(self):
+        nethelper.setRedirectCache(None, 0)
+        nethelper.setOfflineMode(False)
+        nethelper.closeConnections()
+
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_connectionReuse(self):
+        for cnt in range(3):
+            result = nethelper.httpHEAD(self.baseIRI + '/target')
+            self.assertEqual(200, result.status)
+
+        self.assertEqual(3, len(self.server.requests))
+        self.assertEqual(1, self.server.connectioncnt)
+
+        # Closed idle connections should be replaced transparently.
+        nethelper.closeConnections()
+        result = nethelper.httpHEAD(self.baseIRI + '/target')
+        self.assertEqual(200, result.status)
+        self.assertEqual(2, self.server.connectioncnt)
+
+    def test_redirectCache(self):
+        cachepath = os.path.join(self.tmpdir, 'redirect_cache.json')
+        nethelper.setRedirectCache(cachepath, 3600)
+
+        self.assertEqual(
+            self.baseIRI + '/target',
+            nethelper.checkForRedirect(self.baseIRI + '/redirect')
+        )
+        self.assertEqual(
+            '', nethelper.checkForRedirect(self.baseIRI + '/target')
+        )
+        self.assertEqual(3, len(self.server.requests))
+
+        # Cached results should be used without any requests, also after the
+        # cache is loaded again from its file.
+        nethelper.setRedirectCache(None, 0)
+        nethelper.setRedirectCache(cachepath, 3600)
+        self.assertEqual(
+            self.baseIRI + '/target',
+            nethelper.checkForRedirect(self.baseIRI + '/redirect')
+        )
+        self.assertEqual(
+            '', nethelper.checkForRedirect(self.baseIRI + '/target')
+        )
+        self.assertEqual(3, len(self.server.requests))
+
+        # Expired results should be checked again.
+        nethelper.setRedirectCache(cachepath, 0.001)
+        time.sleep(0.01)
+        self.assertEqual(
+            '', nethelper.checkForRedirect(self.baseIRI + '/target')
+        )
+        self.assertEqual(4, len(self.server.requests))
+
+    def test_offlineMode(self):
+        cachepath = os.path.join(self.tmpdir, 'redirect_cache.json')
+        nethelper.setRedirectCache(cachepath, 0.001)
+        nethelper.checkForRedirect(self.baseIRI + '/redirect')
+        self.assertEqual(2, len(self.server.requests))
+        time.sleep(0.01)
+
+        # In offline mode, even expired results should be used, and unknown
+        # IRIs should be assumed to not be redirected.
+        nethelper.setOfflineMode(True)
+        self.assertEqual(
+            self.baseIRI + '/target',
+            nethelper.checkForRedirect(self.baseIRI + '/redirect')
+        )
+        self.assertEqual(
+            '', nethelper.checkForRedirect(self.baseIRI + '/unknown')
+        )
+        self.assertEqual(2, len(self.server.requests))
+
@@ -382,6 +382,47 @@ class TestOntoConfig(unittest.TestCase):
             self.oc.set('Build', 'expand_entity_defs', testval['val'])
             self.assertEqual(testval['exp'], self.oc.getExpandEntityDefs())
 
+    def test_getCompileThreads(self):
+        # Check the default value first.
+        self.assertEqual(1, self.oc.getCompileThreads())
+
+        self.oc.set('Build', 'compile_threads', '4')
+        self.assertEqual(4, self.oc.getCompileThreads())
+
+        # Verify that invalid values are properly handled.
+        for badval in ['0', '-2', '2.5', 'many']:
+            self.oc.set('Build', 'compile_threads', badval)
+            with self.assertRaisesRegexp(
+                ConfigError, 'Invalid value for the "compile_threads" setting'
+            ):
+                self.oc.getCompileThreads()
+
+    def test_getBuildThreads(self):
+        # Check the default value first.
+        self.assertEqual(1, self.oc.getBuildThreads())
+
+        self.oc.set('Build', 'build_threads', '3')
+        self.assertEqual(3, self.oc.getBuildThreads())
+
+        self.oc.set('Build', 'build_threads', '0')
+        with self.assertRaisesRegexp(
+            ConfigError, 'Invalid value for the "build_threads" setting'
+        ):
+            self.oc.getBuildThreads()
+
+    def test_getImportsThreads(self):
+        # Check the default value first.
+        self.assertEqual(1, self.oc.getImportsThreads())
+
+        self.oc.set('Build', 'imports_threads', '6')
+        self.assertEqual(6, self.oc.getImportsThreads())
+
+        self.oc.set('Build', 'imports_threads', 'many')
+        with self.assertRaisesRegexp(
+            ConfigError, 'Invalid value for the "imports_threads" setting'
+        ):
+            self.oc.getImportsThreads()
+
     def test_getImportsSrcDir(self):
         # Test the default case.
         self.assertEqual(
@@ -556,6 +597,114 @@ class TestOntoConfig(unittest.TestCase):
         self.oc.set('Imports', 'annotate_merged', 'true')
         self.assertTrue(self.oc.getAnnotateMerged())
 
+    def test_getUseLocalityIndex(self):
+        self.assertFalse(self.oc.getUseLocalityIndex())
+
+        self.oc.set('Imports', 'locality_index', 'True')
+        self.assertTrue(self.oc.getUseLocalityIndex())
+
+        self.oc.set('Imports', 'locality_index', 'false')
+        self.assertFalse(self.oc.getUseLocalityIndex())
+
+    def test_getUseSharedSourceCache(self):
+        self.assertFalse(self.oc.getUseSharedSourceCache())
+
+        self.oc.set('Imports', 'shared_source_cache', 'True')
+        self.assertTrue(self.oc.getUseSharedSourceCache())
+
+    def test_getSharedSourceCacheDir(self):
+        # Test the default case.
+        self.assertEqual(
+            os.path.realpath(
+                os.path.expanduser('~/.ontopilot/source_cache')
+            ),
+            self.oc.getSharedSourceCacheDir()
+        )
+
+        # Test a custom relative file path.
+        relpath = 'rel/source_cache'
+        self.oc.set('Imports', 'shared_source_cache_dir', relpath)
+        self.assertEqual(
+            self.td_path + '/' + relpath,
+            self.oc.getSharedSourceCacheDir()
+        )
+
+    def test_getSharedSourceCacheSize(self):
+        # Check the default value.
+        self.assertEqual(20 * 1024 ** 3, self.oc.getSharedSourceCacheSize())
+
+        self.oc.set('Imports', 'shared_source_cache_size', '0.5')
+        self.assertEqual(512 * 1024 ** 2, self.oc.getSharedSourceCacheSize())
+
+        for size_str in ('0', '-1', 'invalid'):
+            self.oc.set('Imports', 'shared_source_cache_size', size_str)
+            with self.assertRaisesRegexp(
+                ConfigError,
+                'Invalid value for the "shared_source_cache_size" setting'
+            ):
+                self.oc.getSharedSourceCacheSize()
+
+    def test_getReasonerThreads(self):
+        # Check the default value.
+        self.assertEqual(0, self.oc.getReasonerThreads())
+
+        self.oc.set('Reasoning', 'reasoner_threads', '32')
+        self.assertEqual(32, self.oc.getReasonerThreads())
+
+        for threads_str in ('-1', 'many'):
+            self.oc.set('Reasoning', 'reasoner_threads', threads_str)
+            with self.assertRaisesRegexp(
+                ConfigError, 'Invalid value for the "reasoner_threads" setting'
+            ):
+                self.oc.getReasonerThreads()
+
+    def test_getReasonerTimeout(self):
+        # Check the default value.
+        self.assertEqual(0, self.oc.getReasonerTimeout())
+
+        self.oc.set('Reasoning', 'reasoner_timeout', '90.5')
+        self.assertEqual(90.5, self.oc.getReasonerTimeout())
+
+        for timeout_str in ('-1', 'invalid'):
+            self.oc.set('Reasoning', 'reasoner_timeout', timeout_str)
+            with self.assertRaisesRegexp(
+                ConfigError, 'Invalid value for the "reasoner_timeout" setting'
+            ):
+                self.oc.getReasonerTimeout()
+
+    def test_getPrecomputeStrs(self):
+        # Check the default value.
+        self.assertEqual([], self.oc.getPrecomputeStrs())
+
+        self.oc.set(
+            'Reasoning', 'precompute', 'Class hierarchy, class assertions,'
+        )
+        self.assertEqual(
+            ['class hierarchy', 'class assertions'],
+            self.oc.getPrecomputeStrs()
+        )
+
+        self.oc.set('Reasoning', 'precompute', 'class hierarchy, invalid')
+        with self.assertRaisesRegexp(
+            ConfigError, 'Invalid inference type for the "precompute" setting'
+        ):
+            self.oc.getPrecomputeStrs()
+
+    def test_getRedirectCacheTTL(self):
+        # Check the default value.
+        self.assertEqual(24 * 3600, self.oc.getRedirectCacheTTL())
+
+        self.oc.set('Imports', 'redirect_cache_ttl', '0')
+        self.assertEqual(0, self.oc.getRedirectCacheTTL())
+
+        for ttl_str in ('-1', 'invalid'):
+            self.oc.set('Imports', 'redirect_cache_ttl', ttl_str)
+            with self.assertRaisesRegexp(
+                ConfigError,
+                'Invalid value for the "redirect_cache_ttl" setting'
+            ):
+                self.oc.getRedirectCacheTTL()
+
     def test_getOutputFormat(self):
         # Check the default value.
         self.assertEqual('RDF/XML', self.oc.getOutputFormat())
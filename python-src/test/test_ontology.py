@@ -16,11 +16,13 @@
 
 # Python imports.
 from ontopilot.ontology import Ontology
+from ontopilot.mshelper import ManchesterSyntaxParserHelper
 import unittest
 #from testfixtures import LogCapture
 
 # Java imports.
-from org.semanticweb.owlapi.model import IRI
+from org.semanticweb.owlapi.apibinding import OWLManager
+from org.semanticweb.owlapi.model import IRI, AddImport
 from org.semanticweb.owlapi.model.parameters import Imports as ImportsEnum
 
 
@@ -168,6 +170,49 @@ class Test_Ontology(unittest.TestCase):
             self.ont.getExistingIndividual(CLASS_IRI)
         )
 
+    def test_getManchesterParser(self):
+        parser = self.ont.getManchesterParser()
+        self.assertIsNotNone(parser)
+
+        # Verify that the same parser instance is reused.
+        self.assertIs(parser, self.ont.getManchesterParser())
+
+    def test_setManchesterParser(self):
+        parser = ManchesterSyntaxParserHelper(self.ont)
+        try:
+            # The calling thread should use the parser it was given.
+            self.ont.setManchesterParser(parser)
+            self.assertIs(parser, self.ont.getManchesterParser())
+
+            # Without a parser, a new one should be created.
+            self.ont.setManchesterParser(None)
+            newparser = self.ont.getManchesterParser()
+            self.assertIsNot(parser, newparser)
+        finally:
+            self.ont.releaseManchesterParser()
+            parser.dispose()
+
+    def test_dispose(self):
+        # Create a temporary ontology with the same ontology manager, as is
+        # done for import modules.
+        tmpont = Ontology(self.ont.getOntologyManager().createOntology())
+        declindex = tmpont.declindex
+        tmpont.getRelationshipIndex()
+        tmpont.getLocalityIndex()
+        tmpont.getManchesterParser()
+
+        tmpont.dispose()
+        self.assertIsNone(tmpont.relindex)
+        self.assertIsNone(tmpont.locindex)
+
+        # The disposed indexes should no longer follow ontology changes.
+        owlclass = self.ont.df.getOWLClass(IRI.create(NULL_IRI))
+        self.ont.getOntologyManager().addAxiom(
+            tmpont.getOWLOntology(),
+            self.ont.df.getOWLDeclarationAxiom(owlclass)
+        )
+        self.assertEqual([], declindex.getEntityTypes(IRI.create(NULL_IRI)))
+
     def test_createNewClass(self):
         entIRI = NULL_IRI
 
@@ -223,6 +268,72 @@ class Test_Ontology(unittest.TestCase):
             self.ont.getExistingIndividual(entIRI)
         )
 
+    def test_addEntityAxioms(self):
+        newIRI = IRI.create(NULL_IRI)
+        newclass = self.ont.df.getOWLClass(newIRI)
+        labelaxiom = self.ont.df.getOWLAnnotationAssertionAxiom(
+            self.ont.df.getRDFSLabel(), newIRI,
+            self.ont.df.getOWLLiteral('new test class')
+        )
+
+        # Record label notifications.
+        labelinfos = []
+        self.ont.registerObserver('labels_added', labelinfos.extend)
+
+        # Verify that an anonymous label subject is rejected without adding
+        # any of the axioms.
+        anonlabel = self.ont.df.getOWLAnnotationAssertionAxiom(
+            self.ont.df.getRDFSLabel(),
+            self.ont.df.getOWLAnonymousIndividual(),
+            self.ont.df.getOWLLiteral('anonymous label')
+        )
+        with self.assertRaisesRegexp(
+            RuntimeError, 'as an annotation of an anonymous class'
+        ):
+            self.ont.addEntityAxioms(
+                [self.ont.df.getOWLDeclarationAxiom(newclass), anonlabel]
+            )
+        self.assertIsNone(self.ont.getExistingClass(NULL_IRI))
+        self.assertEqual([], labelinfos)
+
+        self.ont.addEntityAxioms(
+            [self.ont.df.getOWLDeclarationAxiom(newclass), labelaxiom]
+        )
+
+        self.assertIsNotNone(self.ont.getExistingClass(NULL_IRI))
+        self.assertTrue(self.owlont.containsAxiom(labelaxiom))
+        self.assertEqual(1, len(labelinfos))
+        self.assertEqual('new test class', labelinfos[0][0])
+        self.assertTrue(labelinfos[0][1].equals(newIRI))
+
+        # Verify that the new label can be resolved.
+        self.assertIsNotNone(self.ont.getExistingClass("'new test class'"))
+
+    def test_axiomBatch(self):
+        newclass = self.ont.df.getOWLClass(IRI.create(NULL_IRI))
+        declaxiom = self.ont.df.getOWLDeclarationAxiom(newclass)
+
+        # Axioms should not be added until the batch is committed.
+        self.ont.startAxiomBatch()
+        self.ont.addEntityAxiom(declaxiom)
+        self.assertIsNone(self.ont.getExistingClass(NULL_IRI))
+
+        with self.assertRaisesRegexp(
+            RuntimeError, 'another axiom batch was active'
+        ):
+            self.ont.startAxiomBatch()
+
+        self.ont.commitAxiomBatch()
+        self.assertIsNotNone(self.ont.getExistingClass(NULL_IRI))
+
+        # Canceling a batch should discard the buffered axioms.
+        self.ont.removeEntity(newclass)
+        self.ont.startAxiomBatch()
+        self.ont.addEntityAxiom(declaxiom)
+        self.ont.cancelAxiomBatch()
+        self.ont.commitAxiomBatch()
+        self.assertIsNone(self.ont.getExistingClass(NULL_IRI))
+
     def test_removeEntity(self):
         classobj = self.ont.getExistingClass(CLASS_IRI)
         self.assertIsNotNone(classobj)
@@ -250,6 +361,36 @@ class Test_Ontology(unittest.TestCase):
         annot_ax_set = self.owlont.getAnnotationAssertionAxioms(IRIobj)
         self.assertTrue(annot_ax_set.isEmpty())
 
+    def test_removeEntities(self):
+        classobj = self.ont.getExistingClass(CLASS_IRI)
+        indvobj = self.ont.getExistingIndividual(INDIVIDUAL_IRI)
+        self.assertIsNotNone(classobj)
+        self.assertIsNotNone(indvobj)
+
+        # Delete both entities, using an OWL API object for one and an
+        # _OntologyEntity object for the other.
+        self.ont.removeEntities([classobj.getOWLAPIObj(), indvobj])
+
+        # Make sure the entities and their annotations have been deleted.
+        for entIRI in (CLASS_IRI, INDIVIDUAL_IRI):
+            self.assertIsNone(self.ont.getExistingEntity(entIRI))
+            annot_ax_set = self.owlont.getAnnotationAssertionAxioms(
+                IRI.create(entIRI)
+            )
+            self.assertTrue(annot_ax_set.isEmpty())
+
+        # Make sure that no remaining axioms reference the deleted entities.
+        for axiom in self.owlont.getAxioms():
+            self.assertFalse(
+                axiom.getSignature().contains(classobj.getOWLAPIObj())
+            )
+            self.assertFalse(
+                axiom.getSignature().contains(indvobj.getOWLAPIObj())
+            )
+
+        # Make sure an unrelated entity was not affected.
+        self.assertIsNotNone(self.ont.getExistingObjectProperty(OBJPROP_IRI))
+
     def test_hasImport(self):
         import_iri = 'https://github.com/stuckyb/ontopilot/raw/master/python-src/test/test_data/ontology-import.owl'
 
@@ -360,6 +501,68 @@ class Test_Ontology(unittest.TestCase):
             self.owlont.isDeclared(mergeclass, ImportsEnum.EXCLUDED)
         )
 
+    def test_copy(self):
+        ontcopy = self.ont.copy()
+        owlcopy = ontcopy.getOWLOntology()
+
+        # Verify that the copy is identical to the original ontology,
+        # including its imports closure, but uses a different ontology
+        # manager.
+        self.assertTrue(self.owlont.getAxioms().equals(owlcopy.getAxioms()))
+        self.assertTrue(
+            self.owlont.getOntologyID().equals(owlcopy.getOntologyID())
+        )
+        self.assertEqual(
+            self.owlont.getImportsClosure().size(),
+            owlcopy.getImportsClosure().size()
+        )
+        self.assertIsNotNone(ontcopy.getExistingClass('OBITO:0001'))
+        self.assertFalse(
+            self.ont.getOntologyManager().equals(
+                ontcopy.getOntologyManager()
+            )
+        )
+
+        # Verify that modifying the copy does not modify the original.
+        ontcopy.createNewClass('OBTO:0013')
+        self.assertIsNotNone(ontcopy.getExistingClass('OBTO:0013'))
+        self.assertIsNone(self.ont.getExistingClass('OBTO:0013'))
+
+        ontcopy.mergeOntology(
+            'https://github.com/stuckyb/ontopilot/raw/master/python-src/test/test_data/ontology-import.owl'
+        )
+        self.assertEqual(1, self.owlont.getImports().size())
+        self.assertEqual(0, owlcopy.getImports().size())
+
+    def test_copyNestedImports(self):
+        # Create an ontology with a two-level import chain: the ontology
+        # imports chain1.owl, which imports chain2.owl.
+        ontman = OWLManager.createOWLOntologyManager()
+        df = ontman.getOWLDataFactory()
+        iris = [
+            IRI.create('http://test.iri/chain{0}.owl'.format(cnt))
+            for cnt in range(3)
+        ]
+        owlonts = [ontman.createOntology(iri) for iri in iris]
+        for cnt in range(2):
+            ontman.applyChange(AddImport(
+                owlonts[cnt], df.getOWLImportsDeclaration(iris[cnt + 1])
+            ))
+
+        nestedclass = df.getOWLClass(IRI.create(CLASS_IRI))
+        ontman.addAxiom(owlonts[2], df.getOWLDeclarationAxiom(nestedclass))
+        self.assertEqual(3, owlonts[0].getImportsClosure().size())
+
+        # The copy should include the indirectly imported ontology.
+        ontcopy = Ontology(owlonts[0]).copy()
+        owlcopy = ontcopy.getOWLOntology()
+        self.assertEqual(3, owlcopy.getImportsClosure().size())
+        self.assertTrue(
+            owlcopy.containsClassInSignature(
+                IRI.create(CLASS_IRI), ImportsEnum.INCLUDED
+            )
+        )
+
     def test_checkEntailmentErrors(self):
         # Check on ontology that is both consistent and coherent.
         report = self.ont.checkEntailmentErrors()
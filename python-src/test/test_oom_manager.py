@@ -101,3 +101,14 @@ class Test_OOMManager(unittest.TestCase):
                 ontIRI, IRI.create('http://conflicting.iri')
             )
 
+    def test_releaseOWLOntologyManager(self):
+        oom = oom_man.getNewOWLOntologyManager()
+        oom.createOntology(IRI.create('http://some.ontology.iri/released'))
+
+        oom_man.releaseOWLOntologyManager(oom)
+
+        self.assertEqual(0, oom.getOntologies().size())
+        self.assertFalse(
+            any(tracked_oom.equals(oom) for tracked_oom in oom_man._ooms_list)
+        )
+
@@ -15,10 +15,14 @@
 
 
 # Python imports.
+import os
+import shutil
+import tempfile
 from ontopilot.tablereader import TableRow
 from ontopilot.owlontologybuilder import (
     OWLOntologyBuilder, EntityDescriptionError
 )
+from ontopilot.terms_axiom_cache import TermsAxiomCache
 from ontopilot.ontology_entities import (
     CLASS_ENTITY, DATAPROPERTY_ENTITY, OBJECTPROPERTY_ENTITY,
     ANNOTATIONPROPERTY_ENTITY, INDIVIDUAL_ENTITY
@@ -38,6 +42,17 @@ COMMENT_IRI = IRI.create('http://www.w3.org/2000/01/rdf-schema#comment')
 NEW_IRI = 'http://purl.obolibrary.org/obo/OBTO_9999'
 
 
+class FileTableStub(TableStub):
+    """
+    A table stub for a table that comes from an actual file.
+    """
+    def __init__(self, filename):
+        TableStub.__init__(self)
+        self.filename = filename
+    def getFileName(self):
+        return self.filename
+
+
 class Test_OWLOntologyBuilder(unittest.TestCase):
     """
     Tests OWLOntologyBuilder.
@@ -632,6 +647,174 @@ class Test_OWLOntologyBuilder(unittest.TestCase):
         # OBTO:0020 is a data property.
         self._test_addOrUpdateEntity(INDIVIDUAL_ENTITY, 'OBTO:0020')
 
+    def _addParallelTestClasses(self, oob, numclasses, bad_rownum=None):
+        """
+        Adds a series of new classes to an OWLOntologyBuilder for testing
+        parallel processing of deferred entity axioms.  Each class is a
+        subclass of the previously added class.  If bad_rownum is provided,
+        the class in that row will have an invalid "Subclass of" value.
+        """
+        for rownum in range(1, numclasses + 1):
+            trow = TableRow(rownum, TableStub())
+            trow['ID'] = 'OBTO:{0:04d}'.format(9000 + rownum)
+            trow['Label'] = 'parallel test class {0}'.format(rownum)
+            trow['Text definition'] = 'A class that follows {{{0}}}.'.format(
+                'parallel test class {0}'.format(rownum - 1)
+                if rownum > 1 else 'test class 1'
+            )
+
+            if rownum == bad_rownum:
+                trow['Subclass of'] = "'not a class label'"
+            elif rownum > 1:
+                trow['Subclass of'] = "'parallel test class {0}'".format(
+                    rownum - 1
+                )
+            else:
+                trow['Subclass of'] = "'test class 1'"
+
+            oob.addClass(trow)
+
+    def test_processDeferredParallel(self):
+        numclasses = 40
+
+        # Build the same set of classes sequentially and in parallel, and
+        # verify that the results are identical.
+        self._addParallelTestClasses(self.oob, numclasses)
+        self.oob.processDeferredEntityAxioms(numthreads=1)
+
+        p_oob = OWLOntologyBuilder('test_data/ontology.owl')
+        self._addParallelTestClasses(p_oob, numclasses)
+        p_oob.processDeferredEntityAxioms(numthreads=4)
+
+        self.assertEqual(0, len(p_oob.entity_trows))
+        self.assertTrue(
+            self.owlont.getAxioms().equals(
+                p_oob.getOntology().getOWLOntology().getAxioms()
+            )
+        )
+
+        # Verify that an error in one row is reported for that row and that
+        # the axioms for all rows processed before it are added.  Entity
+        # descriptions are processed from the last to the first, so rows after
+        # the bad row should be added and rows before it should remain on the
+        # stack.
+        p_oob = OWLOntologyBuilder('test_data/ontology.owl')
+        self._addParallelTestClasses(p_oob, numclasses, bad_rownum=25)
+        with self.assertRaisesRegexp(
+            EntityDescriptionError, 'row 25 of'
+        ):
+            p_oob.processDeferredEntityAxioms(numthreads=4)
+
+        self.assertEqual(25, len(p_oob.entity_trows))
+        self.assertEqual(25, p_oob.entity_trows[-1][1].getRowNum())
+
+        p_owlont = p_oob.getOntology().getOWLOntology()
+        for class_id, exp_count in (('OBTO:9026', 1), ('OBTO:9024', 0)):
+            owlclass = p_oob.getOntology().getExistingClass(
+                class_id
+            ).getOWLAPIObj()
+            self.assertEqual(
+                exp_count,
+                p_owlont.getSubClassAxiomsForSubClass(owlclass).size()
+            )
+
+    def _addCacheTestClasses(self, oob, dep_class_id):
+        """
+        Adds classes from two "terms files" to an OWLOntologyBuilder for
+        testing the axiom cache.  The class in the first file is a subclass of
+        the class in the second file, which is referenced by its label.
+        """
+        trow = TableRow(1, FileTableStub(self.termsfile_1))
+        trow['ID'] = 'OBTO:9101'
+        trow['Label'] = 'cached test class'
+        trow['Text definition'] = 'A subclass of {dependency class}.'
+        trow['Subclass of'] = "'dependency class'"
+        oob.addClass(trow)
+
+        trow = TableRow(1, FileTableStub(self.termsfile_2))
+        trow['ID'] = dep_class_id
+        trow['Label'] = 'dependency class'
+        trow['Subclass of'] = "'test class 1'"
+        oob.addClass(trow)
+
+    def test_axiomCache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self._test_axiomCache(tmpdir)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def _test_axiomCache(self, tmpdir):
+        # The terms files are only used for detecting changes, so their
+        # contents need not match the test rows.
+        self.termsfile_1 = os.path.join(tmpdir, 'terms_1.csv')
+        self.termsfile_2 = os.path.join(tmpdir, 'terms_2.csv')
+        for termsfile in (self.termsfile_1, self.termsfile_2):
+            with open(termsfile, 'w') as fout:
+                fout.write(termsfile)
+
+        cachedir = os.path.join(tmpdir, 'cache')
+
+        # Build the classes without a cache to get the expected results.
+        self._addCacheTestClasses(self.oob, 'OBTO:9102')
+        self.oob.processDeferredEntityAxioms()
+        expected = self.owlont.getAxioms()
+
+        # Build the classes twice with a cache.  The second time, the axioms
+        # for both files should come from the cache.
+        for exp_hits in (0, 2):
+            axiom_cache = TermsAxiomCache(cachedir)
+            oob = OWLOntologyBuilder('test_data/ontology.owl')
+            oob.setAxiomCache(axiom_cache)
+            self._addCacheTestClasses(oob, 'OBTO:9102')
+            oob.processDeferredEntityAxioms()
+
+            self.assertEqual(0, len(oob.entity_trows))
+            self.assertEqual(exp_hits, axiom_cache.getCacheStats()['hits'])
+            self.assertTrue(
+                expected.equals(oob.getOntology().getOWLOntology().getAxioms())
+            )
+
+        # Change the second file so that the label used by the first file
+        # refers to a different class.  Both files must then be processed
+        # again, and the results must match a build without a cache.
+        with open(self.termsfile_2, 'w') as fout:
+            fout.write('changed')
+
+        oob = OWLOntologyBuilder('test_data/ontology.owl')
+        self._addCacheTestClasses(oob, 'OBTO:9103')
+        oob.processDeferredEntityAxioms()
+        expected = oob.getOntology().getOWLOntology().getAxioms()
+
+        axiom_cache = TermsAxiomCache(cachedir)
+        oob = OWLOntologyBuilder('test_data/ontology.owl')
+        oob.setAxiomCache(axiom_cache)
+        self._addCacheTestClasses(oob, 'OBTO:9103')
+        oob.processDeferredEntityAxioms(numthreads=2)
+
+        self.assertEqual(0, axiom_cache.getCacheStats()['hits'])
+        self.assertTrue(
+            expected.equals(oob.getOntology().getOWLOntology().getAxioms())
+        )
+
+        # If only the first file changed, the second file's axioms should be
+        # reused.
+        with open(self.termsfile_1, 'w') as fout:
+            fout.write('changed')
+
+        axiom_cache = TermsAxiomCache(cachedir)
+        oob = OWLOntologyBuilder('test_data/ontology.owl')
+        oob.setAxiomCache(axiom_cache)
+        self._addCacheTestClasses(oob, 'OBTO:9103')
+        oob.processDeferredEntityAxioms()
+
+        self.assertEqual(
+            {'hits': 1, 'misses': 1}, axiom_cache.getCacheStats()
+        )
+        self.assertTrue(
+            expected.equals(oob.getOntology().getOWLOntology().getAxioms())
+        )
+
     def test_expandDefinition(self):
         # Test an expansion that includes the label text.  Express the label in
         # all four different formats that should be supported, plus test cases
@@ -16,15 +16,19 @@
 
 # Python imports.
 from ontopilot.ontology import Ontology
-from ontopilot.reasoner_manager import ReasonerManager
+from ontopilot.reasoner_manager import ReasonerManager, setReasonerOptions
+from ontopilot.reasoner_manager import reasonerTimeLimit
 import unittest
 #from testfixtures import LogCapture
 
 # Java imports.
+from java.lang import Long
 from org.semanticweb.elk.owlapi import ElkReasoner
 from org.semanticweb.HermiT import Reasoner as HermitReasoner
 from com.clarkparsia.pellet.owlapiv3 import PelletReasoner
 from uk.ac.manchester.cs.jfact import JFactReasoner
+from org.semanticweb.owlapi.reasoner import InferenceType
+from org.semanticweb.owlapi.reasoner import TimeOutException
 
 
 class Test_ReasonerManager(unittest.TestCase):
@@ -35,6 +39,10 @@ class Test_ReasonerManager(unittest.TestCase):
         ont = Ontology('test_data/ontology.owl')
         self.rman = ReasonerManager(ont)
 
+    def tearDown(self):
+        self.rman.disposeReasoners()
+        setReasonerOptions()
+
     def test_getReasoner(self):
         """
         For each supported reasoner type, make sure ReasonerManager returns the
@@ -58,3 +66,59 @@ class Test_ReasonerManager(unittest.TestCase):
         self.assertIsInstance(reasoner, JFactReasoner)
         self.assertIs(reasoner, self.rman.getReasoner('jfact'))
 
+    def test_setReasonerOptions(self):
+        # By default, there should be no time limit.
+        reasoner = self.rman.getReasoner('HermiT')
+        self.assertEqual(Long.MAX_VALUE, reasoner.getTimeOut())
+        self.rman.disposeReasoners()
+
+        # The options should apply to all new reasoners.
+        setReasonerOptions(threads=2, timeout=5)
+
+        reasoner = self.rman.getReasoner('HermiT')
+        self.assertIsInstance(reasoner, HermitReasoner)
+        self.assertEqual(5000, reasoner.getTimeOut())
+
+        reasoner = self.rman.getReasoner('ELK')
+        self.assertIsInstance(reasoner, ElkReasoner)
+        self.assertTrue(reasoner.isConsistent())
+
+    def test_precomputeInferences(self):
+        reasoner = self.rman.getReasoner('HermiT')
+        self.assertFalse(reasoner.isPrecomputed(InferenceType.CLASS_HIERARCHY))
+
+        self.rman.precomputeInferences(
+            'HermiT', [InferenceType.CLASS_HIERARCHY]
+        )
+        self.assertTrue(reasoner.isPrecomputed(InferenceType.CLASS_HIERARCHY))
+        self.assertFalse(
+            reasoner.isPrecomputed(InferenceType.CLASS_ASSERTIONS)
+        )
+
+        # Configured kinds of inferences should replace the requested kinds.
+        setReasonerOptions(precompute=['class assertions'])
+        self.rman.precomputeInferences(
+            'HermiT', [InferenceType.OBJECT_PROPERTY_HIERARCHY]
+        )
+        self.assertTrue(reasoner.isPrecomputed(InferenceType.CLASS_ASSERTIONS))
+        self.assertFalse(
+            reasoner.isPrecomputed(InferenceType.OBJECT_PROPERTY_HIERARCHY)
+        )
+
+    def test_reasonerTimeLimit(self):
+        setReasonerOptions(timeout=5)
+
+        # Reasoner timeouts should be reported as RuntimeErrors that describe
+        # the task that timed out.
+        with self.assertRaisesRegexp(
+            RuntimeError,
+            'did not finish classifying the ontology within the time limit '
+            'of 5 s'
+        ):
+            with reasonerTimeLimit('classifying the ontology'):
+                raise TimeOutException()
+
+        # Other exceptions should not be changed.
+        with self.assertRaises(ValueError):
+            with reasonerTimeLimit('classifying the ontology'):
+                raise ValueError()
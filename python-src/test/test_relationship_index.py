@@ -0,0 +1,111 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+from ontopilot.ontology import Ontology
+from ontopilot.relationship_index import rel_axiom_types
+import unittest
+
+# Java imports.
+from org.semanticweb.owlapi.model import AxiomType
+
+
+class TestRelationshipIndex(unittest.TestCase):
+    """
+    Tests the RelationshipIndex class.  Most of the relationship types are
+    also tested through the ModuleExtractor tests.
+    """
+    def setUp(self):
+        self.ont = Ontology('test_data/ontology.owl')
+        self.relindex = self.ont.getRelationshipIndex()
+
+    def _compareEntitySets(self, ent_list, result):
+        """
+        Compares a list of expected entities to a result set of OWLEntity
+        instances.  The list should contain entity ID strings.
+        """
+        expset = set()
+        for ent_id in ent_list:
+            ent = self.ont.getExistingEntity(ent_id)
+            expset.add(ent.getOWLAPIObj())
+
+        self.assertEqual(expset, result)
+
+    def test_getRelationshipIndex(self):
+        # The index should be shared by all users of the ontology.
+        self.assertIs(self.relindex, self.ont.getRelationshipIndex())
+
+    def test_getDirectlyRelatedComponents(self):
+        # OBITO:0001 is defined in an imported ontology, but its subclasses
+        # are defined in the main ontology.
+        owlent = self.ont.getExistingClass('OBITO:0001').getOWLAPIObj()
+        entset, axiomset = self.relindex.getDirectlyRelatedComponents(
+            owlent, {rel_axiom_types.DESCENDANTS}
+        )
+        self._compareEntitySets(
+            ['OBTO:0010', 'OBTO:0011', 'OBTO:0012'], entset
+        )
+        self.assertEqual(3, len(axiomset))
+        for axiom in axiomset:
+            self.assertTrue(axiom.isOfType(AxiomType.SUBCLASS_OF))
+
+        owlent = self.ont.getExistingClass('OBTO:0010').getOWLAPIObj()
+        entset, axiomset = self.relindex.getDirectlyRelatedComponents(
+            owlent, {rel_axiom_types.ANCESTORS}
+        )
+        self._compareEntitySets(['OBITO:0001'], entset)
+        self.assertEqual(1, len(axiomset))
+
+        # Changes to the ontology should be reflected by the index.
+        newent = self.ont.createNewClass('OBTO:9999')
+        newent.addSuperclass('OBTO:0010')
+        entset, axiomset = self.relindex.getDirectlyRelatedComponents(
+            owlent, {rel_axiom_types.ANCESTORS, rel_axiom_types.DESCENDANTS}
+        )
+        self._compareEntitySets(['OBITO:0001', 'OBTO:9999'], entset)
+        self.assertEqual(2, len(axiomset))
+
+    def test_getRelatedComponents(self):
+        # Create a class hierarchy with a cycle:
+        #
+        # OBITO:0001
+        # |--- OBTO:0010
+        # |--- OBTO:0011
+        # |    |--- OBTO:9999
+        # |         |--- OBTO:0011
+        # |--- OBTO:0012
+        newent = self.ont.createNewClass('OBTO:9999')
+        newent.addSuperclass('OBTO:0011')
+        self.ont.getExistingClass('OBTO:0011').addSuperclass('OBTO:9999')
+
+        owlent = self.ont.getExistingClass('OBITO:0001').getOWLAPIObj()
+        entset, axiomset = self.relindex.getRelatedComponents(
+            owlent, {rel_axiom_types.DESCENDANTS}
+        )
+        self._compareEntitySets(
+            ['OBITO:0001', 'OBTO:0010', 'OBTO:0011', 'OBTO:0012', 'OBTO:9999'],
+            entset
+        )
+        self.assertEqual(5, len(axiomset))
+
+        owlent = self.ont.getExistingClass('OBTO:9999').getOWLAPIObj()
+        entset, axiomset = self.relindex.getRelatedComponents(
+            owlent, {rel_axiom_types.ANCESTORS}
+        )
+        self._compareEntitySets(
+            ['OBITO:0001', 'OBTO:0011', 'OBTO:9999'], entset
+        )
+        self.assertEqual(3, len(axiomset))
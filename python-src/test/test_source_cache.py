@@ -0,0 +1,296 @@
+# Copyright (C) 2017 Brian J. Stucky
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Python imports.
+import os
+import shutil
+import tempfile
+import threading
+import base64
+import hashlib
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from ontopilot.source_cache import SourceOntologyCache, SharedSourceCache
+import unittest
+
+# Java imports.
+
+
+class _SourceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves a single source ontology document from a _SourceServer.  Supports
+    conditional requests with If-None-Match and range requests with If-Range.
+    """
+    def do_GET(self):
+        server = self.server
+        server.requests.append(
+            dict((key.lower(), val) for key, val in self.headers.items())
+        )
+
+        if self.path != '/source.owl':
+            self.send_error(404)
+            return
+
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        rangestr = self.headers.get('Range')
+        if (
+            rangestr is not None and
+            self.headers.get('If-Range') == server.etag
+        ):
+            start = int(rangestr[len('bytes='):-1])
+            self.send_response(206)
+            self.send_header(
+                'Content-Range', 'bytes {0}-{1}/{2}'.format(
+                    start, len(server.content) - 1, len(server.content)
+                )
+            )
+        else:
+            self.send_response(200)
+            if server.content_md5 is not None:
+                self.send_header('Content-MD5', server.content_md5)
+
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', len(server.content) - start)
+        self.end_headers()
+
+        # Simulate an interrupted download, if requested.
+        body = server.content[start:]
+        if server.truncate_at is not None:
+            body = body[:server.truncate_at]
+            server.truncate_at = None
+
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SourceServer(HTTPServer):
+    """
+    A local stand-in for a remote server that hosts a source ontology.
+    """
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _SourceRequestHandler)
+
+        self.requests = []
+        self.truncate_at = None
+        self.content_md5 = None
+        self.setContent(''.join(chr(i % 251) for i in range(200000)), '"v1"')
+
+    def setContent(self, content, etag):
+        self.content = content
+        self.etag = etag
+
+
+class TestSourceOntologyCache(unittest.TestCase):
+    """
+    Tests the SourceOntologyCache class.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = SourceOntologyCache(self.tmpdir)
+
+        self.server = _SourceServer()
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.sourceIRI = 'http://127.0.0.1:{0}/source.owl'.format(
+            self.server.server_address[1]
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def _readFile(self, filepath):
+        with open(filepath, 'rb') as fin:
+            return fin.read()
+
+    def test_retrieve(self):
+        filepath = self.cache.retrieve(self.sourceIRI)
+        self.assertEqual(self.cache.getFilePath(self.sourceIRI), filepath)
+        self.assertEqual(self.server.content, self._readFile(filepath))
+        self.assertEqual(1, len(self.server.requests))
+
+        # An existing local copy should be used without any requests.
+        self.cache.retrieve(self.sourceIRI)
+        self.assertEqual(1, len(self.server.requests))
+
+        # Refreshing an unchanged source should use a conditional request.
+        self.cache.retrieve(self.sourceIRI, refresh=True)
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual('"v1"', self.server.requests[1]['if-none-match'])
+        self.assertEqual(self.server.content, self._readFile(filepath))
+
+        # Refreshing a changed source should download the new version.
+        self.server.setContent('new source ontology', '"v2"')
+        self.cache.retrieve(self.sourceIRI, refresh=True)
+        self.assertEqual(3, len(self.server.requests))
+        self.assertEqual('new source ontology', self._readFile(filepath))
+
+        # A missing source should raise an exception.
+        with self.assertRaisesRegexp(RuntimeError, 'could not be found'):
+            self.cache.retrieve(self.sourceIRI.replace('source', 'missing'))
+
+    def test_resume(self):
+        # Interrupt the first download, which should then be resumed at the
+        # point of interruption.
+        self.server.truncate_at = 50000
+
+        filepath = self.cache.retrieve(self.sourceIRI)
+        self.assertEqual(self.server.content, self._readFile(filepath))
+        self.assertFalse(os.path.exists(filepath + '.part'))
+
+        self.assertEqual(2, len(self.server.requests))
+        self.assertNotIn('range', self.server.requests[0])
+        self.assertEqual('bytes=50000-', self.server.requests[1]['range'])
+        self.assertEqual('"v1"', self.server.requests[1]['if-range'])
+
+    def test_checksums(self):
+        # A download that does not match the server's checksum should be
+        # discarded.
+        self.server.content_md5 = base64.b64encode(
+            hashlib.md5('other content').digest()
+        )
+        with self.assertRaisesRegexp(RuntimeError, 'MD5 checksum'):
+            self.cache.retrieve(self.sourceIRI)
+        filepath = self.cache.getFilePath(self.sourceIRI)
+        self.assertFalse(os.path.exists(filepath))
+        self.assertFalse(os.path.exists(filepath + '.part'))
+
+        # A matching checksum should be accepted.
+        self.server.content_md5 = base64.b64encode(
+            hashlib.md5(self.server.content).digest()
+        )
+        self.cache.retrieve(self.sourceIRI)
+        self.assertEqual(self.server.content, self._readFile(filepath))
+
+        # A corrupted local copy should be downloaded again.
+        with open(filepath, 'r+b') as fout:
+            fout.write('corrupted')
+        mtime = os.path.getmtime(filepath) + 10
+        os.utime(filepath, (mtime, mtime))
+
+        reqcnt = len(self.server.requests)
+        self.cache.retrieve(self.sourceIRI)
+        self.assertEqual(reqcnt + 1, len(self.server.requests))
+        self.assertEqual(self.server.content, self._readFile(filepath))
+
+    def test_sharedCache(self):
+        sharedcache = SharedSourceCache(
+            os.path.join(self.tmpdir, 'shared'), 10 * 1024 ** 2
+        )
+
+        projdir1 = os.path.join(self.tmpdir, 'project1')
+        os.mkdir(projdir1)
+        cache1 = SourceOntologyCache(projdir1, sharedcache)
+
+        filepath1 = cache1.retrieve(self.sourceIRI)
+        self.assertEqual(self.server.content, self._readFile(filepath1))
+        self.assertEqual(1, len(self.server.requests))
+
+        # A cold project cache should use the shared copy without any
+        # requests.
+        projdir2 = os.path.join(self.tmpdir, 'project2')
+        os.mkdir(projdir2)
+        cache2 = SourceOntologyCache(projdir2, sharedcache)
+
+        filepath2 = cache2.retrieve(self.sourceIRI)
+        self.assertEqual(self.server.content, self._readFile(filepath2))
+        self.assertEqual(1, len(self.server.requests))
+        self.assertEqual(
+            os.path.realpath(filepath1), os.path.realpath(filepath2)
+        )
+
+        # The recorded validators of the shared copy should be used for
+        # conditional requests.
+        cache2.retrieve(self.sourceIRI, refresh=True)
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual('"v1"', self.server.requests[1]['if-none-match'])
+
+
+class TestSharedSourceCache(unittest.TestCase):
+    """
+    Tests the SharedSourceCache class.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = SharedSourceCache(os.path.join(self.tmpdir, 'shared'), 25)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _storeFile(self, sourceIRI, content):
+        filepath = os.path.join(self.tmpdir, 'download')
+        with open(filepath, 'wb') as fout:
+            fout.write(content)
+
+        objpath = self.cache.store(
+            sourceIRI, filepath, hashlib.sha1(content).hexdigest(),
+            {'etag': '"v1"'}
+        )
+        self.assertFalse(os.path.exists(filepath))
+
+        return objpath
+
+    def test_lookup(self):
+        self.assertIsNone(self.cache.lookup('http://a.source/ont.owl'))
+
+        objpath = self._storeFile('http://a.source/ont.owl', 'content 1')
+        self.assertEqual(
+            (objpath, {'etag': '"v1"'}),
+            self.cache.lookup('http://a.source/ont.owl')
+        )
+
+        # Identical files should be stored only once.
+        objpath2 = self._storeFile('http://a.source/ont2.owl', 'content 1')
+        self.assertEqual(objpath, objpath2)
+        self.assertEqual(
+            objpath, self.cache.lookup('http://a.source/ont2.owl')[0]
+        )
+
+        # A discarded file should no longer be found.
+        self.cache.discard(objpath)
+        self.assertIsNone(self.cache.lookup('http://a.source/ont.owl'))
+        self.assertIsNone(self.cache.lookup('http://a.source/ont2.owl'))
+        self.assertFalse(os.path.exists(objpath))
+
+    def test_eviction(self):
+        objpath1 = self._storeFile('http://a.source/ont1.owl', 'content 1')
+        objpath2 = self._storeFile('http://a.source/ont2.owl', 'content 2')
+
+        # Using the first file makes the second file the least recently used
+        # file, so storing a third file should evict the second file.
+        self.cache.touch(objpath1)
+        objpath3 = self._storeFile('http://a.source/ont3.owl', 'content 3')
+
+        self.assertTrue(os.path.exists(objpath1))
+        self.assertFalse(os.path.exists(objpath2))
+        self.assertTrue(os.path.exists(objpath3))
+        self.assertIsNone(self.cache.lookup('http://a.source/ont2.owl'))
+
+        # A file that is larger than the maximum size should be kept.
+        objpath4 = self._storeFile('http://a.source/ont4.owl', 'x' * 100)
+        self.assertTrue(os.path.exists(objpath4))
+        self.assertFalse(os.path.exists(objpath1))
+        self.assertFalse(os.path.exists(objpath3))
+